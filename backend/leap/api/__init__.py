@@ -1,14 +1,18 @@
 """
 FastAPI application package.
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 import logging
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
+from ..core.config import INPUT_FAST_PATH, MANIM_API_CHECK, VIDEOS_DIR
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,6 +54,41 @@ def load_env_files():
         else:
             logger.warning(f"Environment variable not found: {var}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background maintenance on startup and stop it on shutdown.
+    
+    The animation service is created in a background thread, so the server
+    accepts connections (and answers health checks) while the workflow, LLM
+    and Supabase clients load; requests that need the service wait for it.
+    """
+    from .routes.animations import get_animation_service
+    
+    stop_event = threading.Event()
+    
+    def start_services():
+        animation_service = get_animation_service()
+        # Heartbeat running jobs and resume jobs interrupted by a crash or deploy.
+        # With the job queue enabled the workers render, and expired leases take care of recovery.
+        if not animation_service.job_queue:
+            animation_service.start_recovery_loop(stop_event)
+            if MANIM_API_CHECK:
+                # This process validates generated code, so have the Manim signature index ready
+                from ..services.manim_api_service import get_manim_api_service
+                get_manim_api_service().index
+            if INPUT_FAST_PATH:
+                # This process validates questions, so have the input lexicon ready
+                from ..services.input_classifier import get_input_classifier
+                get_input_classifier()
+        # Deliver uploads, job record updates and emails recorded by finished jobs
+        animation_service.start_outbox_dispatcher(stop_event)
+    
+    threading.Thread(target=start_services, name="start-services", daemon=True).start()
+    
+    yield
+    
+    stop_event.set()
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     # Load environment variables
@@ -58,7 +97,8 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="AskLeap API",
         description="API for generating educational animations using Manim",
-        version="0.1.0"
+        version="0.1.0",
+        lifespan=lifespan
     )
     
     # Configure CORS
@@ -75,18 +115,13 @@ def create_app() -> FastAPI:
     app.include_router(animations.router, prefix="/api/animations", tags=["animations"])
     app.include_router(feedback.router, prefix="/api", tags=["feedback"])
     app.include_router(system.router, prefix="/api/system", tags=["system"])
+    app.include_router(system.metrics_router, tags=["system"])
     
-    # Serve videos directory as static files
-    videos_dir = Path(__file__).parent.parent.parent / "generated" / "media" / "videos"
-    if videos_dir.exists():
-        logger.info(f"Serving videos from: {videos_dir}")
-        app.mount("/videos", StaticFiles(directory=str(videos_dir)), name="videos")
-    else:
-        logger.warning(f"Videos directory not found at {videos_dir}")
-        # Create the directory
-        videos_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Created videos directory at: {videos_dir}")
-        app.mount("/videos", StaticFiles(directory=str(videos_dir)), name="videos")
+    # Serve rendered videos with range, ETag and cache support
+    from .routes import videos
+    VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Serving videos from: {VIDEOS_DIR}")
+    app.include_router(videos.router, prefix="/videos", tags=["videos"])
     
     # Serve frontend static files
     # Look for the frontend build directory
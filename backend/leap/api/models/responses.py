@@ -3,13 +3,28 @@ Response models for the API.
 """
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 class AnimationResponse(BaseModel):
     """Response model for animation generation."""
     job_id: str
     status: str
     created_at: datetime
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
+
+class ProgressResponse(BaseModel):
+    """Response model for the progress of a running job."""
+    stage: Optional[str] = None
+    timings: Dict[str, float] = {}
+    attempt: int = 0
+    max_attempts: int
+    animation: Optional[int] = None
+    animations_total: Optional[int] = None
+    render_percent: Optional[int] = None
+    prompt_tokens: Dict[str, Dict[str, int]] = {}
+    elapsed_seconds: Optional[float] = None
+    eta_seconds: Optional[float] = None
 
 class StatusResponse(BaseModel):
     """Response model for job status."""
@@ -19,6 +34,7 @@ class StatusResponse(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
+    progress: Optional[ProgressResponse] = None
 
 class FeedbackResponse(BaseModel):
     """Response model for feedback submission."""
@@ -2,12 +2,13 @@
 API routes package.
 """
 from fastapi import APIRouter
-from . import animations, feedback, system
+from . import animations, feedback, system, videos
 
 # Create a combined router
 router = APIRouter()
 router.include_router(animations.router, prefix="/api/animations", tags=["animations"])
 router.include_router(feedback.router, prefix="/api", tags=["feedback"])
 router.include_router(system.router, prefix="/api/system", tags=["system"])
+router.include_router(videos.router, prefix="/videos", tags=["videos"])
 
-__all__ = ["animations", "feedback", "system", "router"]
+__all__ = ["animations", "feedback", "system", "videos", "router"]
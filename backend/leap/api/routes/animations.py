@@ -1,46 +1,111 @@
 """
 Animation generation routes.
 """
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Response
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import asyncio
+import json
 import logging
+import threading
 from uuid import UUID
-from pathlib import Path
-import os
+from urllib.parse import urlparse
 
 from ..models.requests import AnimationRequest
 from ..models.responses import AnimationResponse, StatusResponse
-from ..services.animation import AnimationService
-from ...services.storage_service import StorageService
+from .videos import serve_video
+from ...core import metrics
+from ...core.config import EVENT_KEEPALIVE_INTERVAL
 
 router = APIRouter()
-animation_service = AnimationService()
-storage_service = StorageService()
 logger = logging.getLogger(__name__)
 
+_animation_service = None
+_animation_service_lock = threading.Lock()
+
+def get_animation_service():
+    """Return the animation service, creating it on first use.
+    
+    Creating it imports the workflow, the LLM client and Supabase, so it is
+    deferred until the app starts instead of happening on import.
+    """
+    global _animation_service
+    if _animation_service is None:
+        with _animation_service_lock:
+            if _animation_service is None:
+                from ..services.animation import AnimationService
+                _animation_service = AnimationService()
+    return _animation_service
+
+def __getattr__(name):
+    if name == "animation_service":
+        return get_animation_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _client_key(request: AnimationRequest, http_request: Request) -> Optional[str]:
+    """Identify the client for rate limits and fair sharing of render slots: the email, else the caller's IP.
+    
+    Behind our proxy the caller's IP is the last ``X-Forwarded-For`` entry,
+    the one the proxy appended; the entries before it come from the client
+    and can be spoofed.
+    """
+    if request.email:
+        return f"email:{request.email.lower()}"
+    forwarded = http_request.headers.get("x-forwarded-for")
+    if forwarded and forwarded.split(",")[-1].strip():
+        return f"ip:{forwarded.split(',')[-1].strip()}"
+    return f"ip:{http_request.client.host}" if http_request.client else None
+
 @router.post("/generate", response_model=AnimationResponse)
 async def generate_animation(
     request: AnimationRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    http_request: Request,
+    animation_service=Depends(get_animation_service)
 ):
-    """Generate an animation based on the provided prompt."""
+    """Generate an animation based on the provided prompt.
+    
+    Responds with 429 and a ``Retry-After`` header when the backlog is too
+    deep or the client has made too many requests.
+    """
+    logger.info(f"Received animation request: prompt='{request.prompt}', level='{request.level}', email='{request.email}'")
+    
+    client_key = _client_key(request, http_request)
+    decision = animation_service.admission.admit(client_key)
+    if not decision.admitted:
+        metrics.ADMISSION_REJECTIONS.inc(reason=decision.reason)
+        raise HTTPException(
+            status_code=429,
+            detail=decision.reason,
+            headers={"Retry-After": decision.retry_after_header()}
+        )
+    
     try:
-        logger.info(f"Received animation request: prompt='{request.prompt}', level='{request.level}', email='{request.email}'")
-        
         # Create job and get response data
         response_data = await animation_service.create_job(request)
+        response_data.update(queue_position=decision.queue_position, eta_seconds=decision.eta_seconds)
         logger.info(f"Created job with ID: {response_data['job_id']}")
         
-        # Add background task
-        background_tasks.add_task(
-            animation_service.process_job,
-            job_id=UUID(response_data["job_id"]),
-            prompt=request.prompt,
-            level=request.level,
-            email=request.email
-        )
-        logger.info(f"Added background task to process job: {response_data['job_id']}")
+        if animation_service.job_queue:
+            # Render workers pick the job up from the durable queue
+            animation_service.enqueue_job(
+                job_id=UUID(response_data["job_id"]),
+                prompt=request.prompt,
+                level=request.level,
+                email=request.email,
+                tenant=client_key
+            )
+            logger.info(f"Enqueued job for the render workers: {response_data['job_id']}")
+        else:
+            # Add background task
+            background_tasks.add_task(
+                animation_service.process_job,
+                job_id=UUID(response_data["job_id"]),
+                prompt=request.prompt,
+                level=request.level,
+                email=request.email
+            )
+            logger.info(f"Added background task to process job: {response_data['job_id']}")
         
         return AnimationResponse(**response_data)
     except Exception as e:
@@ -48,7 +113,7 @@ async def generate_animation(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/status/{job_id}", response_model=StatusResponse)
-async def get_status(job_id: UUID):
+async def get_status(job_id: UUID, animation_service=Depends(get_animation_service)):
     """Get the status of an animation job."""
     try:
         logger.info(f"Checking status for job: {job_id}")
@@ -62,50 +127,136 @@ async def get_status(job_id: UUID):
         logger.error(f"Error getting job status: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/animations/download/{job_id}")
-async def download_animation(job_id: str):
-    """Download an animation video file."""
+async def _with_keepalive(events: AsyncIterator, interval: float) -> AsyncIterator:
+    """Yield items from ``events``, or None whenever the stream is idle for ``interval`` seconds."""
+    iterator = events.__aiter__()
+    next_item = asyncio.ensure_future(iterator.__anext__())
     try:
-        # Get the animation from the database
-        animation = await animation_service.get_animation(job_id)
-        
-        if not animation:
-            raise HTTPException(status_code=404, detail="Animation not found")
-        
-        if animation.status != "completed":
-            raise HTTPException(status_code=400, detail="Animation is not ready for download")
-        
-        video_url = animation.video_url
-        
-        if not video_url:
-            raise HTTPException(status_code=404, detail="Video file not found")
-        
-        # If it's a Supabase URL, we need to redirect to it
-        if "supabase" in video_url:
-            return {"download_url": video_url}
-        
-        # For local files, extract the path and serve the file
-        # URL format is like: http://localhost:8000/videos/480p15/PendulumExplanationScene.mp4
-        if "/videos/" in video_url:
-            # Extract the relative path from the URL
-            path_parts = video_url.split("/videos/")
-            if len(path_parts) > 1:
-                relative_path = path_parts[1]
-                # Get the local storage path from the storage service
-                local_storage_path = storage_service.local_storage_path
-                file_path = Path(local_storage_path) / relative_path
-                
-                if file_path.exists():
-                    # Get the filename for the Content-Disposition header
-                    filename = file_path.name
-                    return FileResponse(
-                        path=str(file_path),
-                        filename=filename,
-                        media_type="video/mp4"
-                    )
-        
-        # If we get here, we couldn't find the file
+        while True:
+            done, _ = await asyncio.wait({next_item}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            try:
+                item = next_item.result()
+            except StopAsyncIteration:
+                return
+            yield item
+            next_item = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        next_item.cancel()
+
+@router.get("/events/{job_id}")
+async def stream_events(
+    job_id: UUID,
+    request: Request,
+    cancel_on_disconnect: bool = False,
+    animation_service=Depends(get_animation_service)
+):
+    """Stream job progress as server-sent events until the job finishes.
+    
+    With ``cancel_on_disconnect`` (interactive clients) the job is cancelled
+    when the client goes away and does not reconnect within the grace period.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    try:
+        events = await animation_service.open_event_stream(
+            job_id, int(last_event_id) if last_event_id.isdigit() else None
+        )
+    except ValueError as e:
+        logger.error(f"Job not found: {job_id}")
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    async def sse():
+        finished = False
+        if cancel_on_disconnect:
+            animation_service.watcher_connected(job_id)
+        try:
+            yield "retry: 3000\n\n"
+            async for item in _with_keepalive(events, EVENT_KEEPALIVE_INTERVAL):
+                if item is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                event_id, event_type, data = item
+                message = f"id: {event_id}\n" if event_id is not None else ""
+                yield message + f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+            finished = True
+        finally:
+            if cancel_on_disconnect:
+                asyncio.ensure_future(animation_service.watcher_disconnected(job_id, abandoned=not finished))
+    
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events reach the browser immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws/{job_id}")
+async def job_events_websocket(
+    websocket: WebSocket,
+    job_id: UUID,
+    cancel_on_disconnect: bool = False,
+    animation_service=Depends(get_animation_service)
+):
+    """Stream job progress over a WebSocket until the job finishes."""
+    await websocket.accept()
+    try:
+        events = await animation_service.open_event_stream(job_id)
+    except ValueError as e:
+        await websocket.close(code=4404, reason=str(e))
+        return
+    
+    finished = False
+    if cancel_on_disconnect:
+        animation_service.watcher_connected(job_id)
+    try:
+        async for item in _with_keepalive(events, EVENT_KEEPALIVE_INTERVAL):
+            if item is None:
+                await websocket.send_json({"event": "keep-alive"})
+                continue
+            event_id, event_type, data = item
+            await websocket.send_json({"id": event_id, "event": event_type, "data": data})
+        finished = True
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info(f"Event WebSocket for job {job_id} disconnected")
+    finally:
+        if cancel_on_disconnect:
+            asyncio.ensure_future(animation_service.watcher_disconnected(job_id, abandoned=not finished))
+
+@router.delete("/{job_id}", response_model=StatusResponse)
+async def cancel_animation(job_id: UUID, response: Response, animation_service=Depends(get_animation_service)):
+    """Cancel a job, stopping its LLM calls and render and freeing its slot.
+    
+    Responds with 409 and the final status if the job had already finished.
+    """
+    try:
+        status, cancelled = animation_service.cancel_job(job_id)
+    except ValueError as e:
+        logger.error(f"Job not found: {job_id}")
+        raise HTTPException(status_code=404, detail=str(e))
+    if not cancelled:
+        response.status_code = 409
+    return status
+
+@router.get("/download/{job_id}")
+async def download_animation(job_id: UUID, request: Request, animation_service=Depends(get_animation_service)):
+    """Download an animation video file."""
+    job = animation_service.job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Animation not found")
+    
+    if job.status != "completed":
+        raise HTTPException(status_code=400, detail="Animation is not ready for download")
+    
+    if not job.video_url:
         raise HTTPException(status_code=404, detail="Video file not found")
-    except Exception as e:
-        logger.error(f"Error downloading animation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Remote storage URLs are downloaded from the storage provider directly
+    path = urlparse(job.video_url).path
+    if not path.startswith("/videos/"):
+        return {"download_url": job.video_url}
+    
+    relative_path = path[len("/videos/"):]
+    return await serve_video(request, relative_path, filename=f"askleap-animation-{job_id}.mp4")
@@ -1,7 +1,8 @@
 """
 Feedback routes.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from functools import lru_cache
 from uuid import UUID
 
 from ..models.requests import FeedbackRequest
@@ -9,10 +10,14 @@ from ..models.responses import FeedbackResponse
 from ..services.feedback import FeedbackService
 
 router = APIRouter()
-feedback_service = FeedbackService()
+
+@lru_cache(maxsize=1)
+def get_feedback_service() -> FeedbackService:
+    """Return the feedback service, creating its Supabase client on first use."""
+    return FeedbackService()
 
 @router.post("/feedback", response_model=FeedbackResponse)
-async def submit_feedback(request: FeedbackRequest):
+async def submit_feedback(request: FeedbackRequest, feedback_service: FeedbackService = Depends(get_feedback_service)):
     """Submit feedback for an animation."""
     try:
         result = await feedback_service.submit_feedback(request)
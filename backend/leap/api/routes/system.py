@@ -2,9 +2,12 @@
 System health and status routes.
 """
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from ..models.responses import HealthResponse
+from ...core import metrics
 
 router = APIRouter()
+metrics_router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -13,3 +16,8 @@ async def health_check():
         status="ok",
         version="0.1.0"
     )
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose pipeline, render, queue, cache and upload metrics for Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,112 @@
+"""
+Video delivery routes.
+
+Serves rendered videos from local storage with byte-range support for seeking,
+strong ETags derived from the file contents, and long-lived immutable caching
+for versioned (``?v=<hash>``) URLs.
+"""
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pathlib import Path
+from starlette.datastructures import Headers
+from typing import Optional
+import logging
+import os
+
+from ...core.config import VIDEOS_DIR
+from ...services.storage_service import file_content_hash, CONTENT_VERSION_LENGTH
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class VideoFileResponse(FileResponse):
+    """File response tuned for large media files.
+
+    Reads in 1 MiB chunks instead of 64 KiB. When the ASGI server advertises
+    the ``pathsend`` extension, a whole-file GET is handed to the server to
+    send instead of being streamed through Python; range and HEAD requests
+    are left to ``FileResponse``.
+    """
+    chunk_size = 1024 * 1024
+
+    async def __call__(self, scope, receive, send):
+        extensions = scope.get("extensions") or {}
+        whole_file = scope["method"].upper() == "GET" and "range" not in Headers(scope=scope)
+        if not whole_file or "http.response.pathsend" not in extensions:
+            await super().__call__(scope, receive, send)
+            return
+        self.set_stat_headers(self.stat_result or await run_in_threadpool(os.stat, self.path))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": str(self.path)})
+        if self.background is not None:
+            await self.background()
+
+
+def resolve_video_path(relative_path: str) -> Path:
+    """Resolve a path under the videos directory, rejecting anything outside it.
+
+    Raises:
+        HTTPException: 404 if the path escapes the videos directory or is not a file
+    """
+    root = VIDEOS_DIR.resolve()
+    path = (root / relative_path).resolve()
+    if not path.is_relative_to(root) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Video file not found")
+    return path
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def serve_video(
+    request: Request,
+    relative_path: str,
+    filename: Optional[str] = None
+) -> Response:
+    """Serve a video from local storage.
+
+    Args:
+        request: The incoming request (for conditional and range headers)
+        relative_path: Path of the video relative to the videos directory
+        filename: If set, the video is sent as an attachment with this name
+
+    Returns:
+        A 304 response if the client's copy is current, otherwise the (partial) file
+    """
+    path = resolve_video_path(relative_path)
+    digest = await run_in_threadpool(file_content_hash, path)
+    etag = f'"{digest}"'
+
+    # Versioned URLs never change content, so browsers and CDNs may cache them forever
+    version = request.query_params.get("v")
+    versioned = version is not None and digest.startswith(version) and len(version) >= CONTENT_VERSION_LENGTH
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if versioned else REVALIDATE_CACHE_CONTROL,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    return VideoFileResponse(
+        path,
+        media_type="video/mp4" if path.suffix == ".mp4" else None,
+        headers=headers,
+        filename=filename,
+        content_disposition_type="attachment" if filename else "inline"
+    )
+
+
+@router.api_route("/{relative_path:path}", methods=["GET", "HEAD"])
+async def get_video(relative_path: str, request: Request):
+    """Serve a rendered video with range, ETag and caching support."""
+    return await serve_video(request, relative_path)
@@ -1,42 +1,85 @@
 """
 Animation service for handling animation generation.
 """
+import asyncio
 import uuid
+import threading
 from datetime import datetime
-from typing import Optional, Dict
-from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Dict, List, Tuple
 from pathlib import Path
 import os
 import logging
 
-from ...workflow import workflow
 from ...workflow.state import GraphState
+from ...workflow.utils import summarize_state
+from ...workflow.checkpoints import (
+    thread_config,
+    prune_thread,
+    get_checkpointer,
+    get_checkpointed_workflow,
+    get_run_registry,
+)
+from ...core import metrics
+from ...core.config import (
+    CANCEL_ON_DISCONNECT_GRACE,
+    CHECKPOINT_HEARTBEAT_INTERVAL,
+    CHECKPOINT_STALE_AFTER,
+    JOB_QUEUE_ENABLED,
+    RENDERING_QUALITY,
+)
 from ..models.requests import AnimationRequest
 from ..models.responses import StatusResponse
 from ...services.supabase_service import SupabaseService
 from ...services.email_service import EmailService
 from ...services.storage_service import StorageService
+from ...services.job_queue import JobQueue, DEAD
+from ...services.job_store import Job, get_job_store
+from ...services.event_bus import TERMINAL_STATUSES, get_event_bus
+from ...services.job_progress import ProgressTracker, progress_snapshot, tracking
+from ...services.outbox import Outbox, OutboxDispatcher
+from ...services.cancellation import CANCEL_EVENT, JobCancelled, cancel_local, cancel_requested, cancellable
+from ...services.scheduling import priority_class, quality_class
+from ...services.admission import AdmissionController, RateLimiter, active_job_count, measured_service_time
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class Job:
-    """Represents an animation job."""
-    id: uuid.UUID
-    created_at: datetime
-    status: str = "pending"
-    video_url: Optional[str] = None
-    completed_at: Optional[datetime] = None
-    error: Optional[str] = None
-
 class AnimationService:
     """Service for handling animation generation."""
     
     def __init__(self):
-        self.jobs: Dict[uuid.UUID, Job] = {}
+        self.job_store = get_job_store()
+        self.event_bus = get_event_bus()
         self.supabase = SupabaseService()
         self.email_service = EmailService()
         self.storage_service = StorageService()
+        self.workflow = get_checkpointed_workflow()
+        self.run_registry = get_run_registry()
+        self.job_queue = JobQueue() if JOB_QUEUE_ENABLED else None
+        self.outbox = Outbox()
+        self.outbox_dispatcher = OutboxDispatcher(self.outbox, {
+            "upload": self._upload_video,
+            "job_status": self._sync_job_status,
+            "email": self._send_ready_email,
+        })
+        self.admission = AdmissionController(
+            backlog=self.job_queue.depth if self.job_queue else lambda: active_job_count(self.job_store),
+            service_time=lambda: measured_service_time(self.job_store),
+            rate_limiter=RateLimiter(self.job_store)
+        )
+        # Interactive clients following each job in this process
+        self.watchers: Dict[str, int] = {}
+        self.watchers_lock = threading.Lock()
+        metrics.register_collector("animation_service", self._collect_metrics)
+    
+    def _collect_metrics(self):
+        """Refresh the queue and outbox gauges before a metrics scrape."""
+        if self.job_queue:
+            metrics.QUEUE_JOBS.clear()
+            for status, count in self.job_queue.counts().items():
+                metrics.QUEUE_JOBS.set(count, status=status)
+        metrics.OUTBOX_MESSAGES.clear()
+        for status, count in self.outbox.counts().items():
+            metrics.OUTBOX_MESSAGES.set(count, status=status)
     
     async def create_job(self, request: AnimationRequest) -> Dict:
         """Create a new animation job and return response data."""
@@ -53,7 +96,7 @@ class AnimationService:
             created_at=datetime.utcnow(),
             status="pending"
         )
-        self.jobs[job_id] = job
+        self._update_job(job)
         
         # Return data in the format expected by AnimationResponse
         return {
@@ -64,7 +107,7 @@ class AnimationService:
     
     async def get_status(self, job_id: uuid.UUID) -> StatusResponse:
         """Get the status of a job."""
-        job = self.jobs.get(job_id)
+        job = self.job_store.get(job_id)
         if not job:
             # Try to get from Supabase
             supabase_job = self.supabase.get_job(str(job_id))
@@ -80,103 +123,494 @@ class AnimationService:
                 completed_at=datetime.fromisoformat(supabase_job["completed_at"].replace("Z", "+00:00")) if supabase_job.get("completed_at") else None,
                 error=supabase_job.get("error")
             )
-            self.jobs[job_id] = job
+        elif self.job_queue and job.status not in ("completed", "failed"):
+            # Jobs whose worker kept dying are dead-lettered by the queue itself
+            item = self.job_queue.get(str(job_id))
+            if item and item.status == DEAD:
+                self.mark_failed(job_id, item.last_error or "Job could not be processed")
+                job = self.job_store.get(job_id)
             
-        return StatusResponse(
-            job_id=str(job.id),
-            status=job.status,
-            video_url=job.video_url,
-            created_at=job.created_at,
-            completed_at=job.completed_at,
-            error=job.error
+        return self._status_response(job)
+    
+    async def open_event_stream(
+        self,
+        job_id: uuid.UUID,
+        last_event_id: Optional[int] = None
+    ) -> AsyncIterator[Tuple[Optional[int], str, Dict]]:
+        """Open a stream of a job's events.
+        
+        The stream starts with the job's current status, then yields live events
+        until the job completes or fails.
+        
+        Args:
+            job_id: The job to follow
+            last_event_id: ID of the last event a reconnecting client received
+            
+        Returns:
+            An async iterator of (event ID, event type, data) tuples
+            
+        Raises:
+            ValueError: If the job does not exist
+        """
+        # Read the position before the snapshot so no event falls in between
+        after = last_event_id if last_event_id is not None else self.job_store.last_event_seq(job_id)
+        status = await self.get_status(job_id)
+        
+        async def events():
+            yield None, "status", status.model_dump(mode="json")
+            if status.status in TERMINAL_STATUSES:
+                return
+            async for event in self.event_bus.subscribe(job_id, after):
+                yield event.seq, event.type, event.data
+        
+        return events()
+    
+    def watcher_connected(self, job_id: uuid.UUID):
+        """Record an interactive client following a job."""
+        with self.watchers_lock:
+            self.watchers[str(job_id)] = self.watchers.get(str(job_id), 0) + 1
+    
+    async def watcher_disconnected(self, job_id: uuid.UUID, abandoned: bool):
+        """Record an interactive client going away, cancelling the job if nobody comes back.
+        
+        Args:
+            job_id: The job the client was following
+            abandoned: False if the stream ended because the job finished
+        """
+        key = str(job_id)
+        with self.watchers_lock:
+            remaining = self.watchers.get(key, 1) - 1
+            if remaining > 0:
+                self.watchers[key] = remaining
+            else:
+                self.watchers.pop(key, None)
+        if not abandoned or remaining > 0:
+            return
+        
+        # Give a reloading page or a flaky connection time to reconnect
+        await asyncio.sleep(CANCEL_ON_DISCONNECT_GRACE)
+        with self.watchers_lock:
+            if self.watchers.get(key):
+                return
+        try:
+            _, cancelled = self.cancel_job(job_id)
+            if cancelled:
+                logger.info(f"Cancelled job {job_id} after its client disconnected")
+        except ValueError:
+            pass
+    
+    def enqueue_job(
+        self,
+        job_id: uuid.UUID,
+        prompt: str,
+        level: str,
+        email: Optional[str] = None,
+        tenant: Optional[str] = None
+    ):
+        """Hand a job to the render workers through the durable queue.
+        
+        Args:
+            tenant: Who the job is for (email or IP), so render slots are shared fairly
+        """
+        self.job_queue.enqueue(
+            str(job_id),
+            {"prompt": prompt, "level": level, "email": email},
+            priority_class=priority_class(email),
+            quality_class=quality_class(RENDERING_QUALITY),
+            tenant=tenant
         )
     
-    async def process_job(
+    def process_job(
         self,
         job_id: uuid.UUID,
         prompt: str,
         level: str,
         email: Optional[str] = None
     ):
-        """Process an animation job."""
-        job = self.jobs.get(job_id)
+        """Process an animation job.
+        
+        The workflow blocks for minutes on LLM calls and rendering, so this is
+        a plain function: run as a background task it gets a threadpool thread
+        and the event loop keeps serving other requests meanwhile.
+        """
+        job = self.job_store.get(job_id)
         if not job:
             raise ValueError(f"Job {job_id} not found")
+        if job.status == "cancelled":
+            logger.info(f"Job {job_id} was cancelled before it started")
+            return
             
-        try:
-            # Create a simple test state
-            state = GraphState(
-                user_input=prompt,
-                rendering_quality="low",
-                duration_detail="brief",
-                user_level=level,
-                voice_model="nova"
-            )
+        state = self._build_state(job_id, prompt, level, email)
+        
+        logger.info("Starting workflow execution...")
+        logger.info("State: %s", summarize_state(state))
+        
+        self._run_workflow(job, state, email)
+    
+    def run_job(
+        self,
+        job_id: uuid.UUID,
+        prompt: str,
+        level: str,
+        email: Optional[str] = None
+    ):
+        """Process a job leased from the queue in a render worker.
+        
+        A job retried after its previous worker died, or after an LLM outage,
+        continues from its last checkpoint instead of starting over.
+        
+        Raises:
+            Exception: A retryable error (see ``is_retryable_error``), so the
+                worker returns the job to the queue with backoff
+        """
+        if cancel_requested(self.job_store, job_id):
+            logger.info(f"Job {job_id} was cancelled before it started")
+            self._finish_run(job_id)
+            return
+        
+        snapshot = self.workflow.get_state(thread_config(job_id)) if get_checkpointer() else None
+        if snapshot is not None and snapshot.next:
+            self.resume_job(job_id, requeue_retryable=True)
+            return
+        
+        job = self.job_store.get(job_id)
+        if not job:
+            job = Job(id=job_id, created_at=datetime.utcnow(), status="pending")
+        
+        logger.info(f"Worker starting workflow execution for job {job_id}")
+        self._run_workflow(job, self._build_state(job_id, prompt, level, email), email, requeue_retryable=True)
+    
+    def cancel_job(self, job_id: uuid.UUID) -> Tuple[StatusResponse, bool]:
+        """Cancel a job and tear down whatever it is running.
+        
+        The cancellation is recorded with the job, so a queued job is never
+        started and a running job is stopped by whichever process runs it:
+        immediately in this process, within a poll interval elsewhere.
+        
+        Returns:
+            The job's status and whether it was cancelled (False if it had already finished)
             
-            logger.info("Starting workflow execution...")
-            logger.info(f"State: {state}")
+        Raises:
+            ValueError: If the job does not exist
+        """
+        job = self.job_store.get(job_id)
+        if not job:
+            raise ValueError(f"Job {job_id} not found")
+        if job.status in TERMINAL_STATUSES:
+            return self._status_response(job), False
+        
+        logger.info(f"Cancelling job {job_id}")
+        self.event_bus.publish(job_id, CANCEL_EVENT, {})
+        job.status = "cancelled"
+        job.error = "Cancelled"
+        job.completed_at = datetime.utcnow()
+        self._update_job(job)
+        # Free the queue slot of a job no worker has picked up yet
+        if self.job_queue:
+            self.job_queue.cancel(str(job_id))
+        cancel_local(job_id)
+        self._record_status(job_id, "cancelled")
+        return self._status_response(job), True
+    
+    def mark_failed(self, job_id: uuid.UUID, error: str):
+        """Record a job that the workers gave up on."""
+        job = self.job_store.get(job_id) or Job(id=job_id, created_at=datetime.utcnow())
+        job.status = "failed"
+        job.error = error
+        self._update_job(job)
+        self._record_status(job_id, "failed", error=error)
+        self._finish_run(job_id)
+    
+    def _build_state(
+        self,
+        job_id: uuid.UUID,
+        prompt: str,
+        level: str,
+        email: Optional[str]
+    ) -> GraphState:
+        """Build the initial workflow state for a job."""
+        return GraphState(
+            user_input=prompt,
+            rendering_quality=RENDERING_QUALITY,
+            duration_detail="brief",
+            user_level=level,
+            voice_model="nova",
+            email=email,
+            job_id=str(job_id)
+        )
+    
+    def resume_job(self, job_id: uuid.UUID, requeue_retryable: bool = False):
+        """Resume an interrupted job from its last checkpoint.
+        
+        Args:
+            job_id: The job to resume
+            requeue_retryable: Raise retryable errors instead of failing the job
+        """
+        snapshot = self.workflow.get_state(thread_config(job_id))
+        values = snapshot.values or {}
+        if not snapshot.next:
+            logger.info(f"Job {job_id} has no pending nodes, nothing to resume")
+            if self.run_registry:
+                self.run_registry.finish(job_id)
+            return
+        
+        job = self.job_store.get(job_id)
+        if not job:
+            job = Job(id=job_id, created_at=datetime.utcnow(), status="pending")
+        if job.status == "cancelled":
+            logger.info(f"Job {job_id} was cancelled, not resuming it")
+            self._finish_run(job_id)
+            return
+        
+        logger.info(f"Resuming job {job_id} at node(s): {', '.join(snapshot.next)}")
+        # Passing None as the input continues the thread from its last checkpoint
+        self._run_workflow(job, None, values.get("email"), requeue_retryable=requeue_retryable)
+    
+    def recover_jobs(self) -> List[uuid.UUID]:
+        """Claim unfinished jobs whose owner stopped sending heartbeats.
+        
+        Returns:
+            The IDs of the jobs claimed by this process; the caller resumes them
+        """
+        if not self.run_registry:
+            return []
+        claimed = [uuid.UUID(job_id) for job_id in self.run_registry.claim_stale(CHECKPOINT_STALE_AFTER)]
+        if claimed:
+            logger.info(f"Recovered {len(claimed)} interrupted job(s): {', '.join(map(str, claimed))}")
+        return claimed
+    
+    def start_recovery_loop(self, stop_event: threading.Event) -> Optional[threading.Thread]:
+        """Start the background heartbeat and recovery sweep.
+        
+        Keeps this process's running jobs alive in the run registry and resumes
+        jobs orphaned by a crashed or restarted replica.
+        """
+        if not self.run_registry:
+            return None
+        
+        def loop():
+            while True:
+                try:
+                    self.run_registry.touch_owned()
+                    for job_id in self.recover_jobs():
+                        threading.Thread(
+                            target=self.resume_job, args=(job_id,), name=f"resume-{job_id}", daemon=True
+                        ).start()
+                except Exception as e:
+                    logger.error(f"Error in job recovery sweep: {str(e)}", exc_info=True)
+                if stop_event.wait(CHECKPOINT_HEARTBEAT_INTERVAL):
+                    return
+        
+        thread = threading.Thread(target=loop, name="job-recovery", daemon=True)
+        thread.start()
+        return thread
+    
+    def _run_workflow(
+        self,
+        job: Job,
+        state: Optional[GraphState],
+        email: Optional[str],
+        requeue_retryable: bool = False
+    ):
+        """Run (or resume) the workflow for a job and record the outcome.
+        
+        Args:
+            job: The job to run
+            state: Initial workflow state, or None to continue from the last checkpoint
+            email: Address to notify when the video is ready
+            requeue_retryable: Raise retryable errors, keeping the checkpoints, so
+                the render worker retries the job instead of it being failed
+        """
+        job_id = job.id
+        requeued = False
+        metrics.JOBS_IN_FLIGHT.inc()
+        try:
+            if self.run_registry:
+                self.run_registry.start(job_id)
+            job.status = "processing"
+            self._update_job(job)
             
-            # Execute workflow
-            result = workflow.invoke(state)
-            logger.info(f"Workflow result: {result}")
+            # Execute workflow, tracking when each node starts and finishes.
+            # Cancelling the job aborts the LLM call or render in flight and stops before the next node.
+            result = {}
+            with cancellable(job_id, self.job_store) as token, \
+                    tracking(ProgressTracker(job, self.job_store, self.event_bus)) as tracker:
+                from ...workflow.graph import RECURSION_LIMIT
+                config = {**thread_config(job_id), "recursion_limit": RECURSION_LIMIT}
+                for mode, chunk in self.workflow.stream(state, config, stream_mode=["debug", "values"]):
+                    token.raise_if_cancelled()
+                    if mode == "values":
+                        result = chunk
+                    elif chunk["type"] == "task":
+                        tracker.node_started(chunk["payload"]["name"], chunk["payload"].get("input"))
+                    elif chunk["type"] == "task_result":
+                        tracker.node_finished(chunk["payload"]["name"])
+                token.raise_if_cancelled()
+            logger.info("Workflow result: %s", summarize_state(result))
+            metrics.CORRECTION_ATTEMPTS.observe(result.get("correction_attempts", 0) or 0)
             
             if result.get("error"):
                 job.status = "failed"
                 job.error = result["error"]
                 logger.error(f"Job failed: {result['error']}")
-                
-                # Update Supabase
-                self.supabase.update_job_status(
-                    str(job_id),
-                    "failed",
-                    error=result["error"]
-                )
+                self._update_job(job)
+                self._record_status(job_id, "failed", error=result["error"])
             else:
-                job.status = "completed"
                 # Get the output file from the execution result
                 execution_result = result.get("execution_result", {})
                 local_video_path = execution_result.get("output_file")
+                rendered = bool(local_video_path and Path(local_video_path).exists())
                 
-                if local_video_path and Path(local_video_path).exists():
+                # The job is complete as soon as it is playable from local storage;
+                # the upload to remote storage and notifications follow through the outbox
+                job.status = "completed"
+                if rendered:
                     logger.info(f"Video file exists locally at: {local_video_path}")
-                    
-                    # Upload to storage and get public URL
                     try:
-                        public_url = self.storage_service.get_file_url(local_video_path)
-                        logger.info(f"Video file uploaded to storage: {public_url}")
-                        job.video_url = public_url
+                        job.video_url = self.storage_service.get_local_url(local_video_path)
                     except Exception as e:
-                        logger.error(f"Error uploading video to storage: {str(e)}")
+                        logger.error(f"Error copying video to local storage: {str(e)}")
                         job.video_url = local_video_path  # Fallback to local path
                 else:
                     logger.error(f"Warning: Video file not found at: {local_video_path}")
                     job.video_url = local_video_path  # Keep the path for debugging
                 
                 job.completed_at = datetime.utcnow()
+                self._update_job(job)
                 
-                # Update Supabase
-                self.supabase.update_job_status(
-                    str(job_id),
-                    "completed",
-                    video_url=job.video_url
-                )
-                
-                # Send email notification if email is provided
-                if email and job.video_url:
-                    self.email_service.send_animation_ready_notification(
-                        email=email,
-                        job_id=str(job_id),
-                        video_url=job.video_url
+                if rendered and self.storage_service.use_supabase:
+                    self.outbox.add(
+                        "upload",
+                        f"{job_id}:upload",
+                        {"job_id": str(job_id), "path": local_video_path, "email": email}
                     )
+                    self.outbox_dispatcher.notify()
+                else:
+                    self._record_completion(job_id, job.video_url, email)
+            
+            self._finish_run(job_id)
+        
+        except JobCancelled:
+            logger.info(f"Job {job_id} stopped after cancellation")
+            job.status = "cancelled"
+            job.error = "Cancelled"
+            job.completed_at = datetime.utcnow()
+            self._update_job(job)
+            self._finish_run(job_id)
                 
         except Exception as e:
+            from ...services.llm_service import is_retryable_error
+            if requeue_retryable and is_retryable_error(e):
+                logger.warning(f"Job {job_id} hit a retryable error, returning it to the queue: {str(e)}")
+                requeued = True
+                job.status = "pending"
+                self._update_job(job)
+                raise
             job.status = "failed"
             job.error = str(e)
             logger.error(f"Error processing job: {str(e)}", exc_info=True)
-            
-            # Update Supabase
-            self.supabase.update_job_status(
-                str(job_id),
-                "failed",
-                error=str(e)
+            self._update_job(job)
+            self._record_status(job_id, "failed", error=str(e))
+            self._finish_run(job_id)
+        
+        finally:
+            metrics.JOBS_IN_FLIGHT.dec()
+            if not requeued:
+                metrics.JOBS_FINISHED.inc(status=job.status)
+    
+    def start_outbox_dispatcher(self, stop_event: threading.Event) -> threading.Thread:
+        """Start delivering uploads, job record updates and emails in the background."""
+        return self.outbox_dispatcher.start(stop_event)
+    
+    def _record_status(
+        self,
+        job_id: uuid.UUID,
+        status: str,
+        video_url: Optional[str] = None,
+        error: Optional[str] = None
+    ):
+        """Queue an update of the Supabase job record."""
+        self.outbox.add(
+            "job_status",
+            f"{job_id}:status:{status}",
+            {"job_id": str(job_id), "status": status, "video_url": video_url, "error": error}
+        )
+        self.outbox_dispatcher.notify()
+    
+    def _record_completion(self, job_id: uuid.UUID, video_url: Optional[str], email: Optional[str]):
+        """Queue the job record update and the email for a completed job."""
+        self._record_status(job_id, "completed", video_url=video_url)
+        if email and video_url:
+            self.outbox.add(
+                "email",
+                f"{job_id}:email:ready",
+                {"job_id": str(job_id), "email": email, "video_url": video_url}
             )
+            self.outbox_dispatcher.notify()
+    
+    def _upload_video(self, payload: Dict):
+        """Outbox handler: upload a finished video and switch the job to the remote URL."""
+        job_id = uuid.UUID(payload["job_id"])
+        public_url = self.storage_service.get_file_url(payload["path"])
+        logger.info(f"Video file uploaded to storage: {public_url}")
+        
+        job = self.job_store.get(job_id)
+        if job and job.video_url != public_url:
+            job.video_url = public_url
+            self._update_job(job)
+        self._record_completion(job_id, public_url, payload.get("email"))
+    
+    def _sync_job_status(self, payload: Dict):
+        """Outbox handler: write a job's status to Supabase."""
+        self.supabase.update_job_status(
+            payload["job_id"],
+            payload["status"],
+            video_url=payload.get("video_url"),
+            error=payload.get("error")
+        )
+    
+    def _send_ready_email(self, payload: Dict):
+        """Outbox handler: tell the user their animation is ready."""
+        sent = self.email_service.send_animation_ready_notification(
+            email=payload["email"],
+            job_id=payload["job_id"],
+            video_url=payload["video_url"]
+        )
+        # Without a configured client there is nothing to retry
+        if not sent and self.email_service.client:
+            raise RuntimeError("Email notification could not be sent")
+    
+    def _update_job(self, job: Job):
+        """Save a job and publish its new status to subscribers."""
+        self.job_store.save(job)
+        self.event_bus.publish(job.id, "status", self.status_payload(job))
+    
+    def status_payload(self, job: Job) -> Dict:
+        """Return the JSON-serializable status of a job, as sent to clients."""
+        return self._status_response(job).model_dump(mode="json")
+    
+    def _status_response(self, job: Job) -> StatusResponse:
+        # Progress of a finished job is frozen; a running job's elapsed time and ETA are recomputed
+        if job.status in TERMINAL_STATUSES:
+            progress = {key: value for key, value in (job.progress or {}).items() if key != "eta_seconds"} or None
+        else:
+            progress = progress_snapshot(job.progress)
+        return StatusResponse(
+            job_id=str(job.id),
+            status=job.status,
+            video_url=job.video_url,
+            created_at=job.created_at,
+            completed_at=job.completed_at,
+            error=job.error,
+            progress=progress
+        )
+    
+    def _finish_run(self, job_id: uuid.UUID):
+        """Mark a run finished and drop its checkpoints."""
+        if not self.run_registry:
+            return
+        try:
+            self.run_registry.finish(job_id)
+            prune_thread(get_checkpointer(), job_id)
+        except Exception as e:
+            logger.error(f"Error cleaning up checkpoints for job {job_id}: {str(e)}")
@@ -2,8 +2,6 @@ from pathlib import Path
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-from manim import *  # Import Manim's color constants
-from pydantic import BaseModel
 
 # Load environment variables from .env file
 # Only look for .env in the project root (leap-main/), not in parent directories
@@ -15,9 +13,27 @@ if env_path.exists():
 # Global Constants
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "o3-mini")
 MANIM_QUALITY = "-ql"  # Low quality for faster rendering
+RENDERING_QUALITY = os.getenv("RENDERING_QUALITY", "low")  # "low", "medium" or "high" for API jobs
 EXECUTION_TIMEOUT = 180  # seconds
 MAX_ATTEMPTS = 5
 
+# Model routing - each node uses a model tier (or a model name); corrections move up a tier after repeated failures
+MODEL_TIERS = {
+    "fast": os.getenv("OPENAI_MODEL_FAST", "gpt-4o-mini"),
+    "standard": OPENAI_MODEL,
+    "strong": os.getenv("OPENAI_MODEL_STRONG", "o3"),
+}
+NODE_MODELS = {
+    "validate_input": os.getenv("MODEL_VALIDATE_INPUT", "fast"),
+    "plan_scenes": os.getenv("MODEL_PLAN_SCENES", "fast"),
+    "generate_code": os.getenv("MODEL_GENERATE_CODE", "standard"),
+    "correct_code": os.getenv("MODEL_CORRECT_CODE", "standard"),
+}
+ESCALATE_AFTER_FAILURES = int(os.getenv("ESCALATE_AFTER_FAILURES", "2"))  # failed corrections before escalating
+
+# Best-of-N: number of code candidates requested concurrently for generation and correction
+CANDIDATE_COUNT = max(1, int(os.getenv("CANDIDATE_COUNT", "1")))
+
 # Mock Mode - bypass LLM calls for offline development
 MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
 
@@ -25,14 +41,119 @@ MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
 # Directory Configuration
 BASE_DIR = Path(__file__).parent.parent.parent  # Points to /backend
 PACKAGE_DIR = Path(__file__).parent.parent      # Points to /backend/askleap
-GENERATED_DIR = BASE_DIR / "generated"
+GENERATED_DIR = Path(os.getenv("GENERATED_DIR", str(BASE_DIR / "generated")))  # databases, logs and renders of this deployment
 LOGS_DIR = GENERATED_DIR / "logs"
 ASSETS_DIR = PACKAGE_DIR / "assets"             # Updated to point to /backend/askleap/assets
 TEMPLATES_DIR = PACKAGE_DIR / "templates"       # Also update this to be consistent
 
+VIDEOS_DIR = Path(os.getenv("LOCAL_STORAGE_PATH", str(GENERATED_DIR / "media" / "videos")))
+
 # Ensure directories exist
-GENERATED_DIR.mkdir(exist_ok=True)
+GENERATED_DIR.mkdir(parents=True, exist_ok=True)
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Per-question log files - the most recently used questions keep a logger and an open file
+QUESTION_LOGGER_CACHE_SIZE = int(os.getenv("QUESTION_LOGGER_CACHE_SIZE", "64"))
+
+# State transition logs - only changed keys are logged, long values as their length and hash
+STATE_LOG_LEVEL = os.getenv("STATE_LOG_LEVEL", "INFO").upper()
+STATE_LOG_SAMPLE_RATE = float(os.getenv("STATE_LOG_SAMPLE_RATE", "1.0"))  # fraction of transitions logged
+STATE_LOG_MAX_VALUE = 120  # characters of a value logged before it is summarized
+
+# Manim API index - class and method signatures introspected once per Manim version, used to check calls before rendering
+MANIM_API_CHECK = os.getenv("MANIM_API_CHECK", "true").lower() == "true"
+MANIM_API_INDEX_DIR = Path(os.getenv("MANIM_API_INDEX_DIR", str(GENERATED_DIR / "manim_api")))
+
+# Input fast path - a local lexicon classifier accepts or rejects clear inputs; only ambiguous ones go to the LLM
+INPUT_FAST_PATH = os.getenv("INPUT_FAST_PATH", "true").lower() == "true"
+INPUT_LEXICON_PATH = Path(os.getenv("INPUT_LEXICON_PATH", str(GENERATED_DIR / "input_lexicon.json")))
+INPUT_FAST_PATH_MIN_COVERAGE = float(os.getenv("INPUT_FAST_PATH_MIN_COVERAGE", "0.6"))  # share of content words that must be known topics
+INPUT_LEXICON_MIN_COUNT = int(os.getenv("INPUT_LEXICON_MIN_COUNT", "2"))  # LLM-accepted prompts a word needs to join the lexicon
+
+# Few-shot examples - the scene methods most relevant to a question, retrieved with BM25 from saved scenes and templates
+EXAMPLE_TOP_K = int(os.getenv("EXAMPLE_TOP_K", "4"))
+EXAMPLE_TOKEN_BUDGET = int(os.getenv("EXAMPLE_TOKEN_BUDGET", "2000"))  # estimated tokens of example code per prompt
+
+# Prompt budgets - tokens per prompt by node; lower-priority components (examples, the plan, the error) are trimmed first
+PROMPT_TOKEN_BUDGETS = {
+    "plan_scenes": int(os.getenv("PROMPT_BUDGET_PLAN_SCENES", "3000")),
+    "generate_code": int(os.getenv("PROMPT_BUDGET_GENERATE_CODE", "6000")),
+    "correct_code": int(os.getenv("PROMPT_BUDGET_CORRECT_CODE", "8000")),
+}
+
+# Workflow checkpoints - persist state after each node so jobs survive restarts
+CHECKPOINTS_ENABLED = os.getenv("WORKFLOW_CHECKPOINTS", "true").lower() == "true"
+CHECKPOINT_DB_PATH = Path(os.getenv("CHECKPOINT_DB_PATH", str(GENERATED_DIR / "checkpoints.sqlite")))
+CHECKPOINT_HEARTBEAT_INTERVAL = 15  # seconds between heartbeats for running jobs
+CHECKPOINT_STALE_AFTER = 60  # seconds without a heartbeat before a job is resumed elsewhere
+
+# Job queue - when enabled the API only enqueues jobs and `leap-worker` processes render them
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "false").lower() == "true"
+JOB_QUEUE_DB_PATH = Path(os.getenv("JOB_QUEUE_DB_PATH", str(GENERATED_DIR / "job_queue.sqlite")))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))  # worker processes per host
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))  # worker i serves /metrics on port + i; 0 disables
+QUEUE_VISIBILITY_TIMEOUT = int(os.getenv("QUEUE_VISIBILITY_TIMEOUT", "300"))  # seconds
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+QUEUE_RETRY_BACKOFF = 30  # seconds, doubled on every retry
+QUEUE_POLL_INTERVAL = 2  # seconds between polls when the queue is empty
+
+# Scheduling - queued jobs are leased by score: seconds waited plus class head starts, minus fair-share penalties
+SCHEDULER_CLASS_BOOST = {
+    "interactive": float(os.getenv("SCHEDULER_INTERACTIVE_BOOST", "600")),  # someone is watching the page
+    "offline": 0.0,  # the video is sent by email
+}
+SCHEDULER_QUALITY_BOOST = {
+    "preview": float(os.getenv("SCHEDULER_PREVIEW_BOOST", "60")),  # low-quality renders finish quickly
+    "final": 0.0,
+}
+SCHEDULER_TENANT_PENALTY = float(os.getenv("SCHEDULER_TENANT_PENALTY", "300"))  # per job the tenant already has running
+SCHEDULER_AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", "1"))  # score gained per second waited
+SCHEDULER_WINDOW = 200  # oldest ready jobs considered on each lease
+
+# Job store - job state shared by all API replicas and workers ("sqlite", "redis" or "memory")
+JOB_STORE_BACKEND = os.getenv("JOB_STORE_BACKEND", "sqlite").lower()
+JOB_STORE_DB_PATH = Path(os.getenv("JOB_STORE_DB_PATH", str(GENERATED_DIR / "jobs.sqlite")))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Job events - progress pushed to clients over SSE / WebSocket
+EVENT_POLL_INTERVAL = 0.5  # seconds between event log reads for updates published by other replicas
+EVENT_KEEPALIVE_INTERVAL = 15  # seconds between keep-alive comments on idle streams
+EVENT_RETENTION = 3600  # seconds finished jobs keep their event log
+
+# Job progress - typical seconds per workflow node, used for ETAs until real timings are observed
+NODE_DURATION_ESTIMATES = {
+    "validate_input": 3,
+    "plan_scenes": 20,
+    "generate_code": 45,
+    "validate_code": 1,
+    "auto_fix": 1,
+    "correct_code": 45,
+    "execute_code": 120,
+}
+
+# Cancellation - DELETE /api/animations/{job_id} or an interactive client going away
+CANCEL_POLL_INTERVAL = 1  # seconds between checks for cancellation requested through another replica
+CANCEL_ON_DISCONNECT_GRACE = 30  # seconds an interactive job survives without a connected client
+
+# Admission control - new jobs are rejected with 429 + Retry-After when the backlog would thrash the renderers
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", str(WORKER_CONCURRENCY)))  # jobs processed in parallel
+ADMISSION_MAX_BACKLOG = int(os.getenv("ADMISSION_MAX_BACKLOG", "50"))  # unfinished jobs across all replicas
+ADMISSION_MAX_WAIT = int(os.getenv("ADMISSION_MAX_WAIT", "1800"))  # seconds a new job may wait to start
+ADMISSION_CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", "10")) / 3600  # jobs per second per email / IP
+ADMISSION_CLIENT_BURST = int(os.getenv("ADMISSION_CLIENT_BURST", "3"))
+
+# Uploads - chunked, resumable uploads to object storage
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(6 * 1024 * 1024)))  # Supabase requires 6 MiB TUS chunks
+UPLOAD_MAX_RETRIES = 5  # consecutive failed requests before an upload is abandoned
+UPLOAD_RETRY_BACKOFF = 1.0  # seconds, doubled on every consecutive retry
+UPLOAD_MANIFEST_DB_PATH = Path(os.getenv("UPLOAD_MANIFEST_DB_PATH", str(GENERATED_DIR / "upload_manifest.sqlite")))
+
+# Outbox - post-render side effects (upload, job record, email) delivered in the background
+OUTBOX_DB_PATH = Path(os.getenv("OUTBOX_DB_PATH", str(GENERATED_DIR / "outbox.sqlite")))
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BACKOFF = 5  # seconds, doubled on every retry
+OUTBOX_CLAIM_TIMEOUT = 600  # seconds before an undelivered claimed message is retried elsewhere
+OUTBOX_POLL_INTERVAL = 2  # seconds between polls when the outbox is empty
+
 # Run timestamp
 RUN_TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
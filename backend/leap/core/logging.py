@@ -1,62 +1,198 @@
+"""
+Per-question logging.
+
+Every question gets its own JSON log file. Question loggers only put records on
+a queue; a single ``QueueListener`` thread writes them to the question's file
+and the console, so workflow nodes never block on disk I/O. Loggers are kept
+in a bounded LRU: when a question is evicted its file is closed once the
+records already queued for it have been written. An evicted logger still held
+by a running job keeps working: its file is reopened in append mode on its
+next record, and setting the question up again returns the same logger. The
+file is forgotten only once nothing references the logger anymore.
+"""
+import atexit
 import logging
 import hashlib
+import queue
+import threading
+import weakref
+from collections import OrderedDict
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from leap.core.config import LOGS_DIR
+from typing import Dict, List, Optional
+from leap.core.config import LOGS_DIR, QUESTION_LOGGER_CACHE_SIZE
 from pythonjsonlogger.json import JsonFormatter
 
-# Dictionary to store loggers by their hash
-_loggers = {}
+# Question loggers by question hash, least recently used first
+_loggers: "OrderedDict[str, logging.Logger]" = OrderedDict()
+# Question loggers that are still referenced, cached or not, by question hash
+_live_loggers: "weakref.WeakValueDictionary[str, logging.Logger]" = weakref.WeakValueDictionary()
+# Log files of live questions by logger name; removed only by the listener thread
+_file_handlers: Dict[str, logging.FileHandler] = {}
+_lock = threading.Lock()
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = QueueHandler(_queue)
+_listener: Optional[QueueListener] = None
+
+# Attributes of control records the listener handles itself instead of writing
+_CLOSE = "close_question_log"
+_RELEASE = "release_question_log"
+_FLUSHED = "question_logs_flushed"
+
+
+class _QuestionLogRouter(logging.Handler):
+    """Writes queued records to their question's log file and the console."""
+
+    def __init__(self):
+        super().__init__()
+        formatter = JsonFormatter('%(asctime)s - %(levelname)s - %(message)s')
+        self.console = logging.StreamHandler()
+        self.console.setLevel(logging.INFO)
+        self.console.setFormatter(formatter)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if hasattr(record, _FLUSHED):
+            getattr(record, _FLUSHED).set()
+            return True
+        if hasattr(record, _CLOSE):
+            # A closed FileHandler reopens its file in append mode on its next record
+            getattr(record, _CLOSE).close()
+            return True
+        if hasattr(record, _RELEASE):
+            handler = getattr(record, _RELEASE)
+            with _lock:
+                if _file_handlers.get(record.name) is handler:
+                    del _file_handlers[record.name]
+            handler.close()
+            return True
+        return super().handle(record)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        with _lock:
+            file_handler = _file_handlers.get(record.name)
+        if file_handler:
+            file_handler.handle(record)
+        self.console.handle(record)
+
+
+def _start_listener() -> None:
+    """Start the listener thread the first time a question logger is created."""
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_queue, _QuestionLogRouter())
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def flush_question_logs(timeout: float = 5.0) -> bool:
+    """Wait until every record logged so far has been written.
+
+    Returns:
+        False if the records were not written within ``timeout`` seconds
+    """
+    if _listener is None:
+        return True
+    flushed = threading.Event()
+    _queue.put(logging.makeLogRecord({_FLUSHED: flushed}))
+    return flushed.wait(timeout)
+
+
+def _evict(logger: logging.Logger) -> None:
+    """Close an evicted logger's file after its queued records.
+
+    The logger stays usable, since a running job may still hold it.
+    """
+    with _lock:
+        handler = _file_handlers.get(logger.name)
+    if handler:
+        _queue.put(logging.makeLogRecord({"name": logger.name, _CLOSE: handler}))
+
+
+def _release(name: str, handler: logging.FileHandler) -> None:
+    """Forget a question's file once its logger has been garbage collected."""
+    _queue.put(logging.makeLogRecord({"name": name, _RELEASE: handler}))
+
+
+def _cache(question_hash: str, logger: logging.Logger) -> List[logging.Logger]:
+    """Put a logger in the LRU and return the loggers it pushed out.
+
+    Must be called with ``_lock`` held.
+    """
+    _loggers[question_hash] = logger
+    _loggers.move_to_end(question_hash)
+    evicted = []
+    while len(_loggers) > QUESTION_LOGGER_CACHE_SIZE:
+        evicted.append(_loggers.popitem(last=False)[1])
+    return evicted
+
 
 def setup_question_logger(question: str) -> logging.Logger:
     """Setup a logger for a specific question."""
     # Create a hash of the question to use as a unique identifier
     question_hash = hashlib.md5(question.encode()).hexdigest()
-    
-    # Check if we already have a logger for this question
-    if question_hash in _loggers:
-        return _loggers[question_hash]
-    
-    # Create a new logger
-    logger = logging.getLogger(f"question_{question_hash}")
-    
-    # Only add handler if none exists
-    if not logger.handlers:
-        # Create a sanitized filename from the question
-        safe_name = question.lower()
-        safe_name = "".join(c if c.isalnum() else "_" for c in safe_name[:30])
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = LOGS_DIR / f"{safe_name}_{timestamp}.log"
-        
-        # Set the logger level
-        logger.setLevel(logging.INFO)
-        
-        # Remove any existing handlers
-        logger.handlers = []
-        
-        # Create a json formatter for structured logging
-        formatter = JsonFormatter('%(asctime)s - %(levelname)s - %(message)s')
-        
-        # Add file handler
-        fh = logging.FileHandler(log_file)
-        fh.setLevel(logging.INFO)
-        fh.setFormatter(formatter)
-        logger.addHandler(fh)
-        
-        # Add console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        ch.setFormatter(formatter)
-        logger.addHandler(ch)
-    
-    # Store the logger for future use
-    _loggers[question_hash] = logger
-    
+
+    with _lock:
+        # Check if we already have a logger for this question
+        if question_hash in _loggers:
+            _loggers.move_to_end(question_hash)
+            return _loggers[question_hash]
+        # An evicted logger a running job still holds keeps its file
+        logger = _live_loggers.get(question_hash)
+        if logger is not None:
+            evicted = _cache(question_hash, logger)
+    if logger is not None:
+        for old in evicted:
+            _evict(old)
+        return logger
+
+    # Create a new logger; it is not registered with logging.getLogger so it
+    # is freed once evicted and unused, and it does not propagate to the synchronous root handlers
+    logger = logging.Logger(f"question_{question_hash}", logging.INFO)
+    logger.propagate = False
+
+    # Create a sanitized filename from the question
+    safe_name = question.lower()
+    safe_name = "".join(c if c.isalnum() else "_" for c in safe_name[:30])
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_file = LOGS_DIR / f"{safe_name}_{timestamp}.log"
+
+    # The file is opened by the listener on the first record
+    fh = logging.FileHandler(log_file, delay=True)
+    fh.setLevel(logging.INFO)
+    fh.setFormatter(JsonFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(_queue_handler)
+
+    with _lock:
+        if question_hash in _live_loggers:
+            # Another thread set this question up first
+            existing = _live_loggers[question_hash]
+            evicted = _cache(question_hash, existing)
+        else:
+            existing = None
+            _live_loggers[question_hash] = logger
+            _file_handlers[logger.name] = fh
+            weakref.finalize(logger, _release, logger.name, fh)
+            evicted = _cache(question_hash, logger)
+            _start_listener()
+    if existing is not None:
+        logger = existing
+    for old in evicted:
+        _evict(old)
+
     return logger
 
+
+def question_log_file(logger: logging.Logger) -> Optional[Path]:
+    """Return the log file of a live question logger."""
+    with _lock:
+        handler = _file_handlers.get(logger.name)
+    return Path(handler.baseFilename) if handler else None
+
 # Setup root logger
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
-) 
\ No newline at end of file
+)
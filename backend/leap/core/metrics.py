@@ -0,0 +1,313 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are defined once at module level and updated
+where the work happens (workflow nodes, LLM calls, renders, caches). Values
+that already live elsewhere (queue depth, outbox, upload and auto-fix stats)
+are read by collectors registered with :func:`register_collector` just before
+each scrape. ``GET /metrics`` on the API, and on ``leap-worker --metrics-port``,
+returns :func:`render`.
+"""
+import contextvars
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RENDER_BUCKETS = (5, 10, 30, 60, 120, 180, 300, 600)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """A named metric with optional labels."""
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value for a label set (counters mirrored from another source use this too)."""
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def clear(self) -> None:
+        with self.lock:
+            self.values.clear()
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values]
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets."""
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.series: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.series.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.series[key] = (counts, total + value)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.series.clear()
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self.series.items())
+        lines = []
+        for key, (counts, total) in series:
+            for bound, count in zip(self.buckets, counts):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+_registry: List[Metric] = []
+_collectors: Dict[str, Callable[[], None]] = {}
+_collectors_lock = threading.Lock()
+
+
+def register_collector(name: str, collect: Callable[[], None]) -> None:
+    """Register a function that refreshes metrics before every scrape.
+
+    Registering again under the same name replaces the previous collector.
+    """
+    with _collectors_lock:
+        _collectors[name] = collect
+
+
+def render() -> str:
+    """Refresh collected metrics and return every metric in the text exposition format."""
+    with _collectors_lock:
+        collectors = list(_collectors.items())
+    for name, collect in collectors:
+        try:
+            collect()
+        except Exception as e:
+            logger.warning(f"Metrics collector {name} failed: {str(e)}")
+
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def start_http_server(port: int) -> threading.Thread:
+    """Serve :func:`render` at ``/metrics`` on ``port`` from a background thread.
+
+    Used by processes that do not run the API, such as the render workers.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics on port {port}")
+    return thread
+
+
+def reset() -> None:
+    """Clear every metric value (used by tests)."""
+    for metric in _registry:
+        metric.clear()
+
+
+# Workflow
+NODE_DURATION = Histogram("leap_node_duration_seconds", "Workflow node execution time.", ["node"])
+JOBS_IN_FLIGHT = Gauge("leap_jobs_in_flight", "Jobs whose workflow is running in this process.")
+JOBS_FINISHED = Counter("leap_jobs_finished_total", "Jobs finished in this process, by outcome.", ["status"])
+CORRECTION_ATTEMPTS = Histogram(
+    "leap_job_correction_attempts", "LLM correction rounds per finished job.", buckets=(0, 1, 2, 3, 4, 5)
+)
+
+# LLM
+LLM_DURATION = Histogram("leap_llm_request_duration_seconds", "LLM request latency.", ["node", "model"])
+LLM_TOKENS = Counter(
+    "leap_llm_tokens_total", "LLM tokens used, by prompt, cached (prompt tokens read from the provider's cache) or completion.",
+    ["node", "model", "kind"]
+)
+LLM_CACHED_RATIO = Histogram(
+    "leap_llm_prompt_cached_ratio", "Fraction of each request's prompt tokens read from the provider's prompt cache.",
+    ["node", "model"], buckets=(0, 0.1, 0.25, 0.5, 0.75, 0.9, 1)
+)
+MODEL_ESCALATIONS = Counter("leap_model_escalations_total", "LLM requests routed to a stronger model after failures.", ["node", "model"])
+PROMPT_TOKENS = Histogram(
+    "leap_prompt_tokens", "Prompt tokens per request, by node and prompt component.", ["node", "component"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+PROMPT_TRIMS = Counter("leap_prompt_trims_total", "Prompt components shrunk to fit the node's token budget.", ["node", "component"])
+
+# Input validation
+INPUT_DECISIONS = Counter(
+    "leap_input_fast_path_decisions_total", "Input validation decisions of the local classifier: accept, reject or escalate to the LLM.",
+    ["decision", "reason"]
+)
+
+# Rendering
+RENDER_DURATION = Histogram("leap_render_duration_seconds", "Manim render wall time.", ["quality"], RENDER_BUCKETS)
+RENDER_CPU = Histogram("leap_render_cpu_seconds", "Manim render CPU time, including its child processes.", ["quality"], RENDER_BUCKETS)
+
+# Caches
+CACHE_REQUESTS = Counter("leap_cache_requests_total", "Cache lookups, by cache and hit or miss.", ["cache", "result"])
+
+# Queue, admission and outbox
+QUEUE_JOBS = Gauge("leap_queue_jobs", "Jobs in the durable job queue, by state.", ["status"])
+ADMISSION_REJECTIONS = Counter("leap_admission_rejections_total", "Job requests rejected with 429.", ["reason"])
+OUTBOX_MESSAGES = Gauge("leap_outbox_messages", "Post-render outbox messages, by state.", ["status"])
+
+# Uploads
+UPLOADS = Counter("leap_uploads_total", "Finished video uploads, by outcome.", ["result"])
+UPLOAD_RETRIES = Counter("leap_upload_retries_total", "Upload requests retried after an error.")
+UPLOAD_BYTES = Counter("leap_upload_bytes_total", "Bytes uploaded to object storage.")
+UPLOAD_THROUGHPUT = Gauge("leap_upload_throughput_bytes_per_second", "Average upload throughput.")
+
+# Auto-fix
+AUTOFIX_RUNS = Counter("leap_autofix_runs_total", "Runs of the deterministic auto-fixer.")
+AUTOFIX_FIXES = Counter("leap_autofix_fixes_total", "Auto-fix rule applications, by rule.", ["rule"])
+AUTOFIX_LLM_CALLS_AVOIDED = Counter("leap_autofix_llm_calls_avoided_total", "Correction rounds resolved without the LLM.")
+
+
+_node: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_node", default="")
+
+
+def current_node() -> str:
+    """Return the workflow node running in this context, or "" outside the workflow."""
+    return _node.get()
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """Wrap a workflow node so its latency is recorded and LLM calls it makes are labelled with it."""
+    # Not functools.wraps: LangGraph would read the wrapped signature and pass arguments the wrapper does not take
+    def run(state):
+        reset = _node.set(name)
+        started = time.monotonic()
+        try:
+            return node(state)
+        finally:
+            NODE_DURATION.observe(time.monotonic() - started, node=name)
+            _node.reset(reset)
+    run.__name__ = getattr(node, "__name__", name)
+    run.__doc__ = node.__doc__
+    return run
+
+
+@contextmanager
+def observe_llm_call(model: str) -> Iterator[Dict[str, int]]:
+    """Time an LLM request made by the current node.
+
+    Yields a dict the caller fills with ``prompt``, ``cached`` and ``completion`` token counts.
+    """
+    usage: Dict[str, int] = {}
+    started = time.monotonic()
+    try:
+        yield usage
+    finally:
+        node = current_node() or "none"
+        LLM_DURATION.observe(time.monotonic() - started, node=node, model=model)
+        for kind, tokens in usage.items():
+            LLM_TOKENS.inc(tokens, node=node, model=model, kind=kind)
+        if usage.get("prompt"):
+            LLM_CACHED_RATIO.observe(usage.get("cached", 0) / usage["prompt"], node=node, model=model)
+
+
+def record_usage(usage: Dict[str, int], completion) -> None:
+    """Copy the token counts of an OpenAI completion, including cached prompt tokens, into ``usage``."""
+    counts = getattr(completion, "usage", None)
+    if counts is None:
+        return
+    usage["prompt"] = getattr(counts, "prompt_tokens", 0) or 0
+    usage["completion"] = getattr(counts, "completion_tokens", 0) or 0
+    details = getattr(counts, "prompt_tokens_details", None)
+    usage["cached"] = getattr(details, "cached_tokens", 0) or 0
+
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    """Count lookups in a cache."""
+    if count:
+        CACHE_REQUESTS.inc(count, cache=cache, result="hit" if hit else "miss")
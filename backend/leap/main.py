@@ -17,7 +17,7 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 # Now we can import from src
-from leap.workflow.graph import workflow
+# (the workflow graph is imported when it runs, so --help and argument errors stay fast)
 from leap.workflow.state import GraphState
 from leap.core.logging import setup_question_logger
 from leap.core.config import GENERATED_DIR
@@ -91,12 +91,14 @@ def create_initial_state(args) -> GraphState:
 
 def run_workflow(state: GraphState) -> Dict[str, Any]:
     """Run the workflow with the given initial state."""
+    from leap.workflow.graph import RECURSION_LIMIT, workflow
+    
     # Create a logger specific to this question
     logger = setup_question_logger(state["user_input"])
     logger.info(f"Starting workflow with prompt: {state['user_input']}")
     
     # Run the workflow
-    result = workflow.invoke(state)
+    result = workflow.invoke(state, {"recursion_limit": RECURSION_LIMIT})
     
     # Return the final state
     return result
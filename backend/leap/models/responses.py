@@ -38,4 +38,7 @@ class ValidationResult(BaseModel):
     )
     reformulated_question: Optional[str] = Field(
         None, description="A clearer, reformulated version of the user's question that could be used internally"
+    )
+    topic_words: Optional[List[str]] = Field(
+        None, description="The words of the user's input that name the subject it asks about"
     ) 
\ No newline at end of file
@@ -16,6 +16,7 @@ class PromptVersion(str, Enum):
     V2 = "v2"
     V3 = "v3"
     V4 = "v4"
+    V5 = "v5"
     EXPERIMENTAL = "experimental"
     PRODUCTION = "production"
     
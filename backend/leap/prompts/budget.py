@@ -0,0 +1,277 @@
+"""
+Token budgets for workflow prompts.
+
+A node builds its prompt from named components: the question, the plan, the
+code to fix, API notes, example code. ``build_prompt`` counts the tokens of
+every component and of the template around them. When the total is over the
+node's budget, it shrinks the lowest-priority trimmable components first
+(examples before the plan, the plan before the error) until the prompt fits.
+The counts per component go to the ``leap_prompt_tokens`` metric and to the
+job's progress, so prompt size can be watched per node and per job.
+
+Components marked ``static`` are the same for every request. They are never
+trimmed, and templates place them before any per-request value, so the start
+of the prompt is byte-identical between requests and the provider can serve it
+from its prompt cache. ``static_prefix`` returns that shared start; its size is
+recorded as the ``prefix`` count.
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from leap.core import metrics
+from leap.core.config import OPENAI_MODEL, PROMPT_TOKEN_BUDGETS
+from leap.prompts.base import PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+# Characters per token when no tokenizer is available; close for English and Python
+CHARS_PER_TOKEN = 4
+
+# How a component is shrunk
+KEEP_HEAD = "head"  # keep the beginning (reference material, examples)
+KEEP_TAIL = "tail"  # keep the end (tracebacks, where the error is)
+OUTLINE = "outline"  # keep headings and numbered steps (plans)
+REQUIRED = "required"  # never trimmed
+
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder():
+    """Return a tiktoken encoder if tiktoken is installed and has its encoding available."""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            try:
+                _encoder = tiktoken.encoding_for_model(OPENAI_MODEL)
+            except KeyError:
+                _encoder = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.info(f"Estimating prompt tokens from length, no tokenizer available: {str(e)}")
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Count (or, without tiktoken, estimate) the tokens of a piece of text."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _marker(lines: int) -> str:
+    return f"[... {lines} lines left out to fit the prompt budget ...]"
+
+
+def keep_head(text: str, max_tokens: int) -> str:
+    """Keep whole lines from the start of the text up to ``max_tokens``, marker included."""
+    lines = text.splitlines()
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], count_tokens(_marker(len(lines)) + "\n")
+    for line in lines:
+        cost = count_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) == len(lines):
+        return text
+    return "\n".join(kept + [_marker(len(lines) - len(kept))])
+
+
+def keep_tail(text: str, max_tokens: int) -> str:
+    """Keep whole lines from the end of the text up to ``max_tokens``, marker included."""
+    lines = text.splitlines()
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], count_tokens(_marker(len(lines)) + "\n")
+    for line in reversed(lines):
+        cost = count_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) == len(lines):
+        return text
+    return "\n".join([_marker(len(lines) - len(kept))] + kept[::-1])
+
+
+def outline(text: str, max_tokens: int) -> str:
+    """Summarize structured text by its headings and numbered or bulleted steps.
+
+    Falls back to keeping the start when even the outline is over budget.
+    """
+    lines = text.splitlines()
+    headings = [
+        line for line in lines
+        if line.strip() and (
+            line.lstrip()[:1] in "#*-" or line.lstrip()[:1].isdigit() or line.rstrip().endswith(":")
+        )
+    ]
+    summary = "\n".join(headings + [_marker(len(lines) - len(headings))]) if headings else text
+    return keep_head(summary, max_tokens)
+
+
+_SHRINKERS: Dict[str, Callable[[str, int], str]] = {
+    KEEP_HEAD: keep_head,
+    KEEP_TAIL: keep_tail,
+    OUTLINE: outline,
+}
+
+
+@dataclass
+class PromptComponent:
+    """A named value filled into a prompt template.
+
+    Attributes:
+        name: The template placeholder the text fills
+        text: The text
+        trim: How the component is shrunk: ``head``, ``tail``, ``outline`` or ``required``
+        priority: Components with a lower priority are shrunk first
+        min_tokens: The component is never shrunk below this size
+        static: The text is the same for every request; it is never trimmed
+    """
+    name: str
+    text: str
+    trim: str = REQUIRED
+    priority: int = 0
+    min_tokens: int = 0
+    static: bool = False
+
+
+@dataclass
+class BudgetedPrompt:
+    """A formatted prompt and its token accounting."""
+    system: str
+    user: str
+    tokens: Dict[str, int] = field(default_factory=dict)
+    trimmed: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.tokens.get("total", 0)
+
+
+def fit_components(
+    components: Sequence[PromptComponent],
+    budget: int,
+    overhead: int = 0
+) -> Dict[str, str]:
+    """Shrink the lowest-priority components until everything fits the budget.
+
+    Args:
+        components: The prompt components
+        budget: Maximum tokens of the whole prompt
+        overhead: Tokens of the template text around the components
+
+    Returns:
+        The text of every component, shrunk where needed
+    """
+    texts = {component.name: component.text for component in components}
+    sizes = {component.name: count_tokens(component.text) for component in components}
+    excess = overhead + sum(sizes.values()) - budget
+    trimmable = sorted(
+        (component for component in components if component.trim != REQUIRED and not component.static),
+        key=lambda component: component.priority
+    )
+    for component in trimmable:
+        if excess <= 0:
+            break
+        target = max(component.min_tokens, sizes[component.name] - excess)
+        if target >= sizes[component.name]:
+            continue
+        shrunk = _SHRINKERS[component.trim](component.text, target)
+        shrunk_size = count_tokens(shrunk)
+        if shrunk_size >= sizes[component.name]:
+            continue
+        excess -= sizes[component.name] - shrunk_size
+        texts[component.name] = shrunk
+        sizes[component.name] = shrunk_size
+    return texts
+
+
+def static_prefix(template: PromptTemplate, components: Sequence[PromptComponent]) -> str:
+    """Return the start of the prompt shared by every request: the system and user
+    messages up to the first per-request value.
+
+    Logs a warning when a static component comes after a per-request value, since
+    its text can then no longer be served from the provider's prompt cache.
+    """
+    marks = {component.name: f"\x00{component.name}\x00" for component in components}
+    layout = template.format(**marks)
+    text = layout["system"] + layout["user"]
+    dynamic = [text.find(marks[c.name]) for c in components if not c.static and marks[c.name] in text]
+    end = min(dynamic, default=len(text))
+    late = [c.name for c in components if c.static and text.find(marks[c.name]) > end]
+    if late:
+        logger.warning(f"Static prompt components {', '.join(late)} follow per-request values and will not be cached")
+    prefix = text[:end]
+    for component in components:
+        if component.static:
+            prefix = prefix.replace(marks[component.name], component.text)
+    return prefix
+
+
+def build_prompt(
+    node: str,
+    template: PromptTemplate,
+    components: Sequence[PromptComponent],
+    budget: Optional[int] = None,
+    job_id: Optional[str] = None
+) -> BudgetedPrompt:
+    """Format a prompt within the node's token budget and record its size.
+
+    Args:
+        node: The workflow node building the prompt
+        template: The prompt template
+        components: Values for every placeholder of the template
+        budget: Maximum prompt tokens, defaults to the node's ``PROMPT_TOKEN_BUDGETS`` entry
+        job_id: The job the prompt is for, to record the counts in its progress
+
+    Returns:
+        The formatted prompt with its tokens per component, ``template``, ``prefix`` and ``total``
+    """
+    budget = budget or PROMPT_TOKEN_BUDGETS.get(node)
+    empty = template.format(**{component.name: "" for component in components})
+    overhead = count_tokens(empty["system"]) + count_tokens(empty["user"])
+
+    texts = {component.name: component.text for component in components}
+    if budget:
+        texts = fit_components(components, budget, overhead)
+    formatted = template.format(**texts)
+
+    tokens = {name: count_tokens(text) for name, text in texts.items()}
+    tokens["template"] = overhead
+    tokens["prefix"] = count_tokens(static_prefix(template, components))
+    tokens["total"] = count_tokens(formatted["system"]) + count_tokens(formatted["user"])
+    trimmed = [component.name for component in components if texts[component.name] != component.text]
+
+    if trimmed:
+        logger.info(f"Trimmed {', '.join(trimmed)} to fit the {node} prompt budget of {budget} tokens")
+    if budget and tokens["total"] > budget:
+        logger.warning(f"{node} prompt is {tokens['total']} tokens, over its budget of {budget}")
+    record_prompt_tokens(node, tokens, trimmed, job_id)
+    return BudgetedPrompt(system=formatted["system"], user=formatted["user"], tokens=tokens, trimmed=trimmed)
+
+
+def record_prompt_tokens(
+    node: str,
+    tokens: Dict[str, int],
+    trimmed: Sequence[str] = (),
+    job_id: Optional[str] = None
+) -> None:
+    """Record the tokens of a prompt per component in metrics and the job's progress."""
+    for component, count in tokens.items():
+        metrics.PROMPT_TOKENS.observe(count, node=node, component=component)
+    for component in trimmed:
+        metrics.PROMPT_TRIMS.inc(node=node, component=component)
+    if job_id:
+        from leap.services.job_progress import record_prompt_tokens as record_in_progress
+        record_in_progress(job_id, node, tokens)
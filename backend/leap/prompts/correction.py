@@ -212,12 +212,63 @@ ERROR_CORRECTION_V4 = PromptTemplate(
     description="Error correction prompt with explicit background creation prohibition"
 )
 
+# Error correction prompt laid out for provider-side prompt caching: the
+# instructions and the Manim breaking changes never change between requests,
+# so they come first as a byte-identical prefix; the plan, code and error follow.
+ERROR_CORRECTION_V5 = PromptTemplate(
+    system=ERROR_CORRECTION_V4.system,
+    user="""
+        Fix the Manim code at the end of this message, which has encountered errors. Maintain the original educational intent while making it technically correct.
+        
+        DEBUGGING APPROACH:
+        1. First identify the root cause of the error
+        2. Fix the immediate issue
+        3. Check for related issues that might cause problems
+        4. Verify the fix doesn't break other parts of the code or recreate previous errors
+        5. Ensure the educational intent is preserved
+        6. See if the code is using deprecated or removed methods and update it accordingly, using the breaking changes below
+        
+        CRITICAL RESTRICTIONS:
+        - NEVER create any background rectangles, images, or shapes that cover the entire screen
+        - The base class already provides a background image - do not create your own
+        - NEVER use Rectangle, ImageMobject, or any other object as a full-screen background
+        - NEVER use self.camera.background or try to modify the camera background
+        - NEVER use self.camera.frame or any attempt to animate or scale the camera frame
+        - The Camera object does NOT have a 'frame' attribute that can be animated
+        - For zoom effects, scale the objects themselves: self.play(mobject.animate.scale(0.8))
+        - For perspective changes, move objects: self.play(mobject.animate.shift(direction))
+        - For transitions, use transforms: self.play(Transform(group1, group2))
+        
+        RESPONSE FORMAT:
+        Return a structured response with:
+        1. Complete fixed code (ready to run without modifications)
+        2. Explanation of what was fixed
+        3. List of specific errors addressed
+        4. Validation checks performed
+        
+        MANIM BREAKING CHANGES:
+        {manim_api_context}
+        
+        ORIGINAL ANIMATION PLAN:
+        {plan}
+        
+        ORIGINAL CODE:
+        {generated_code}
+        
+        ERROR DETAILS:
+        {error}
+        """,
+    version=PromptVersion.V5,
+    description="Error correction prompt with the static instructions first, for prompt caching"
+)
+
 # Collection of all error correction prompts
 ERROR_CORRECTION_PROMPTS = PromptCollection({
     PromptVersion.V1: ERROR_CORRECTION_V1,
     PromptVersion.V2: ERROR_CORRECTION_V2,
     PromptVersion.V3: ERROR_CORRECTION_V3,
     PromptVersion.V4: ERROR_CORRECTION_V4,
-    PromptVersion.PRODUCTION: ERROR_CORRECTION_V4,  # Now using V4 in production
-    PromptVersion.EXPERIMENTAL: ERROR_CORRECTION_V4,  # Testing V4
+    PromptVersion.V5: ERROR_CORRECTION_V5,
+    PromptVersion.PRODUCTION: ERROR_CORRECTION_V5,  # Now using V5 in production
+    PromptVersion.EXPERIMENTAL: ERROR_CORRECTION_V5,  # Testing V5
 }) 
\ No newline at end of file
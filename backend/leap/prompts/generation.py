@@ -273,12 +273,91 @@ DO NOT use any other color names or RGB values unless explicitly converting from
     description="Code generation prompt with explicit background creation prohibition"
 )
 
+# Code generation prompt laid out for provider-side prompt caching: the system
+# message, the rules and the code template never change between requests, so
+# they come first as a byte-identical prefix; examples and everything about
+# the request follow.
+CODE_GENERATION_V5 = PromptTemplate(
+    system=CODE_GENERATION_V4.system,
+    user="""
+        You write Manim code for educational animations. Follow the requirements, the code template and the examples below to implement the request at the end.
+
+        TECHNICAL REQUIREMENTS:
+        1. Return ONLY valid Python code without any explanations or markdown formatting.
+        2. The code must be complete, runnable, and error-free.
+        3. Define a class that inherits from ManimVoiceoverBase.
+        4. Structure your code into logical scene methods (introduction, explanation, example, summary etc).
+        5. The construct method should call these methods in sequence.
+        
+        ANIMATION BEST PRACTICES:
+        1. Every animation must be wrapped in a voiceover block:
+           ```
+           with self.voiceover(text="Your narration here") as tracker:
+               self.play(Your_Animation_Here, run_time=tracker.duration)
+           ```
+        2. Use tracker.duration to sync animation timing with voiceover.
+        3. After completing each logical section, call self.fade_out_scene() to clean up.
+        4. Use smooth transitions between scenes for better flow.
+        5. Ensure text is readable and appropriately sized.
+        
+        CRITICAL RESTRICTIONS:
+        - NEVER create any background rectangles, images, or shapes that cover the entire screen
+        - The base class already provides a background image - do not create your own
+        - NEVER use Rectangle, ImageMobject, or any other object as a full-screen background
+        - NEVER use self.camera.background or try to modify the camera background
+        - NEVER use self.camera.frame or any attempt to animate or scale the camera frame
+        - The Camera object does NOT have a 'frame' attribute that can be animated
+        - For zoom effects, scale the objects themselves: self.play(mobject.animate.scale(0.8))
+        - For perspective changes, move objects: self.play(mobject.animate.shift(direction))
+        - For transitions, use transforms: self.play(Transform(group1, group2))
+        
+        TECHNICAL DETAILS:
+        1. Import statements must include:
+           - from manim import *
+           - from leap.templates.base_scene import ManimVoiceoverBase
+        2. Use only the color constants listed in the system message.
+        3. ALWAYS use MathTex for mathematical expressions, NEVER use Tex.
+        
+        EDUCATIONAL DESIGN PRINCIPLES:
+        1. Start with a concrete example before introducing abstract concepts.
+        2. Use visual metaphors to explain complex ideas.
+        3. Reinforce key points with visual cues (highlighting, scaling, etc.).
+        4. Maintain a consistent visual language throughout the animation.
+        5. End with a clear summary that reinforces the main takeaways.
+        
+        BASE CLASS METHODS:
+        - create_title(text): creates properly sized titles
+        - ensure_group_visible(group, margin): ensures objects are visible
+        - fade_out_scene(): fades out all objects except the background
+        
+        CODE TEMPLATE:
+        {code_template}
+        
+        EXAMPLES FROM EARLIER ANIMATIONS:
+        {example_code}
+        
+        AUDIENCE LEVEL:
+        {user_level_instruction}
+        
+        DURATION CONSTRAINTS:
+        {duration_instruction}
+        
+        ANIMATION PLAN:
+        {plan}
+        
+        Generate Manim code to explain "{user_input}" following the plan above. The animation should be clear, engaging, and educational.
+        """,
+    version=PromptVersion.V5,
+    description="Code generation prompt with the static rules and template first, for prompt caching"
+)
+
 # Collection of all code generation prompts
 CODE_GENERATION_PROMPTS = PromptCollection({
     PromptVersion.V1: CODE_GENERATION_V1,
     PromptVersion.V2: CODE_GENERATION_V2,
     PromptVersion.V3: CODE_GENERATION_V3,
     PromptVersion.V4: CODE_GENERATION_V4,
-    PromptVersion.PRODUCTION: CODE_GENERATION_V4,  # Now using V4 in production
-    PromptVersion.EXPERIMENTAL: CODE_GENERATION_V4,  # Testing V4
+    PromptVersion.V5: CODE_GENERATION_V5,
+    PromptVersion.PRODUCTION: CODE_GENERATION_V5,  # Now using V5 in production
+    PromptVersion.EXPERIMENTAL: CODE_GENERATION_V5,  # Testing V5
 }) 
\ No newline at end of file
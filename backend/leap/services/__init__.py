@@ -1,9 +1,30 @@
-from leap.services.llm_service import LLMService
-from leap.services.file_service import FileService
-from leap.services.manim_service import ManimService
+"""
+Services package.
+
+Exports are resolved on first access, so importing one service module does not
+import the OpenAI client and every other service with it.
+"""
+import importlib
+
+_EXPORTS = {
+    "LLMService": "leap.services.llm_service",
+    "FileService": "leap.services.file_service",
+    "ManimService": "leap.services.manim_service",
+    "ManimAPIService": "leap.services.manim_api_service",
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "LLMService",
     "FileService",
-    "ManimService"
+    "ManimService",
+    "ManimAPIService"
 ]
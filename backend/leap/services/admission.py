@@ -0,0 +1,172 @@
+"""
+Admission control for new animation jobs.
+
+Each job takes minutes of LLM calls and rendering, so accepting every request
+during a burst only makes all of them slow. The ``AdmissionController`` admits
+a job only while the backlog of unfinished jobs is below a threshold and the
+expected wait, from the backlog, the render capacity and the measured service
+time, is acceptable. Otherwise the client gets a 429 and a ``Retry-After``
+telling it when capacity frees up. A per-client token bucket, kept in the
+shared job store so every replica draws from the same one, keeps one client
+from filling the backlog on its own.
+"""
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from leap.core.config import (
+    ADMISSION_CAPACITY,
+    ADMISSION_CLIENT_BURST,
+    ADMISSION_CLIENT_RATE,
+    ADMISSION_MAX_BACKLOG,
+    ADMISSION_MAX_WAIT,
+)
+from leap.services.job_progress import estimated_job_duration
+from leap.services.job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+# Statuses of jobs that still hold or wait for a render slot
+ACTIVE_STATUSES = ("pending", "processing")
+
+# Smoothing factor for the service time learned from finished jobs
+SERVICE_TIME_ALPHA = 0.2
+
+# Seconds a measured backlog or service time is reused before it is read again
+REFRESH_INTERVAL = 2.0
+
+
+@dataclass
+class AdmissionDecision:
+    """The outcome of an admission check."""
+    admitted: bool
+    reason: Optional[str] = None
+    retry_after: Optional[float] = None
+    queue_position: int = 0
+    eta_seconds: Optional[float] = None
+
+    def retry_after_header(self) -> str:
+        """Return ``retry_after`` as a ``Retry-After`` header value in whole seconds."""
+        return str(max(1, math.ceil(self.retry_after or 0)))
+
+
+class RateLimiter:
+    """Per-client token buckets, kept in the job store shared by all replicas."""
+
+    def __init__(self, store: JobStore, rate: float = ADMISSION_CLIENT_RATE, burst: int = ADMISSION_CLIENT_BURST):
+        """
+        Args:
+            store: Job store holding the buckets
+            rate: Tokens added per second
+            burst: Bucket size, i.e. requests a client may make at once
+        """
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """Take a token from a client's bucket.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is available
+        """
+        # Wall-clock time, as buckets are updated by every replica
+        now = time.time() if now is None else now
+        return self.store.take_token(key, self.rate, self.burst, now)
+
+
+def active_job_count(store: JobStore, limit: int = ADMISSION_MAX_BACKLOG + 1) -> int:
+    """Count unfinished jobs in the job store, up to ``limit`` per status."""
+    return sum(len(store.list_by_status(status, limit=limit)) for status in ACTIVE_STATUSES)
+
+
+def measured_service_time(store: JobStore, sample: int = 20) -> float:
+    """Return the smoothed processing time of recently completed jobs.
+
+    Falls back to the per-node duration estimates when no job has finished yet.
+    """
+    estimate = None
+    for job in reversed(store.list_by_status("completed", limit=sample)):
+        timings = (job.progress or {}).get("timings")
+        if not timings:
+            continue
+        seconds = sum(timings.values())
+        estimate = seconds if estimate is None else estimate + SERVICE_TIME_ALPHA * (seconds - estimate)
+    return estimated_job_duration() if estimate is None else estimate
+
+
+class AdmissionController:
+    """Decides whether a new job is accepted, from the backlog and the measured service time."""
+
+    def __init__(
+        self,
+        backlog: Callable[[], int],
+        service_time: Callable[[], float],
+        capacity: int = ADMISSION_CAPACITY,
+        max_backlog: int = ADMISSION_MAX_BACKLOG,
+        max_wait: float = ADMISSION_MAX_WAIT,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        """
+        Args:
+            backlog: Returns the number of unfinished jobs across all replicas
+            service_time: Returns the typical seconds a job takes to process
+            capacity: Jobs processed in parallel
+            max_backlog: Unfinished jobs above which new jobs are rejected
+            max_wait: Expected seconds until a new job starts above which it is rejected
+            rate_limiter: Per-client limiter, or None for no per-client limit
+        """
+        self.backlog = backlog
+        self.service_time = service_time
+        self.capacity = max(1, capacity)
+        self.max_backlog = max_backlog
+        self.max_wait = max_wait
+        self.rate_limiter = rate_limiter
+        self.lock = threading.Lock()
+        self._cached: Optional[tuple] = None
+
+    def _load(self) -> tuple:
+        now = time.monotonic()
+        with self.lock:
+            if self._cached and now - self._cached[0] < REFRESH_INTERVAL:
+                return self._cached[1], self._cached[2]
+        backlog, service_time = self.backlog(), self.service_time()
+        with self.lock:
+            self._cached = (now, backlog, service_time)
+        return backlog, service_time
+
+    def admit(self, client_key: Optional[str] = None) -> AdmissionDecision:
+        """Decide whether to accept a new job.
+
+        Args:
+            client_key: Identifies the client for the per-client limit (email or IP)
+
+        Returns:
+            The decision; admitted jobs carry their queue position and expected wait
+        """
+        backlog, service_time = self._load()
+        # Jobs ahead of this one start in waves of ``capacity``
+        wait = (backlog // self.capacity) * service_time
+        drain = ((backlog - self.max_backlog) // self.capacity + 1) * service_time
+
+        if backlog >= self.max_backlog:
+            logger.warning(f"Rejecting job: backlog {backlog} at limit {self.max_backlog}")
+            return AdmissionDecision(False, "Server is at capacity", retry_after=drain)
+        if wait > self.max_wait:
+            logger.warning(f"Rejecting job: expected wait {wait:.0f}s exceeds {self.max_wait:.0f}s")
+            return AdmissionDecision(False, "Server is at capacity", retry_after=wait - self.max_wait + service_time)
+
+        if self.rate_limiter and client_key:
+            client_wait = self.rate_limiter.take(client_key)
+            if client_wait:
+                logger.warning(f"Rejecting job: client {client_key} is over its rate limit")
+                return AdmissionDecision(False, "Too many requests from this client", retry_after=client_wait)
+
+        with self.lock:
+            # Count this job until the backlog is read again
+            if self._cached:
+                self._cached = (self._cached[0], self._cached[1] + 1, self._cached[2])
+        return AdmissionDecision(True, queue_position=backlog, eta_seconds=wait + service_time)
@@ -0,0 +1,278 @@
+"""
+Job cancellation.
+
+A ``CancellationToken`` is bound to the context a job's workflow runs in.
+Long-running operations register a cancel callback on the active token (close
+the LLM client, kill the render process group), so cancelling a job tears down
+whatever it is doing at that moment instead of waiting for it to finish.
+Clients a job reuses across calls are kept on its token as resources, which
+are closed when the job ends or is cancelled.
+
+Cancellation requests are also recorded as a ``cancel`` event in the job's
+shared event log, and a watcher thread per running job polls for it, so a job
+cancelled through one API replica is stopped in whichever worker runs it.
+"""
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from leap.core.config import CANCEL_POLL_INTERVAL
+from leap.services.job_store import JobId, JobStore
+
+logger = logging.getLogger(__name__)
+
+CANCEL_EVENT = "cancel"
+
+
+class JobCancelled(BaseException):
+    """Raised inside a job's workflow once the job has been cancelled.
+
+    Like ``asyncio.CancelledError`` this is not an ``Exception``, so the
+    workflow nodes' generic error handling does not turn it into a correction
+    round.
+    """
+
+    def __init__(self, job_id: JobId):
+        super().__init__(f"Job {job_id} was cancelled")
+        self.job_id = str(job_id)
+
+
+class CancellationToken:
+    """Cancellation state of one running job."""
+
+    def __init__(self, job_id: JobId):
+        self.job_id = str(job_id)
+        self.event = threading.Event()
+        self.callbacks: List[Callable[[], Any]] = []
+        self.resources: Dict[str, Tuple[Any, Callable[[Any], Any]]] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the job and run the registered teardown callbacks."""
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+        logger.info(f"Cancelling job {self.job_id}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Error tearing down cancelled job {self.job_id}: {str(e)}")
+        self.close_resources()
+
+    def resource(self, key: str, factory: Callable[[], Any], close: Callable[[Any], Any]) -> Any:
+        """Return the job's resource ``key``, creating it on first use.
+
+        Args:
+            key: Name of the resource
+            factory: Creates the resource
+            close: Closes the resource when the job ends or is cancelled
+        """
+        with self.lock:
+            if key not in self.resources:
+                self.resources[key] = (factory(), close)
+            return self.resources[key][0]
+
+    def close_resources(self) -> None:
+        """Close the resources created for the job."""
+        with self.lock:
+            resources, self.resources = self.resources, {}
+        for key, (value, close) in resources.items():
+            try:
+                close(value)
+            except Exception as e:
+                logger.warning(f"Error closing {key} of job {self.job_id}: {str(e)}")
+
+    def raise_if_cancelled(self) -> None:
+        """Raise ``JobCancelled`` if the job has been cancelled."""
+        if self.event.is_set():
+            raise JobCancelled(self.job_id)
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], Any]) -> Iterator[None]:
+        """Run ``callback`` if the job is cancelled while the block executes."""
+        with self.lock:
+            already_cancelled = self.event.is_set()
+            if not already_cancelled:
+                self.callbacks.append(callback)
+        if already_cancelled:
+            callback()
+        try:
+            yield
+        finally:
+            with self.lock:
+                if callback in self.callbacks:
+                    self.callbacks.remove(callback)
+
+
+_current: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar("cancellation_token", default=None)
+_tokens: Dict[str, CancellationToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Return the cancellation token of the job running in this context, if any."""
+    return _current.get()
+
+
+def raise_if_cancelled() -> None:
+    """Raise ``JobCancelled`` if the job running in this context has been cancelled."""
+    token = _current.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def cancellable(job_id: JobId, store: Optional[JobStore] = None) -> Iterator[CancellationToken]:
+    """Bind a cancellation token to the job running in this context.
+
+    Args:
+        job_id: The job about to run
+        store: If given, the job's event log is polled for cancellation requests
+            made by other processes
+    """
+    token = CancellationToken(job_id)
+    with _tokens_lock:
+        _tokens[token.job_id] = token
+    reset = _current.set(token)
+    stop_watching = threading.Event()
+    if store is not None:
+        threading.Thread(
+            target=_watch, args=(token, store, stop_watching), name=f"cancel-watch-{job_id}", daemon=True
+        ).start()
+    try:
+        yield token
+    finally:
+        stop_watching.set()
+        token.close_resources()
+        _current.reset(reset)
+        with _tokens_lock:
+            if _tokens.get(token.job_id) is token:
+                del _tokens[token.job_id]
+
+
+@contextmanager
+def subtasks(count: int) -> Iterator[List[CancellationToken]]:
+    """Create tokens for concurrent subtasks of the job running in this context.
+
+    Each subtask binds its token with ``bind`` so it gets its own resources
+    and can be cancelled without stopping the others. All subtasks are
+    cancelled together with the job, and their resources are closed when the
+    block exits.
+
+    Args:
+        count: Number of subtasks
+    """
+    parent = _current.get()
+    tokens = [CancellationToken(parent.job_id if parent else "subtask") for _ in range(count)]
+
+    def cancel_all():
+        for token in tokens:
+            token.cancel()
+
+    try:
+        if parent is None:
+            yield tokens
+        else:
+            with parent.on_cancel(cancel_all):
+                yield tokens
+    finally:
+        for token in tokens:
+            token.close_resources()
+
+
+@contextmanager
+def bind(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Bind an existing token, such as a subtask's, to this context."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def _watch(token: CancellationToken, store: JobStore, stop: threading.Event) -> None:
+    """Cancel the token when a cancel event shows up in the job's event log."""
+    after = 0
+    while not stop.wait(CANCEL_POLL_INTERVAL):
+        try:
+            events = store.events_since(token.job_id, after)
+        except Exception as e:
+            logger.warning(f"Error checking job {token.job_id} for cancellation: {str(e)}")
+            continue
+        if events:
+            after = events[-1].seq
+        if any(event.type == CANCEL_EVENT for event in events):
+            token.cancel()
+            return
+
+
+def cancel_local(job_id: JobId) -> bool:
+    """Cancel a job running in this process.
+
+    Returns:
+        True if the job was running here
+    """
+    with _tokens_lock:
+        token = _tokens.get(str(job_id))
+    if token is None:
+        return False
+    token.cancel()
+    return True
+
+
+def cancel_requested(store: JobStore, job_id: JobId) -> bool:
+    """Return whether cancellation of a job has been requested."""
+    return any(event.type == CANCEL_EVENT for event in store.events_since(job_id))
+
+
+def run_cancellable(operation: Callable[[], Any], teardown: Optional[Callable[[], Any]] = None) -> Any:
+    """Run a blocking operation that is abandoned when the current job is cancelled.
+
+    The operation runs in a helper thread; on cancellation ``teardown`` is
+    called (e.g. to close the client the operation uses) and ``JobCancelled``
+    is raised right away instead of waiting for the operation to return.
+    Outside a cancellable job the operation simply runs in the caller's thread.
+
+    Raises:
+        JobCancelled: If the job is cancelled before the operation finishes
+    """
+    token = _current.get()
+    if token is None:
+        return operation()
+    token.raise_if_cancelled()
+
+    outcome: Dict[str, Any] = {}
+    done = threading.Event()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            outcome["value"] = context.run(operation)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=run, name=f"cancellable-{token.job_id}", daemon=True).start()
+    with token.on_cancel(done.set):
+        done.wait()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    if "value" in outcome:
+        return outcome["value"]
+    if teardown:
+        try:
+            teardown()
+        except Exception as e:
+            logger.warning(f"Error tearing down cancelled operation for job {token.job_id}: {str(e)}")
+    raise JobCancelled(token.job_id)
@@ -0,0 +1,107 @@
+"""
+Job event bus.
+
+Publishes job progress (status changes, workflow node transitions and render
+progress) to the shared job store's event log and wakes subscribers in the same
+process immediately. Subscribers on other replicas pick events up from the
+store on their next poll of the (indexed) event log, so a client can stream a
+job's progress from any replica.
+"""
+import asyncio
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from leap.core.config import EVENT_POLL_INTERVAL, EVENT_RETENTION
+from leap.services.job_store import JobEvent, JobId, JobStore, get_job_store
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def is_terminal(event: JobEvent) -> bool:
+    """Return True if the event ends the job's stream."""
+    return event.type == "status" and event.data.get("status") in TERMINAL_STATUSES
+
+
+class EventBus:
+    """Publish/subscribe for job events backed by the job store."""
+
+    def __init__(self, store: JobStore, poll_interval: float = EVENT_POLL_INTERVAL):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def publish(self, job_id: JobId, type: str, data: Dict[str, Any]) -> Optional[JobEvent]:
+        """Record an event and notify local subscribers.
+
+        Publishing never fails the caller: progress events are best effort.
+
+        Args:
+            job_id: The job the event belongs to
+            type: Event type ("status", "node", "render", ...)
+            data: JSON-serializable event payload
+
+        Returns:
+            The recorded event, or None if it could not be stored
+        """
+        try:
+            event = self.store.append_event(job_id, type, data)
+            if is_terminal(event):
+                self.store.prune_events(time.time() - EVENT_RETENTION)
+        except Exception as e:
+            logger.error(f"Error publishing {type} event for job {job_id}: {str(e)}")
+            return None
+
+        with self.lock:
+            waiters = list(self.waiters.get(str(job_id), ()))
+        for loop, wakeup in waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # The subscriber's event loop has already closed
+                pass
+        return event
+
+    async def subscribe(self, job_id: JobId, after: int = 0) -> AsyncIterator[JobEvent]:
+        """Yield a job's events after ``after`` until its final status event.
+
+        Args:
+            job_id: The job to follow
+            after: Sequence number of the last event the subscriber has seen
+        """
+        key = str(job_id)
+        wakeup = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), wakeup)
+        with self.lock:
+            self.waiters.setdefault(key, set()).add(waiter)
+        try:
+            while True:
+                # Clear before reading so an event published mid-read still wakes us
+                wakeup.clear()
+                events = await asyncio.to_thread(self.store.events_since, key, after)
+                for event in events:
+                    after = event.seq
+                    yield event
+                    if is_terminal(event):
+                        return
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self.lock:
+                self.waiters[key].discard(waiter)
+                if not self.waiters[key]:
+                    del self.waiters[key]
+
+
+@lru_cache(maxsize=1)
+def get_event_bus() -> EventBus:
+    """Return the process-wide event bus."""
+    return EventBus(get_job_store())
+
@@ -0,0 +1,221 @@
+"""
+Few-shot example retrieval for code generation.
+
+Saved scenes and example templates are split into one chunk per scene method
+and indexed with BM25 over identifier, string and comment words. Code
+generation asks for the chunks most relevant to the question and plan, up to
+a token budget, instead of inlining one fixed example for every topic.
+Everything is local: the index is built in memory from the files on first use.
+"""
+import ast
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from leap.core.config import EXAMPLE_TOKEN_BUDGET, EXAMPLE_TOP_K, PACKAGE_DIR
+from leap.prompts.budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+EXAMPLE_DIRS = (PACKAGE_DIR / "saved_scenes", PACKAGE_DIR / "templates" / "examples")
+FALLBACK_EXAMPLE = PACKAGE_DIR / "templates" / "examples" / "gcf.py"
+
+# Words too common in Manim code or questions to tell scenes apart
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "if", "in", "is", "it", "of", "on", "or", "the", "this", "to", "what", "when", "why", "with",
+    "self", "def", "return", "none", "true", "false", "import", "class", "play", "wait", "run",
+    "time", "tracker", "duration", "text", "font", "size", "color", "scene", "manim", "voiceover",
+    "explain", "work", "works", "show", "tell", "me", "about", "mean", "means", "understand",
+}
+
+# BM25 score below which a chunk only shares incidental words with the question
+MIN_SCORE = 2.0
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text and identifiers (``snake_case``, ``CamelCase``) into lowercase words."""
+    return [
+        word for word in (match.lower() for match in _WORD.findall(text))
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+@dataclass
+class ExampleChunk:
+    """One method of an example scene."""
+    source: str
+    class_name: str
+    class_header: str
+    name: str
+    lineno: int
+    code: str
+    words: List[str] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.code)
+
+
+def chunk_scene_file(path: Path, root: Optional[Path] = None) -> List[ExampleChunk]:
+    """Split a scene file into one chunk per method of each class.
+
+    Files that do not parse are skipped.
+    """
+    try:
+        source = path.read_text()
+        tree = ast.parse(source)
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.warning(f"Skipping example {path.name}: {str(e)}")
+        return []
+
+    lines = source.splitlines()
+    name = str(path.relative_to(root)) if root else path.name
+    # File and directory names often name the topic (GradientDescent/GradientDescent.py)
+    topic_words = tokenize(name)
+    chunks = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        header = lines[node.lineno - 1].rstrip()
+        class_words = topic_words + tokenize(node.name) + tokenize(ast.get_docstring(node) or "")
+        for item in node.body:
+            if not isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            start = min([item.lineno] + [d.lineno for d in item.decorator_list])
+            code = "\n".join(lines[start - 1:item.end_lineno])
+            chunks.append(ExampleChunk(
+                source=name,
+                class_name=node.name,
+                class_header=header,
+                name=item.name,
+                lineno=start,
+                code=code,
+                words=class_words + tokenize(code),
+            ))
+    return chunks
+
+
+class ExampleRetriever:
+    """BM25 index over example scene methods."""
+
+    def __init__(self, chunks: Sequence[ExampleChunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(chunk.words) for chunk in self.chunks]
+        self.lengths = [len(chunk.words) for chunk in self.chunks]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        n = len(self.chunks)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    @classmethod
+    def from_directories(cls, directories: Iterable[Path] = EXAMPLE_DIRS) -> "ExampleRetriever":
+        """Index every scene file under the given directories."""
+        chunks = []
+        for directory in directories:
+            if not directory.exists():
+                continue
+            for path in sorted(directory.rglob("*.py")):
+                if "__pycache__" in path.parts or path.name == "__init__.py":
+                    continue
+                chunks.extend(chunk_scene_file(path, directory.parent))
+        logger.info(f"Indexed {len(chunks)} example scene methods")
+        return cls(chunks)
+
+    def score(self, query_words: Sequence[str]) -> List[Tuple[float, ExampleChunk]]:
+        """Return the chunks matching any query word with their BM25 scores, best first."""
+        query = Counter(query_words)
+        scored = []
+        for chunk, counts, length in zip(self.chunks, self.term_counts, self.lengths):
+            score = 0.0
+            for term, weight in query.items():
+                frequency = counts.get(term)
+                if not frequency:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+                score += weight * self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            if score > 0:
+                scored.append((score, chunk))
+        scored.sort(key=lambda pair: -pair[0])
+        return scored
+
+    def search(self, query: str, context: str = "", top_k: int = EXAMPLE_TOP_K,
+               token_budget: int = EXAMPLE_TOKEN_BUDGET) -> List[ExampleChunk]:
+        """Return the most relevant chunks that fit in the token budget.
+
+        Args:
+            query: The user's question; its words count double
+            context: Additional text to match, such as the scene plan
+            top_k: Maximum number of chunks
+            token_budget: Maximum estimated tokens of all chunks together
+
+        Returns:
+            The selected chunks, best first
+        """
+        selected = []
+        used = 0
+        for score, chunk in self.score(tokenize(query) * 2 + tokenize(context)):
+            if len(selected) >= top_k or score < MIN_SCORE:
+                break
+            if used + chunk.tokens > token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk.tokens
+        return selected
+
+
+def format_examples(chunks: Sequence[ExampleChunk]) -> str:
+    """Render chunks as excerpts of their scenes, grouped by class in file order."""
+    groups: Dict[Tuple[str, str], List[ExampleChunk]] = {}
+    for chunk in chunks:
+        groups.setdefault((chunk.source, chunk.class_name), []).append(chunk)
+    parts = []
+    for (source, _), members in groups.items():
+        members.sort(key=lambda chunk: chunk.lineno)
+        body = "\n\n".join(chunk.code for chunk in members)
+        parts.append(f"# Excerpt from {source}\n{members[0].class_header}\n{body}")
+    return "\n\n".join(parts)
+
+
+_retriever: Optional[ExampleRetriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_example_retriever() -> ExampleRetriever:
+    """Return the process-wide example index, building it on first use."""
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = ExampleRetriever.from_directories()
+    return _retriever
+
+
+def retrieve_examples(query: str, context: str = "", top_k: int = EXAMPLE_TOP_K,
+                      token_budget: int = EXAMPLE_TOKEN_BUDGET) -> str:
+    """Return the example code most relevant to a question, within the token budget.
+
+    Falls back to the GCF example scene, trimmed to the budget by method, when
+    no example is relevant.
+    """
+    chunks = get_example_retriever().search(query, context, top_k, token_budget)
+    if not chunks:
+        chunks = []
+        used = 0
+        for chunk in chunk_scene_file(FALLBACK_EXAMPLE, FALLBACK_EXAMPLE.parent.parent):
+            if used + chunk.tokens <= token_budget:
+                chunks.append(chunk)
+                used += chunk.tokens
+    return format_examples(chunks)
@@ -0,0 +1,333 @@
+"""
+Local fast path for input validation.
+
+Most questions are plainly fine ("How does gradient descent work?") or plainly
+not ("asdfgh jkl"), and asking the LLM about them costs a network round-trip
+per job. ``InputClassifier`` decides those cases offline from a topic lexicon
+and word lists, and escalates everything else to the LLM:
+
+- inputs with a blocked term, or that are keyboard mash, are rejected
+- inputs with a sensitive term ("kill", "drug") always go to the LLM, which
+  can tell "How do antibiotics kill bacteria?" from a harmful request
+- questions whose content words are mostly known topics are accepted
+
+The lexicon is built from a seed list of subject words, the names and
+docstrings of the saved scenes, and the words the LLM tagged as the topic of
+earlier prompts it accepted, which are persisted so the fast path covers more
+with every job.
+
+An accepted input keeps the user's wording: the fast path does not reformulate
+the question the way the LLM does.
+"""
+import ast
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from leap.core import metrics
+from leap.core.config import (
+    INPUT_FAST_PATH_MIN_COVERAGE,
+    INPUT_LEXICON_MIN_COUNT,
+    INPUT_LEXICON_PATH,
+    PACKAGE_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+SCENE_DIR = PACKAGE_DIR / "saved_scenes"
+
+# Verdicts
+ACCEPT = "accept"
+REJECT = "reject"
+ESCALATE = "escalate"
+
+# Subjects the app is built to animate
+SEED_TOPICS = {
+    # Mathematics
+    "algebra", "geometry", "calculus", "derivative", "derivatives", "integral", "integrals", "integration",
+    "differentiation", "limit", "limits", "function", "functions", "equation", "equations", "polynomial",
+    "polynomials", "quadratic", "linear", "matrix", "matrices", "vector", "vectors", "eigenvalue",
+    "eigenvalues", "eigenvector", "eigenvectors", "determinant", "tensor", "probability", "statistics",
+    "variance", "deviation", "distribution", "gaussian", "bayes", "theorem", "pythagorean", "triangle",
+    "triangles", "circle", "circles", "angle", "angles", "sine", "cosine", "tangent", "trigonometry",
+    "logarithm", "logarithms", "exponential", "exponent", "exponents", "fraction", "fractions", "prime",
+    "primes", "factorial", "fibonacci", "sequence", "series", "convergence", "infinity", "topology",
+    "fourier", "laplace", "transform", "complex", "imaginary", "number", "numbers", "multiplication",
+    "division", "addition", "subtraction", "gcd", "lcm", "divisor", "set", "sets", "graph", "graphs",
+    "parabola", "ellipse", "hyperbola", "slope", "area", "volume", "perimeter", "symmetry", "proof",
+    # Physics
+    "physics", "gravity", "gravitational", "force", "forces", "motion", "velocity", "acceleration",
+    "momentum", "energy", "kinetic", "potential", "friction", "mass", "inertia", "newton", "relativity",
+    "quantum", "entanglement", "wave", "waves", "frequency", "wavelength", "light", "optics", "refraction",
+    "reflection", "diffraction", "interference", "electricity", "electric", "magnetic", "magnetism",
+    "electromagnetic", "circuit", "circuits", "current", "voltage", "resistance", "thermodynamics",
+    "entropy", "heat", "temperature", "pressure", "pendulum", "oscillation", "orbit", "orbits", "planet",
+    "planets", "star", "stars", "galaxy", "universe", "black", "hole", "holes", "atom", "atoms", "electron",
+    "electrons", "proton", "photon", "nuclear", "fission", "fusion", "radiation", "sound", "doppler",
+    # Chemistry
+    "chemistry", "chemical", "molecule", "molecules", "bond", "bonds", "reaction", "reactions", "acid",
+    "acids", "base", "bases", "ph", "oxidation", "catalyst", "periodic", "element", "elements", "isotope",
+    "isotopes", "ion", "ions", "compound", "compounds", "solution", "solubility", "equilibrium",
+    # Biology and earth science
+    "biology", "cell", "cells", "dna", "rna", "gene", "genes", "genetics", "protein", "proteins", "enzyme",
+    "enzymes", "evolution", "natural", "selection", "photosynthesis", "respiration", "mitosis", "meiosis",
+    "virus", "viruses", "bacteria", "immune", "neuron", "neurons", "brain", "heart", "blood", "ecosystem",
+    "climate", "weather", "volcano", "volcanoes", "earthquake", "earthquakes", "tectonic", "plates",
+    "erosion", "water", "cycle", "carbon", "oxygen", "nitrogen", "atmosphere", "ocean", "tides", "seasons",
+    # Computing and machine learning
+    "algorithm", "algorithms", "sorting", "sort", "search", "binary", "recursion", "recursive", "complexity",
+    "array", "arrays", "list", "lists", "tree", "trees", "hash", "hashing", "stack", "queue", "pointer",
+    "compiler", "encryption", "cryptography", "rsa", "blockchain", "network", "networks", "internet",
+    "protocol", "database", "neural", "learning", "machine", "regression", "classification", "clustering",
+    "gradient", "descent", "backpropagation", "perceptron", "transformer", "transformers", "attention",
+    "embedding", "embeddings", "overfitting", "regularization", "normalization", "standardization",
+    "convolution", "convolutional", "optimization", "loss", "entropy", "softmax", "sigmoid", "activation",
+    "bias", "variance", "dimensionality", "pca", "svm", "boundary", "decision", "outlier", "outliers",
+    "scaling", "batch", "dropout", "tokenization", "markov", "monte", "carlo",
+    # Economics
+    "economics", "inflation", "interest", "compound", "supply", "demand", "market", "elasticity",
+    "equilibrium", "gdp", "tax", "taxes", "price", "prices",
+}
+
+# Words that shape a question without saying what it is about
+FUNCTION_WORDS = {
+    "a", "about", "after", "all", "also", "an", "and", "any", "are", "as", "at", "be", "because", "been",
+    "before", "between", "both", "but", "by", "can", "could", "did", "do", "does", "doing", "done", "each",
+    "for", "from", "get", "gets", "give", "had", "has", "have", "help", "her", "his", "how", "i", "if", "in",
+    "into", "is", "it", "its", "just", "let", "like", "make", "makes", "me", "more", "most", "much", "my",
+    "need", "not", "now", "of", "on", "one", "or", "other", "our", "out", "over", "please", "really", "she",
+    "should", "show", "so", "some", "such", "than", "that", "the", "their", "them", "then", "there",
+    "these", "they", "thing", "things", "this", "those", "through", "to", "two", "under", "up", "us",
+    "use", "used", "uses", "using", "very", "via", "want", "was", "way", "ways", "we", "were", "what",
+    "when", "where", "which", "while", "who", "why", "will", "with", "would", "you", "your",
+    # Words every explanation request uses
+    "explain", "explained", "explaining", "describe", "visualize", "visualise", "illustrate", "animate",
+    "animation", "teach", "understand", "understanding", "learn", "mean", "means", "meaning", "work",
+    "works", "working", "happen", "happens", "process", "concept", "idea", "basics", "simple", "example",
+    "examples", "intuition", "intuitive", "difference", "different", "relationship", "role", "affect",
+    "affects", "effect", "effects", "cause", "causes", "defined", "definition", "define", "important",
+    "step", "steps", "video", "tell", "know", "see", "look", "first", "next", "here", "new", "called",
+}
+
+# Words in scene names that describe the scene rather than its topic
+SCENE_NAME_WORDS = {
+    "scene", "scenes", "intro", "introduction", "summary", "title", "part", "new", "old", "test", "demo",
+    "setup", "final", "verified", "workflow", "types", "view", "side", "py", "vs", "without", "better",
+    "too", "right", "left", "large", "small", "three", "needed", "handles", "visual", "animated",
+}
+
+# Openings and endings of a question or topic request
+QUESTION_STARTS = {
+    "how", "why", "what", "when", "where", "which", "who", "explain", "describe", "show", "visualize",
+    "visualise", "illustrate", "animate", "teach", "derive", "prove", "compare", "define", "is", "are",
+    "can", "does", "do", "introduce", "walk",
+}
+
+# Terms that are never suitable for an educational animation
+BLOCKED_TERMS = {
+    "porn", "porno", "pornography", "pornographic", "nsfw", "xxx", "nude", "nudes", "naked", "hentai",
+    "onlyfans", "sexy", "erotic", "fetish",
+}
+
+# Terms that are fine in some questions and not others; the LLM decides
+SENSITIVE_TERMS = {
+    "kill", "killing", "kills", "murder", "suicide", "die", "dying", "death", "dead", "bomb", "bombs",
+    "explosive", "explosives", "weapon", "weapons", "gun", "guns", "drug", "drugs", "poison", "poisonous",
+    "hack", "hacking", "steal", "attack", "attacks", "terror", "terrorism", "terrorist", "war", "abuse",
+    "racist", "racism", "nazi", "sex", "sexual", "alcohol", "gambling", "cheat", "cheating",
+    "harm", "hate", "violence", "violent", "torture",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_VOWELS = set("aeiouy")
+_CONSONANT_RUN = re.compile(r"[^aeiouy\d]{5,}")
+_REPEATED = re.compile(r"(.)\1{3,}")
+
+
+def words_of(text: str) -> List[str]:
+    """Split text into lowercase words."""
+    return _WORD.findall(text.lower())
+
+
+def content_words(text: str) -> List[str]:
+    """Return the words of a text that say what it is about."""
+    return [word for word in words_of(text) if len(word) > 1 and not word.isdigit() and word not in FUNCTION_WORDS]
+
+
+def _is_mash(word: str) -> bool:
+    """Return whether a word looks like keyboard mash rather than a word."""
+    if word.isdigit() or len(word) < 4:
+        return False
+    return not (set(word) & _VOWELS) or bool(_CONSONANT_RUN.search(word)) or bool(_REPEATED.search(word))
+
+
+def scene_topic_words(directory: Path = SCENE_DIR) -> Set[str]:
+    """Collect topic words from saved scenes: their file, directory and class names and docstrings."""
+    from leap.services.example_retriever import tokenize
+
+    words: Set[str] = set()
+    if not directory.exists():
+        return words
+    for path in directory.rglob("*.py"):
+        if "__pycache__" in path.parts or path.name == "__init__.py":
+            continue
+        words.update(tokenize(str(path.relative_to(directory))))
+        try:
+            tree = ast.parse(path.read_text())
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                words.update(tokenize(node.name))
+                words.update(content_words(ast.get_docstring(node) or ""))
+    return {
+        word for word in words
+        if len(word) > 2 and not word.isdigit() and word not in FUNCTION_WORDS and word not in SCENE_NAME_WORDS
+    }
+
+
+@dataclass
+class InputDecision:
+    """The fast-path verdict on an input.
+
+    Attributes:
+        verdict: ``accept``, ``reject`` or ``escalate``
+        reason: Short machine-readable reason, used as a metric label
+        explanation: Why the input was rejected, shown to the user
+        topic_words: The content words found in the lexicon
+    """
+    verdict: str
+    reason: str
+    explanation: str = ""
+    topic_words: List[str] = field(default_factory=list)
+
+
+class InputClassifier:
+    """Offline classifier that accepts or rejects clear inputs and escalates the rest."""
+
+    def __init__(
+        self,
+        topics: Iterable[str] = (),
+        learned: Optional[Dict[str, int]] = None,
+        lexicon_path: Optional[Path] = None,
+        min_coverage: float = INPUT_FAST_PATH_MIN_COVERAGE,
+        min_count: int = INPUT_LEXICON_MIN_COUNT
+    ):
+        self.topics = set(topics)
+        self.learned: Dict[str, int] = dict(learned or {})
+        self.lexicon_path = lexicon_path
+        self.min_coverage = min_coverage
+        self.min_count = min_count
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_sources(cls, lexicon_path: Path = INPUT_LEXICON_PATH) -> "InputClassifier":
+        """Build the classifier from the seed topics, saved scenes and learned prompt words."""
+        topics = SEED_TOPICS | scene_topic_words()
+        learned = _load_learned(lexicon_path)
+        logger.info(f"Input lexicon has {len(topics)} topic words and {len(learned)} learned words")
+        return cls(topics, learned, lexicon_path)
+
+    def is_topic(self, word: str) -> bool:
+        """Return whether a word is a known topic."""
+        return word in self.topics or self.learned.get(word, 0) >= self.min_count
+
+    def classify(self, text: str) -> InputDecision:
+        """Decide an input locally, or escalate it to the LLM, and count the decision."""
+        decision = self._decide(text)
+        metrics.INPUT_DECISIONS.inc(decision=decision.verdict, reason=decision.reason)
+        return decision
+
+    def _decide(self, text: str) -> InputDecision:
+        words = words_of(text)
+        blocked = [word for word in words if word in BLOCKED_TERMS]
+        if blocked:
+            return InputDecision(
+                REJECT, "blocked",
+                "the request contains content that is not suitable for an educational animation."
+            )
+        if any(word in SENSITIVE_TERMS for word in words):
+            return InputDecision(ESCALATE, "sensitive")
+
+        alphabetic = [word for word in words if not word.isdigit()]
+        known = [word for word in alphabetic if word in FUNCTION_WORDS or self.is_topic(word)]
+        mash = [word for word in alphabetic if _is_mash(word)]
+        if not alphabetic or (not known and len(mash) * 2 >= len(alphabetic)):
+            return InputDecision(REJECT, "gibberish", "the request does not look like a question or topic.")
+
+        if words[0] not in QUESTION_STARTS and not text.rstrip().endswith("?"):
+            return InputDecision(ESCALATE, "not_a_question")
+        content = content_words(text)
+        topic_words = [word for word in content if self.is_topic(word)]
+        if not topic_words:
+            return InputDecision(ESCALATE, "no_topic")
+        if len(topic_words) < self.min_coverage * len(content):
+            return InputDecision(ESCALATE, "low_coverage", topic_words=topic_words)
+        return InputDecision(ACCEPT, "topic", topic_words=topic_words)
+
+    def learn(self, text: str, topic_words: Iterable[str]) -> None:
+        """Add the words the LLM tagged as the topic of an accepted input to the learned lexicon.
+
+        Only tagged words that are content words of the input are counted, so
+        the other words of accepted prompts never become topics.
+        The counts on disk are re-read before writing, so processes sharing the
+        file add to each other's counts instead of overwriting them.
+
+        Args:
+            text: The input the LLM accepted
+            topic_words: The words the LLM said name the input's subject
+        """
+        tagged = {word for tag in topic_words for word in words_of(tag)}
+        words = (set(content_words(text)) & tagged) - SENSITIVE_TERMS
+        if not words:
+            return
+        with self.lock:
+            counts = Counter(_load_learned(self.lexicon_path) if self.lexicon_path else self.learned)
+            counts.update(words)
+            self.learned = dict(counts)
+            if self.lexicon_path:
+                _save_learned(self.lexicon_path, self.learned)
+
+
+def _load_learned(path: Path) -> Dict[str, int]:
+    """Read learned word counts, or nothing if the file is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return {str(word): int(count) for word, count in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Could not read input lexicon {path}: {str(e)}")
+        return {}
+
+
+def _save_learned(path: Path, learned: Dict[str, int]) -> None:
+    """Write learned word counts atomically."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(learned, f, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not persist input lexicon to {path}: {str(e)}")
+
+
+_classifier: Optional[InputClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_input_classifier() -> InputClassifier:
+    """Return the process-wide input classifier, building its lexicon on first use."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = InputClassifier.from_sources()
+    return _classifier
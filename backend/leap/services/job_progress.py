@@ -0,0 +1,270 @@
+"""
+Fine-grained job progress.
+
+A ``ProgressTracker`` follows a job through the workflow: it is told when each
+node starts and finishes and how far the Manim render has got, keeps per-node
+timings, the correction attempt and the animation being rendered, and estimates
+the time remaining. Every update is saved compactly with the job and published
+on the event bus, so the status API and the event stream report the same data.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from leap.core.config import MAX_ATTEMPTS, NODE_DURATION_ESTIMATES
+from leap.services.event_bus import EventBus, get_event_bus
+from leap.services.job_store import Job, JobId, JobStore
+
+logger = logging.getLogger(__name__)
+
+# The nodes a job passes through when nothing needs correcting
+HAPPY_PATH = ["validate_input", "plan_scenes", "generate_code", "validate_code", "execute_code"]
+
+# Smoothing factor for the per-node duration estimates learned from finished nodes
+ESTIMATE_ALPHA = 0.2
+
+_estimates: Dict[str, float] = dict(NODE_DURATION_ESTIMATES)
+_estimates_lock = threading.Lock()
+
+
+def _observe_duration(node: str, seconds: float) -> None:
+    """Fold an observed node duration into the running estimate."""
+    with _estimates_lock:
+        previous = _estimates.get(node)
+        _estimates[node] = seconds if previous is None else previous + ESTIMATE_ALPHA * (seconds - previous)
+
+
+def _estimate(node: str) -> float:
+    with _estimates_lock:
+        return _estimates.get(node, 0.0)
+
+
+def estimated_job_duration() -> float:
+    """Return the expected processing time of a job that needs no corrections."""
+    return sum(_estimate(node) for node in HAPPY_PATH)
+
+
+@dataclass
+class JobProgress:
+    """Where a job is in the workflow and how long its steps took."""
+    started_at: Optional[float] = None
+    stage: Optional[str] = None
+    stage_started_at: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    attempt: int = 0
+    max_attempts: int = MAX_ATTEMPTS
+    animation: Optional[int] = None
+    animations_total: Optional[int] = None
+    render_percent: Optional[int] = None
+    prompt_tokens: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def render_fraction(self) -> Optional[float]:
+        """Return the fraction of the render completed, if it can be estimated."""
+        if self.animation is None or not self.animations_total:
+            return None
+        done = self.animation + (self.render_percent or 0) / 100
+        return min(1.0, done / max(self.animations_total, self.animation + 1))
+
+    def eta_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        """Estimate the seconds until the job finishes.
+
+        Remaining happy-path nodes are costed with the learned per-node
+        estimates. While rendering, the render's own progress is extrapolated.
+        """
+        if self.started_at is None:
+            return None
+        now = time.time() if now is None else now
+
+        remaining = 0.0
+        if self.stage:
+            in_stage = now - self.stage_started_at if self.stage_started_at is not None else 0.0
+            fraction = self.render_fraction() if self.stage == "execute_code" else None
+            if fraction:
+                remaining += in_stage * (1 - fraction) / fraction
+            else:
+                remaining += max(_estimate(self.stage) - in_stage, 0.0)
+
+        if self.stage in HAPPY_PATH:
+            upcoming = HAPPY_PATH[HAPPY_PATH.index(self.stage) + 1:]
+        elif self.stage in ("auto_fix", "correct_code"):
+            # A corrected script is validated and rendered again
+            upcoming = ["validate_code", "execute_code"]
+        else:
+            upcoming = [node for node in HAPPY_PATH if node not in self.timings]
+        remaining += sum(_estimate(node) for node in upcoming)
+        return round(remaining, 1)
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Serialize the progress, leaving out empty fields, with elapsed time and ETA."""
+        now = time.time() if now is None else now
+        data: Dict[str, Any] = {
+            "started_at": self.started_at,
+            "stage": self.stage,
+            "stage_started_at": self.stage_started_at,
+            "timings": {node: round(seconds, 1) for node, seconds in self.timings.items()},
+            "attempt": self.attempt,
+            "max_attempts": self.max_attempts,
+            "animation": self.animation,
+            "animations_total": self.animations_total,
+            "render_percent": self.render_percent,
+            "prompt_tokens": self.prompt_tokens,
+            "elapsed_seconds": round(now - self.started_at, 1) if self.started_at is not None else None,
+            "eta_seconds": self.eta_seconds(now),
+        }
+        return {key: value for key, value in data.items() if value not in (None, {})}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JobProgress":
+        """Rebuild progress saved with :meth:`to_dict`."""
+        return cls(
+            started_at=data.get("started_at"),
+            stage=data.get("stage"),
+            stage_started_at=data.get("stage_started_at"),
+            timings=dict(data.get("timings", {})),
+            attempt=data.get("attempt", 0),
+            max_attempts=data.get("max_attempts", MAX_ATTEMPTS),
+            animation=data.get("animation"),
+            animations_total=data.get("animations_total"),
+            render_percent=data.get("render_percent"),
+            prompt_tokens={node: dict(tokens) for node, tokens in data.get("prompt_tokens", {}).items()},
+        )
+
+
+def progress_snapshot(progress: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Recompute elapsed time and ETA for progress loaded from the job store."""
+    if not progress:
+        return None
+    return JobProgress.from_dict(progress).to_dict()
+
+
+class ProgressTracker:
+    """Records a job's progress and publishes every change."""
+
+    def __init__(self, job: Job, store: JobStore, event_bus: Optional[EventBus] = None):
+        self.job = job
+        self.store = store
+        self.event_bus = event_bus or get_event_bus()
+        self.progress = JobProgress.from_dict(job.progress or {})
+        if self.progress.started_at is None:
+            self.progress.started_at = time.time()
+        self.lock = threading.Lock()
+
+    def node_started(self, node: str, state: Optional[Dict[str, Any]] = None) -> None:
+        """Record that a workflow node started.
+
+        Args:
+            node: The node name
+            state: The state the node was called with
+        """
+        with self.lock:
+            self.progress.stage = node
+            self.progress.stage_started_at = time.time()
+            if state:
+                self.progress.attempt = state.get("correction_attempts", 0) or 0
+            if node == "execute_code":
+                self.progress.animation = self.progress.render_percent = None
+            self._publish("node", {"node": node, "phase": "start"})
+
+    def node_finished(self, node: str) -> None:
+        """Record that a workflow node finished and how long it took."""
+        with self.lock:
+            if self.progress.stage != node or self.progress.stage_started_at is None:
+                return
+            seconds = time.time() - self.progress.stage_started_at
+            self.progress.timings[node] = self.progress.timings.get(node, 0.0) + seconds
+            self.progress.stage = self.progress.stage_started_at = None
+            _observe_duration(node, seconds)
+            self._publish("node", {"node": node, "phase": "end", "seconds": round(seconds, 1)})
+
+    def render(self, animation: int, percent: int, total: Optional[int] = None) -> None:
+        """Record render progress for the animation being rendered."""
+        with self.lock:
+            self.progress.animation = animation
+            self.progress.render_percent = percent
+            if total:
+                self.progress.animations_total = max(total, animation + 1)
+            self._publish("render", {"animation": animation, "percent": percent, "total": self.progress.animations_total})
+
+    def prompt_built(self, node: str, tokens: Dict[str, int]) -> None:
+        """Record the tokens per component of the prompt a node sent.
+
+        Saved and published with the node's end.
+        """
+        with self.lock:
+            self.progress.prompt_tokens[node] = dict(tokens)
+
+    def _publish(self, type: str, data: Dict[str, Any]) -> None:
+        snapshot = self.progress.to_dict()
+        self.job.progress = snapshot
+        try:
+            # Only the progress is written, so a status set meanwhile by another process (e.g. cancelled) stays
+            self.store.save_progress(self.job.id, snapshot)
+        except Exception as e:
+            logger.error(f"Error saving progress for job {self.job.id}: {str(e)}")
+        self.event_bus.publish(self.job.id, type, {**data, "progress": snapshot})
+
+
+_active: Dict[str, ProgressTracker] = {}
+_active_lock = threading.Lock()
+
+
+@contextmanager
+def tracking(tracker: ProgressTracker) -> Iterator[ProgressTracker]:
+    """Make a tracker receive the render progress reported for its job in this process."""
+    key = str(tracker.job.id)
+    with _active_lock:
+        _active[key] = tracker
+    try:
+        yield tracker
+    finally:
+        with _active_lock:
+            if _active.get(key) is tracker:
+                del _active[key]
+
+
+def render_progress_reporter(
+    job_id: JobId,
+    total: Optional[int] = None,
+    step: int = 10,
+) -> Callable[[int, int], None]:
+    """Return a Manim progress callback that reports throttled render progress.
+
+    Progress goes to the job's tracker when one is active in this process, and
+    is published as a plain render event otherwise.
+
+    Args:
+        job_id: The job being rendered
+        total: Estimated number of animations in the scene
+        step: Minimum change in percent before another update is reported
+
+    Returns:
+        A callback taking the animation index and its percent complete
+    """
+    last: Dict[str, int] = {"animation": -1, "percent": -1}
+
+    def report(animation: int, percent: int) -> None:
+        if animation == last["animation"]:
+            finished = percent == 100 and last["percent"] < 100
+            if percent - last["percent"] < step and not finished:
+                return
+        last["animation"], last["percent"] = animation, percent
+
+        with _active_lock:
+            tracker = _active.get(str(job_id))
+        if tracker:
+            tracker.render(animation, percent, total)
+        else:
+            get_event_bus().publish(job_id, "render", {"animation": animation, "percent": percent, "total": total})
+
+    return report
+
+
+def record_prompt_tokens(job_id: JobId, node: str, tokens: Dict[str, int]) -> None:
+    """Record a node's prompt size in the progress of its job, if the job is tracked in this process."""
+    with _active_lock:
+        tracker = _active.get(str(job_id))
+    if tracker:
+        tracker.prompt_built(node, tokens)
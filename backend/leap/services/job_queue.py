@@ -0,0 +1,313 @@
+"""
+Durable job queue backed by SQLite.
+
+The web tier enqueues animation jobs and dedicated worker processes lease them.
+A lease is only valid for the visibility timeout; workers extend it while they
+are alive, so a job held by a crashed worker becomes visible again and is
+retried. Jobs that fail ``max_attempts`` times are moved to the dead-letter state.
+
+Ready jobs are not leased in arrival order but by the ``SchedulingPolicy``
+(priority class, render quality, per-tenant fair share and aging), and every
+decision is logged.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from leap.core.config import (
+    JOB_QUEUE_DB_PATH,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_RETRY_BACKOFF,
+    QUEUE_VISIBILITY_TIMEOUT,
+    SCHEDULER_WINDOW,
+)
+from leap.services.scheduling import INTERACTIVE, PREVIEW, Candidate, SchedulingPolicy
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+CANCELLED = "cancelled"
+
+
+@dataclass
+class QueueItem:
+    """A job leased from the queue."""
+    id: int
+    job_id: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    status: str = QUEUED
+    worker: Optional[str] = None
+    last_error: Optional[str] = None
+    priority_class: str = INTERACTIVE
+    quality_class: str = PREVIEW
+    tenant: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "QueueItem":
+        return cls(
+            id=row["id"],
+            job_id=row["job_id"],
+            payload=json.loads(row["payload"]),
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            status=row["status"],
+            worker=row["worker"],
+            last_error=row["last_error"],
+            priority_class=row["priority_class"] or INTERACTIVE,
+            quality_class=row["quality_class"] or PREVIEW,
+            tenant=row["tenant"],
+        )
+
+
+class JobQueue:
+    """Persistent job queue with visibility timeouts, retries and dead-lettering."""
+
+    def __init__(
+        self,
+        db_path: Path = JOB_QUEUE_DB_PATH,
+        visibility_timeout: float = QUEUE_VISIBILITY_TIMEOUT,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS,
+        retry_backoff: float = QUEUE_RETRY_BACKOFF,
+        policy: Optional[SchedulingPolicy] = None,
+    ):
+        self.db_path = Path(db_path)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.policy = policy or SchedulingPolicy()
+        self.lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode so transactions are controlled explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_expires_at REAL,
+                worker TEXT,
+                last_error TEXT,
+                priority_class TEXT,
+                quality_class TEXT,
+                tenant TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        # Queues created before scheduling was added
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(job_queue)")}
+        for column in ("priority_class", "quality_class", "tenant"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE job_queue ADD COLUMN {column} TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_ready ON job_queue (status, available_at)")
+
+    def enqueue(
+        self,
+        job_id: str,
+        payload: Dict[str, Any],
+        max_attempts: Optional[int] = None,
+        priority_class: str = INTERACTIVE,
+        quality_class: str = PREVIEW,
+        tenant: Optional[str] = None,
+    ) -> None:
+        """Add a job to the queue.
+
+        Args:
+            job_id: The job ID (enqueueing the same job twice is a no-op)
+            payload: JSON-serializable job parameters
+            max_attempts: Attempts before the job is dead-lettered
+            priority_class: Scheduling class ("interactive" or "offline")
+            quality_class: Render quality class ("preview" or "final")
+            tenant: Who the job is for (email or IP), for fair sharing of render slots
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO job_queue "
+                "(job_id, payload, status, max_attempts, available_at, priority_class, quality_class, tenant, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(job_id), json.dumps(payload), QUEUED, max_attempts or self.max_attempts, now,
+                    priority_class, quality_class, tenant, now, now
+                )
+            )
+        logger.info(f"Enqueued job {job_id} ({priority_class}, {quality_class})")
+
+    def lease(self, worker: str) -> Optional[QueueItem]:
+        """Lease the available job the scheduling policy ranks highest.
+
+        Jobs whose lease expired (the worker died) are leased again, or
+        dead-lettered if they already used all their attempts.
+
+        Args:
+            worker: Identifier of the leasing worker
+
+        Returns:
+            The leased job, or None if the queue is empty
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that are out of attempts go to the dead-letter state
+                self.conn.execute(
+                    "UPDATE job_queue SET status = ?, last_error = 'Lease expired', updated_at = ? "
+                    "WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+                    (DEAD, now, LEASED, now)
+                )
+                rows = self.conn.execute(
+                    "SELECT * FROM job_queue "
+                    "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?) "
+                    "ORDER BY available_at, id LIMIT ?",
+                    (QUEUED, now, LEASED, now, SCHEDULER_WINDOW)
+                ).fetchall()
+                if not rows:
+                    self.conn.execute("COMMIT")
+                    return None
+                running = dict(self.conn.execute(
+                    "SELECT tenant, COUNT(*) FROM job_queue "
+                    "WHERE status = ? AND lease_expires_at >= ? AND tenant IS NOT NULL GROUP BY tenant",
+                    (LEASED, now)
+                ).fetchall())
+                row = self._schedule(rows, running, now)
+                self.conn.execute(
+                    "UPDATE job_queue SET status = ?, attempts = attempts + 1, lease_expires_at = ?, "
+                    "worker = ?, updated_at = ? WHERE id = ?",
+                    (LEASED, now + self.visibility_timeout, worker, now, row["id"])
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        item = QueueItem.from_row(row)
+        item.attempts += 1
+        item.status = LEASED
+        item.worker = worker
+        return item
+
+    def _schedule(self, rows: List[sqlite3.Row], running: Dict[str, int], now: float) -> sqlite3.Row:
+        """Pick the ready job with the highest score and log why."""
+        scored = []
+        for row in rows:
+            candidate = Candidate(
+                job_id=row["job_id"],
+                priority_class=row["priority_class"] or INTERACTIVE,
+                quality_class=row["quality_class"] or PREVIEW,
+                tenant=row["tenant"],
+                waited=now - row["created_at"],
+            )
+            scored.append((self.policy.score(candidate, running), -row["id"], candidate, row))
+        score, _, chosen, row = max(scored, key=lambda entry: entry[:2])
+        logger.info(
+            f"Scheduling job {chosen.job_id}: class={chosen.priority_class}/{chosen.quality_class} "
+            f"tenant={chosen.tenant} waited={chosen.waited:.0f}s running={running.get(chosen.tenant, 0)} "
+            f"score={score:.0f}, ahead of {len(scored) - 1} ready jobs"
+        )
+        return row
+
+    def get(self, job_id: str) -> Optional[QueueItem]:
+        """Return the queue entry for a job, or None if it was never enqueued."""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM job_queue WHERE job_id = ?", (str(job_id),)).fetchone()
+        return QueueItem.from_row(row) if row else None
+
+    def extend(self, item: QueueItem) -> bool:
+        """Extend the lease on a job the worker is still processing.
+
+        Returns:
+            False if the lease was lost (e.g. it expired and another worker took the job)
+        """
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE job_queue SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (now + self.visibility_timeout, now, item.id, item.worker, LEASED)
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, item: QueueItem) -> None:
+        """Mark a leased job as done."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE job_queue SET status = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (DONE, time.time(), item.id, item.worker)
+            )
+
+    def nack(self, item: QueueItem, error: str) -> str:
+        """Return a failed job to the queue with backoff, or dead-letter it.
+
+        Returns:
+            The new status of the job
+        """
+        now = time.time()
+        if item.attempts >= item.max_attempts:
+            status, available_at = DEAD, now
+            logger.error(f"Job {item.job_id} dead-lettered after {item.attempts} attempts: {error}")
+        else:
+            status = QUEUED
+            available_at = now + self.retry_backoff * (2 ** (item.attempts - 1))
+            logger.warning(f"Job {item.job_id} failed (attempt {item.attempts} of {item.max_attempts}), retrying: {error}")
+        with self.lock:
+            self.conn.execute(
+                "UPDATE job_queue SET status = ?, available_at = ?, lease_expires_at = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ? AND worker = ?",
+                (status, available_at, error, now, item.id, item.worker)
+            )
+        return status
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove a job that has not been leased yet from the queue.
+
+        Returns:
+            True if the job was waiting in the queue
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE job_queue SET status = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (CANCELLED, time.time(), str(job_id), QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def depth(self) -> int:
+        """Return the number of jobs waiting or being processed."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM job_queue WHERE status IN (?, ?)", (QUEUED, LEASED)
+            ).fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs in each state."""
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM job_queue GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def dead_letters(self, limit: int = 100) -> List[QueueItem]:
+        """Return the most recent dead-lettered jobs."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM job_queue WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (DEAD, limit)
+            ).fetchall()
+        return [QueueItem.from_row(row) for row in rows]
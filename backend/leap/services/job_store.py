@@ -0,0 +1,441 @@
+"""
+Shared job-state store.
+
+Every API replica and render worker reads and writes job state through the
+store, so a status poll returns the same answer whichever process serves it.
+Backends: an in-process dict (single process only), a SQLite file in WAL mode
+on the shared volume, or Redis. Lookups by job ID and by status are indexed.
+
+The store also keeps a short per-job event log that the event bus uses to fan
+progress updates out to subscribers on every replica, and the per-client
+rate-limit buckets of admission control, so the limit holds across replicas.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, replace
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from leap.core.config import EVENT_RETENTION, JOB_STORE_BACKEND, JOB_STORE_DB_PATH, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+JobId = Union[str, uuid.UUID]
+
+
+@dataclass
+class Job:
+    """Represents an animation job."""
+    id: uuid.UUID
+    created_at: datetime
+    status: str = "pending"
+    video_url: Optional[str] = None
+    completed_at: Optional[datetime] = None
+    error: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class JobEvent:
+    """An entry in a job's event log."""
+    job_id: str
+    seq: int
+    type: str
+    data: Dict[str, Any]
+    created_at: float
+
+
+def _to_record(job: Job) -> Dict[str, Any]:
+    """Serialize a job to flat string fields."""
+    return {
+        "id": str(job.id),
+        "created_at": job.created_at.isoformat(),
+        "status": job.status,
+        "video_url": job.video_url,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "error": job.error,
+        "progress": json.dumps(job.progress) if job.progress else None,
+    }
+
+
+def _from_record(record: Dict[str, Any]) -> Job:
+    """Deserialize a job from flat string fields."""
+    return Job(
+        id=uuid.UUID(record["id"]),
+        created_at=datetime.fromisoformat(record["created_at"]),
+        status=record["status"],
+        video_url=record.get("video_url") or None,
+        completed_at=datetime.fromisoformat(record["completed_at"]) if record.get("completed_at") else None,
+        error=record.get("error") or None,
+        progress=json.loads(record["progress"]) if record.get("progress") else None,
+    )
+
+
+def _take_token(bucket: Optional[Tuple[float, float]], now: float, rate: float, burst: int) -> Tuple[float, float]:
+    """Refill a token bucket up to ``now`` and take a token from it.
+
+    Args:
+        bucket: The bucket's tokens and last update time, or None for a full bucket
+
+    Returns:
+        The tokens left, and 0 if a token was taken or else the seconds until one is available
+    """
+    tokens, updated = bucket if bucket else (float(burst), now)
+    tokens = min(float(burst), tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class JobStore:
+    """Interface for job-state backends."""
+
+    def save(self, job: Job) -> None:
+        """Insert or replace a job."""
+        raise NotImplementedError
+
+    def save_progress(self, job_id: JobId, progress: Optional[Dict[str, Any]]) -> None:
+        """Update only a job's progress, leaving its status as other processes wrote it."""
+        raise NotImplementedError
+
+    def get(self, job_id: JobId) -> Optional[Job]:
+        """Return a job by ID, or None if it is unknown."""
+        raise NotImplementedError
+
+    def list_by_status(self, status: str, limit: int = 100) -> List[Job]:
+        """Return the most recently created jobs with the given status."""
+        raise NotImplementedError
+
+    def append_event(self, job_id: JobId, type: str, data: Dict[str, Any]) -> JobEvent:
+        """Append an event to a job's event log."""
+        raise NotImplementedError
+
+    def events_since(self, job_id: JobId, after: int = 0) -> List[JobEvent]:
+        """Return a job's events with a sequence number greater than ``after``."""
+        raise NotImplementedError
+
+    def last_event_seq(self, job_id: JobId) -> int:
+        """Return the sequence number of a job's latest event, or 0."""
+        raise NotImplementedError
+
+    def prune_events(self, older_than: float) -> None:
+        """Delete events created before the given timestamp."""
+        raise NotImplementedError
+
+    def take_token(self, key: str, rate: float, burst: int, now: float) -> float:
+        """Take a token from a client's rate-limit bucket.
+
+        Args:
+            key: Identifies the client
+            rate: Tokens added per second
+            burst: Bucket size
+            now: Current wall-clock time
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is available
+        """
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """Job store kept in process memory. Only consistent within a single process."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.events: Dict[str, List[JobEvent]] = {}
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.seq = 0
+        self.lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        with self.lock:
+            self.jobs[str(job.id)] = job
+
+    def save_progress(self, job_id: JobId, progress: Optional[Dict[str, Any]]) -> None:
+        with self.lock:
+            stored = self.jobs.get(str(job_id))
+            if stored is not None:
+                self.jobs[str(job_id)] = replace(stored, progress=progress)
+
+    def get(self, job_id: JobId) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(str(job_id))
+
+    def list_by_status(self, status: str, limit: int = 100) -> List[Job]:
+        with self.lock:
+            matches = [job for job in self.jobs.values() if job.status == status]
+        return sorted(matches, key=lambda job: job.created_at, reverse=True)[:limit]
+
+    def append_event(self, job_id: JobId, type: str, data: Dict[str, Any]) -> JobEvent:
+        with self.lock:
+            self.seq += 1
+            event = JobEvent(str(job_id), self.seq, type, data, time.time())
+            self.events.setdefault(str(job_id), []).append(event)
+        return event
+
+    def events_since(self, job_id: JobId, after: int = 0) -> List[JobEvent]:
+        with self.lock:
+            return [event for event in self.events.get(str(job_id), []) if event.seq > after]
+
+    def last_event_seq(self, job_id: JobId) -> int:
+        with self.lock:
+            events = self.events.get(str(job_id))
+            return events[-1].seq if events else 0
+
+    def prune_events(self, older_than: float) -> None:
+        with self.lock:
+            for job_id in list(self.events):
+                kept = [event for event in self.events[job_id] if event.created_at >= older_than]
+                if kept:
+                    self.events[job_id] = kept
+                else:
+                    del self.events[job_id]
+
+    def take_token(self, key: str, rate: float, burst: int, now: float) -> float:
+        with self.lock:
+            tokens, wait = _take_token(self.buckets.get(key), now, rate, burst)
+            self.buckets[key] = (tokens, now)
+            # Buckets idle long enough to be full again hold no state
+            refilled = now - burst / rate
+            for stale in [name for name, (_, updated) in self.buckets.items() if updated < refilled]:
+                del self.buckets[stale]
+        return wait
+
+
+class SqliteJobStore(JobStore):
+    """Job store in a SQLite file, shared by every process on the host volume."""
+
+    def __init__(self, db_path: Path = JOB_STORE_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        # WAL lets replicas read status while a worker writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                status TEXT NOT NULL,
+                video_url TEXT,
+                completed_at TEXT,
+                error TEXT,
+                progress TEXT
+            )
+            """
+        )
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "progress" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                type TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, seq)")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_buckets_updated ON rate_buckets (updated_at)")
+        self.conn.commit()
+
+    def save(self, job: Job) -> None:
+        record = _to_record(job)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, created_at, status, video_url, completed_at, error, progress) "
+                "VALUES (:id, :created_at, :status, :video_url, :completed_at, :error, :progress)",
+                record
+            )
+            self.conn.commit()
+
+    def save_progress(self, job_id: JobId, progress: Optional[Dict[str, Any]]) -> None:
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET progress = ? WHERE id = ?",
+                (json.dumps(progress) if progress else None, str(job_id))
+            )
+            self.conn.commit()
+
+    def get(self, job_id: JobId) -> Optional[Job]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (str(job_id),)).fetchone()
+        return _from_record(dict(row)) if row else None
+
+    def list_by_status(self, status: str, limit: int = 100) -> List[Job]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+            ).fetchall()
+        return [_from_record(dict(row)) for row in rows]
+
+    def append_event(self, job_id: JobId, type: str, data: Dict[str, Any]) -> JobEvent:
+        created_at = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+                (str(job_id), type, json.dumps(data, default=str), created_at)
+            )
+            self.conn.commit()
+        return JobEvent(str(job_id), cursor.lastrowid, type, data, created_at)
+
+    def events_since(self, job_id: JobId, after: int = 0) -> List[JobEvent]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (str(job_id), after)
+            ).fetchall()
+        return [
+            JobEvent(row["job_id"], row["seq"], row["type"], json.loads(row["data"]), row["created_at"])
+            for row in rows
+        ]
+
+    def last_event_seq(self, job_id: JobId) -> int:
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM job_events WHERE job_id = ?", (str(job_id),)).fetchone()
+        return row[0] or 0
+
+    def prune_events(self, older_than: float) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM job_events WHERE created_at < ?", (older_than,))
+            self.conn.commit()
+
+    def take_token(self, key: str, rate: float, burst: int, now: float) -> float:
+        with self.lock:
+            # Take the write lock up front so replicas update a bucket one at a time
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+                tokens, wait = _take_token(tuple(row) if row else None, now, rate, burst)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now)
+                )
+                # Buckets idle long enough to be full again hold no state
+                self.conn.execute("DELETE FROM rate_buckets WHERE updated_at < ?", (now - burst / rate,))
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        return wait
+
+
+class RedisJobStore(JobStore):
+    """Job store in Redis: a hash per job plus a sorted set per status."""
+
+    PREFIX = "leap:job:"
+    STATUS_PREFIX = "leap:jobs:"
+    EVENTS_PREFIX = "leap:events:"
+    BUCKET_PREFIX = "leap:ratelimit:"
+
+    def __init__(self, url: str = REDIS_URL, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.redis = client
+
+    def save(self, job: Job) -> None:
+        key = f"{self.PREFIX}{job.id}"
+        previous = self.redis.hget(key, "status")
+        record = {name: value for name, value in _to_record(job).items() if value is not None}
+        pipe = self.redis.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=record)
+        if previous and previous != job.status:
+            pipe.zrem(f"{self.STATUS_PREFIX}{previous}", str(job.id))
+        pipe.zadd(f"{self.STATUS_PREFIX}{job.status}", {str(job.id): job.created_at.timestamp()})
+        pipe.execute()
+
+    def save_progress(self, job_id: JobId, progress: Optional[Dict[str, Any]]) -> None:
+        key = f"{self.PREFIX}{job_id}"
+        if not self.redis.exists(key):
+            return
+        if progress:
+            self.redis.hset(key, "progress", json.dumps(progress))
+        else:
+            self.redis.hdel(key, "progress")
+
+    def get(self, job_id: JobId) -> Optional[Job]:
+        record = self.redis.hgetall(f"{self.PREFIX}{job_id}")
+        return _from_record(record) if record else None
+
+    def list_by_status(self, status: str, limit: int = 100) -> List[Job]:
+        job_ids = self.redis.zrevrange(f"{self.STATUS_PREFIX}{status}", 0, limit - 1)
+        jobs = [self.get(job_id) for job_id in job_ids]
+        return [job for job in jobs if job is not None]
+
+    def append_event(self, job_id: JobId, type: str, data: Dict[str, Any]) -> JobEvent:
+        created_at = time.time()
+        key = f"{self.EVENTS_PREFIX}{job_id}"
+        entry = json.dumps({"type": type, "data": data, "created_at": created_at}, default=str)
+        # The list length after the push doubles as the sequence number
+        seq = self.redis.rpush(key, entry)
+        self.redis.expire(key, EVENT_RETENTION)
+        return JobEvent(str(job_id), seq, type, data, created_at)
+
+    def events_since(self, job_id: JobId, after: int = 0) -> List[JobEvent]:
+        entries = self.redis.lrange(f"{self.EVENTS_PREFIX}{job_id}", after, -1)
+        events = []
+        for offset, entry in enumerate(entries, start=after + 1):
+            record = json.loads(entry)
+            events.append(JobEvent(str(job_id), offset, record["type"], record["data"], record["created_at"]))
+        return events
+
+    def last_event_seq(self, job_id: JobId) -> int:
+        return self.redis.llen(f"{self.EVENTS_PREFIX}{job_id}")
+
+    def prune_events(self, older_than: float) -> None:
+        # Event logs expire on their own
+        pass
+
+    def take_token(self, key: str, rate: float, burst: int, now: float) -> float:
+        key = f"{self.BUCKET_PREFIX}{key}"
+
+        def update(pipe) -> float:
+            record = pipe.hgetall(key)
+            bucket = (float(record["tokens"]), float(record["updated_at"])) if record else None
+            tokens, wait = _take_token(bucket, now, rate, burst)
+            pipe.multi()
+            pipe.hset(key, mapping={"tokens": tokens, "updated_at": now})
+            # Buckets idle long enough to be full again hold no state
+            pipe.expire(key, int(burst / rate) + 1)
+            return wait
+
+        # Retried if another replica changes the bucket in between
+        return self.redis.transaction(update, key, value_from_callable=True)
+
+
+@lru_cache(maxsize=1)
+def get_job_store() -> JobStore:
+    """Return the process-wide job store selected by ``JOB_STORE_BACKEND``."""
+    if JOB_STORE_BACKEND == "memory":
+        return MemoryJobStore()
+    if JOB_STORE_BACKEND == "redis":
+        try:
+            store = RedisJobStore()
+            logger.info(f"Job state stored in Redis: {REDIS_URL}")
+            return store
+        except ImportError:
+            logger.warning("redis not installed. Falling back to the SQLite job store.")
+    logger.info(f"Job state stored in: {JOB_STORE_DB_PATH}")
+    return SqliteJobStore()
@@ -1,15 +1,36 @@
 import logging
-from typing import Dict, Type, TypeVar
-from openai import OpenAI
+from typing import Dict, Optional, Type, TypeVar
+from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError
 import instructor
 from pydantic import BaseModel
 import os
 
 from leap.core.config import OPENAI_MODEL
+from leap.core.metrics import observe_llm_call, record_usage
+from leap.services.cancellation import current_token, run_cancellable
 from leap.workflow.tracing import traceable  # Import the traceable decorator
 
 T = TypeVar('T', bound=BaseModel)
 
+# LLM outages that may be over by the time the job is retried
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def is_retryable_error(error: Optional[BaseException]) -> bool:
+    """Return whether an error is a transient LLM outage worth retrying the job for.
+    
+    The error's causes are checked too, as instructor and the candidate race
+    wrap the original error.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, RETRYABLE_ERRORS):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
 class LLMService:
     """Service for interacting with language models."""
     
@@ -20,8 +41,21 @@ class LLMService:
             model: The OpenAI model to use
         """
         self.model = model
-        self.client = instructor.from_openai(OpenAI())
+        self.openai_client = OpenAI()
+        self.client = instructor.from_openai(self.openai_client)
         self.logger = logging.getLogger("leap")
+
+    def _openai_client(self) -> OpenAI:
+        """Return the OpenAI client for a call made in the current context.
+
+        A cancellable job gets its own client, which keeps its connections open
+        across the job's calls and is closed when the job ends or, to abort the
+        request in flight, when it is cancelled.
+        """
+        token = current_token()
+        if token is None:
+            return self.openai_client
+        return token.resource("openai_client", OpenAI, lambda client: client.close())
     
     @traceable(run_type="llm", tags=["llm", "structured"])
     def generate_structured_response(
@@ -42,14 +76,21 @@ class LLMService:
         """
         self.logger.info(f"Generating structured response with model: {self.model}")
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            response_model=response_model,
-            messages=[
-                {"role": "system", "content": system_content},
-                {"role": "user", "content": user_content}
-            ]
-        )
+        openai_client = self._openai_client()
+        client = self.client if openai_client is self.openai_client else instructor.from_openai(openai_client)
+        
+        with observe_llm_call(self.model) as usage:
+            response, completion = run_cancellable(
+                lambda: client.chat.completions.create_with_completion(
+                    model=self.model,
+                    response_model=response_model,
+                    messages=[
+                        {"role": "system", "content": system_content},
+                        {"role": "user", "content": user_content}
+                    ]
+                )
+            )
+            record_usage(usage, completion)
         
         return response
         
@@ -66,13 +107,17 @@ class LLMService:
         """
         self.logger.info(f"Generating chat response with model: {self.model}")
         
-        client = OpenAI()
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        client = self._openai_client()
+        with observe_llm_call(self.model) as usage:
+            response = run_cancellable(
+                lambda: client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+            )
+            record_usage(usage, response)
         
         return {"content": response.choices[0].message.content} 
\ No newline at end of file
@@ -1,435 +1,430 @@
-# import inspect
-# import importlib
-# import re
-# from typing import Dict, List, Optional, Any, Set
-# import logging
-
-# import manim
-
-# class ManimAPIService:
-#     """Service for accessing Manim API information to assist with code generation and error correction."""
-    
-#     def __init__(self):
-#         """Initialize the ManimAPIService."""
-#         self.api_cache = {}
-#         self.logger = logging.getLogger(__name__)
-#         # Common Manim classes that are frequently used
-#         self.common_classes = {
-#             "Circle", "Square", "Rectangle", "Triangle", "Line", "Arrow", 
-#             "Dot", "Text", "MathTex", "Tex", "VGroup", "Scene", "Mobject",
-#             "Animation", "Transform", "Create", "FadeIn", "FadeOut", "Write",
-#             "Arc", "ArcBetweenPoints", "CubicBezier", "DashedLine", "Polygon"
-#         }
-    
-#     def get_class_info(self, class_name: str) -> Optional[Dict[str, Any]]:
-#         """Get information about a Manim class.
-        
-#         Args:
-#             class_name: The name of the class to look up
-            
-#         Returns:
-#             Dictionary with class information or None if not found
-#         """
-#         if class_name in self.api_cache:
-#             return self.api_cache[class_name]
-        
-#         try:
-#             # Try to import the class from manim
-#             manim = importlib.import_module("manim")
-#             if hasattr(manim, class_name):
-#                 cls = getattr(manim, class_name)
-                
-#                 # Get method signatures
-#                 methods = {}
-#                 for name, method in inspect.getmembers(cls, inspect.isfunction):
-#                     if not name.startswith("_") or name == "__init__":
-#                         try:
-#                             signature = inspect.signature(method)
-#                             methods[name] = {
-#                                 "signature": str(signature),
-#                                 "parameters": [param for param in signature.parameters],
-#                                 "docstring": inspect.getdoc(method) or ""
-#                             }
-#                         except (ValueError, TypeError):
-#                             # Some methods might not be inspectable
-#                             pass
-                
-#                 # Get class docstring
-#                 docstring = inspect.getdoc(cls) or ""
-                
-#                 # Store in cache
-#                 self.api_cache[class_name] = {
-#                     "docstring": docstring,
-#                     "methods": methods
-#                 }
-                
-#                 return self.api_cache[class_name]
-            
-#         except (ImportError, AttributeError) as e:
-#             self.logger.warning(f"Could not find Manim class {class_name}: {str(e)}")
-        
-#         return None
-    
-#     def get_method_signature(self, class_name: str, method_name: str) -> Optional[str]:
-#         """Get the signature of a specific method.
-        
-#         Args:
-#             class_name: The name of the class
-#             method_name: The name of the method
-            
-#         Returns:
-#             Method signature as a string or None if not found
-#         """
-#         class_info = self.get_class_info(class_name)
-#         if class_info and method_name in class_info["methods"]:
-#             return class_info["methods"][method_name]["signature"]
-#         return None
-    
-#     def extract_error_context(self, error_message):
-#         """Extract context from error messages to identify relevant classes and methods."""
-#         context = {}
-        
-#         # Extract class names from error messages
-#         class_pattern = r"'([A-Za-z0-9_]+)' object"
-#         class_matches = re.findall(class_pattern, error_message)
-#         if class_matches:
-#             context['class_name'] = class_matches[0]
-        
-#         # Extract method names from error messages
-#         method_pattern = r"has no attribute '([A-Za-z0-9_]+)'"
-#         method_matches = re.findall(method_pattern, error_message)
-#         if method_matches:
-#             context['missing_method'] = method_matches[0]
-        
-#         # Extract method names from error messages about wrong number of arguments
-#         wrong_args_pattern = r"([A-Za-z0-9_]+)\(\) takes (\d+) positional arguments? but (\d+) (?:was|were) given"
-#         wrong_args_matches = re.findall(wrong_args_pattern, error_message)
-#         if wrong_args_matches:
-#             method_name, expected, actual = wrong_args_matches[0]
-#             context['method_name'] = method_name
-#             context['expected_args'] = expected
-#             context['actual_args'] = actual
-        
-#         # Extract method names from error messages about unexpected keyword arguments
-#         unexpected_kwarg_pattern = r"([A-Za-z0-9_]+)\(\) got an unexpected keyword argument '([A-Za-z0-9_]+)'"
-#         unexpected_kwarg_matches = re.findall(unexpected_kwarg_pattern, error_message)
-#         if unexpected_kwarg_matches:
-#             method_name, kwarg = unexpected_kwarg_matches[0]
-#             context['method_name'] = method_name
-#             context['invalid_kwarg'] = kwarg
-            
-#         # Extract undefined variables
-#         undefined_var_pattern = r"NameError: name '([A-Za-z0-9_]+)' is not defined"
-#         undefined_var_matches = re.findall(undefined_var_pattern, error_message)
-#         if undefined_var_matches:
-#             context['undefined_variable'] = undefined_var_matches[0]
-            
-#         # Extract module import errors
-#         import_error_pattern = r"ImportError: No module named '([A-Za-z0-9_.]+)'"
-#         import_error_matches = re.findall(import_error_pattern, error_message)
-#         if import_error_matches:
-#             context['missing_module'] = import_error_matches[0]
-            
-#         # Extract syntax errors
-#         syntax_error_pattern = r"SyntaxError: (.*?) \(line (\d+)\)"
-#         syntax_error_matches = re.findall(syntax_error_pattern, error_message)
-#         if syntax_error_matches:
-#             error_msg, line_num = syntax_error_matches[0]
-#             context['syntax_error'] = error_msg
-#             context['error_line'] = line_num
-        
-#         return context
-
-#     def suggest_fix(self, error_message):
-#         """Suggest a fix based on the error message."""
-#         context = self.extract_error_context(error_message)
-#         if not context:
-#             return None
-        
-#         # Handle undefined variable errors
-#         if 'undefined_variable' in context:
-#             var_name = context['undefined_variable']
-            
-#             # Check for common Manim constants
-#             if var_name in ['FRAME_WIDTH', 'FRAME_HEIGHT']:
-#                 return (
-#                     f"The constant '{var_name}' is not defined in current Manim versions. "
-#                     f"Instead of using {var_name}, use specific values like 14 for width and 8 for height, "
-#                     f"or use the FullScreenRectangle() class for a background that covers the entire screen. "
-#                     f"Example: background = Rectangle(width=14, height=8, fill_opacity=1) or background = FullScreenRectangle()"
-#                 )
-#             elif var_name in ['UP', 'DOWN', 'LEFT', 'RIGHT', 'ORIGIN', 'OUT', 'IN']:
-#                 return (
-#                     f"The direction constant '{var_name}' needs to be imported from manim. "
-#                     f"Make sure you have 'from manim import *' at the top of your file."
-#                 )
-#             elif var_name in ['PI', 'TAU', 'DEGREES', 'RADIANS']:
-#                 return (
-#                     f"The mathematical constant '{var_name}' needs to be imported from manim. "
-#                     f"Make sure you have 'from manim import *' at the top of your file."
-#                 )
-#             elif var_name in ['RED', 'GREEN', 'BLUE', 'YELLOW', 'PURPLE', 'ORANGE', 'WHITE', 'BLACK']:
-#                 return (
-#                     f"The color constant '{var_name}' needs to be imported from manim. "
-#                     f"Make sure you have 'from manim import *' at the top of your file. "
-#                     f"Alternatively, use quoted color strings like \"red\", \"green\", etc."
-#                 )
-#             else:
-#                 return f"The variable '{var_name}' is not defined. Check for typos or make sure it's defined before use."
-        
-#         # Handle missing method errors
-#         elif 'class_name' in context and 'missing_method' in context:
-#             class_name = context['class_name']
-#             missing_method = context['missing_method']
-            
-#             # Check if the method name is similar to any existing method
-#             if class_name in self.common_classes:
-#                 try:
-#                     class_obj = getattr(manim, class_name)
-#                     methods = [method for method in dir(class_obj) if callable(getattr(class_obj, method)) and not method.startswith('_')]
-                    
-#                     # Find similar method names
-#                     similar_methods = []
-#                     for method in methods:
-#                         if missing_method in method or method in missing_method:
-#                             similar_methods.append(method)
-                    
-#                     # For dash-related methods, suggest specific styling methods
-#                     if 'dash' in missing_method.lower():
-#                         dash_alternatives = [m for m in methods if 'stroke' in m or 'style' in m or 'color' in m]
-#                         if dash_alternatives:
-#                             similar_methods.extend(dash_alternatives)
-#                             # Add a note about DashedLine
-#                             suggestion = f"The method '{missing_method}' does not exist for {class_name}. For dashed lines, use the DashedLine class instead of {class_name}. Alternatively, you can use these styling methods: {', '.join(set(similar_methods))}."
-#                             return suggestion
-                    
-#                     if similar_methods:
-#                         suggestion = f"The method '{missing_method}' does not exist for {class_name}. Did you mean one of these: {', '.join(set(similar_methods))}?"
-#                         return suggestion
-#                     else:
-#                         # Get common methods that might be useful
-#                         common_methods = ['set_color', 'set_fill', 'set_stroke', 'move_to', 'shift', 'scale', 'rotate']
-#                         available_methods = [m for m in common_methods if m in methods]
-                        
-#                         if available_methods:
-#                             suggestion = f"The method '{missing_method}' does not exist for {class_name}. Common methods you can use include: {', '.join(available_methods)}."
-#                             return suggestion
-#                         else:
-#                             return f"The method '{missing_method}' does not exist for {class_name}. Check the documentation for available methods."
-#                 except (AttributeError, ImportError):
-#                     pass
-        
-#         # Handle wrong number of arguments errors
-#         elif 'method_name' in context and 'expected_args' in context and 'actual_args' in context:
-#             method_name = context['method_name']
-#             expected = context['expected_args']
-#             actual = context['actual_args']
-            
-#             # Try to find the method signature
-#             for class_name in self.common_classes:
-#                 try:
-#                     class_obj = getattr(manim, class_name)
-#                     if hasattr(class_obj, method_name) or class_name == method_name:
-#                         # Handle constructor case
-#                         if class_name == method_name:
-#                             signature = str(inspect.signature(class_obj.__init__))
-#                             return f"The {class_name} constructor takes {expected} positional arguments, but you provided {actual}. The correct signature is: {class_name}{signature}. Use keyword arguments for optional parameters."
-#                         else:
-#                             method = getattr(class_obj, method_name)
-#                             signature = str(inspect.signature(method))
-#                             return f"The method {class_name}.{method_name}{signature} takes {expected} arguments, but you provided {actual}."
-#                 except (AttributeError, ImportError):
-#                     continue
-            
-#             return f"The method {method_name}() takes {expected} arguments, but you provided {actual}. Check the documentation for the correct signature."
-        
-#         # Handle unexpected keyword argument errors
-#         elif 'method_name' in context and 'invalid_kwarg' in context:
-#             method_name = context['method_name']
-#             invalid_kwarg = context['invalid_kwarg']
-            
-#             # Try to find the method signature
-#             for class_name in self.common_classes:
-#                 try:
-#                     class_obj = getattr(manim, class_name)
-#                     if hasattr(class_obj, method_name):
-#                         method = getattr(class_obj, method_name)
-#                         signature = str(inspect.signature(method))
-#                         return f"The parameter '{invalid_kwarg}' is not valid for {class_name}.{method_name}{signature}. Check the documentation:"
-#                 except (AttributeError, ImportError):
-#                     continue
-            
-#             return f"The parameter '{invalid_kwarg}' is not valid for {method_name}(). Check the documentation for valid parameters."
-        
-#         return None
-    
-#     def extract_classes_from_code(self, code: str) -> Set[str]:
-#         """Extract Manim class names from a code snippet.
-        
-#         Args:
-#             code: The code to analyze
-            
-#         Returns:
-#             Set of class names found in the code
-#         """
-#         # Pattern to match class instantiations: ClassName(
-#         class_pattern = r'([A-Z][A-Za-z0-9_]*)\('
-#         # Pattern to match method calls: .method_name(
-#         method_pattern = r'\.([a-z][A-Za-z0-9_]*)\('
-        
-#         classes = set()
-        
-#         # Find all class instantiations
-#         for match in re.finditer(class_pattern, code):
-#             class_name = match.group(1)
-#             # Only include if it's likely a Manim class (starts with capital letter)
-#             # and is in our common classes list or we can find it in the manim module
-#             if class_name in self.common_classes or self.get_class_info(class_name) is not None:
-#                 classes.add(class_name)
-        
-#         return classes
-    
-#     def extract_classes_from_error(self, error_msg: str) -> Set[str]:
-#         """Extract Manim class names from an error message.
-        
-#         Args:
-#             error_msg: The error message to analyze
-            
-#         Returns:
-#             Set of class names found in the error
-#         """
-#         # Pattern to match class names in errors
-#         patterns = [
-#             r'([A-Z][A-Za-z0-9_]*) object has no attribute',  # AttributeError
-#             r'Cannot call ([A-Z][A-Za-z0-9_]*)\.', # Method call on object with no points
-#             r'([A-Z][A-Za-z0-9_]*)\.__init__\(\) takes', # Wrong number of arguments
-#             r'module \'manim\' has no attribute \'([A-Z][A-Za-z0-9_]*)\'', # Missing import
-#             r'\'([A-Z][A-Za-z0-9_]*)\' object is not', # Type error
-#         ]
-        
-#         classes = set()
-        
-#         for pattern in patterns:
-#             for match in re.finditer(pattern, error_msg):
-#                 class_name = match.group(1)
-#                 if class_name in self.common_classes or self.get_class_info(class_name) is not None:
-#                     classes.add(class_name)
-        
-#         # Extract method names and try to find their classes
-#         method_patterns = [
-#             r'([a-z][a-z_]+)\(\) got an unexpected keyword argument',  # Unexpected keyword
-#             r'([a-z][a-z_]+)\(\) missing \d+ required positional argument',  # Missing argument
-#         ]
-        
-#         for pattern in method_patterns:
-#             for match in re.finditer(pattern, error_msg):
-#                 method_name = match.group(1)
-#                 # Try to find which classes have this method
-#                 for class_name in self.common_classes:
-#                     class_info = self.get_class_info(class_name)
-#                     if class_info and method_name in class_info["methods"]:
-#                         classes.add(class_name)
-        
-#         return classes
-    
-#     def get_targeted_api_docs(self, code: str = "", error_msg: str = "") -> str:
-#         """Get targeted API documentation for classes mentioned in code or error message.
-        
-#         Args:
-#             code: The code to analyze (optional)
-#             error_msg: The error message to analyze (optional)
-            
-#         Returns:
-#             A string containing relevant API documentation
-#         """
-#         classes = set()
-        
-#         # Extract classes from both code and error message
-#         if code:
-#             classes.update(self.extract_classes_from_code(code))
-        
-#         if error_msg:
-#             classes.update(self.extract_classes_from_error(error_msg))
-        
-#         # If no classes found, include a few common ones
-#         if not classes:
-#             classes = {"Circle", "Square", "Line", "MathTex", "VGroup"}
-        
-#         # Build documentation string
-#         docs = []
-#         docs.append("# Manim API Documentation\n")
-        
-#         for class_name in sorted(classes):
-#             class_info = self.get_class_info(class_name)
-#             if class_info:
-#                 docs.append(f"## {class_name}\n")
-#                 docs.append(f"{class_info['docstring']}\n")
-                
-#                 # Add constructor info
-#                 if "__init__" in class_info["methods"]:
-#                     init_info = class_info["methods"]["__init__"]
-#                     docs.append(f"### Constructor\n")
-#                     docs.append(f"```python\n{class_name}{init_info['signature']}\n```\n")
-#                     if init_info["docstring"]:
-#                         docs.append(f"{init_info['docstring']}\n")
-                
-#                 # Add a few key methods (limit to 5 to avoid too much information)
-#                 methods = [m for m in class_info["methods"] if m != "__init__"]
-#                 if methods:
-#                     docs.append(f"### Key Methods\n")
-#                     for method_name in methods[:5]:
-#                         method_info = class_info["methods"][method_name]
-#                         docs.append(f"#### {method_name}\n")
-#                         docs.append(f"```python\n{method_name}{method_info['signature']}\n```\n")
-#                         if method_info["docstring"]:
-#                             docs.append(f"{method_info['docstring']}\n")
-        
-#         # Add common best practices
-#         docs.append(self.get_common_best_practices())
-        
-#         return "\n".join(docs)
-    
-#     def get_common_best_practices(self) -> str:
-#         """Get common best practices and error solutions for Manim.
-        
-#         Returns:
-#             A string containing common best practices
-#         """
-#         return """
-# ## Common Manim Best Practices and Error Solutions
-
-# ### Working with Paths and Points
-# - Always initialize path objects (Line, Arc, etc.) with explicit coordinates
-# - For a Line, use: `Line(start=ORIGIN, end=RIGHT)`
-# - For an Arc, use: `Arc(radius=1, start_angle=0, angle=PI)`
-# - When using MoveAlongPath, ensure the path has points
-
-# ### Camera Frame Issues
-# - Never use `camera.frame` directly - it doesn't exist in current Manim versions
-# - Instead of camera manipulation, scale or move the objects themselves
-# - Use `self.play(mobject.animate.scale(0.8))` instead of camera zooming
-
-# ### Background and Branding
-# - NEVER create or modify the background - it's already set in the base class with product branding
-# - Do not use `FullScreenRectangle`, `Rectangle`, or any other object as a background
-# - The background is automatically added in the ManimVoiceoverBase class constructor
-
-# ### Color Handling
-# - Always use quoted color values: `color="blue"` not `color=blue`
-# - Use predefined colors like RED, GREEN, BLUE, or hex values like "#FF0000"
-
-# ### Text and Math
-# - Use MathTex for mathematical expressions, not Tex
-# - For regular text, use Text("Your text here")
-
-# ### Constants and Dimensions
-# - FRAME_WIDTH and FRAME_HEIGHT are not defined in current Manim versions
-# - For specific dimensions, use explicit values: `Rectangle(width=14, height=8)`
-# - Common constants that need to be imported: UP, DOWN, LEFT, RIGHT, ORIGIN
-# - Mathematical constants: PI, TAU, DEGREES, RADIANS
-
-# ### Animation Performance
-# - Avoid creating too many objects (>100)
-# - Use VGroup to manage collections of objects
-# - Avoid infinite loops or loops without clear exit conditions
-# """ 
\ No newline at end of file
+"""
+Static index of the Manim API for checking generated code before rendering.
+
+The index lists every public name Manim exports and, for each class, its
+members and the keyword arguments its constructor and methods accept. A
+method that takes ``**kwargs`` and hands them to ``super()`` accepts whatever
+the next class in the MRO accepts, so those chains are followed; ``**kwargs``
+that go anywhere else leave the call open.
+
+Introspecting Manim means importing it, which takes seconds, so the index is
+built once per installed Manim version and persisted as JSON. Checking a
+scene against it is a single AST walk and needs no Manim import at all.
+"""
+import ast
+import builtins
+import difflib
+import importlib
+import inspect
+import json
+import logging
+import os
+import textwrap
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from leap.core.config import MANIM_API_INDEX_DIR
+from leap.models import CodeIssue
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the persisted index changes
+INDEX_FORMAT = 1
+
+# Prefixes Mobject.__getattr__ turns into getters and setters of instance attributes
+DYNAMIC_PREFIXES = ("get_", "set_")
+
+_BUILTINS = set(dir(builtins))
+
+# A signature: the keyword arguments accepted, and whether any other keyword is accepted too
+Signature = Dict[str, Any]
+OPEN_SIGNATURE: Signature = {"params": [], "open": True}
+
+
+def manim_version() -> Optional[str]:
+    """Return the installed Manim version, or None if Manim is not installed."""
+    try:
+        return metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _passes_kwargs_to_super(func, name: str) -> bool:
+    """Return whether ``func`` calls ``super().<name>(..., **kwargs)`` with its own ``**kwargs``."""
+    var_keyword = next(
+        (p.name for p in inspect.signature(func).parameters.values() if p.kind is p.VAR_KEYWORD), None
+    )
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+    except (OSError, TypeError, SyntaxError):
+        return False
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == name):
+            continue
+        target = node.func.value
+        # super().name(**kwargs) or Base.name(self, **kwargs)
+        to_super = isinstance(target, ast.Call) and isinstance(target.func, ast.Name) and target.func.id == "super"
+        to_base = isinstance(target, ast.Name) and node.args and isinstance(node.args[0], ast.Name) and node.args[0].id == "self"
+        if (to_super or to_base) and any(
+            keyword.arg is None and isinstance(keyword.value, ast.Name) and keyword.value.id == var_keyword
+            for keyword in node.keywords
+        ):
+            return True
+    return False
+
+
+class _SignatureResolver:
+    """Resolves the keyword arguments a method accepts, following ``**kwargs`` up the MRO."""
+
+    def __init__(self):
+        self.resolved: Dict[Tuple[Tuple[type, ...], str], Signature] = {}
+
+    def accepted(self, cls: type, name: str) -> Optional[Signature]:
+        """Return what ``cls.<name>`` accepts, or None if it is not a plain function."""
+        return self._resolve(cls.__mro__, name)
+
+    def _resolve(self, mro: Tuple[type, ...], name: str) -> Optional[Signature]:
+        for position, klass in enumerate(mro):
+            if name in vars(klass):
+                break
+        else:
+            return None
+        if klass is object:
+            # object.__init__ takes no arguments; other object methods are not part of the API
+            return {"params": [], "open": False} if name == "__init__" else OPEN_SIGNATURE
+
+        # Where super() leads depends on the MRO of the class being indexed, not just klass
+        key = (mro[position:], name)
+        if key in self.resolved:
+            return self.resolved[key]
+
+        member = vars(klass)[name]
+        if isinstance(member, (staticmethod, classmethod)):
+            member = member.__func__
+        if not inspect.isfunction(member):
+            return None
+        func = inspect.unwrap(member)
+        try:
+            parameters = list(inspect.signature(func).parameters.values())
+        except (TypeError, ValueError):
+            return OPEN_SIGNATURE
+
+        params = [p.name for p in parameters if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)]
+        if params and params[0] in ("self", "cls"):
+            params = params[1:]
+        signature: Signature = {"params": params, "open": False}
+        if any(p.kind is p.VAR_KEYWORD for p in parameters):
+            parent = self._resolve(mro[position + 1:], name) if _passes_kwargs_to_super(func, name) else None
+            if parent is None or parent["open"]:
+                signature = {"params": params, "open": True}
+            else:
+                signature = {"params": sorted(set(params) | set(parent["params"])), "open": False}
+        self.resolved[key] = signature
+        return signature
+
+
+def _function_signature(func) -> Signature:
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return OPEN_SIGNATURE
+    return {
+        "params": [p.name for p in parameters if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)],
+        "open": any(p.kind is p.VAR_KEYWORD for p in parameters),
+    }
+
+
+def build_signature_index(module, version: Optional[str] = None) -> Dict[str, Any]:
+    """Introspect the public API of a module.
+
+    Args:
+        module: The module to index, normally ``manim``
+        version: The module's version, recorded in the index
+
+    Returns:
+        The index: exported ``names``, and ``classes`` and ``functions`` with their signatures
+    """
+    resolver = _SignatureResolver()
+    names = sorted(name for name in dir(module) if not name.startswith("_"))
+    classes: Dict[str, Any] = {}
+    functions: Dict[str, Signature] = {}
+    for name in names:
+        obj = getattr(module, name)
+        if inspect.isclass(obj):
+            members = sorted(member for member in dir(obj) if not member.startswith("_"))
+            methods = {}
+            for member in members:
+                signature = resolver.accepted(obj, member)
+                if signature is not None:
+                    methods[member] = signature
+            classes[name] = {
+                "init": resolver.accepted(obj, "__init__") or OPEN_SIGNATURE,
+                "members": members,
+                "methods": methods,
+                # Classes with their own __getattr__ answer get_*/set_* for any attribute
+                "dynamic": hasattr(obj, "__getattr__"),
+            }
+        elif inspect.isfunction(obj) or inspect.isbuiltin(obj):
+            functions[name] = _function_signature(obj)
+    return {
+        "format": INDEX_FORMAT,
+        "version": version,
+        "names": names,
+        "classes": classes,
+        "functions": functions,
+    }
+
+
+class ManimAPIService:
+    """Checks calls in generated code against the persisted Manim signature index."""
+
+    def __init__(self, index_dir: Optional[Path] = None, index: Optional[Dict[str, Any]] = None):
+        """Initialize the Manim API service.
+
+        Args:
+            index_dir: Where indexes are persisted, one file per Manim version
+            index: A prebuilt index to use instead of loading one
+        """
+        self.index_dir = index_dir or MANIM_API_INDEX_DIR
+        self._index = index
+        self._loaded = index is not None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> Optional[Dict[str, Any]]:
+        """The signature index, loaded or built on first use; None if Manim is not installed."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._index = self._load()
+                    self._loaded = True
+        return self._index
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        version = manim_version()
+        if version is None:
+            logger.info("Manim is not installed, API checks are disabled")
+            return None
+
+        path = self.index_dir / f"manim-{version}.json"
+        try:
+            with open(path) as f:
+                index = json.load(f)
+            if index.get("format") == INDEX_FORMAT:
+                return index
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable Manim API index {path}: {str(e)}")
+
+        try:
+            manim = importlib.import_module("manim")
+        except Exception as e:
+            logger.warning(f"Could not import Manim to build the API index: {str(e)}")
+            return None
+        index = build_signature_index(manim, version)
+        logger.info(f"Built Manim {version} API index with {len(index['classes'])} classes")
+
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so concurrent workers never read a partial index
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not persist Manim API index to {path}: {str(e)}")
+        return index
+
+    def get_method_signature(self, class_name: str, method_name: str) -> Optional[Signature]:
+        """Return what a Manim method accepts (``__init__`` for the constructor), if known."""
+        info = (self.index or {}).get("classes", {}).get(class_name)
+        if not info:
+            return None
+        return info["init"] if method_name == "__init__" else info["methods"].get(method_name)
+
+    def check_code(self, code: Any) -> List[CodeIssue]:
+        """Flag unknown Manim classes, methods and keyword arguments.
+
+        Args:
+            code: The generated code, or its parsed ``ast.Module``
+
+        Returns:
+            The issues found, empty if there is no index or the code does not parse
+        """
+        if self.index is None:
+            return []
+        try:
+            tree = code if isinstance(code, ast.AST) else ast.parse(code)
+        except SyntaxError:
+            return []
+        return _CallChecker(self.index, tree).check()
+
+
+def _close_matches(name: str, candidates) -> str:
+    matches = difflib.get_close_matches(name, list(candidates), n=3)
+    return " or ".join(f"'{match}'" for match in matches)
+
+
+class _CallChecker(ast.NodeVisitor):
+    """Checks the Manim calls of one module against the index.
+
+    The class of a variable is known when it was last assigned a Manim
+    constructor call in the same function; calls on anything else are not
+    checked.
+    """
+
+    def __init__(self, index: Dict[str, Any], tree: ast.Module):
+        self.index = index
+        self.tree = tree
+        self.exported: Set[str] = set(index["names"])
+        self.classes: Dict[str, Any] = index["classes"]
+        self.functions: Dict[str, Signature] = index["functions"]
+        self.defined = self._defined_names(tree)
+        self.scopes: List[Dict[str, str]] = [{}]
+        self.issues: List[CodeIssue] = []
+        self.seen: Set[Tuple[str, int]] = set()
+
+    @staticmethod
+    def _defined_names(tree: ast.Module) -> Set[str]:
+        """Names the code defines or imports itself, which shadow Manim's."""
+        defined = set()
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                defined.add(node.name)
+            elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                defined.add(node.id)
+            elif isinstance(node, ast.arg):
+                defined.add(node.arg)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for alias in node.names:
+                    if alias.name != "*":
+                        defined.add((alias.asname or alias.name).split(".")[0])
+        return defined
+
+    def check(self) -> List[CodeIssue]:
+        # Unknown names are only Manim's problem when the code star-imports it
+        self.star_import = any(
+            isinstance(node, ast.ImportFrom) and node.module == "manim" and any(a.name == "*" for a in node.names)
+            for node in self.tree.body
+        )
+        self.visit(self.tree)
+        return self.issues
+
+    def _report(self, node: ast.AST, message: str, suggestion: str) -> None:
+        key = (message, node.lineno)
+        if key in self.seen:
+            return
+        self.seen.add(key)
+        self.issues.append(CodeIssue(message=message, severity="error", line_number=node.lineno, suggestion=suggestion))
+
+    def _manim_class(self, name: str) -> Optional[str]:
+        return name if name in self.classes and name not in self.defined else None
+
+    def _class_of(self, node: ast.AST) -> Optional[str]:
+        """Return the Manim class an expression evaluates to, if it is known."""
+        if isinstance(node, ast.Name):
+            for scope in reversed(self.scopes):
+                if node.id in scope:
+                    return scope[node.id]
+            return None
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            return self._manim_class(node.func.id)
+        if isinstance(node, ast.Attribute) and node.attr == "animate":
+            # mobject.animate.<method>(...) builds an animation of the mobject's method
+            return self._class_of(node.value)
+        return None
+
+    def visit_FunctionDef(self, node):
+        self.scopes.append({})
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_Lambda = visit_FunctionDef
+
+    def visit_Assign(self, node: ast.Assign):
+        self.visit(node.value)
+        for target in node.targets:
+            self.visit(target)
+        if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            cls = self._class_of(node.value) if isinstance(node.value, ast.Call) else None
+            if cls:
+                self.scopes[-1][node.targets[0].id] = cls
+
+    def visit_Name(self, node: ast.Name):
+        if isinstance(node.ctx, ast.Store):
+            # Any other assignment (loops, with, unpacking) makes the type unknown
+            self.scopes[-1].pop(node.id, None)
+
+    def visit_Call(self, node: ast.Call):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Name):
+            self._check_name_call(node, func.id)
+        elif isinstance(func, ast.Attribute):
+            cls = self._class_of(func.value)
+            if cls:
+                self._check_method_call(node, cls, func.attr)
+
+    def _check_name_call(self, node: ast.Call, name: str) -> None:
+        if name in self.defined:
+            return
+        if name in self.classes:
+            self._check_keywords(node, f"{name}()", self.classes[name]["init"])
+        elif name in self.functions:
+            self._check_keywords(node, f"{name}()", self.functions[name])
+        elif self.star_import and name[:1].isupper() and name not in self.exported and name not in _BUILTINS:
+            matches = _close_matches(name, self.exported)
+            self._report(
+                node,
+                f"{name} is not defined in Manim",
+                f"Did you mean {matches}?" if matches else f"Remove {name} or define it before use",
+            )
+
+    def _check_method_call(self, node: ast.Call, cls: str, method: str) -> None:
+        info = self.classes[cls]
+        if method not in info["members"]:
+            if info["dynamic"] and method.startswith(DYNAMIC_PREFIXES):
+                return
+            matches = _close_matches(method, info["members"])
+            self._report(
+                node,
+                f"'{cls}' object has no attribute '{method}'",
+                f"Did you mean {matches}?" if matches else f"Check the {cls} API for the right method",
+            )
+            return
+        signature = info["methods"].get(method)
+        if signature:
+            self._check_keywords(node, f"{cls}.{method}()", signature)
+
+    def _check_keywords(self, node: ast.Call, callee: str, signature: Signature) -> None:
+        if signature["open"]:
+            return
+        accepted = signature["params"]
+        for keyword in node.keywords:
+            # **options at the call site cannot be checked statically
+            if keyword.arg is None or keyword.arg in accepted:
+                continue
+            matches = _close_matches(keyword.arg, accepted)
+            self._report(
+                node,
+                f"{callee} got an unexpected keyword argument '{keyword.arg}'",
+                f"Did you mean {matches}?" if matches else f"Remove '{keyword.arg}'; {callee} does not accept it",
+            )
+
+
+_service: Optional[ManimAPIService] = None
+_service_lock = threading.Lock()
+
+
+def get_manim_api_service() -> ManimAPIService:
+    """Return the process-wide Manim API service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ManimAPIService()
+    return _service
@@ -1,11 +1,24 @@
 import logging
+import os
+import signal
 import subprocess
 import ast
 import re
+import threading
+import time
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
 
 from leap.core.config import GENERATED_DIR
+from leap.core.metrics import RENDER_CPU, RENDER_DURATION, record_cache
+from leap.services.cancellation import current_token, raise_if_cancelled
+
+# Manim's tqdm progress bars look like "Animation 3: Write(Text('Hi')):  45%|####  | 27/60"
+PROGRESS_PATTERN = re.compile(r"Animation (\d+)\b.*?(\d{1,3})%\|")
+
+# Animations Manim skips because their partial movie file is already cached
+CACHED_PATTERN = re.compile(r"Animation (\d+)\s*:\s*Using cached data")
 
 class ManimService:
     """Service for executing Manim code."""
@@ -66,15 +79,63 @@ class ManimService:
                 return class_match.group(1)
             raise ValueError(f"Could not extract class name: {str(e)}")
     
-    def execute_manim_code(self, file_path: str, quality: str) -> Dict[str, Any]:
+    def count_animations(self, code_content: str) -> Optional[int]:
+        """Estimate how many animations a scene renders.
+        
+        Manim numbers every ``play`` and ``wait`` call as an animation. Calls in
+        loops are counted once, so the result is a lower bound.
+        
+        Args:
+            code_content: The Python code content
+            
+        Returns:
+            The number of ``self.play``/``self.wait`` calls, or None if the code does not parse
+        """
+        try:
+            tree = ast.parse(code_content)
+        except SyntaxError:
+            return None
+        return sum(
+            1 for node in ast.walk(tree)
+            if isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in ("play", "wait")
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "self"
+        ) or None
+    
+    def parse_progress(self, line: str) -> Optional[tuple]:
+        """Parse a line of Manim progress output.
+        
+        Args:
+            line: A line of Manim's stderr output
+            
+        Returns:
+            A tuple of (animation index, percent complete), or None if the line is not a progress update
+        """
+        match = PROGRESS_PATTERN.search(line)
+        if not match:
+            return None
+        return int(match.group(1)), min(100, int(match.group(2)))
+    
+    def execute_manim_code(
+        self,
+        file_path: str,
+        quality: str,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
         """Execute the Manim code and return the result.
         
         Args:
             file_path: The path to the Python file containing Manim code
             quality: The rendering quality ("low", "medium", or "high")
+            progress_callback: Optional callback receiving (animation index, percent complete) while rendering
             
         Returns:
             A dictionary containing the execution result
+
+        Raises:
+            JobCancelled: If the job was cancelled while rendering
         """
         # Get the quality flag
         quality_flag = self.quality_flags.get(quality, "-ql")
@@ -101,17 +162,46 @@ class ManimService:
             ]
             
             self.logger.info(f"Running Manim with quality: {quality}")
+            started = time.monotonic()
             
-            # Execute the command
-            result = subprocess.run(
+            # Execute the command, streaming stderr to pick up the progress bars
+            # Manim runs in its own session so cancelling the job can kill the whole process group
+            process = subprocess.Popen(
                 cmd,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                check=True
+                start_new_session=True
+            )
+            stderr_lines: List[str] = []
+            rendered: set = set()
+            stderr_reader = threading.Thread(
+                target=self._read_stderr,
+                args=(process.stderr, stderr_lines, progress_callback, rendered),
+                daemon=True
             )
+            stderr_reader.start()
+            token = current_token()
+            with token.on_cancel(lambda: self._kill_process_group(process)) if token else nullcontext():
+                stdout = process.stdout.read()
+                # wait4 also reports the CPU time of the render and the processes it waited for
+                _, status, usage = os.wait4(process.pid, 0)
+                returncode = process.returncode = os.waitstatus_to_exitcode(status)
+            stderr_reader.join()
+            stderr = "".join(stderr_lines)
+            raise_if_cancelled()
+            
+            RENDER_DURATION.observe(time.monotonic() - started, quality=quality)
+            RENDER_CPU.observe(usage.ru_utime + usage.ru_stime, quality=quality)
+            cached = set(CACHED_PATTERN.findall(stdout + stderr))
+            record_cache("render", hit=True, count=len(cached))
+            record_cache("render", hit=False, count=len(rendered - cached))
+            
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, cmd, output=stdout, stderr=stderr)
             
             # Log a summary of the execution instead of the full output
-            output_lines = result.stdout.strip().split("\n")
+            output_lines = stdout.strip().split("\n")
             self.logger.info(f"Manim execution completed with {len(output_lines)} lines of output")
             
             # Find the output file
@@ -123,7 +213,7 @@ class ManimService:
                 self.logger.warning("Could not find output video file")
                 return {
                     "success": False,
-                    "output": result.stdout,
+                    "output": stdout,
                     "error": "Could not find output video file",
                     "output_file": None
                 }
@@ -131,7 +221,7 @@ class ManimService:
             self.logger.info(f"Generated video: {output_file[0]}")
             return {
                 "success": True,
-                "output": result.stdout,
+                "output": stdout,
                 "error": None,
                 "output_file": str(output_file[0])
             }
@@ -154,4 +244,38 @@ class ManimService:
                 "output": None,
                 "error": str(e),
                 "output_file": None
-            } 
\ No newline at end of file
+            }
+    
+    def _kill_process_group(self, process: subprocess.Popen):
+        """Kill a render process and everything it started (ffmpeg, LaTeX, TTS)."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            self.logger.info(f"Killed render process group {process.pid}")
+        except ProcessLookupError:
+            pass
+    
+    def _read_stderr(
+        self,
+        stream,
+        lines: List[str],
+        progress_callback: Optional[Callable[[int, int], None]],
+        rendered: Optional[set] = None
+    ):
+        """Collect Manim's stderr and report progress updates as they arrive.
+        
+        The indices of animations that showed a progress bar (were actually
+        rendered) are added to ``rendered``.
+        """
+        # Text mode translates the carriage returns tqdm uses into line breaks
+        for line in stream:
+            progress = self.parse_progress(line)
+            if progress is None:
+                lines.append(line)
+                continue
+            if rendered is not None:
+                rendered.add(str(progress[0]))
+            if progress_callback:
+                try:
+                    progress_callback(*progress)
+                except Exception as e:
+                    self.logger.warning(f"Progress callback failed: {str(e)}")
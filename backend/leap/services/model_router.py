@@ -0,0 +1,50 @@
+"""
+Model routing for workflow nodes.
+
+Each node is configured with a model tier (``fast``, ``standard``, ``strong``)
+or an explicit model name in ``NODE_MODELS``. Cheap classification and planning
+run on the fast tier, code generation and correction on the standard one.
+After ``ESCALATE_AFTER_FAILURES`` failed corrections the next attempts move up
+one tier, so hard errors get a stronger model instead of the same retry.
+"""
+import logging
+from typing import Optional
+
+from leap.core import metrics
+from leap.core.config import ESCALATE_AFTER_FAILURES, MODEL_TIERS, NODE_MODELS
+
+logger = logging.getLogger(__name__)
+
+TIER_ORDER = ("fast", "standard", "strong")
+
+
+def select_model(node: str, failures: int = 0) -> str:
+    """Return the model a node should call.
+
+    Args:
+        node: The workflow node name
+        failures: Failed attempts so far; at ``ESCALATE_AFTER_FAILURES`` the
+            node's tier is raised by one
+
+    Returns:
+        The model name
+    """
+    tier = NODE_MODELS.get(node, "standard")
+    if tier not in MODEL_TIERS:
+        # An explicit model name is used as is and never escalated
+        return tier
+    model = MODEL_TIERS[tier]
+    escalated = _escalate(tier, failures)
+    if escalated and MODEL_TIERS[escalated] != model:
+        model = MODEL_TIERS[escalated]
+        logger.info(f"Escalating {node} to {model} after {failures} failed attempts")
+        metrics.MODEL_ESCALATIONS.inc(node=node, model=model)
+    return model
+
+
+def _escalate(tier: str, failures: int) -> Optional[str]:
+    """Return the tier above ``tier`` once there have been enough failures."""
+    if ESCALATE_AFTER_FAILURES <= 0 or failures < ESCALATE_AFTER_FAILURES:
+        return None
+    position = TIER_ORDER.index(tier)
+    return TIER_ORDER[min(position + 1, len(TIER_ORDER) - 1)]
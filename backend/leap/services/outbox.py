@@ -0,0 +1,216 @@
+"""
+Transactional outbox for post-render side effects.
+
+Uploading the video, syncing the job record to Supabase and emailing the user
+happen after a job is already playable, so they are recorded as outbox
+messages and delivered by a background dispatcher instead of holding the
+render worker. Every message carries an idempotency key: recording the same
+key twice (e.g. when a resumed job completes again) is a no-op, and a message
+is retried with exponential backoff until it succeeds or runs out of attempts.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from leap.core.config import (
+    OUTBOX_CLAIM_TIMEOUT,
+    OUTBOX_DB_PATH,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_BACKOFF,
+)
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+DEAD = "dead"
+
+
+@dataclass
+class OutboxMessage:
+    """A side effect waiting to be delivered."""
+    id: int
+    kind: str
+    key: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class Outbox:
+    """Persistent outbox with idempotency keys, retries and dead-lettering."""
+
+    def __init__(
+        self,
+        db_path: Path = OUTBOX_DB_PATH,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        retry_backoff: float = OUTBOX_RETRY_BACKOFF,
+        claim_timeout: float = OUTBOX_CLAIM_TIMEOUT,
+    ):
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.claim_timeout = claim_timeout
+        self.lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode so transactions are controlled explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_ready ON outbox (status, available_at)")
+
+    def add(self, kind: str, key: str, payload: Dict[str, Any]) -> bool:
+        """Record a side effect for delivery.
+
+        Args:
+            kind: The handler that delivers the message
+            key: Idempotency key; a message with the same key is only recorded once
+            payload: JSON-serializable handler arguments
+
+        Returns:
+            True if the message was new
+        """
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO outbox "
+                "(idempotency_key, kind, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload), PENDING, now, now, now)
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, limit: int = 10) -> List[OutboxMessage]:
+        """Claim messages that are due for delivery.
+
+        Claimed messages are hidden from other dispatchers for the claim
+        timeout, after which they become visible again if never completed.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT * FROM outbox WHERE status = ? AND available_at <= ? "
+                    "ORDER BY available_at, id LIMIT ?",
+                    (PENDING, now, limit)
+                ).fetchall()
+                for row in rows:
+                    self.conn.execute(
+                        "UPDATE outbox SET attempts = attempts + 1, available_at = ?, updated_at = ? WHERE id = ?",
+                        (now + self.claim_timeout, now, row["id"])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [
+            OutboxMessage(row["id"], row["kind"], row["idempotency_key"], json.loads(row["payload"]), row["attempts"] + 1)
+            for row in rows
+        ]
+
+    def complete(self, message: OutboxMessage) -> None:
+        """Mark a message as delivered."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE id = ?",
+                (DONE, time.time(), message.id)
+            )
+
+    def fail(self, message: OutboxMessage, error: str) -> str:
+        """Schedule a retry with backoff, or dead-letter the message.
+
+        Returns:
+            The new status of the message
+        """
+        now = time.time()
+        status = DEAD if message.attempts >= self.max_attempts else PENDING
+        delay = self.retry_backoff * (2 ** (message.attempts - 1))
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET status = ?, available_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, now + delay, error, now, message.id)
+            )
+        return status
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of messages in each status."""
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class OutboxDispatcher:
+    """Delivers outbox messages to their handlers in a background thread."""
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        handlers: Dict[str, Callable[[Dict[str, Any]], None]],
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+    ):
+        self.outbox = outbox
+        self.handlers = handlers
+        self.poll_interval = poll_interval
+        self.wakeup = threading.Event()
+
+    def notify(self) -> None:
+        """Wake the dispatcher after new messages were recorded."""
+        self.wakeup.set()
+
+    def dispatch_once(self) -> int:
+        """Deliver the messages that are currently due.
+
+        Returns:
+            The number of messages attempted
+        """
+        messages = self.outbox.claim()
+        for message in messages:
+            try:
+                self.handlers[message.kind](message.payload)
+            except Exception as e:
+                status = self.outbox.fail(message, str(e))
+                log = logger.error if status == DEAD else logger.warning
+                log(f"Outbox message {message.key} failed (attempt {message.attempts}, now {status}): {str(e)}")
+            else:
+                self.outbox.complete(message)
+                logger.info(f"Delivered outbox message {message.key}")
+        return len(messages)
+
+    def start(self, stop_event: threading.Event) -> threading.Thread:
+        """Deliver messages until the stop event is set."""
+        def loop():
+            while not stop_event.is_set():
+                try:
+                    if self.dispatch_once():
+                        continue
+                except Exception as e:
+                    logger.error(f"Error dispatching outbox: {str(e)}", exc_info=True)
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+
+        thread = threading.Thread(target=loop, name="outbox-dispatcher", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,72 @@
+"""
+Scheduling policy for queued render jobs.
+
+Jobs are not served first come, first served. Every queued job gets a score in
+seconds: how long it has waited (times the aging rate), plus a head start for
+its priority class and render quality, minus a penalty for every job its tenant
+already has running. The render worker leases the job with the highest score,
+so interactive users go ahead of email-notified batches, one tenant cannot fill
+every render slot, and a job that keeps being passed over eventually wins on
+age alone.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+from leap.core.config import (
+    SCHEDULER_AGING_RATE,
+    SCHEDULER_CLASS_BOOST,
+    SCHEDULER_QUALITY_BOOST,
+    SCHEDULER_TENANT_PENALTY,
+)
+
+INTERACTIVE = "interactive"
+OFFLINE = "offline"
+
+PREVIEW = "preview"
+FINAL = "final"
+
+
+def priority_class(email: Optional[str]) -> str:
+    """Return the priority class of a job: users who asked for an email are not watching."""
+    return OFFLINE if email else INTERACTIVE
+
+
+def quality_class(quality: Optional[str]) -> str:
+    """Return whether a job renders a quick preview or a final-quality video."""
+    return PREVIEW if (quality or "low") == "low" else FINAL
+
+
+@dataclass
+class Candidate:
+    """A queued job competing for a render slot."""
+    job_id: str
+    priority_class: str
+    quality_class: str
+    tenant: Optional[str]
+    waited: float
+
+
+@dataclass
+class SchedulingPolicy:
+    """Scores queued jobs; the highest score is leased next."""
+    class_boost: Dict[str, float] = field(default_factory=lambda: dict(SCHEDULER_CLASS_BOOST))
+    quality_boost: Dict[str, float] = field(default_factory=lambda: dict(SCHEDULER_QUALITY_BOOST))
+    tenant_penalty: float = SCHEDULER_TENANT_PENALTY
+    aging_rate: float = SCHEDULER_AGING_RATE
+
+    def score(self, candidate: Candidate, running: Mapping[str, int]) -> float:
+        """Score a queued job.
+
+        Args:
+            candidate: The queued job
+            running: Jobs currently being processed, by tenant
+
+        Returns:
+            The job's priority in seconds of equivalent waiting time
+        """
+        score = candidate.waited * self.aging_rate
+        score += self.class_boost.get(candidate.priority_class, 0)
+        score += self.quality_boost.get(candidate.quality_class, 0)
+        if candidate.tenant:
+            score -= self.tenant_penalty * running.get(candidate.tenant, 0)
+        return score
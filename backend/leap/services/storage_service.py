@@ -4,14 +4,73 @@ Storage service for handling file uploads and downloads.
 import os
 import logging
 import shutil
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple, Union
 import uuid
 import mimetypes
 from datetime import datetime
 
+from leap.core.config import VIDEOS_DIR
+from leap.core.metrics import record_cache
+from leap.services.upload_manifest import UploadManifest, get_upload_manifest
+from leap.services.uploads import ChunkedUploader, TusObjectStore
+
 logger = logging.getLogger(__name__)
 
+# Number of hash characters used in versioned (?v=) URLs
+CONTENT_VERSION_LENGTH = 16
+
+# Number of hash characters in content-addressed storage keys
+CONTENT_KEY_LENGTH = 12
+
+_hash_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_hash_cache_lock = threading.Lock()
+_HASH_CACHE_SIZE = 1024
+
+def file_content_hash(file_path: Union[str, Path]) -> str:
+    """Return the SHA-256 of a file's contents.
+    
+    Results are cached by path, size and modification time, so each file is
+    only hashed once per process unless it changes.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        The hex digest of the file contents
+    """
+    stat = os.stat(file_path)
+    key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_cache_lock:
+        if key in _hash_cache:
+            _hash_cache.move_to_end(key)
+            record_cache("file_hash", hit=True)
+            return _hash_cache[key]
+    record_cache("file_hash", hit=False)
+    
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    
+    with _hash_cache_lock:
+        _hash_cache[key] = digest.hexdigest()
+        if len(_hash_cache) > _HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    return digest.hexdigest()
+
+def content_addressed_path(file_path: Path, content_hash: str) -> str:
+    """Return the storage key of a rendered video, named after its contents.
+    
+    Renders are named after their scene class, which many jobs share
+    (``480p15/MainScene.mp4``), so the key carries a prefix of the content hash:
+    ``480p15/MainScene-<hash>.mp4``.
+    """
+    return f"{file_path.parent.name}/{file_path.stem}-{content_hash[:CONTENT_KEY_LENGTH]}{file_path.suffix}"
+
 class StorageService:
     """Service for handling file storage."""
     
@@ -24,16 +83,15 @@ class StorageService:
         self.base_url = os.environ.get("BASE_URL", "http://localhost:8000")
         
         # Set up local storage paths
-        self.local_storage_path = os.environ.get(
-            "LOCAL_STORAGE_PATH", 
-            str(Path(__file__).parent.parent.parent / "generated" / "media" / "videos")
-        )
+        self.local_storage_path = str(VIDEOS_DIR)
         
         # Ensure local storage directory exists
         Path(self.local_storage_path).mkdir(parents=True, exist_ok=True)
         
         # Initialize Supabase client if needed
         self.supabase_client = None
+        self.uploader: Optional[ChunkedUploader] = None
+        self.manifest: Optional[UploadManifest] = None
         if self.use_supabase:
             try:
                 from supabase import create_client
@@ -50,7 +108,9 @@ class StorageService:
                 else:
                     try:
                         self.supabase_client = create_client(supabase_url, supabase_key)
-                        
+                        self.uploader = ChunkedUploader(TusObjectStore(supabase_url, supabase_key, self.bucket_name))
+                        self.manifest = get_upload_manifest()
+
                         # Check if bucket exists, create if not
                         try:
                             self.supabase_client.storage.get_bucket(self.bucket_name)
@@ -114,47 +174,20 @@ class StorageService:
             # Create a path that includes the parent directory for organization
             destination_path = f"{parent_dir}/{unique_filename}"
         
-        # If using Supabase, upload to Supabase Storage
-        if self.use_supabase and self.supabase_client:
+        # If using object storage, stream the file up in resumable chunks
+        if self.use_supabase and self.uploader:
             try:
                 logger.info(f"Uploading file to Supabase: {destination_path}")
-                
+
                 # Get file mime type
                 content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
-                
-                # Upload file to Supabase without deleting existing files
-                with open(file_path, "rb") as f:
-                    file_data = f.read()  # Read file data
-                    
-                    # Upload the file without checking for existing files
-                    result = self.supabase_client.storage.from_(self.bucket_name).upload(
-                        destination_path,
-                        file_data,
-                        {"content-type": content_type}
-                    )
-                    
-                    # Check if result is an object with attributes or a dictionary
-                    if hasattr(result, 'get'):
-                        # It's a dictionary-like object
-                        if not result or not result.get('Key'):
-                            raise Exception("Upload failed: No key returned")
-                    else:
-                        # It's likely an object with attributes
-                        # Just check if it exists
-                        if not result:
-                            raise Exception("Upload failed: No response returned")
-                
-                # Get public URL
-                public_url = self.supabase_client.storage.from_(self.bucket_name).get_public_url(destination_path)
-                
-                # Remove any trailing question mark if present
-                if public_url.endswith('?'):
-                    public_url = public_url[:-1]
-                    
+
+                public_url = self.uploader.upload(file_path, destination_path, content_type)
+                self.manifest.record(file_content_hash(file_path), destination_path, public_url, file_path.stat().st_size)
                 logger.info(f"File uploaded to Supabase: {public_url}")
-                
+
                 return public_url
-            
+
             except Exception as e:
                 logger.error(f"Error uploading to Supabase: {str(e)}")
                 logger.info("Falling back to local storage")
@@ -171,11 +204,7 @@ class StorageService:
             shutil.copy2(file_path, local_dest)
             logger.info(f"File saved to local storage: {local_dest}")
             
-            # Generate relative path for URL
-            relative_path = str(destination_path).replace("\\", "/")
-            
-            # Create URL
-            url = f"{self.base_url}/videos/{relative_path}"
+            url = self._local_url(destination_path, local_dest)
             logger.info(f"Local file URL: {url}")
             
             return url
@@ -200,28 +229,27 @@ class StorageService:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Extract the directory name and filename for the destination path
-        parent_dir = file_path.parent.name
-        filename = file_path.name
-        destination_path = f"{parent_dir}/{filename}"
-        
-        # Check if file already exists in Supabase
-        if self.use_supabase and self.supabase_client:
+        # Check if this content is already in Supabase: manifest first, then a single HEAD.
+        # The key is derived from the content, so an existing object holds this very video.
+        if self.use_supabase and self.uploader:
+            content_hash = file_content_hash(file_path)
+            destination_path = content_addressed_path(file_path, content_hash)
             try:
-                # We need to actually check if the file exists, not just get the URL
-                # Try to list the file to see if it exists
-                files = self.supabase_client.storage.from_(self.bucket_name).list(parent_dir)
-                file_exists = any(file['name'] == filename for file in files)
+                entry = self.manifest.get(content_hash)
+                record_cache("upload_manifest", hit=entry is not None)
+                if entry:
+                    logger.info(f"File already exists in Supabase: {entry.url}")
+                    return entry.url
                 
-                if file_exists:
-                    # If file exists, return public URL
-                    public_url = self.supabase_client.storage.from_(self.bucket_name).get_public_url(destination_path)
+                if self.uploader.store.object_exists(destination_path):
+                    public_url = self.uploader.store.public_url(destination_path)
+                    self.manifest.record(content_hash, destination_path, public_url, file_path.stat().st_size)
                     logger.info(f"File already exists in Supabase: {public_url}")
                     return public_url
-                else:
-                    # File doesn't exist, upload it
-                    logger.info(f"File not found in Supabase, uploading: {destination_path}")
-                    return self.save_file(file_path, destination_path)
+                
+                # File doesn't exist, upload it
+                logger.info(f"File not found in Supabase, uploading: {destination_path}")
+                return self.save_file(file_path, destination_path)
             
             except Exception as e:
                 # Error checking or getting URL, upload it
@@ -229,14 +257,54 @@ class StorageService:
                 logger.info(f"Attempting to upload file: {destination_path}")
                 return self.save_file(file_path, destination_path)
         
-        # Check if file exists in local storage
+        return self.get_local_url(file_path)
+    
+    def get_local_url(self, file_path: str) -> str:
+        """
+        Get a URL serving the file from local storage, copying it there if needed.
+        
+        Never contacts remote storage, so a finished job is playable right away
+        while the upload happens in the background. Scenes of different jobs
+        often share a class name; when the stored file has different contents,
+        the video is stored under a name carrying its content hash instead.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            Versioned local URL of the file
+        """
+        file_path = Path(file_path)
+        
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        content_hash = file_content_hash(file_path)
+        destination_path = f"{file_path.parent.name}/{file_path.name}"
         local_path = Path(self.local_storage_path) / destination_path
+        if local_path.exists() and file_content_hash(local_path) != content_hash:
+            destination_path = content_addressed_path(file_path, content_hash)
+            local_path = Path(self.local_storage_path) / destination_path
         if local_path.exists():
-            # File exists in local storage, return URL
-            relative_path = str(destination_path).replace("\\", "/")
-            url = f"{self.base_url}/videos/{relative_path}"
+            # Same contents already in local storage, return URL
+            url = self._local_url(destination_path, local_path)
             logger.info(f"File already exists in local storage: {url}")
             return url
         
-        # File doesn't exist in storage, save it
-        return self.save_file(file_path, destination_path) 
\ No newline at end of file
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        # Copy then rename, so the video is never served half-written
+        tmp = local_path.with_name(f"{local_path.name}.{os.getpid()}.tmp")
+        shutil.copy2(file_path, tmp)
+        os.replace(tmp, local_path)
+        logger.info(f"File saved to local storage: {local_path}")
+        return self._local_url(destination_path, local_path)
+    
+    def _local_url(self, destination_path: str, local_path: Path) -> str:
+        """Build the versioned public URL of a file in local storage.
+        
+        The ``v`` query parameter is a prefix of the content hash, so the URL
+        changes whenever the file does and can be cached as immutable.
+        """
+        relative_path = str(destination_path).replace("\\", "/")
+        version = file_content_hash(local_path)[:CONTENT_VERSION_LENGTH]
+        return f"{self.base_url}/videos/{relative_path}?v={version}"
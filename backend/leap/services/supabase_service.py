@@ -1,7 +1,6 @@
 import os
 from typing import Dict, Any, Optional
 import logging
-from supabase import create_client, Client
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +15,9 @@ class SupabaseService:
             self.supabase = None
         else:
             try:
-                self.supabase: Client = create_client(url, key)
+                # Imported here: the supabase client pulls in a large dependency tree
+                from supabase import create_client
+                self.supabase = create_client(url, key)
             except Exception as e:
                 logger.warning(f"Failed to initialize Supabase client: {e}. Using mock database.")
                 self.supabase = None
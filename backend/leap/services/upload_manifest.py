@@ -0,0 +1,79 @@
+"""
+Manifest of files already uploaded to object storage.
+
+Maps the content hash of a file to its remote key and public URL, so checking
+whether a video is already stored is a single indexed lookup instead of a
+listing of its storage prefix.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from leap.core.config import UPLOAD_MANIFEST_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ManifestEntry:
+    """A stored object and the content it holds."""
+    content_hash: str
+    key: str
+    url: str
+    size: int
+    uploaded_at: float
+
+
+class UploadManifest:
+    """SQLite-backed index of uploaded files keyed by content hash."""
+
+    def __init__(self, db_path: Path = UPLOAD_MANIFEST_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS upload_manifest (
+                content_hash TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                uploaded_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, content_hash: str) -> Optional[ManifestEntry]:
+        """Return the stored object holding this content, if any."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM upload_manifest WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return ManifestEntry(**dict(row)) if row else None
+
+    def record(self, content_hash: str, key: str, url: str, size: int) -> ManifestEntry:
+        """Record that ``key`` holds the content with this hash."""
+        entry = ManifestEntry(content_hash, key, url, size, time.time())
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO upload_manifest (content_hash, key, url, size, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (entry.content_hash, entry.key, entry.url, entry.size, entry.uploaded_at)
+            )
+            self.conn.commit()
+        return entry
+
+
+@lru_cache(maxsize=1)
+def get_upload_manifest() -> UploadManifest:
+    """Return the process-wide upload manifest."""
+    return UploadManifest()
@@ -0,0 +1,279 @@
+"""
+Streaming, chunked and resumable uploads.
+
+Videos are uploaded in fixed-size chunks read straight from disk, so memory use
+does not grow with the file size. After a failed chunk the uploader backs off,
+asks the store how many bytes it has, and carries on from that offset instead
+of starting over.
+
+``TusObjectStore`` speaks the TUS resumable upload protocol used by Supabase
+Storage. ``LocalObjectStore`` implements the same interface on a local
+directory and stands in for it in tests and local development.
+"""
+import base64
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple, Union
+
+from leap.core import metrics
+from leap.core.config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_RETRIES, UPLOAD_RETRY_BACKOFF
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    """Raised when an upload cannot be completed."""
+
+
+class ObjectStore:
+    """Interface for object stores that accept uploads in chunks."""
+
+    def create_upload(self, key: str, size: int, content_type: str) -> str:
+        """Start an upload and return its upload ID."""
+        raise NotImplementedError
+
+    def upload_offset(self, upload_id: str) -> int:
+        """Return how many bytes of an upload the store has received."""
+        raise NotImplementedError
+
+    def upload_chunk(self, upload_id: str, offset: int, data: bytes) -> int:
+        """Append a chunk at ``offset`` and return the new offset."""
+        raise NotImplementedError
+
+    def public_url(self, key: str) -> str:
+        """Return the public URL of a stored object."""
+        raise NotImplementedError
+
+    def object_exists(self, key: str) -> bool:
+        """Return whether an object exists, without listing its prefix."""
+        raise NotImplementedError
+
+
+class TusObjectStore(ObjectStore):
+    """Resumable uploads to Supabase Storage over the TUS protocol."""
+
+    def __init__(self, supabase_url: str, supabase_key: str, bucket: str, timeout: float = 60.0):
+        import httpx
+
+        self.base_url = supabase_url.rstrip("/")
+        self.bucket = bucket
+        self.client = httpx.Client(
+            timeout=timeout,
+            headers={
+                "Authorization": f"Bearer {supabase_key}",
+                "apikey": supabase_key,
+                "Tus-Resumable": "1.0.0",
+            }
+        )
+
+    def _metadata(self, **values: str) -> str:
+        return ",".join(f"{name} {base64.b64encode(value.encode()).decode()}" for name, value in values.items())
+
+    def create_upload(self, key: str, size: int, content_type: str) -> str:
+        response = self.client.post(
+            f"{self.base_url}/storage/v1/upload/resumable",
+            headers={
+                "Upload-Length": str(size),
+                # Keys are content-addressed, so an existing object is never overwritten
+                "Upload-Metadata": self._metadata(bucketName=self.bucket, objectName=key, contentType=content_type),
+            }
+        )
+        response.raise_for_status()
+        return response.headers["Location"]
+
+    def upload_offset(self, upload_id: str) -> int:
+        response = self.client.head(upload_id)
+        response.raise_for_status()
+        return int(response.headers["Upload-Offset"])
+
+    def upload_chunk(self, upload_id: str, offset: int, data: bytes) -> int:
+        response = self.client.patch(
+            upload_id,
+            content=data,
+            headers={"Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"}
+        )
+        response.raise_for_status()
+        return int(response.headers["Upload-Offset"])
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/storage/v1/object/public/{self.bucket}/{key}"
+
+    def object_exists(self, key: str) -> bool:
+        response = self.client.head(self.public_url(key))
+        if response.status_code in (400, 404):
+            return False
+        response.raise_for_status()
+        return True
+
+
+class LocalObjectStore(ObjectStore):
+    """Object store on a local directory with the same chunked upload semantics."""
+
+    def __init__(self, root: Union[str, Path], base_url: str = "http://localhost:8000/objects"):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.partial_dir = self.root / ".uploads"
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def create_upload(self, key: str, size: int, content_type: str) -> str:
+        upload_id = uuid.uuid4().hex
+        (self.partial_dir / upload_id).touch()
+        with self.lock:
+            self.uploads[upload_id] = {"key": key, "size": size}
+        return upload_id
+
+    def upload_offset(self, upload_id: str) -> int:
+        return (self.partial_dir / upload_id).stat().st_size
+
+    def upload_chunk(self, upload_id: str, offset: int, data: bytes) -> int:
+        with self.lock:
+            upload = self.uploads[upload_id]
+            partial = self.partial_dir / upload_id
+            if partial.stat().st_size != offset:
+                raise UploadError(f"Offset mismatch for upload {upload_id}")
+            with open(partial, "ab") as f:
+                f.write(data)
+            new_offset = offset + len(data)
+            if new_offset >= upload["size"]:
+                destination = self.root / upload["key"]
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(partial), destination)
+                del self.uploads[upload_id]
+        return new_offset
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def object_exists(self, key: str) -> bool:
+        return (self.root / key).is_file()
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, float] = {}
+
+
+def reset_upload_stats() -> None:
+    """Reset the upload metrics."""
+    with _stats_lock:
+        _stats.update(uploads=0, failures=0, retries=0, bytes=0, seconds=0.0, last_throughput=0.0)
+
+
+reset_upload_stats()
+
+
+def get_upload_stats() -> Dict[str, float]:
+    """Return upload counters, bytes transferred and throughput in bytes per second."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["throughput"] = stats["bytes"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def _collect_metrics() -> None:
+    stats = get_upload_stats()
+    metrics.UPLOADS.set(stats["uploads"], result="success")
+    metrics.UPLOADS.set(stats["failures"], result="failure")
+    metrics.UPLOAD_RETRIES.set(stats["retries"])
+    metrics.UPLOAD_BYTES.set(stats["bytes"])
+    metrics.UPLOAD_THROUGHPUT.set(stats["throughput"])
+
+
+metrics.register_collector("uploads", _collect_metrics)
+
+
+def _record_upload(size: int, seconds: float, retries: int, failed: bool) -> None:
+    with _stats_lock:
+        _stats["retries"] += retries
+        if failed:
+            _stats["failures"] += 1
+            return
+        _stats["uploads"] += 1
+        _stats["bytes"] += size
+        _stats["seconds"] += seconds
+        _stats["last_throughput"] = size / seconds if seconds else 0.0
+
+
+class ChunkedUploader:
+    """Uploads files chunk by chunk, resuming from the stored offset after errors."""
+
+    def __init__(
+        self,
+        store: ObjectStore,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        max_retries: int = UPLOAD_MAX_RETRIES,
+        retry_backoff: float = UPLOAD_RETRY_BACKOFF,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.sleep = sleep
+
+    def upload(self, file_path: Union[str, Path], key: str, content_type: str = "application/octet-stream") -> str:
+        """Upload a file and return its public URL.
+
+        Args:
+            file_path: The local file to upload
+            key: Object key in the store
+            content_type: MIME type of the file
+
+        Returns:
+            The public URL of the uploaded object
+
+        Raises:
+            UploadError: If the upload still fails after ``max_retries`` consecutive retries
+        """
+        size = os.path.getsize(file_path)
+        start = time.monotonic()
+        retries = 0
+        try:
+            upload_id, retries = self._with_retries(lambda: self.store.create_upload(key, size, content_type), key)
+
+            offset = 0
+            attempt = 0
+            with open(file_path, "rb") as f:
+                while offset < size:
+                    f.seek(offset)
+                    chunk = f.read(self.chunk_size)
+                    try:
+                        offset = self.store.upload_chunk(upload_id, offset, chunk)
+                        attempt = 0
+                    except Exception as e:
+                        attempt += 1
+                        retries += 1
+                        if attempt > self.max_retries:
+                            raise UploadError(f"Upload of {key} failed at byte {offset} of {size}: {str(e)}") from e
+                        delay = self.retry_backoff * (2 ** (attempt - 1))
+                        logger.warning(f"Chunk upload of {key} failed at byte {offset} ({str(e)}), retrying in {delay:.1f}s")
+                        self.sleep(delay)
+                        # Resume from what the store actually received
+                        offset, extra = self._with_retries(lambda: self.store.upload_offset(upload_id), key)
+                        retries += extra
+        except Exception:
+            _record_upload(size, time.monotonic() - start, retries, failed=True)
+            raise
+
+        seconds = time.monotonic() - start
+        _record_upload(size, seconds, retries, failed=False)
+        logger.info(f"Uploaded {key} ({size} bytes) in {seconds:.2f}s with {retries} retries")
+        return self.store.public_url(key)
+
+    def _with_retries(self, operation: Callable[[], Any], key: str) -> Tuple[Any, int]:
+        """Run a control request with retries; return its result and the retry count."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return operation(), attempt
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise UploadError(f"Upload of {key} failed: {str(e)}") from e
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"Upload request for {key} failed ({str(e)}), retrying in {delay:.1f}s")
+                self.sleep(delay)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Render worker entry point.
+
+Runs one or more worker processes that lease animation jobs from the durable
+job queue and execute the workflow, keeping LLM calls and Manim rendering out
+of the web tier. Start with ``leap-worker --concurrency 4`` (or
+``python -m leap.worker``) next to an API started with ``JOB_QUEUE_ENABLED=true``.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import uuid
+from typing import Optional
+
+from leap.core import metrics
+from leap.core.config import (
+    INPUT_FAST_PATH,
+    MANIM_API_CHECK,
+    QUEUE_POLL_INTERVAL,
+    QUEUE_VISIBILITY_TIMEOUT,
+    WORKER_CONCURRENCY,
+    WORKER_METRICS_PORT,
+)
+from leap.services.job_queue import DEAD, JobQueue, QueueItem
+
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="AskLeap render worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=WORKER_CONCURRENCY,
+        help="Number of worker processes to run"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=WORKER_METRICS_PORT,
+        help="Serve /metrics on this port (worker i uses port + i); 0 disables"
+    )
+    return parser.parse_args()
+
+
+def _keep_lease(queue: JobQueue, item: QueueItem, done: threading.Event) -> None:
+    """Extend the lease on a job until it has been processed."""
+    while not done.wait(QUEUE_VISIBILITY_TIMEOUT / 3):
+        if not queue.extend(item):
+            logger.warning(f"Lost the lease on job {item.job_id}")
+            return
+
+
+def process_item(service, queue: JobQueue, item: QueueItem) -> None:
+    """Run a leased job and acknowledge it, or return it to the queue on failure.
+
+    Args:
+        service: The animation service that executes the workflow
+        queue: The job queue the item was leased from
+        item: The leased job
+    """
+    logger.info(f"Worker {item.worker} processing job {item.job_id} (attempt {item.attempts})")
+    done = threading.Event()
+    heartbeat = threading.Thread(target=_keep_lease, args=(queue, item, done), daemon=True)
+    heartbeat.start()
+    try:
+        service.run_job(
+            job_id=uuid.UUID(item.job_id),
+            prompt=item.payload["prompt"],
+            level=item.payload["level"],
+            email=item.payload.get("email")
+        )
+    except Exception as e:
+        logger.error(f"Job {item.job_id} failed in worker: {str(e)}", exc_info=True)
+        if queue.nack(item, str(e)) == DEAD:
+            service.mark_failed(uuid.UUID(item.job_id), str(e))
+    else:
+        queue.ack(item)
+    finally:
+        done.set()
+
+
+def run_worker(stop_event: Optional[threading.Event] = None, metrics_port: int = 0) -> None:
+    """Lease and process jobs until the stop event is set.
+
+    Args:
+        stop_event: Set to stop the worker after its current job
+        metrics_port: Port to serve this worker's metrics on, or 0 for none
+    """
+    from leap.api import load_env_files
+    from leap.api.services.animation import AnimationService
+
+    load_env_files()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop_event = stop_event or threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    service = AnimationService()
+    queue = JobQueue()
+    # Post-render work is delivered in the background so the render slot frees up immediately
+    service.start_outbox_dispatcher(stop_event)
+    if metrics_port:
+        metrics.start_http_server(metrics_port)
+    if MANIM_API_CHECK:
+        # Load (or build and persist) the Manim signature index before the first job needs it
+        from leap.services.manim_api_service import get_manim_api_service
+        get_manim_api_service().index
+    if INPUT_FAST_PATH:
+        # Build the input lexicon before the first job is validated
+        from leap.services.input_classifier import get_input_classifier
+        get_input_classifier()
+    logger.info(f"Worker {worker_id} started")
+
+    while not stop_event.is_set():
+        try:
+            item = queue.lease(worker_id)
+        except Exception as e:
+            logger.error(f"Error leasing job: {str(e)}", exc_info=True)
+            item = None
+        if item is None:
+            stop_event.wait(QUEUE_POLL_INTERVAL)
+            continue
+        process_item(service, queue, item)
+
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def main():
+    """Start the render worker processes."""
+    logging.basicConfig(level=logging.INFO)
+    args = parse_arguments()
+    concurrency = max(1, args.concurrency)
+
+    if concurrency == 1:
+        run_worker(metrics_port=args.metrics_port)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            kwargs={"metrics_port": args.metrics_port + i if args.metrics_port else 0},
+            name=f"leap-worker-{i}"
+        )
+        for i in range(concurrency)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {concurrency} render workers")
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,30 @@
-from leap.workflow.graph import create_workflow, GraphState
-from leap.workflow.utils import execute_code
-from leap.workflow.nodes import generate_code
+"""
+Animation workflow package.
+
+Exports are resolved on first access, so importing a submodule such as
+``leap.workflow.tracing`` does not build the workflow graph (which imports
+every node and the services they use).
+"""
+import importlib
+
+_EXPORTS = {
+    "create_workflow": "leap.workflow.graph",
+    "GraphState": "leap.workflow.graph",
+    "execute_code": "leap.workflow.utils",
+    "generate_code": "leap.workflow.nodes",
+}
+
+
+def __getattr__(name):
+    if name == "workflow":
+        # Create the workflow instance
+        value = importlib.import_module("leap.workflow.graph").create_workflow()
+    elif name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
 
-# Create the workflow instance
-workflow = create_workflow()
 
 __all__ = ["workflow", "GraphState", "generate_code", "execute_code"]
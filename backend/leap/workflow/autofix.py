@@ -0,0 +1,399 @@
+"""
+Deterministic auto-fixer for known Manim code issues.
+
+Many of the issues reported by ``validate_code`` are mechanical (a deprecated
+class name, a missing import, ``self.clear()`` instead of ``self.fade_out_scene()``)
+and do not need an LLM round-trip to fix. This module provides a small codemod
+engine: each rule pairs an AST-based detector with a rewrite, and rewrites are
+applied as text edits on the original source so comments and formatting survive.
+"""
+import ast
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from leap.core import metrics
+
+logger = logging.getLogger(__name__)
+
+MANIM_IMPORT = "from manim import *"
+BASE_SCENE_IMPORT = "from leap.templates.base_scene import ManimVoiceoverBase"
+SCENE_BASE_CLASSES = {"Scene", "ManimVoiceoverBase", "VoiceoverScene"}
+
+
+@dataclass
+class TextEdit:
+    """A replacement of the source text between two character offsets."""
+    start: int
+    end: int
+    replacement: str
+
+
+class SourceIndex:
+    """Maps AST (line, byte column) positions to character offsets in the source."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.lines = source.splitlines(keepends=True)
+        self.line_starts = [0]
+        for line in self.lines:
+            self.line_starts.append(self.line_starts[-1] + len(line))
+
+    def offset(self, lineno: int, col_offset: int) -> int:
+        """Convert a 1-based line number and UTF-8 byte column to a character offset."""
+        line = self.lines[lineno - 1] if lineno - 1 < len(self.lines) else ""
+        col = len(line.encode("utf-8")[:col_offset].decode("utf-8", errors="ignore"))
+        return self.line_starts[lineno - 1] + col
+
+    def span(self, node: ast.AST) -> tuple:
+        """Return the (start, end) character offsets of an AST node."""
+        return (
+            self.offset(node.lineno, node.col_offset),
+            self.offset(node.end_lineno, node.end_col_offset),
+        )
+
+    def line_start(self, lineno: int) -> int:
+        """Return the character offset of the start of a 1-based line."""
+        return self.line_starts[lineno - 1]
+
+    def indentation(self, lineno: int) -> str:
+        """Return the leading whitespace of a 1-based line."""
+        line = self.lines[lineno - 1]
+        return line[:len(line) - len(line.lstrip())]
+
+
+class AutoFixRule:
+    """Base class for auto-fix rules.
+
+    Subclasses implement ``detect`` to find offending nodes and ``rewrite`` to
+    turn each of them into a text edit. ``triggers`` are patterns of the
+    validation issues or execution errors the rule fixes; when the fixer is
+    given the reported error, only rules with a matching trigger run.
+    """
+    name: str = "rule"
+    description: str = ""
+    triggers: Tuple[str, ...] = ()
+
+    def matches(self, error: str) -> bool:
+        """Return whether ``error`` reports the issue this rule fixes."""
+        return any(re.search(trigger, error) for trigger in self.triggers)
+
+    def detect(self, tree: ast.Module) -> List[ast.AST]:
+        """Return the AST nodes this rule should rewrite."""
+        raise NotImplementedError
+
+    def rewrite(self, node: ast.AST, index: SourceIndex) -> Optional[TextEdit]:
+        """Return the edit fixing ``node``, or None if it cannot be fixed."""
+        raise NotImplementedError
+
+
+class RenameNameRule(AutoFixRule):
+    """Replace references to a deprecated name with its replacement."""
+
+    def __init__(self, name: str, old: str, new: str, calls_only: bool = False, description: str = "",
+                 triggers: Tuple[str, ...] = ()):
+        self.name = name
+        self.old = old
+        self.new = new
+        self.calls_only = calls_only
+        self.description = description or f"Replace {old} with {new}"
+        self.triggers = triggers or (rf"\b{re.escape(old)}\b",)
+
+    def detect(self, tree: ast.Module) -> List[ast.AST]:
+        if self.calls_only:
+            return [
+                node.func for node in ast.walk(tree)
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == self.old
+            ]
+        return [node for node in ast.walk(tree) if isinstance(node, ast.Name) and node.id == self.old]
+
+    def rewrite(self, node: ast.AST, index: SourceIndex) -> Optional[TextEdit]:
+        start, end = index.span(node)
+        return TextEdit(start, end, self.new)
+
+
+class TexToMathTexRule(RenameNameRule):
+    """Replace ``Tex`` calls with ``MathTex`` when the code typesets no math with ``MathTex``.
+
+    This is the condition under which validation reports ``Tex``: alongside
+    ``MathTex``, ``Tex`` is taken to be deliberate text-mode LaTeX.
+    """
+
+    def __init__(self):
+        super().__init__("tex_to_mathtex", "Tex", "MathTex", calls_only=True,
+                         description="Replace Tex with MathTex",
+                         triggers=(r"Using Tex instead of MathTex", r"Missing \$ inserted"))
+
+    def detect(self, tree: ast.Module) -> List[ast.AST]:
+        calls = super().detect(tree)
+        uses_math_tex = any(
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "MathTex"
+            for node in ast.walk(tree)
+        )
+        return [] if uses_math_tex else calls
+
+
+class SceneClearRule(AutoFixRule):
+    """Replace ``self.clear()`` with ``self.fade_out_scene()`` to keep the background."""
+    name = "scene_clear"
+    description = "Replace self.clear() with self.fade_out_scene()"
+    triggers = (r"self\.clear\(\)",)
+
+    def detect(self, tree: ast.Module) -> List[ast.AST]:
+        return [
+            node for node in ast.walk(tree)
+            if isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "clear"
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "self"
+            and not node.args and not node.keywords
+        ]
+
+    def rewrite(self, node: ast.AST, index: SourceIndex) -> Optional[TextEdit]:
+        start, end = index.span(node)
+        return TextEdit(start, end, "self.fade_out_scene()")
+
+
+class MissingImportsRule(AutoFixRule):
+    """Add the imports every generated scene needs."""
+    name = "missing_imports"
+    description = "Add missing manim and ManimVoiceoverBase imports"
+    triggers = (r"Code must import all Manim classes", r"Code must import ManimVoiceoverBase", r"is not defined")
+
+    def _missing(self, tree: ast.Module) -> List[str]:
+        has_manim = has_base = False
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom):
+                names = {alias.name for alias in node.names}
+                if node.module == "manim" and "*" in names:
+                    has_manim = True
+                elif node.module == "leap.templates.base_scene" and "ManimVoiceoverBase" in names:
+                    has_base = True
+        missing = []
+        if not has_manim:
+            missing.append(MANIM_IMPORT)
+        if not has_base:
+            missing.append(BASE_SCENE_IMPORT)
+        return missing
+
+    def detect(self, tree: ast.Module) -> List[ast.AST]:
+        return [tree] if self._missing(tree) else []
+
+    def rewrite(self, node: ast.AST, index: SourceIndex) -> Optional[TextEdit]:
+        # Insert after a module docstring and any __future__ imports, before everything else
+        insert_line = 1
+        for stmt in node.body:
+            is_docstring = (
+                stmt is node.body[0]
+                and isinstance(stmt, ast.Expr)
+                and isinstance(stmt.value, ast.Constant)
+                and isinstance(stmt.value.value, str)
+            )
+            is_future = isinstance(stmt, ast.ImportFrom) and stmt.module == "__future__"
+            if not (is_docstring or is_future):
+                insert_line = stmt.lineno
+                break
+            insert_line = stmt.end_lineno + 1
+        if insert_line > len(index.lines):
+            offset = len(index.source)
+            prefix = "" if not index.source or index.source.endswith("\n") else "\n"
+        else:
+            offset = index.line_start(insert_line)
+            prefix = ""
+        return TextEdit(offset, offset, prefix + "\n".join(self._missing(node)) + "\n")
+
+
+class MissingConstructRule(AutoFixRule):
+    """Add a ``construct`` method that calls the scene methods in definition order."""
+    name = "missing_construct"
+    description = "Add a construct method calling the scene methods"
+    triggers = (r"must have a construct method",)
+
+    @staticmethod
+    def _is_scene(node: ast.ClassDef) -> bool:
+        for base in node.bases:
+            base_name = base.id if isinstance(base, ast.Name) else getattr(base, "attr", None)
+            if base_name in SCENE_BASE_CLASSES:
+                return True
+        return False
+
+    @staticmethod
+    def _scene_methods(node: ast.ClassDef) -> List[str]:
+        return [
+            stmt.name for stmt in node.body
+            if isinstance(stmt, ast.FunctionDef) and not stmt.name.startswith("_")
+        ]
+
+    def detect(self, tree: ast.Module) -> List[ast.AST]:
+        return [
+            node for node in ast.walk(tree)
+            if isinstance(node, ast.ClassDef)
+            and self._is_scene(node)
+            and "construct" not in self._scene_methods(node)
+            and self._scene_methods(node)
+        ]
+
+    def rewrite(self, node: ast.AST, index: SourceIndex) -> Optional[TextEdit]:
+        first = node.body[0]
+        # Decorators belong to the method, so insert above them
+        lineno = min([first.lineno] + [d.lineno for d in getattr(first, "decorator_list", [])])
+        indent = index.indentation(lineno)
+        body = "".join(f"{indent}    self.{name}()\n" for name in self._scene_methods(node))
+        offset = index.line_start(lineno)
+        return TextEdit(offset, offset, f"{indent}def construct(self):\n{body}\n")
+
+
+DEFAULT_RULES: List[AutoFixRule] = [
+    RenameNameRule("show_creation", "ShowCreation", "Create",
+                   description="Replace deprecated ShowCreation with Create"),
+    SceneClearRule(),
+    TexToMathTexRule(),
+    MissingImportsRule(),
+    MissingConstructRule(),
+]
+
+
+@dataclass
+class AutoFixResult:
+    """Result of running the auto-fixer over a piece of code."""
+    code: str
+    applied: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.applied)
+
+
+@dataclass
+class AutoFixStats:
+    """Process-wide counters for the auto-fixer."""
+    runs: int = 0
+    fixes_applied: int = 0
+    llm_calls_avoided: int = 0
+    rule_hits: Dict[str, int] = field(default_factory=dict)
+
+
+_stats = AutoFixStats()
+_stats_lock = threading.Lock()
+
+
+def get_autofix_stats() -> Dict[str, object]:
+    """Return a snapshot of the auto-fixer counters."""
+    with _stats_lock:
+        return {
+            "runs": _stats.runs,
+            "fixes_applied": _stats.fixes_applied,
+            "llm_calls_avoided": _stats.llm_calls_avoided,
+            "rule_hits": dict(_stats.rule_hits),
+        }
+
+
+def _collect_metrics() -> None:
+    stats = get_autofix_stats()
+    metrics.AUTOFIX_RUNS.set(stats["runs"])
+    metrics.AUTOFIX_LLM_CALLS_AVOIDED.set(stats["llm_calls_avoided"])
+    for rule, hits in stats["rule_hits"].items():
+        metrics.AUTOFIX_FIXES.set(hits, rule=rule)
+
+
+metrics.register_collector("autofix", _collect_metrics)
+
+
+def record_llm_call_avoided() -> None:
+    """Count a correction round that was resolved without calling the LLM."""
+    with _stats_lock:
+        _stats.llm_calls_avoided += 1
+
+
+def reset_autofix_stats() -> None:
+    """Reset the auto-fixer counters (used by tests)."""
+    global _stats
+    with _stats_lock:
+        _stats = AutoFixStats()
+
+
+class AutoFixer:
+    """Applies a set of auto-fix rules to Manim code."""
+
+    def __init__(self, rules: Optional[Sequence[AutoFixRule]] = None):
+        self.rules: List[AutoFixRule] = list(DEFAULT_RULES if rules is None else rules)
+
+    def register(self, rule: AutoFixRule) -> None:
+        """Add a rule to this fixer."""
+        self.rules.append(rule)
+
+    def fix(self, code: str, error: Optional[str] = None) -> AutoFixResult:
+        """Apply every matching rule to ``code``.
+
+        Code that does not parse is returned unchanged; syntax errors are left
+        to the LLM correction step.
+
+        Args:
+            code: The code to fix
+            error: The validation issues or execution error reported for the
+                code; when given, only rules that fix a reported issue run
+        """
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            self._record([])
+            return AutoFixResult(code=code)
+
+        index = SourceIndex(code)
+        edits = []
+        applied = []
+        for rule in self.rules:
+            if error is not None and not rule.matches(error):
+                continue
+            rule_edits = []
+            for node in rule.detect(tree):
+                edit = rule.rewrite(node, index)
+                if edit is not None:
+                    rule_edits.append(edit)
+            if rule_edits:
+                edits.extend(rule_edits)
+                applied.append(rule.name)
+
+        if not edits:
+            self._record([])
+            return AutoFixResult(code=code)
+
+        fixed = self._apply(code, edits)
+        try:
+            ast.parse(fixed)
+        except SyntaxError as e:
+            logger.warning(f"Auto-fix produced invalid code, discarding: {e}")
+            self._record([])
+            return AutoFixResult(code=code)
+
+        self._record(applied)
+        return AutoFixResult(code=fixed, applied=applied)
+
+    @staticmethod
+    def _apply(code: str, edits: List[TextEdit]) -> str:
+        # Apply from the end so earlier offsets stay valid; drop overlapping edits
+        result = code
+        last_start = len(code) + 1
+        for edit in sorted(edits, key=lambda e: (e.start, e.end), reverse=True):
+            if edit.end > last_start:
+                continue
+            result = result[:edit.start] + edit.replacement + result[edit.end:]
+            last_start = edit.start
+        return result
+
+    @staticmethod
+    def _record(applied: List[str]) -> None:
+        with _stats_lock:
+            _stats.runs += 1
+            if applied:
+                _stats.fixes_applied += 1
+            for name in applied:
+                _stats.rule_hits[name] = _stats.rule_hits.get(name, 0) + 1
+
+
+def auto_fix(code: str, error: Optional[str] = None) -> AutoFixResult:
+    """Run the default auto-fixer over ``code``."""
+    return AutoFixer().fix(code, error)
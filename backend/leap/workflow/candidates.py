@@ -0,0 +1,131 @@
+"""
+Best-of-N candidate generation.
+
+Requests several code candidates from the LLM concurrently, runs each one
+through the fast pre-flight check (auto-fix, syntax and static validation) as
+soon as it arrives, and returns the first candidate that passes. Trading
+parallel tokens for fewer serial correction rounds keeps end-to-end latency down.
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from leap.models import CodeIssue
+from leap.services.cancellation import bind, subtasks
+from leap.workflow.autofix import auto_fix
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Candidate:
+    """A code candidate together with its pre-flight result."""
+    index: int
+    code: str
+    response: Any = None
+    issues: List[CodeIssue] = field(default_factory=list)
+    autofix_applied: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.issues
+
+
+def preflight(code: str) -> Candidate:
+    """Run the fast pre-flight check on a single piece of code.
+
+    Known issues are auto-fixed first, then the code must compile and pass
+    the static validation checks.
+
+    Args:
+        code: The candidate code
+
+    Returns:
+        A candidate holding the (possibly auto-fixed) code and remaining issues
+    """
+    # Imported here because the nodes package imports this module
+    from leap.workflow.nodes.validation import collect_code_issues
+
+    fixed = auto_fix(code)
+    try:
+        compile(fixed.code, "<candidate>", "exec")
+    except SyntaxError as e:
+        issues = [CodeIssue(
+            message=f"Syntax error: {e.msg}",
+            severity="error",
+            line_number=e.lineno,
+            suggestion="Fix the Python syntax"
+        )]
+    else:
+        issues = collect_code_issues(fixed.code)
+    return Candidate(index=-1, code=fixed.code, issues=issues, autofix_applied=fixed.applied)
+
+
+def race_candidates(
+    produce: Callable[[int], Any],
+    n: int,
+    transform: Optional[Callable[[str], str]] = None,
+) -> Candidate:
+    """Produce ``n`` candidates concurrently and return the first passing one.
+
+    Each candidate runs as a subtask of the current job with its own LLM
+    client, so the requests still in flight when a passing candidate arrives
+    are aborted. When no candidate passes, the one with the fewest issues is
+    returned so the normal correction loop can take over.
+
+    Args:
+        produce: Callable taking the candidate index and returning a response with a ``code`` attribute
+        n: Number of candidates to request
+        transform: Optional function applied to the raw code before the pre-flight check
+
+    Returns:
+        The selected candidate
+
+    Raises:
+        RuntimeError: If every candidate failed to be produced
+    """
+    def run(index: int) -> Candidate:
+        with bind(tokens[index]):
+            response = produce(index)
+        code = transform(response.code) if transform else response.code
+        candidate = preflight(code)
+        candidate.index = index
+        candidate.response = response
+        return candidate
+
+    best: Optional[Candidate] = None
+    errors: List[Exception] = []
+    with subtasks(n) as tokens:
+        executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="candidate")
+        # Each candidate runs in a copy of this context so it keeps the job's context variables
+        futures = [executor.submit(contextvars.copy_context().run, run, i) for i in range(n)]
+        try:
+            for future in as_completed(futures):
+                try:
+                    candidate = future.result()
+                except Exception as e:
+                    logger.warning(f"Candidate generation failed: {str(e)}")
+                    errors.append(e)
+                    continue
+
+                if candidate.passed:
+                    logger.info(f"Candidate {candidate.index + 1} of {n} passed pre-flight")
+                    return candidate
+
+                logger.info(f"Candidate {candidate.index + 1} of {n} failed pre-flight with {len(candidate.issues)} issues")
+                if best is None or len(candidate.issues) < len(best.issues):
+                    best = candidate
+        finally:
+            # Abort the requests of the candidates still in flight
+            for future, token in zip(futures, tokens):
+                if not future.done():
+                    token.cancel()
+            executor.shutdown(wait=False)
+
+    if best is None:
+        raise RuntimeError(f"All {n} candidates failed: {errors[-1] if errors else 'no result'}") from (errors[-1] if errors else None)
+
+    logger.info(f"No candidate passed pre-flight, continuing with candidate {best.index + 1}")
+    return best
@@ -0,0 +1,167 @@
+"""
+Durable workflow checkpoints.
+
+Each API job runs the workflow as its own LangGraph thread (``thread_id`` is the
+job ID), and the SQLite checkpointer records the state after every node. A small
+run registry stored in the same database tracks which process owns each
+unfinished run and when it last sent a heartbeat, so that a recovery sweep on any
+replica can resume runs whose owner has died from the last completed node.
+"""
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from leap.core.config import CHECKPOINT_DB_PATH, CHECKPOINTS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as the owner of the runs it executes
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def thread_config(job_id: Union[str, uuid.UUID]) -> Dict[str, Any]:
+    """Return the LangGraph config that scopes checkpoints to a job."""
+    return {"configurable": {"thread_id": str(job_id)}}
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+    # WAL lets several replicas on the shared volume read while one writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+@lru_cache(maxsize=1)
+def get_checkpointer():
+    """Return the process-wide SQLite checkpointer, or None if unavailable."""
+    if not CHECKPOINTS_ENABLED:
+        return None
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        logger.warning("langgraph-checkpoint-sqlite not installed. Workflow checkpoints disabled.")
+        return None
+
+    saver = SqliteSaver(_connect(CHECKPOINT_DB_PATH))
+    saver.setup()
+    logger.info(f"Workflow checkpoints stored in: {CHECKPOINT_DB_PATH}")
+    return saver
+
+
+@lru_cache(maxsize=1)
+def get_checkpointed_workflow():
+    """Return the workflow compiled with the durable checkpointer.
+
+    Falls back to the plain compiled workflow when checkpoints are disabled.
+    """
+    from leap.workflow.graph import create_workflow
+
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        from leap.workflow.graph import workflow
+        return workflow
+    return create_workflow(checkpointer=checkpointer)
+
+
+def prune_thread(checkpointer, job_id: Union[str, uuid.UUID]) -> None:
+    """Delete the checkpoints of a finished job."""
+    conn = getattr(checkpointer, "conn", None)
+    if conn is None:
+        return
+    lock = getattr(checkpointer, "lock", None) or threading.Lock()
+    with lock:
+        conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (str(job_id),))
+        conn.execute("DELETE FROM writes WHERE thread_id = ?", (str(job_id),))
+        conn.commit()
+
+
+class WorkflowRunRegistry:
+    """Tracks ownership and liveness of unfinished workflow runs."""
+
+    def __init__(self, db_path: Path = CHECKPOINT_DB_PATH, owner: str = PROCESS_OWNER):
+        self.owner = owner
+        self.conn = _connect(db_path)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workflow_runs (
+                    thread_id TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    heartbeat REAL NOT NULL,
+                    finished INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_workflow_runs_open ON workflow_runs (finished, heartbeat)"
+            )
+            self.conn.commit()
+
+    def start(self, job_id: Union[str, uuid.UUID]) -> None:
+        """Record that this process is running a job."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO workflow_runs (thread_id, owner, heartbeat, finished) VALUES (?, ?, ?, 0)",
+                (str(job_id), self.owner, time.time())
+            )
+            self.conn.commit()
+
+    def finish(self, job_id: Union[str, uuid.UUID]) -> None:
+        """Record that a job has run to completion (successfully or not)."""
+        with self.lock:
+            self.conn.execute("UPDATE workflow_runs SET finished = 1 WHERE thread_id = ?", (str(job_id),))
+            self.conn.commit()
+
+    def touch_owned(self) -> None:
+        """Refresh the heartbeat of every unfinished run owned by this process."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE workflow_runs SET heartbeat = ? WHERE owner = ? AND finished = 0",
+                (time.time(), self.owner)
+            )
+            self.conn.commit()
+
+    def claim_stale(self, stale_after: float) -> List[str]:
+        """Take ownership of unfinished runs whose owner stopped sending heartbeats.
+
+        Args:
+            stale_after: Seconds without a heartbeat after which a run is considered orphaned
+
+        Returns:
+            The job IDs claimed by this process
+        """
+        cutoff = time.time() - stale_after
+        claimed = []
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT thread_id FROM workflow_runs WHERE finished = 0 AND heartbeat < ?",
+                (cutoff,)
+            ).fetchall()
+            for (thread_id,) in rows:
+                # Conditional update so only one replica wins the claim
+                cursor = self.conn.execute(
+                    "UPDATE workflow_runs SET owner = ?, heartbeat = ? "
+                    "WHERE thread_id = ? AND finished = 0 AND heartbeat < ?",
+                    (self.owner, time.time(), thread_id, cutoff)
+                )
+                if cursor.rowcount == 1:
+                    claimed.append(thread_id)
+            self.conn.commit()
+        return claimed
+
+
+@lru_cache(maxsize=1)
+def get_run_registry() -> Optional[WorkflowRunRegistry]:
+    """Return the process-wide run registry, or None if checkpoints are disabled."""
+    if get_checkpointer() is None:
+        return None
+    return WorkflowRunRegistry()
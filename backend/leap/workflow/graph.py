@@ -8,10 +8,22 @@ from leap.workflow.nodes import (
     validate_code,
     execute_code,
     error_correction,
+    auto_fix_code,
 )
 from leap.core.logging import setup_question_logger
+from leap.core.metrics import instrument_node
 from leap.workflow.tracing import traceable
 
+# Most nodes one correction round can run: validate_code, auto_fix, validate_code,
+# execute_code, auto_fix (which skips code it already fixed this round), correct_code
+NODES_PER_CORRECTION = 6
+
+# Nodes of the longest run: validate_input, plan_scenes and generate_code, every
+# correction round, then log_end. LangGraph stops a run at its recursion limit
+# before finishing one with exactly that many steps, and its default of 25 is too
+# low, so the limit is one more than the count.
+RECURSION_LIMIT = 3 + NODES_PER_CORRECTION * MAX_ATTEMPTS + 1 + 1
+
 @traceable(name="log_workflow_end", tags=["logging"])
 def log_workflow_end(state: GraphState) -> GraphState:
     """Log the end of the workflow with appropriate status messages.
@@ -42,18 +54,23 @@ def log_workflow_end(state: GraphState) -> GraphState:
     
     return state
 
-def create_workflow() -> StateGraph:
-    """Create and return the workflow graph."""
+def create_workflow(checkpointer=None) -> StateGraph:
+    """Create and return the workflow graph.
+    
+    Args:
+        checkpointer: Optional LangGraph checkpointer that records state after each node
+    """
     workflow = StateGraph(GraphState)
     
-    # Add nodes
-    workflow.add_node("validate_input", validate_input)
-    workflow.add_node("plan_scenes", plan_scenes)
-    workflow.add_node("generate_code", generate_code)
-    workflow.add_node("validate_code", validate_code)
-    workflow.add_node("execute_code", execute_code)
-    workflow.add_node("correct_code", error_correction)
-    workflow.add_node("log_end", log_workflow_end)
+    # Add nodes, recording their latency
+    workflow.add_node("validate_input", instrument_node("validate_input", validate_input))
+    workflow.add_node("plan_scenes", instrument_node("plan_scenes", plan_scenes))
+    workflow.add_node("generate_code", instrument_node("generate_code", generate_code))
+    workflow.add_node("validate_code", instrument_node("validate_code", validate_code))
+    workflow.add_node("execute_code", instrument_node("execute_code", execute_code))
+    workflow.add_node("auto_fix", instrument_node("auto_fix", auto_fix_code))
+    workflow.add_node("correct_code", instrument_node("correct_code", error_correction))
+    workflow.add_node("log_end", instrument_node("log_end", log_workflow_end))
 
     
     # Set entry point and basic flow
@@ -75,13 +92,23 @@ def create_workflow() -> StateGraph:
     # Add conditional edges
     workflow.add_conditional_edges(
         "validate_code",
-        lambda state: "correct_code" if state.get("error") else "execute_code",
+        lambda state: "auto_fix" if state.get("error") else "execute_code",
         {
-            "correct_code": "correct_code",
+            "auto_fix": "auto_fix",
             "execute_code": "execute_code"
         }
     )
     
+    # Deterministic fixes go back through validation; anything else needs the LLM
+    workflow.add_conditional_edges(
+        "auto_fix",
+        lambda state: "validate_code" if state.get("autofix_applied") else "correct_code",
+        {
+            "validate_code": "validate_code",
+            "correct_code": "correct_code"
+        }
+    )
+    
     workflow.add_conditional_edges(
         "correct_code",
         lambda state: "validate_code" if state["correction_attempts"] < MAX_ATTEMPTS else "log_end",
@@ -93,9 +120,9 @@ def create_workflow() -> StateGraph:
     
     workflow.add_conditional_edges(
         "execute_code",
-        lambda state: "correct_code" if (state.get("error") and state["correction_attempts"] < MAX_ATTEMPTS) else "log_end",
+        lambda state: "auto_fix" if (state.get("error") and state["correction_attempts"] < MAX_ATTEMPTS) else "log_end",
         {
-            "correct_code": "correct_code",
+            "auto_fix": "auto_fix",
             "log_end": "log_end"
         }
     )
@@ -103,7 +130,7 @@ def create_workflow() -> StateGraph:
     # Add final logging step before ending
     workflow.add_edge("log_end", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 # Create the compiled workflow
 workflow = create_workflow()
@@ -0,0 +1,55 @@
+"""
+Auto-fix node for the workflow.
+
+Runs the deterministic rule-based fixer before falling back to LLM error correction.
+"""
+from typing import Optional
+
+from leap.workflow.state import GraphState
+from leap.core.logging import setup_question_logger
+from leap.workflow.autofix import AutoFixer
+
+
+def auto_fix_code(state: GraphState, auto_fixer: Optional[AutoFixer] = None) -> GraphState:
+    """Try to fix known issues in the generated code without calling the LLM.
+
+    Args:
+        state: The current workflow state
+        auto_fixer: Optional auto-fixer for dependency injection
+
+    Returns:
+        The updated workflow state. ``autofix_applied`` lists the rules that
+        changed the code; when it is empty the error is left for ``correct_code``.
+        Only rules fixing the reported error run, and the code is auto-fixed at
+        most once per correction attempt, so every round ends in ``correct_code``
+        if the fixed code still fails.
+    """
+    logger = setup_question_logger(state["user_input"])
+
+    code = state.get("generated_code")
+    if not code:
+        return {**state, "autofix_applied": []}
+
+    attempt = state.get("correction_attempts", 0) or 0
+    if state.get("autofix_attempt") == attempt:
+        logger.info("Code was already auto-fixed in this correction attempt, falling back to LLM correction")
+        return {**state, "autofix_applied": []}
+
+    auto_fixer = auto_fixer or AutoFixer()
+    result = auto_fixer.fix(code, state.get("error") or "")
+
+    if not result.changed:
+        logger.info("Auto-fix found nothing to rewrite, falling back to LLM correction")
+        return {**state, "autofix_applied": []}
+
+    # Whether this saved an LLM call is only known once the fixed code renders (see execute_code)
+    logger.info(f"Auto-fix applied rules: {', '.join(result.applied)}")
+
+    return {
+        **state,
+        "generated_code": result.code,
+        "execution_result": None,
+        "error": None,
+        "autofix_applied": result.applied,
+        "autofix_attempt": attempt
+    }
@@ -4,10 +4,14 @@ from leap.workflow.state import GraphState
 from leap.core.logging import setup_question_logger
 from leap.models import ManimCodeResponse
 from leap.services import LLMService, FileService
-from leap.core.config import  MAX_ATTEMPTS
+from leap.services.llm_service import is_retryable_error
+from leap.services.model_router import select_model
+from leap.core.config import  MAX_ATTEMPTS, CANDIDATE_COUNT
 from leap.prompts import ERROR_CORRECTION_PROMPTS
 from leap.prompts.base import PromptVersion
+from leap.prompts.budget import KEEP_TAIL, OUTLINE, PromptComponent, build_prompt
 from leap.workflow.utils import get_manim_api_context
+from leap.workflow.candidates import race_candidates
 
 
 def error_correction(
@@ -49,38 +53,62 @@ def error_correction(
     manim_api_context = get_manim_api_context()
     
     # Use provided services or create new ones
-    llm_service = llm_service or LLMService()
+    llm_service = llm_service or LLMService(select_model("correct_code", failures=current_attempts))
     file_service = file_service or FileService()
     
     try:
         # Get the prompt template (using production version by default)
         prompt_template = ERROR_CORRECTION_PROMPTS.get(PromptVersion.PRODUCTION)
         
-        # Format the prompt with our parameters
-        formatted_prompt = prompt_template.format(
-            error=error_msg,
-            generated_code=state["generated_code"],
-            plan=state["plan"],
-            manim_api_context=manim_api_context
+        # Format the prompt within the node's token budget. The code being fixed and the
+        # API notes, which start every correction prompt as its cacheable prefix, are never
+        # trimmed; the plan is cut to its outline first, then the error to its last lines,
+        # where the traceback points at the failure.
+        formatted_prompt = build_prompt(
+            "correct_code",
+            prompt_template,
+            [
+                PromptComponent("error", error_msg, trim=KEEP_TAIL, priority=2, min_tokens=300),
+                PromptComponent("generated_code", state["generated_code"]),
+                PromptComponent("plan", state["plan"], trim=OUTLINE, priority=1, min_tokens=150),
+                PromptComponent("manim_api_context", manim_api_context, static=True),
+            ],
+            job_id=state.get("job_id")
         )
         
         # Store the prompts in the state for tracing
         if "prompts" not in state:
             state["prompts"] = {}
         state["prompts"]["correction"] = {
-            "system": formatted_prompt["system"],
-            "user": formatted_prompt["user"]
+            "system": formatted_prompt.system,
+            "user": formatted_prompt.user
         }
         
         # Generate the corrected code with structured output
         logger.info("Generating corrected code...")
         
         # Use the LLM service to generate the corrected code
-        response = llm_service.generate_structured_response(
-            system_content=formatted_prompt["system"],
-            user_content=formatted_prompt["user"],
-            response_model=ManimCodeResponse
-        )
+        candidate_count = state.get("candidate_count") or CANDIDATE_COUNT
+        if candidate_count > 1:
+            # Best-of-N: race several corrections through the pre-flight check
+            logger.info(f"Requesting {candidate_count} correction candidates concurrently")
+            candidate = race_candidates(
+                lambda _: llm_service.generate_structured_response(
+                    system_content=formatted_prompt.system,
+                    user_content=formatted_prompt.user,
+                    response_model=ManimCodeResponse
+                ),
+                candidate_count
+            )
+            response = candidate.response
+            corrected_code = candidate.code
+        else:
+            response = llm_service.generate_structured_response(
+                system_content=formatted_prompt.system,
+                user_content=formatted_prompt.user,
+                response_model=ManimCodeResponse
+            )
+            corrected_code = response.code
         
         # Log the corrected code and explanation
         if response.explanation:
@@ -98,14 +126,14 @@ def error_correction(
             logger.info(f"Validation checks performed: {len(response.validation_checks)}")
         
         # Save the corrected code to a file
-        file_path = file_service.save_generated_code(response.code, state["user_input"])
+        file_path = file_service.save_generated_code(corrected_code, state["user_input"])
         logger.info(f"Corrected code saved to: {file_path}")
         
         # Create a new state with the corrected code
         new_state = GraphState(
             user_input=state["user_input"],
             plan=state["plan"],
-            generated_code=response.code,
+            generated_code=corrected_code,
             execution_result=None,
             error=None,
             correction_attempts=state.get("correction_attempts", 0) + 1,
@@ -123,6 +151,9 @@ def error_correction(
         return new_state
         
     except Exception as e:
+        if is_retryable_error(e):
+            # An LLM outage fails the whole job, so the render worker retries it later
+            raise
         error_msg = f"Error correction failed: {str(e)}"
         logger.error(error_msg)
         
@@ -2,7 +2,9 @@ from typing import Optional
 from leap.workflow.state import GraphState
 from leap.core.logging import setup_question_logger
 from leap.services import FileService, ManimService
+from leap.services.job_progress import render_progress_reporter
 from leap.core.config import MAX_ATTEMPTS
+from leap.workflow.autofix import record_llm_call_avoided
 
 
 def execute_code(
@@ -56,7 +58,13 @@ def execute_code(
         
         # Execute the Manim code
         logger.info("Starting Manim execution...")
-        execution_result = manim_service.execute_manim_code(file_path, rendering_quality)
+        job_id = state.get("job_id")
+        progress_callback = None
+        if job_id:
+            progress_callback = render_progress_reporter(job_id, total=manim_service.count_animations(code))
+        execution_result = manim_service.execute_manim_code(
+            file_path, rendering_quality, progress_callback=progress_callback
+        )
         
         # Update the state with the execution result
         if execution_result["success"]:
@@ -64,6 +72,9 @@ def execute_code(
             logger.info(f"Execution completed successfully. Output file: {output_file}")
             state["execution_result"] = execution_result
             state["error"] = None
+            if state.get("autofix_attempt") is not None and state["autofix_attempt"] == (state.get("correction_attempts") or 0):
+                # The code auto-fixed in this round rendered, so the round needed no LLM call
+                record_llm_call_avoided()
         else:
             error = execution_result.get("error", "Unknown error")
             # Don't truncate error messages anymore to preserve important details
@@ -5,22 +5,15 @@ from typing import Dict, Any, Optional
 from leap.core.logging import setup_question_logger
 from leap.models import ManimCodeResponse
 from leap.services import LLMService
+from leap.services.llm_service import is_retryable_error
+from leap.services.model_router import select_model
 from leap.workflow.utils import log_state_transition, get_manim_api_context
 from leap.prompts import CODE_GENERATION_PROMPTS
 from leap.prompts.base import PromptVersion
-
-def read_gcf_example() -> str:
-    """Read the GCF example from templates."""
-    from pathlib import Path
-    
-    # Get the path to the GCF example file
-    template_path = Path(__file__).parent.parent.parent / "templates" / "examples" / "gcf.py"
-    
-    # Read the file content
-    with open(template_path, "r") as f:
-        content = f.read()
-    
-    return content
+from leap.prompts.budget import KEEP_HEAD, PromptComponent, build_prompt
+from leap.core.config import CANDIDATE_COUNT
+from leap.workflow.candidates import race_candidates
+from leap.services.example_retriever import retrieve_examples
 
 def _sanitize_generated_code(code: str) -> str:
     """
@@ -86,7 +79,7 @@ def generate_code(
     api_context = get_manim_api_context()
     
     # Use provided service or create a new one
-    llm_service = llm_service or LLMService()
+    llm_service = llm_service or LLMService(select_model("generate_code"))
     
     try:
         # Get user level from state
@@ -104,10 +97,9 @@ def generate_code(
         # Add duration instruction
         duration_instruction = "The animation should be 1-2 minutes long, so keep it concise and focused."
         
-        # Get example code for one-shot learning
-        example_code = read_gcf_example()
-        # TODO: It should search and fetch the most relevant example code for the topic
-        logger.info("Using GCF example for one-shot learning")
+        # Get the example scene methods most relevant to the topic for few-shot learning
+        example_code = retrieve_examples(state["user_input"], state.get("plan") or "")
+        logger.info(f"Using {example_code.count('# Excerpt from')} example excerpts for few-shot learning")
         
         # Create a code template with proper color usage
         code_template = f"""
@@ -183,34 +175,56 @@ class SCENE_NAME(ManimVoiceoverBase):
         self.fade_out_scene()
 """
         
-        # Format the prompt with our parameters
-        formatted_prompt = CODE_GENERATION_PROMPTS.get(PromptVersion.PRODUCTION).format(
-            user_input=state["user_input"],
-            plan=state["plan"],
-            user_level_instruction=user_level_instruction,
-            duration_instruction=duration_instruction,
-            code_template=code_template,
-            example_code=example_code
+        # Format the prompt within the node's token budget; examples are trimmed first. The
+        # code template is static so the prompt starts with the same cacheable prefix every time.
+        formatted_prompt = build_prompt(
+            "generate_code",
+            CODE_GENERATION_PROMPTS.get(PromptVersion.PRODUCTION),
+            [
+                PromptComponent("user_input", state["user_input"]),
+                PromptComponent("plan", state["plan"]),
+                PromptComponent("user_level_instruction", user_level_instruction),
+                PromptComponent("duration_instruction", duration_instruction),
+                PromptComponent("code_template", code_template, static=True),
+                PromptComponent("example_code", example_code, trim=KEEP_HEAD, priority=0),
+            ],
+            job_id=state.get("job_id")
         )
         
         # Store the prompts in the state for tracing
         if "prompts" not in state:
             state["prompts"] = {}
         state["prompts"]["generation"] = {
-            "system": formatted_prompt["system"],
-            "user": formatted_prompt["user"]
+            "system": formatted_prompt.system,
+            "user": formatted_prompt.user
         }
         
         # Generate the code with structured output
         logger.info("Generating code with Instructor...")
-        response = llm_service.generate_structured_response(
-            system_content=formatted_prompt["system"],
-            user_content=formatted_prompt["user"],
-            response_model=ManimCodeResponse
-        )
-        
-        # Sanitize the generated code
-        sanitized_code = _sanitize_generated_code(response.code)
+        candidate_count = state.get("candidate_count") or CANDIDATE_COUNT
+        if candidate_count > 1:
+            # Best-of-N: race several candidates through the pre-flight check
+            logger.info(f"Requesting {candidate_count} code candidates concurrently")
+            candidate = race_candidates(
+                lambda _: llm_service.generate_structured_response(
+                    system_content=formatted_prompt.system,
+                    user_content=formatted_prompt.user,
+                    response_model=ManimCodeResponse
+                ),
+                candidate_count,
+                transform=_sanitize_generated_code
+            )
+            response = candidate.response
+            sanitized_code = candidate.code
+        else:
+            response = llm_service.generate_structured_response(
+                system_content=formatted_prompt.system,
+                user_content=formatted_prompt.user,
+                response_model=ManimCodeResponse
+            )
+            
+            # Sanitize the generated code
+            sanitized_code = _sanitize_generated_code(response.code)
         
         # Log code generation success
         code_lines = sanitized_code.split("\n")
@@ -233,6 +247,9 @@ class SCENE_NAME(ManimVoiceoverBase):
         return log_state_transition("generate_code", state, output_state)
     
     except Exception as e:
+        if is_retryable_error(e):
+            # An LLM outage fails the whole job, so the render worker retries it later
+            raise
         error_msg = f"Code generation failed: {str(e)}"
         logger.error(error_msg)
         return {
@@ -8,7 +8,10 @@ import re
 from leap.workflow.state import GraphState
 from leap.core.logging import setup_question_logger
 from leap.services.llm_service import LLMService
+from leap.services.model_router import select_model
+from leap.services.input_classifier import ACCEPT, REJECT, get_input_classifier
 from leap.models import ValidationResult
+from leap.core.config import INPUT_FAST_PATH
 
 
 def validate_input(state: GraphState, llm_service: Optional[LLMService] = None, **kwargs) -> GraphState:
@@ -61,8 +64,26 @@ def validate_input(state: GraphState, llm_service: Optional[LLMService] = None,
             validation_status="invalid"
         )
 
+    # Decide clearly valid or invalid inputs locally; only ambiguous ones need the LLM
+    if INPUT_FAST_PATH:
+        decision = get_input_classifier().classify(user_input)
+        logger.info(f"Fast-path input decision: {decision.verdict} ({decision.reason})")
+        if decision.verdict == ACCEPT:
+            return GraphState(
+                user_input=state["user_input"],
+                validation_status="valid",
+                reformulated_input=state["user_input"]
+            )
+        if decision.verdict == REJECT:
+            return GraphState(
+                user_input=state["user_input"],
+                error=f"We're having trouble understanding your request: {decision.explanation}",
+                suggestion="Try asking about a concept in science, math or technology, such as \"How does photosynthesis work?\"",
+                validation_status="invalid"
+            )
+
     # Use provided service or create a new one
-    llm_service = llm_service or LLMService()
+    llm_service = llm_service or LLMService(select_model("validate_input"))
     
     logger.info("Using LLM to validate input")
     
@@ -98,6 +119,7 @@ def validate_input(state: GraphState, llm_service: Optional[LLMService] = None,
     - explanation: Your explanation for the classification
     - suggestion: Specific guidance for improving the question (for NEEDS_CLARIFICATION or INVALID)
     - reformulated_question: A clearer, more specific version of the user's question
+    - topic_words: The words copied from the user's input that name the subject it asks about (e.g. ["photosynthesis"] for "How does photosynthesis work?"), leaving out question and filler words
     """
     
     # Store the prompts in the state for tracing
@@ -126,6 +148,9 @@ def validate_input(state: GraphState, llm_service: Optional[LLMService] = None,
         logger.info(f"Reformulated question: {reformulated_question}")
         
         if classification == "VALID":
+            if INPUT_FAST_PATH:
+                # Teach the fast path this topic so similar questions skip the LLM
+                get_input_classifier().learn(user_input, validation_result.topic_words or [])
             return GraphState(
                 user_input=state["user_input"],
                 validation_status="valid",
@@ -5,8 +5,11 @@ from leap.workflow.state import GraphState
 from leap.core.logging import setup_question_logger
 from leap.models import ScenePlanResponse
 from leap.services import LLMService
+from leap.services.llm_service import is_retryable_error
+from leap.services.model_router import select_model
 from leap.prompts import SCENE_PLANNING_PROMPTS
 from leap.prompts.base import PromptVersion
+from leap.prompts.budget import PromptComponent, build_prompt
 
 
 
@@ -26,7 +29,7 @@ def plan_scenes(state: GraphState, llm_service: Optional[LLMService] = None) ->
     logger.info(f"Planning scenes for input: {state['user_input']}")
     
     # Use provided service or create a new one
-    llm_service = llm_service or LLMService()
+    llm_service = llm_service or LLMService(select_model("plan_scenes"))
     
     try:
         # Get user level from state
@@ -54,24 +57,29 @@ def plan_scenes(state: GraphState, llm_service: Optional[LLMService] = None) ->
         prompt_template = SCENE_PLANNING_PROMPTS.get(PromptVersion.PRODUCTION)
         
         # Format the prompt with our parameters
-        formatted_prompt = prompt_template.format(
-            user_input=input_for_planning,
-            user_level_instruction=user_level_instruction,
-            duration_instruction=duration_instruction
+        formatted_prompt = build_prompt(
+            "plan_scenes",
+            prompt_template,
+            [
+                PromptComponent("user_input", input_for_planning),
+                PromptComponent("user_level_instruction", user_level_instruction),
+                PromptComponent("duration_instruction", duration_instruction),
+            ],
+            job_id=state.get("job_id")
         )
         
         # Store the prompts in the state for tracing
         if "prompts" not in state:
             state["prompts"] = {}
         state["prompts"]["planning"] = {
-            "system": formatted_prompt["system"],
-            "user": formatted_prompt["user"]
+            "system": formatted_prompt.system,
+            "user": formatted_prompt.user
         }
         
         # Use instructor with a response model
         response = llm_service.generate_structured_response(
-            system_content=formatted_prompt["system"],
-            user_content=formatted_prompt["user"],
+            system_content=formatted_prompt.system,
+            user_content=formatted_prompt.user,
             response_model=ScenePlanResponse
         )
         
@@ -97,6 +105,9 @@ def plan_scenes(state: GraphState, llm_service: Optional[LLMService] = None) ->
         )
         
     except Exception as e:
+        if is_retryable_error(e):
+            # An LLM outage fails the whole job, so the render worker retries it later
+            raise
         logger.error(f"Scene planning failed: {str(e)}")
         return GraphState(
             user_input=state["user_input"],
@@ -1,11 +1,355 @@
-import re
+"""
+Static checks on generated Manim code.
 
-from typing import Dict, Any, Optional, List
+The code is parsed once and walked once: a single ``ast.NodeVisitor`` hands
+every node to the rules registered for its type, so validation is linear in
+the size of the code and every issue carries the line it was found on. Code
+that does not parse is reported as a syntax error before any rule runs.
+"""
+import ast
+import warnings
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple, Type
 
 from leap.workflow.state import GraphState
+from leap.core.config import MANIM_API_CHECK
 from leap.core.logging import setup_question_logger
 from leap.models import CodeIssue, CodeValidationResult
 
+MANIM_MODULE = "manim"
+BASE_SCENE_MODULE = "leap.templates.base_scene"
+FRAME_SIZE_NAMES = {"width": ("FRAME_WIDTH", "frame_width"), "height": ("FRAME_HEIGHT", "frame_height")}
+
+
+def _is_self_attribute(node: ast.AST, attr: str) -> bool:
+    """Return whether ``node`` is ``self.<attr>``."""
+    return (
+        isinstance(node, ast.Attribute)
+        and node.attr == attr
+        and isinstance(node.value, ast.Name)
+        and node.value.id == "self"
+    )
+
+
+def _call_name(node: ast.Call) -> Optional[str]:
+    """Return the name a call is made through (``Tex`` for both ``Tex(...)`` and ``m.Tex(...)``)."""
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+class ValidationRule:
+    """Base class for validation rules.
+
+    A rule lists the AST node types it inspects in ``node_types``; ``visit``
+    is called for each such node during the single walk of the tree, and
+    ``finish`` once the walk is done (for checks on something the code lacks).
+    Rules keep per-run state, so a fresh instance is created for every run.
+    """
+    name: str = "rule"
+    node_types: Tuple[Type[ast.AST], ...] = ()
+
+    def __init__(self):
+        self.issues: List[CodeIssue] = []
+        self.reported_lines = set()
+
+    def visit(self, node: ast.AST) -> None:
+        """Inspect one node of a type listed in ``node_types``."""
+
+    def finish(self) -> Iterable[CodeIssue]:
+        """Return the issues found once every node has been visited."""
+        return self.issues
+
+    def report(self, node: Optional[ast.AST], message: str, suggestion: str, severity: str = "error") -> None:
+        """Record an issue at ``node``'s line, once per line."""
+        line_number = getattr(node, "lineno", None)
+        if line_number in self.reported_lines:
+            return
+        self.reported_lines.add(line_number)
+        self.issues.append(CodeIssue(
+            message=message,
+            severity=severity,
+            line_number=line_number,
+            suggestion=suggestion
+        ))
+
+
+class ManimImportRule(ValidationRule):
+    """The code must star-import Manim."""
+    name = "manim_import"
+    node_types = (ast.ImportFrom,)
+
+    def __init__(self):
+        super().__init__()
+        self.found = False
+
+    def visit(self, node: ast.ImportFrom) -> None:
+        if node.module == MANIM_MODULE and any(alias.name == "*" for alias in node.names):
+            self.found = True
+
+    def finish(self) -> Iterable[CodeIssue]:
+        if not self.found:
+            self.report(None, "Code must import all Manim classes",
+                        "Add 'from manim import *' at the top of the file")
+        return self.issues
+
+
+class BaseSceneImportRule(ValidationRule):
+    """The code must import the voiceover base scene."""
+    name = "base_scene_import"
+    node_types = (ast.ImportFrom,)
+
+    def __init__(self):
+        super().__init__()
+        self.found = False
+
+    def visit(self, node: ast.ImportFrom) -> None:
+        if node.module == BASE_SCENE_MODULE and any(alias.name == "ManimVoiceoverBase" for alias in node.names):
+            self.found = True
+
+    def finish(self) -> Iterable[CodeIssue]:
+        if not self.found:
+            self.report(None, "Code must import ManimVoiceoverBase",
+                        "Add 'from leap.templates.base_scene import ManimVoiceoverBase' at the top of the file")
+        return self.issues
+
+
+class ConstructRule(ValidationRule):
+    """A scene needs a ``construct(self)`` method."""
+    name = "construct"
+    node_types = (ast.FunctionDef,)
+
+    def __init__(self):
+        super().__init__()
+        self.found = False
+
+    def visit(self, node: ast.FunctionDef) -> None:
+        if node.name == "construct" and node.args.args and node.args.args[0].arg == "self":
+            self.found = True
+
+    def finish(self) -> Iterable[CodeIssue]:
+        if not self.found:
+            self.report(None, "Scene class must have a construct method",
+                        "Add a 'def construct(self):' method to your Scene class")
+        return self.issues
+
+
+class SceneClearRule(ValidationRule):
+    """``self.clear()`` also removes the base scene's background."""
+    name = "scene_clear"
+    node_types = (ast.Call,)
+
+    def visit(self, node: ast.Call) -> None:
+        if _is_self_attribute(node.func, "clear") and not node.args and not node.keywords:
+            self.report(node, "self.clear() removes the background. Use self.fade_out_scene() instead.",
+                        "Replace self.clear() with self.fade_out_scene()")
+
+
+class ShowCreationRule(ValidationRule):
+    """``ShowCreation`` was renamed to ``Create``."""
+    name = "show_creation"
+    node_types = (ast.Name, ast.Attribute)
+
+    def visit(self, node: ast.AST) -> None:
+        name = node.id if isinstance(node, ast.Name) else node.attr
+        if name == "ShowCreation":
+            self.report(node, "ShowCreation is deprecated. Use Create() instead.",
+                        "Replace ShowCreation with Create", severity="warning")
+
+
+class VoiceoverRule(ValidationRule):
+    """Animations must be wrapped in ``with self.voiceover(...)`` blocks."""
+    name = "voiceover"
+    node_types = (ast.With, ast.AsyncWith)
+
+    def __init__(self):
+        super().__init__()
+        self.found = False
+
+    def visit(self, node: ast.AST) -> None:
+        for item in node.items:
+            expr = item.context_expr
+            if isinstance(expr, ast.Call) and _is_self_attribute(expr.func, "voiceover"):
+                self.found = True
+
+    def finish(self) -> Iterable[CodeIssue]:
+        if not self.found:
+            self.report(None, "Code must use voiceover blocks for animations",
+                        "Wrap animations in 'with self.voiceover(text=\"...\") as tracker:' blocks")
+        return self.issues
+
+
+class TexRule(ValidationRule):
+    """Math should be typeset with ``MathTex``; ``Tex`` is only accepted alongside it."""
+    name = "tex"
+    node_types = (ast.Call,)
+
+    def __init__(self):
+        super().__init__()
+        self.tex_calls: List[ast.Call] = []
+        self.uses_math_tex = False
+
+    def visit(self, node: ast.Call) -> None:
+        name = _call_name(node)
+        if name == "Tex":
+            self.tex_calls.append(node)
+        elif name == "MathTex":
+            self.uses_math_tex = True
+
+    def finish(self) -> Iterable[CodeIssue]:
+        if not self.uses_math_tex:
+            for node in self.tex_calls:
+                self.report(node, "Using Tex instead of MathTex for mathematical expressions",
+                            "Replace Tex with MathTex for mathematical expressions")
+        return self.issues
+
+
+class BackgroundRule(ValidationRule):
+    """The base scene draws the background; scenes must not create or replace it.
+
+    Flags full-frame rectangles, background images and any use of
+    ``self.camera.background*``.
+    """
+    name = "background"
+    node_types = (ast.Call, ast.Assign, ast.Attribute)
+
+    MESSAGE = "Code creates a background element which will conflict with the base scene background"
+    SUGGESTION = "Remove all background creation. The base class already provides a background image."
+
+    @staticmethod
+    def _is_frame_size(keyword: ast.keyword) -> bool:
+        names = FRAME_SIZE_NAMES.get(keyword.arg)
+        if not names:
+            return False
+        value = keyword.value
+        if isinstance(value, ast.Name):
+            return value.id == names[0]
+        return (
+            isinstance(value, ast.Attribute)
+            and value.attr == names[1]
+            and isinstance(value.value, ast.Name)
+            and value.value.id == "config"
+        )
+
+    @staticmethod
+    def _mentions_background(node: ast.AST) -> bool:
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return "background" in node.value.lower()
+        if isinstance(node, ast.Name):
+            return "background" in node.id.lower()
+        if isinstance(node, ast.Attribute):
+            return "background" in node.attr.lower()
+        return False
+
+    def visit(self, node: ast.AST) -> None:
+        if isinstance(node, ast.Attribute):
+            if node.attr.startswith("background") and _is_self_attribute(node.value, "camera"):
+                self.report(node, self.MESSAGE, self.SUGGESTION)
+        elif isinstance(node, ast.Assign):
+            # bg = ImageMobject("sky.png") / self.background = ImageMobject(...)
+            if (
+                isinstance(node.value, ast.Call)
+                and _call_name(node.value) == "ImageMobject"
+                and any(self._mentions_background(target) for target in node.targets)
+            ):
+                self.report(node, self.MESSAGE, self.SUGGESTION)
+        else:
+            name = _call_name(node)
+            if name == "Rectangle" and any(self._is_frame_size(keyword) for keyword in node.keywords):
+                self.report(node, self.MESSAGE, self.SUGGESTION)
+            elif name == "ImageMobject" and any(self._mentions_background(arg) for arg in node.args):
+                self.report(node, self.MESSAGE, self.SUGGESTION)
+
+    def finish(self) -> Iterable[CodeIssue]:
+        # One issue is enough to remove every background; point at the first
+        return self.issues[:1]
+
+
+class ManimAPIRule(ValidationRule):
+    """Calls must match the installed Manim's classes, methods and keyword arguments.
+
+    The check tracks variable types per function, so it walks the module
+    itself instead of node by node. It is skipped when Manim is not installed.
+    """
+    name = "manim_api"
+    node_types = (ast.Module,)
+
+    def visit(self, node: ast.Module) -> None:
+        if not MANIM_API_CHECK:
+            return
+        from leap.services.manim_api_service import get_manim_api_service
+        self.issues.extend(get_manim_api_service().check_code(node))
+
+
+DEFAULT_RULES: List[Type[ValidationRule]] = [
+    ManimImportRule,
+    BaseSceneImportRule,
+    ConstructRule,
+    SceneClearRule,
+    ShowCreationRule,
+    VoiceoverRule,
+    TexRule,
+    BackgroundRule,
+    ManimAPIRule,
+]
+
+
+class _RuleDispatcher(ast.NodeVisitor):
+    """Walks the tree once, handing each node to the rules registered for its type."""
+
+    def __init__(self, rules: Sequence[ValidationRule]):
+        self.handlers: Dict[type, List[ValidationRule]] = defaultdict(list)
+        for rule in rules:
+            for node_type in rule.node_types:
+                self.handlers[node_type].append(rule)
+
+    def generic_visit(self, node: ast.AST) -> None:
+        for rule in self.handlers.get(type(node), ()):
+            rule.visit(node)
+        super().generic_visit(node)
+
+
+def _parse(code: str) -> ast.Module:
+    """Parse code, ignoring the invalid-escape warnings LaTeX strings trigger."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", SyntaxWarning)
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return ast.parse(code)
+
+
+def collect_code_issues(code: str, rules: Optional[Sequence[Type[ValidationRule]]] = None) -> List[CodeIssue]:
+    """Run the static checks on generated code.
+    
+    Every issue returned is blocking: code with any issue is considered invalid.
+    
+    Args:
+        code: The generated Manim code
+        rules: The rule classes to run, defaults to ``DEFAULT_RULES``
+        
+    Returns:
+        The list of issues found in the code, grouped by rule in registry order
+    """
+    try:
+        tree = _parse(code)
+    except (SyntaxError, ValueError) as e:
+        # Nothing else can be checked reliably until the code parses
+        return [CodeIssue(
+            message=f"Syntax error: {getattr(e, 'msg', None) or str(e)}",
+            severity="error",
+            line_number=getattr(e, "lineno", None),
+            suggestion="Fix the syntax so the file parses as Python"
+        )]
+
+    active = [rule() for rule in (DEFAULT_RULES if rules is None else rules)]
+    _RuleDispatcher(active).visit(tree)
+
+    issues = []
+    for rule in active:
+        issues.extend(rule.finish())
+    return issues
+
 
 def validate_code(state: GraphState, config: Optional[Dict[str, Any]] = None, **kwargs) -> GraphState:
     """Validate the generated code using AST parsing and structured validation.
@@ -35,125 +379,8 @@ def validate_code(state: GraphState, config: Optional[Dict[str, Any]] = None, **
         code_lines = state["generated_code"].split("\n")
         logger.info(f"Validating code ({len(code_lines)} lines)")
         
-        # Perform basic validation using AST
-        issues = []
-        is_valid = True
-        
-        # Skip AST parsing for syntax validation to avoid string literal errors
-        # We'll rely on execution to catch syntax errors
-        
-        # Continue with other validations that don't require AST parsing
-        if "from manim import *" not in state["generated_code"]:
-            issues.append(CodeIssue(
-                message="Code must import all Manim classes",
-                severity="error",
-                suggestion="Add 'from manim import *' at the top of the file"
-            ))
-            is_valid = False
-
-        # Check for ManimVoiceoverBase import - accept multiple possible paths
-        valid_base_imports = [
-            "from leap.templates.base_scene import ManimVoiceoverBase",
-        ]
-        
-        has_valid_import = any(import_path in state["generated_code"] for import_path in valid_base_imports)
-        if not has_valid_import:
-            issues.append(CodeIssue(
-                message="Code must import ManimVoiceoverBase",
-                severity="error",
-                suggestion="Add 'from leap.templates.base_scene import ManimVoiceoverBase' at the top of the file"
-            ))
-            is_valid = False
-            
-
-            
-        if "def construct(self)" not in state["generated_code"]:
-            issues.append(CodeIssue(
-                message="Scene class must have a construct method",
-                severity="error",
-                suggestion="Add a 'def construct(self):' method to your Scene class"
-            ))
-            is_valid = False
-            
-        # Check for deprecated methods
-        deprecated_methods = ["self.clear()", "ShowCreation"]
-        for method in deprecated_methods:
-            if method in state["generated_code"]:
-                if method == "self.clear()":
-                    issues.append(CodeIssue(
-                        message="self.clear() removes the background. Use self.fade_out_scene() instead.",
-                        severity="error",
-                        suggestion="Replace self.clear() with self.fade_out_scene()"
-                    ))
-                    is_valid = False
-                elif method == "ShowCreation":
-                    issues.append(CodeIssue(
-                        message="ShowCreation is deprecated. Use Create() instead.",
-                        severity="warning",
-                        suggestion="Replace ShowCreation with Create"
-                    ))
-                    is_valid = False
-        
-        # Check for voiceover blocks
-        if "with self.voiceover" not in state["generated_code"]:
-            issues.append(CodeIssue(
-                message="Code must use voiceover blocks for animations",
-                severity="error",
-                suggestion="Wrap animations in 'with self.voiceover(text=\"...\") as tracker:' blocks"
-            ))
-            is_valid = False
-        
-        # Check for Tex vs MathTex usage (using regex instead of AST)
-        if re.search(r'(?<![A-Za-z])Tex\s*\(', state["generated_code"]) and not re.search(r'MathTex\s*\(', state["generated_code"]):
-            issues.append(CodeIssue(
-                message="Using Tex instead of MathTex for mathematical expressions",
-                severity="error",
-                suggestion="Replace Tex with MathTex for mathematical expressions"
-            ))
-            is_valid = False
-        
-
-        
-        # Check for background creation
-        background_patterns = [
-            r'Rectangle\s*\(\s*width\s*=\s*FRAME_WIDTH',
-            r'Rectangle\s*\(\s*width\s*=\s*config\.frame_width',
-            r'Rectangle\s*\(\s*height\s*=\s*FRAME_HEIGHT',
-            r'Rectangle\s*\(\s*height\s*=\s*config\.frame_height',
-            r'ImageMobject\s*\(\s*.*\s*\)\s*.*\s*background',
-            r'self\.camera\.background',
-            r'ReplacementTransform\s*\(\s*self\.camera\.background'
-        ]
-        
-        for pattern in background_patterns:
-            if re.search(pattern, state["generated_code"]):
-                issues.append(CodeIssue(
-                    message="Code creates a background element which will conflict with the base scene background",
-                    severity="error",
-                    suggestion="Remove all background creation. The base class already provides a background image."
-                ))
-                is_valid = False
-                break
-        # # Check for color values in constructor arguments (using regex)
-        # color_params = ['color', 'fill_color', 'stroke_color', 'background_stroke_color']
-        # # Continue with the rest of the validation
-        # for param in color_params:
-        #     if re.search(rf'{param}=\s*(?![\'"])([A-Za-z_]+)(?=\s*[,)])', state["generated_code"]):
-        #         issues.append(CodeIssue(
-        #             message=f"Unquoted color value in {param} parameter",
-        #             severity="error",
-        #             suggestion=f"Use quoted color values: {param}=\"blue\" instead of {param}=blue"
-        #         ))
-        #         is_valid = False
-        
-        # # Check for unquoted color values in set_color method
-        # if re.search(r'\.set_color\(\s*(?![\'"])([A-Za-z_]+)\s*\)', state["generated_code"]):
-        #     issues.append(CodeIssue(
-        #         message="Unquoted color value in set_color method",
-        #         severity="error",
-        #         suggestion="Use quoted color values: .set_color(\"blue\") instead of .set_color(blue)"
-        #     ))
-        #     is_valid = False
+        issues = collect_code_issues(state["generated_code"])
+        is_valid = not issues
         
         # Create validation result
         validation_result = CodeValidationResult(
@@ -14,7 +14,11 @@ class GraphState(TypedDict, total=False):
     user_level: str = Field("normal", description="Explanation level")
     voice_model: str = Field("nova", description="Voice model")
     email: Optional[str] = Field(None, description="User email")
+    job_id: Optional[str] = Field(None, description="API job ID, also used as the checkpoint thread ID")
     validation_status: Optional[str] = Field(None, description="Status of input validation (valid, invalid, needs_clarification)")
     suggestion: Optional[str] = Field(None, description="Suggestion for improving the input")
     prompts: Optional[Dict[str, Dict[str, str]]] = Field(None, description="Prompts used in each step")
+    candidate_count: Optional[int] = Field(None, description="Number of code candidates to request concurrently (overrides CANDIDATE_COUNT)")
+    autofix_applied: Optional[List[str]] = Field(None, description="Auto-fix rules applied in the last auto-fix step")
+    autofix_attempt: Optional[int] = Field(None, description="Correction attempt in which the code was last auto-fixed")
 
@@ -1,7 +1,17 @@
 import re
+import hashlib
+import random
 import tempfile
 import logging
-from leap.core.config import GENERATED_DIR, LOGS_DIR, RUN_TIMESTAMP
+from typing import Any, Dict
+from leap.core.config import (
+    GENERATED_DIR,
+    LOGS_DIR,
+    RUN_TIMESTAMP,
+    STATE_LOG_LEVEL,
+    STATE_LOG_MAX_VALUE,
+    STATE_LOG_SAMPLE_RATE,
+)
 from leap.templates import get_api_doc
 
 def get_manim_api_context() -> str:
@@ -9,36 +19,79 @@ def get_manim_api_context() -> str:
     # Read the API documentation from the templates directory
     return get_api_doc("breaking_changes")
 
+def _summarize(value: Any, depth: int = 0) -> Any:
+    """Return a log-friendly version of a state value.
+    
+    Long strings become their length and a short hash, containers are
+    summarized item by item (or by size when large or deeply nested).
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        if depth >= 2 or len(value) > 20:
+            return f"<dict of {len(value)} keys>"
+        return {key: _summarize(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if depth >= 2 or len(value) > 10:
+            return f"<{type(value).__name__} of {len(value)} items>"
+        return [_summarize(item, depth + 1) for item in value]
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= STATE_LOG_MAX_VALUE:
+        return text
+    digest = hashlib.sha1(text.encode(errors="replace")).hexdigest()[:10]
+    return f"<{len(text)} chars sha1:{digest}>"
+
+def summarize_state(state: dict) -> Dict[str, Any]:
+    """Return a state with long values replaced by their length and hash, for logging."""
+    return {key: _summarize(value) for key, value in (state or {}).items()}
+
+class _Transition:
+    """Changed state keys, formatted into a message only if a handler emits the record."""
+    
+    def __init__(self, changes: Dict[str, Any], added: Dict[str, Any]):
+        self.changes = changes
+        self.added = added
+    
+    def __str__(self) -> str:
+        parts = [f"{key}: {before} -> {after}" for key, (before, after) in self.changes.items()]
+        parts += [f"+ {key}: {value}" for key, value in self.added.items()]
+        return "; ".join(parts) or "no changes"
+
 def log_state_transition(node_name: str, input_state: dict, output_state: dict):
-    """Log the state transition for a node, showing what changed."""
+    """Log the state keys a node changed.
+    
+    Only changed and added keys are logged, long values as their length and
+    hash, at ``STATE_LOG_LEVEL`` for a ``STATE_LOG_SAMPLE_RATE`` fraction of
+    transitions. The changes are attached to the record as structured
+    ``node``/``changes``/``added`` fields for the JSON log formatter.
+    """
     logger = logging.getLogger(__name__)
-    logger.info(f"\n{'='*50}\nNode: {node_name}")
-    
-    # Log input state
-    logger.info("Input State:")
-    for k, v in input_state.items():
-        if k in ['generated_code', 'plan'] and v:
-            logger.info(f"  {k}: <{len(str(v))} chars>")
-        else:
-            logger.info(f"  {k}: {v}")
-    
-    # Log changes between input and output states
-    logger.info("Changes:")
-    for k in output_state:
-        if k in input_state:
-            if output_state[k] != input_state[k]:
-                if k in ['generated_code', 'plan']:
-                    logger.info(f"  {k}: <updated - {len(str(output_state[k]))} chars>")
-                else:
-                    logger.info(f"  {k}: {input_state[k]} -> {output_state[k]}")
-        else:
-            logger.info(f"  + {k}: {output_state[k]}")
+    level = logging.getLevelName(STATE_LOG_LEVEL)
+    level = level if isinstance(level, int) else logging.INFO
+    
+    if logger.isEnabledFor(level) and random.random() < STATE_LOG_SAMPLE_RATE:
+        changes: Dict[str, Any] = {}
+        added: Dict[str, Any] = {}
+        for k, after in output_state.items():
+            if k not in input_state:
+                added[k] = _summarize(after)
+                continue
+            before = input_state[k]
+            if before is not after and before != after:
+                changes[k] = (_summarize(before), _summarize(after))
+        transition = _Transition(changes, added)
+        logger.log(
+            level,
+            "Node: %s | %s",
+            node_name,
+            transition,
+            extra={"node": node_name, "changes": changes, "added": added}
+        )
     
     # Log error if present
     if output_state.get('error'):
         logger.error(f"Error in {node_name}: {output_state['error']}")
     
-    logger.info(f"{'='*50}\n")
     return output_state
 
 def create_temp_dir():
@@ -31,6 +31,7 @@ setup(
         "manim-voiceover[transcribe]==0.3.7",
         "langsmith==0.3.11",
         "langgraph==0.3.2",
+        "langgraph-checkpoint-sqlite==2.0.6",
         "instructor==1.7.2",
         "sendgrid==6.11.0",
         "python-json-logger==3.2.1",
@@ -51,11 +52,15 @@ setup(
             "rich==13.9.4",
             "ipython==9.0.1",
         ],
+        "redis": [
+            "redis>=5.0",
+        ],
     },
     entry_points={
         "console_scripts": [
             "leap=leap.main:main",
             "leap-api=leap.api_server:app",
+            "leap-worker=leap.worker:main",
         ],
     },
     include_package_data=True,
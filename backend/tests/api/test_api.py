@@ -2,7 +2,9 @@
 Test the API endpoints.
 """
 import logging
+import uuid
 import pytest
+from datetime import datetime
 from fastapi.testclient import TestClient
 from leap.api import create_app
 
@@ -26,6 +28,151 @@ def test_api_health():
     assert response.status_code == 200
     assert response.json()["status"] == "ok"
 
+def test_event_stream_for_finished_job():
+    """Test the event stream sends the final status of a finished job and closes."""
+    from leap.api.routes.animations import animation_service
+    from leap.services.job_store import Job
+
+    job = Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status="completed", video_url="http://localhost:8000/videos/demo.mp4")
+    animation_service.job_store.save(job)
+
+    response = client.get(f"/api/animations/events/{job.id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: status" in response.text
+    assert '"status": "completed"' in response.text
+
+def test_generate_rejected_when_saturated(monkeypatch):
+    """Test a saturated server answers 429 with Retry-After instead of accepting the job."""
+    from leap.api.routes.animations import animation_service
+    from leap.services.admission import AdmissionController
+
+    saturated = AdmissionController(backlog=lambda: 10, service_time=lambda: 60.0, capacity=2, max_backlog=10)
+    monkeypatch.setattr(animation_service, "admission", saturated)
+
+    response = client.post("/api/animations/generate", json={"prompt": "Explain derivatives", "level": "beginner"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "60"
+
+def test_client_key_uses_the_proxy_added_address():
+    """Test the caller's IP is taken from the hop our proxy appended, not a spoofable one."""
+    from starlette.requests import Request
+    from leap.api.models.requests import AnimationRequest
+    from leap.api.routes.animations import _client_key
+
+    http_request = Request({
+        "type": "http",
+        "headers": [(b"x-forwarded-for", b"6.6.6.6, 203.0.113.7")],
+        "client": ("10.0.0.2", 40000),
+    })
+
+    assert _client_key(AnimationRequest(prompt="Explain derivatives", level="beginner"), http_request) == "ip:203.0.113.7"
+
+def test_in_process_job_runs_off_the_event_loop():
+    """Test an in-process job is run by BackgroundTasks in the threadpool, not on the event loop."""
+    from starlette.background import BackgroundTask
+    from leap.api.routes.animations import animation_service
+
+    task = BackgroundTask(animation_service.process_job, job_id=uuid.uuid4(), prompt="Explain derivatives", level="beginner")
+    assert not task.is_async
+
+def test_cancel_stops_a_job_running_in_process(monkeypatch):
+    """Test DELETE stops a job while it is still running in this process."""
+    import threading
+    from unittest.mock import MagicMock
+    from leap.api.routes.animations import animation_service
+    from leap.services.cancellation import run_cancellable
+    from leap.services.job_store import Job
+
+    started, release = threading.Event(), threading.Event()
+
+    def stream(state, config, stream_mode=None):
+        started.set()
+        # Blocks like an LLM call until the job is cancelled
+        run_cancellable(release.wait)
+        yield "values", {}
+
+    workflow = MagicMock()
+    workflow.stream.side_effect = stream
+    monkeypatch.setattr(animation_service, "workflow", workflow)
+    job = Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status="pending")
+    animation_service.job_store.save(job)
+
+    # BackgroundTasks runs process_job in a threadpool thread
+    runner = threading.Thread(target=animation_service.process_job, args=(job.id, "Explain derivatives", "beginner"))
+    runner.start()
+    assert started.wait(5)
+
+    response = client.delete(f"/api/animations/{job.id}")
+    runner.join(5)
+
+    assert response.status_code == 200
+    assert not runner.is_alive()
+    assert animation_service.job_store.get(job.id).status == "cancelled"
+    release.set()
+
+def _failing_workflow(error):
+    from unittest.mock import MagicMock
+
+    workflow = MagicMock()
+    workflow.get_state.return_value = MagicMock(next=(), values={})
+    workflow.stream.side_effect = error
+    return workflow
+
+def test_llm_outage_is_left_to_the_worker_to_retry(monkeypatch):
+    """Test a retryable error propagates to the worker instead of failing the job."""
+    import httpx
+    import openai
+    from leap.api.routes.animations import animation_service
+    from leap.services.job_store import Job
+
+    outage = openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+    failure = RuntimeError("All 3 candidates failed")
+    failure.__cause__ = outage
+    monkeypatch.setattr(animation_service, "workflow", _failing_workflow(failure))
+    job = Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status="pending")
+    animation_service.job_store.save(job)
+
+    with pytest.raises(RuntimeError):
+        animation_service.run_job(job.id, "Explain derivatives", "beginner")
+    assert animation_service.job_store.get(job.id).status == "pending"
+
+def test_terminal_error_fails_the_job(monkeypatch):
+    """Test an error that a retry cannot fix fails the job right away."""
+    from leap.api.routes.animations import animation_service
+    from leap.services.job_store import Job
+
+    monkeypatch.setattr(animation_service, "workflow", _failing_workflow(ValueError("bad state")))
+    job = Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status="pending")
+    animation_service.job_store.save(job)
+
+    animation_service.run_job(job.id, "Explain derivatives", "beginner")
+    assert animation_service.job_store.get(job.id).status == "failed"
+
+def test_cancel_job():
+    """Test cancelling a job records it as cancelled and cannot be repeated."""
+    from leap.api.routes.animations import animation_service
+    from leap.services.job_store import Job
+
+    job = Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status="processing")
+    animation_service.job_store.save(job)
+
+    response = client.delete(f"/api/animations/{job.id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+
+    response = client.delete(f"/api/animations/{job.id}")
+    assert response.status_code == 409
+    assert client.delete(f"/api/animations/{uuid.uuid4()}").status_code == 404
+
+def test_metrics_endpoint():
+    """Test the metrics endpoint serves the Prometheus text format."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE leap_node_duration_seconds histogram" in response.text
+    assert "leap_outbox_messages" in response.text
+
 if __name__ == "__main__":
     logger.info("Starting API test...")
     test_animation_generation()
@@ -3,7 +3,16 @@ Shared pytest fixtures and configuration.
 """
 import pytest
 import os
+import shutil
+import tempfile
 from pathlib import Path
+
+# Job, queue, outbox and checkpoint databases, logs and the input lexicon live
+# under GENERATED_DIR, and their paths are read when leap is first imported, so
+# tests get a scratch directory before that instead of the deployment's one
+TEST_GENERATED_DIR = Path(tempfile.mkdtemp(prefix="leap-tests-"))
+os.environ["GENERATED_DIR"] = str(TEST_GENERATED_DIR)
+
 from leap.core.config import (
     GENERATED_DIR,
     LOGS_DIR,
@@ -11,6 +20,13 @@ from leap.core.config import (
     TEMPLATES_DIR
 )
 
+@pytest.fixture(scope="session", autouse=True)
+def scratch_generated_dir():
+    """Remove the scratch GENERATED_DIR once the test session is over."""
+    assert GENERATED_DIR == TEST_GENERATED_DIR
+    yield TEST_GENERATED_DIR
+    shutil.rmtree(TEST_GENERATED_DIR, ignore_errors=True)
+
 @pytest.fixture(autouse=True)
 def setup_test_environment():
     """Set up test environment with required directories."""
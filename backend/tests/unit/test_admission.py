@@ -0,0 +1,82 @@
+"""
+Unit tests for admission control.
+"""
+import uuid
+from datetime import datetime
+from leap.services.admission import AdmissionController, RateLimiter, active_job_count, measured_service_time
+from leap.services.job_store import Job, MemoryJobStore, SqliteJobStore
+
+def controller(backlog, **kwargs):
+    options = dict(service_time=lambda: 100.0, capacity=2, max_backlog=10, max_wait=1000)
+    options.update(kwargs)
+    return AdmissionController(backlog=lambda: backlog, **options)
+
+def test_admitted_job_gets_position_and_eta():
+    """Test an admitted job reports the jobs ahead of it and when it should finish."""
+    decision = controller(5).admit()
+
+    assert decision.admitted
+    assert decision.queue_position == 5
+    # Two waves of two jobs run before it, then its own run
+    assert decision.eta_seconds == 300.0
+
+def test_full_backlog_is_rejected_with_retry_after():
+    """Test a full backlog rejects new jobs until a wave of jobs finishes."""
+    decision = controller(11).admit()
+
+    assert not decision.admitted
+    assert decision.retry_after == 100.0
+    assert decision.retry_after_header() == "100"
+
+def test_long_wait_is_rejected():
+    """Test jobs are rejected when they would wait longer than allowed to start."""
+    decision = controller(8, max_wait=250).admit()
+
+    assert not decision.admitted
+    assert decision.retry_after == 400 - 250 + 100
+
+def test_admitted_jobs_count_towards_cached_backlog():
+    """Test a burst is held back even before the backlog is read again."""
+    gate = controller(8)
+
+    assert gate.admit().admitted
+    assert gate.admit().admitted
+    assert not gate.admit().admitted
+
+def test_rate_limiter_refills_over_time():
+    """Test a client can burst, is then limited, and regains tokens at the set rate."""
+    limiter = RateLimiter(MemoryJobStore(), rate=0.5, burst=2)
+
+    assert limiter.take("ip:1", now=0) == 0
+    assert limiter.take("ip:1", now=0) == 0
+    assert limiter.take("ip:1", now=0) == 2.0
+    assert limiter.take("ip:2", now=0) == 0
+    assert limiter.take("ip:1", now=2) == 0
+
+def test_rate_limit_is_shared_by_replicas(tmp_path):
+    """Test replicas using the same job store draw from the same bucket."""
+    replicas = [RateLimiter(SqliteJobStore(tmp_path / "jobs.sqlite"), rate=0.5, burst=2) for _ in range(2)]
+
+    assert replicas[0].take("ip:1", now=0) == 0
+    assert replicas[1].take("ip:1", now=0) == 0
+    assert replicas[0].take("ip:1", now=0) == 2.0
+    assert replicas[1].take("ip:1", now=0) == 2.0
+    assert replicas[1].take("ip:1", now=2) == 0
+
+def test_client_limit_applies_per_client():
+    """Test the per-client limit rejects one client without affecting others."""
+    gate = controller(0, rate_limiter=RateLimiter(MemoryJobStore(), rate=0.001, burst=1))
+
+    assert gate.admit("email:a@example.com").admitted
+    assert not gate.admit("email:a@example.com").admitted
+    assert gate.admit("email:b@example.com").admitted
+
+def test_backlog_and_service_time_from_job_store():
+    """Test unfinished jobs are counted and service time follows finished jobs' timings."""
+    store = MemoryJobStore()
+    for status, seconds in [("pending", None), ("processing", None), ("completed", 90.0), ("failed", 10.0)]:
+        progress = {"timings": {"generate_code": seconds / 3, "execute_code": seconds * 2 / 3}} if seconds else None
+        store.save(Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status=status, progress=progress))
+
+    assert active_job_count(store) == 2
+    assert round(measured_service_time(store)) == 90
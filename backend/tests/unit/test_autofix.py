@@ -0,0 +1,242 @@
+"""
+Unit tests for the rule-based auto-fixer.
+"""
+import pytest
+from leap.workflow.autofix import (
+    AutoFixer,
+    AutoFixRule,
+    TextEdit,
+    auto_fix,
+    get_autofix_stats,
+    reset_autofix_stats,
+)
+from leap.workflow.nodes.auto_fix import auto_fix_code
+from leap.workflow.nodes.validation import collect_code_issues
+
+VALID_HEADER = """from manim import *
+from leap.templates.base_scene import ManimVoiceoverBase
+"""
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    """Start every test with fresh counters."""
+    reset_autofix_stats()
+    yield
+    reset_autofix_stats()
+
+def test_show_creation_replaced():
+    """Test ShowCreation is rewritten to Create."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        circle = Circle()  # keep this comment
+        with self.voiceover(text="Hi") as tracker:
+            self.play(ShowCreation(circle), run_time=tracker.duration)
+"""
+    result = auto_fix(code)
+
+    assert result.changed
+    assert "show_creation" in result.applied
+    assert "ShowCreation" not in result.code
+    assert "self.play(Create(circle), run_time=tracker.duration)" in result.code
+    assert "# keep this comment" in result.code
+
+def test_clear_replaced_with_fade_out():
+    """Test self.clear() is rewritten to self.fade_out_scene()."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        with self.voiceover(text="Hi") as tracker:
+            self.play(Write(Text("Hi")), run_time=tracker.duration)
+        self.clear()
+"""
+    result = auto_fix(code)
+
+    assert result.applied == ["scene_clear"]
+    assert "self.clear()" not in result.code
+    assert "self.fade_out_scene()" in result.code
+
+def test_tex_replaced_with_mathtex():
+    """Test Tex calls are rewritten when the code uses no MathTex, as validation reports them."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        a = Tex(r"x^2")
+"""
+    result = auto_fix(code)
+
+    assert "tex_to_mathtex" in result.applied
+    assert 'a = MathTex(r"x^2")' in result.code
+
+def test_tex_alongside_mathtex_left_alone():
+    """Test text-mode Tex is kept when the code already typesets math with MathTex."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        a = Tex(r"Energy")
+        b = MathTex(r"E = mc^2")
+"""
+    assert not any("Tex" in issue.message for issue in collect_code_issues(code))
+
+    result = auto_fix(code)
+
+    assert "tex_to_mathtex" not in result.applied
+    assert 'a = Tex(r"Energy")' in result.code
+
+def test_only_rules_for_the_reported_error_run():
+    """Test rules run only when the reported validation issue or execution error is theirs."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        self.play(ShowCreation(Tex("x^2")))
+"""
+    unrelated = auto_fix(code, "RuntimeError: ffmpeg exited with status 1")
+    show_creation = auto_fix(code, "NameError: name 'ShowCreation' is not defined")
+
+    assert not unrelated.changed
+    assert show_creation.applied == ["show_creation"]
+    assert 'Tex("x^2")' in show_creation.code
+
+def test_missing_imports_added_after_docstring():
+    """Test missing imports are inserted after the module docstring."""
+    code = '''"""Scene docstring."""
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        pass
+'''
+    result = auto_fix(code)
+
+    assert result.applied == ["missing_imports"]
+    lines = result.code.splitlines()
+    assert lines[0] == '"""Scene docstring."""'
+    assert lines[1] == "from manim import *"
+    assert lines[2] == "from leap.templates.base_scene import ManimVoiceoverBase"
+
+def test_missing_construct_added():
+    """Test a construct method calling the scene methods is added."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def introduction(self):
+        pass
+
+    def summarize(self):
+        pass
+"""
+    result = auto_fix(code)
+
+    assert result.applied == ["missing_construct"]
+    assert "    def construct(self):\n        self.introduction()\n        self.summarize()\n" in result.code
+
+def test_syntax_error_left_unchanged():
+    """Test code that does not parse is returned as-is."""
+    code = "def broken(:\n    ShowCreation(x)\n"
+    result = auto_fix(code)
+
+    assert not result.changed
+    assert result.code == code
+
+def test_valid_code_is_fixpoint():
+    """Test running the fixer on fixed code changes nothing."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        self.play(ShowCreation(Tex("a")))
+        self.clear()
+"""
+    first = auto_fix(code)
+    second = auto_fix(first.code)
+
+    assert first.changed
+    assert not second.changed
+
+def test_custom_rule_registration():
+    """Test pluggable rules are applied by the engine."""
+    class RemovePrintRule(AutoFixRule):
+        name = "remove_print"
+
+        def detect(self, tree):
+            import ast
+            return [
+                node for node in tree.body
+                if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call)
+                and getattr(node.value.func, "id", None) == "print"
+            ]
+
+        def rewrite(self, node, index):
+            start, end = index.span(node)
+            return TextEdit(start, end, "pass")
+
+    fixer = AutoFixer(rules=[])
+    fixer.register(RemovePrintRule())
+    result = fixer.fix("print('debug')\n")
+
+    assert result.applied == ["remove_print"]
+    assert result.code == "pass\n"
+
+def test_auto_fix_node_fixes_reported_issue():
+    """Test the node fixes the code without counting a saved LLM call before it renders."""
+    code = VALID_HEADER + """
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        with self.voiceover(text="Hi") as tracker:
+            self.play(ShowCreation(Circle()), run_time=tracker.duration)
+"""
+    assert collect_code_issues(code)
+    state = {"user_input": "How does gravity work?", "generated_code": code, "error": "WARNING: ShowCreation"}
+
+    result = auto_fix_code(state)
+
+    assert result["autofix_applied"] == ["show_creation"]
+    assert result["error"] is None
+    assert not collect_code_issues(result["generated_code"])
+    stats = get_autofix_stats()
+    assert stats["llm_calls_avoided"] == 0
+    assert stats["rule_hits"]["show_creation"] == 1
+
+def test_avoided_llm_call_counted_once_auto_fixed_code_renders():
+    """Test a saved LLM call is only counted when the auto-fixed code executes successfully."""
+    from unittest.mock import MagicMock
+    from leap.workflow.nodes import execute_code
+
+    manim_service = MagicMock()
+    manim_service.count_animations.return_value = 1
+    state = {"user_input": "How does gravity work?", "generated_code": VALID_HEADER + "x = 1\n",
+             "correction_attempts": 1, "autofix_attempt": 1}
+
+    manim_service.execute_manim_code.return_value = {"success": False, "error": "Render failed"}
+    execute_code(dict(state), file_service=MagicMock(), manim_service=manim_service)
+    assert get_autofix_stats()["llm_calls_avoided"] == 0
+
+    manim_service.execute_manim_code.return_value = {"success": True, "output_file": "Demo.mp4"}
+    execute_code({**state, "autofix_attempt": 0}, file_service=MagicMock(), manim_service=manim_service)
+    assert get_autofix_stats()["llm_calls_avoided"] == 0
+
+    execute_code(dict(state), file_service=MagicMock(), manim_service=manim_service)
+    assert get_autofix_stats()["llm_calls_avoided"] == 1
+
+def test_auto_fix_node_falls_back_when_nothing_to_fix():
+    """Test the node leaves the error in place when no rule matches."""
+    state = {"user_input": "How does gravity work?", "generated_code": VALID_HEADER + "x = 1\n", "error": "Some error"}
+
+    result = auto_fix_code(state)
+
+    assert result["autofix_applied"] == []
+    assert result["error"] == "Some error"
+    assert get_autofix_stats()["llm_calls_avoided"] == 0
+
+def test_auto_fix_node_runs_once_per_correction_attempt():
+    """Test code already auto-fixed in this correction attempt is left for the LLM."""
+    code = VALID_HEADER + "x = ShowCreation\n"
+    state = {"user_input": "How does gravity work?", "generated_code": code,
+             "error": "WARNING: ShowCreation is deprecated", "correction_attempts": 1}
+
+    fixed = auto_fix_code(state)
+    again = auto_fix_code({**state, "autofix_attempt": fixed["autofix_attempt"]})
+    next_attempt = auto_fix_code({**state, "autofix_attempt": fixed["autofix_attempt"], "correction_attempts": 2})
+
+    assert fixed["autofix_applied"] == ["show_creation"]
+    assert fixed["autofix_attempt"] == 1
+    assert again["autofix_applied"] == []
+    assert again["error"] == state["error"]
+    assert next_attempt["autofix_applied"] == ["show_creation"]
+
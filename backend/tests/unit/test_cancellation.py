@@ -0,0 +1,93 @@
+"""
+Unit tests for job cancellation.
+"""
+import threading
+import time
+import pytest
+from leap.services.cancellation import (
+    CANCEL_EVENT,
+    JobCancelled,
+    cancel_local,
+    cancel_requested,
+    cancellable,
+    current_token,
+    run_cancellable,
+)
+from leap.services.job_queue import CANCELLED, JobQueue
+from leap.services.job_store import MemoryJobStore
+
+JOB_ID = "00000000-0000-0000-0000-000000000001"
+
+def test_run_cancellable_outside_a_job_runs_inline():
+    """Test operations run normally when no job is bound to the context."""
+    assert current_token() is None
+    assert run_cancellable(lambda: 42) == 42
+
+def test_cancel_abandons_operation_and_tears_it_down():
+    """Test cancelling a job interrupts a blocking call and closes its client."""
+    release = threading.Event()
+    torn_down = []
+
+    with cancellable(JOB_ID):
+        threading.Timer(0.05, cancel_local, args=(JOB_ID,)).start()
+        started = time.monotonic()
+        with pytest.raises(JobCancelled):
+            run_cancellable(release.wait, teardown=lambda: torn_down.append(True))
+
+    assert time.monotonic() - started < 5
+    assert torn_down == [True]
+    release.set()
+
+def test_on_cancel_callbacks_run_once():
+    """Test teardown callbacks run on cancellation and are dropped after their block."""
+    calls = []
+    with cancellable(JOB_ID) as token:
+        with token.on_cancel(lambda: calls.append("inner")):
+            pass
+        with token.on_cancel(lambda: calls.append("active")):
+            token.cancel()
+            token.cancel()
+        with pytest.raises(JobCancelled):
+            token.raise_if_cancelled()
+    assert calls == ["active"]
+    assert not cancel_local(JOB_ID)
+
+def test_job_resources_are_reused_and_closed_when_the_job_ends():
+    """Test a job's resource is created once and closed when the job is done."""
+    closed = []
+    with cancellable(JOB_ID) as token:
+        first = token.resource("client", object, closed.append)
+        assert token.resource("client", object, closed.append) is first
+        assert closed == []
+    assert closed == [first]
+
+def test_job_resources_are_closed_on_cancel():
+    """Test cancelling a job closes its resources right away."""
+    closed = []
+    with cancellable(JOB_ID) as token:
+        client = token.resource("client", object, closed.append)
+        token.cancel()
+        assert closed == [client]
+    assert closed == [client]
+
+def test_cancel_event_stops_job_in_another_process(monkeypatch):
+    """Test a job notices a cancel event recorded in the shared event log."""
+    monkeypatch.setattr("leap.services.cancellation.CANCEL_POLL_INTERVAL", 0.01)
+    store = MemoryJobStore()
+
+    with cancellable(JOB_ID, store) as token:
+        store.append_event(JOB_ID, "status", {"status": "processing"})
+        assert not cancel_requested(store, JOB_ID)
+        store.append_event(JOB_ID, CANCEL_EVENT, {})
+        assert token.event.wait(2)
+    assert cancel_requested(store, JOB_ID)
+
+def test_cancel_queued_job(tmp_path):
+    """Test a cancelled job is removed from the queue before any worker leases it."""
+    queue = JobQueue(tmp_path / "queue.sqlite", visibility_timeout=60, max_attempts=2, retry_backoff=0)
+    queue.enqueue(JOB_ID, {"prompt": "How does gravity work?"})
+
+    assert queue.cancel(JOB_ID)
+    assert queue.get(JOB_ID).status == CANCELLED
+    assert queue.lease("worker-a") is None
+    assert queue.depth() == 0
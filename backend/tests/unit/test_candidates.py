@@ -0,0 +1,126 @@
+"""
+Unit tests for best-of-N candidate generation.
+"""
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from leap.models import ManimCodeResponse
+from leap.services.cancellation import JobCancelled, cancel_local, cancellable, run_cancellable
+from leap.workflow.candidates import preflight, race_candidates
+from leap.workflow.nodes import generate_code
+
+GOOD_CODE = """
+from manim import *
+from leap.templates.base_scene import ManimVoiceoverBase
+
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        with self.voiceover(text="Hi") as tracker:
+            self.play(Write(Text("Hi")), run_time=tracker.duration)
+"""
+
+BAD_CODE = """
+class Demo:
+    pass
+"""
+
+def test_preflight_autofixes_known_issues():
+    """Test pre-flight auto-fixes mechanical issues before checking."""
+    candidate = preflight(GOOD_CODE.replace("Write(", "ShowCreation("))
+
+    assert candidate.passed
+    assert candidate.autofix_applied == ["show_creation"]
+
+def test_preflight_reports_syntax_errors():
+    """Test pre-flight rejects code that does not compile."""
+    candidate = preflight("def broken(:\n")
+
+    assert not candidate.passed
+    assert "Syntax error" in candidate.issues[0].message
+
+def test_race_returns_first_passing_candidate():
+    """Test a fast passing candidate wins over a slow one."""
+    def produce(index):
+        if index == 0:
+            time.sleep(0.5)
+            return ManimCodeResponse(code=BAD_CODE)
+        return ManimCodeResponse(code=GOOD_CODE)
+
+    start = time.monotonic()
+    candidate = race_candidates(produce, 2)
+
+    assert candidate.passed
+    assert candidate.index == 1
+    assert time.monotonic() - start < 0.5
+
+def test_race_aborts_losing_requests():
+    """Test requests still in flight are aborted once a candidate passes."""
+    release = threading.Event()
+    aborted = threading.Event()
+
+    def produce(index):
+        if index == 0:
+            run_cancellable(release.wait, teardown=aborted.set)
+            return ManimCodeResponse(code=BAD_CODE)
+        return ManimCodeResponse(code=GOOD_CODE)
+
+    candidate = race_candidates(produce, 2)
+
+    assert candidate.index == 1
+    assert aborted.wait(5)
+    release.set()
+
+def test_race_is_cancelled_with_its_job():
+    """Test cancelling the job aborts every candidate."""
+    job_id = "00000000-0000-0000-0000-000000000002"
+    release = threading.Event()
+
+    with cancellable(job_id):
+        threading.Timer(0.05, cancel_local, args=(job_id,)).start()
+        with pytest.raises(JobCancelled):
+            race_candidates(lambda i: run_cancellable(release.wait), 2)
+    release.set()
+
+def test_race_falls_back_to_fewest_issues():
+    """Test the least broken candidate is returned when none pass."""
+    codes = [BAD_CODE, GOOD_CODE.replace("with self.voiceover", "if True or self.voiceover")]
+
+    candidate = race_candidates(lambda i: ManimCodeResponse(code=codes[i]), 2)
+
+    assert not candidate.passed
+    assert candidate.index == 1
+
+def test_race_skips_failed_candidates():
+    """Test candidates raising exceptions are ignored."""
+    def produce(index):
+        if index == 0:
+            raise RuntimeError("rate limited")
+        return ManimCodeResponse(code=GOOD_CODE)
+
+    candidate = race_candidates(produce, 2)
+
+    assert candidate.index == 1
+
+def test_race_raises_when_all_fail():
+    """Test an error is raised when no candidate could be produced."""
+    def produce(index):
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError, match="All 3 candidates failed"):
+        race_candidates(produce, 3)
+
+def test_generate_code_requests_n_candidates():
+    """Test generate_code fans out when candidate_count is set."""
+    mock_llm = MagicMock()
+    mock_llm.generate_structured_response.return_value = ManimCodeResponse(code=GOOD_CODE)
+    state = {
+        "user_input": "How does gravity work?",
+        "plan": "1. Explain gravity",
+        "candidate_count": 3
+    }
+
+    result = generate_code(state, llm_service=mock_llm)
+
+    assert mock_llm.generate_structured_response.call_count == 3
+    assert "class Demo(ManimVoiceoverBase)" in result["generated_code"]
@@ -0,0 +1,81 @@
+"""
+Unit tests for durable workflow checkpoints and job recovery.
+"""
+import sqlite3
+import pytest
+from unittest.mock import patch, MagicMock
+from langgraph.checkpoint.sqlite import SqliteSaver
+from leap.workflow.graph import create_workflow
+from leap.workflow.checkpoints import WorkflowRunRegistry, thread_config, prune_thread
+
+@pytest.fixture
+def registry_path(tmp_path):
+    """Path to a scratch checkpoint database."""
+    return tmp_path / "checkpoints.sqlite"
+
+def test_fresh_runs_are_not_claimed(registry_path):
+    """Test runs with a recent heartbeat stay with their owner."""
+    owner = WorkflowRunRegistry(registry_path, owner="replica-a")
+    other = WorkflowRunRegistry(registry_path, owner="replica-b")
+    owner.start("job-1")
+
+    assert other.claim_stale(stale_after=60) == []
+
+def test_stale_runs_are_claimed_once(registry_path):
+    """Test only one replica wins the claim on an orphaned run."""
+    owner = WorkflowRunRegistry(registry_path, owner="replica-a")
+    first = WorkflowRunRegistry(registry_path, owner="replica-b")
+    second = WorkflowRunRegistry(registry_path, owner="replica-c")
+    owner.start("job-1")
+
+    # A negative threshold makes every heartbeat look stale
+    assert first.claim_stale(stale_after=-1) == ["job-1"]
+    assert second.claim_stale(stale_after=60) == []
+
+def test_finished_runs_are_not_claimed(registry_path):
+    """Test completed runs are never resumed."""
+    owner = WorkflowRunRegistry(registry_path, owner="replica-a")
+    owner.start("job-1")
+    owner.finish("job-1")
+
+    assert WorkflowRunRegistry(registry_path, owner="replica-b").claim_stale(stale_after=-1) == []
+
+def test_workflow_resumes_from_last_completed_node(registry_path):
+    """Test a crashed run resumes without repeating completed nodes."""
+    validate = MagicMock(return_value={"validation_status": "valid"})
+    plan_calls = []
+
+    def flaky_plan(state):
+        plan_calls.append(state)
+        if len(plan_calls) == 1:
+            raise RuntimeError("replica killed")
+        return {"plan": "1. Explain gravity", "error": None}
+
+    conn = sqlite3.connect(str(registry_path), check_same_thread=False)
+    saver = SqliteSaver(conn)
+    config = thread_config("job-1")
+
+    with patch("leap.workflow.graph.validate_input", validate), \
+         patch("leap.workflow.graph.plan_scenes", flaky_plan), \
+         patch("leap.workflow.graph.generate_code", lambda state: {"generated_code": None, "error": "stop"}), \
+         patch("leap.workflow.graph.auto_fix_code", lambda state: {"autofix_applied": []}), \
+         patch("leap.workflow.graph.error_correction", lambda state: {"correction_attempts": 99}), \
+         patch("leap.workflow.graph.log_workflow_end", lambda state: state):
+        graph = create_workflow(checkpointer=saver)
+
+        with pytest.raises(RuntimeError):
+            graph.invoke({"user_input": "How does gravity work?", "job_id": "job-1"}, config)
+
+        snapshot = graph.get_state(config)
+        assert snapshot.next == ("plan_scenes",)
+        assert snapshot.values["validation_status"] == "valid"
+
+        result = graph.invoke(None, config)
+
+    assert validate.call_count == 1
+    assert len(plan_calls) == 2
+    assert result["plan"] == "1. Explain gravity"
+    assert not graph.get_state(config).next
+
+    prune_thread(saver, "job-1")
+    assert conn.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = 'job-1'").fetchone()[0] == 0
@@ -1,6 +1,7 @@
 """
 Unit tests for the configuration module.
 """
+import os
 import pytest
 from pathlib import Path
 from leap.core.config import (
@@ -23,7 +24,7 @@ def test_critical_paths():
     assert PACKAGE_DIR == BASE_DIR / "leap"
     
     # Test generated directories
-    assert GENERATED_DIR.parent == BASE_DIR
+    assert GENERATED_DIR == Path(os.getenv("GENERATED_DIR", str(BASE_DIR / "generated")))
     assert LOGS_DIR.parent == GENERATED_DIR
     assert LOGS_DIR.exists()
 
@@ -0,0 +1,72 @@
+"""
+Unit tests for the job event bus and render progress reporting.
+"""
+import asyncio
+import threading
+import pytest
+from leap.services.event_bus import EventBus
+from leap.services.job_store import MemoryJobStore, SqliteJobStore
+from leap.services.manim_service import ManimService
+
+JOB_ID = "00000000-0000-0000-0000-000000000001"
+
+async def collect(bus, after=0):
+    return [event async for event in bus.subscribe(JOB_ID, after)]
+
+@pytest.mark.asyncio
+async def test_subscribe_stops_at_final_status():
+    """Test subscribers receive events in order and stop when the job finishes."""
+    bus = EventBus(MemoryJobStore())
+    bus.publish(JOB_ID, "node", {"node": "plan_scenes"})
+    bus.publish(JOB_ID, "status", {"status": "completed"})
+    bus.publish(JOB_ID, "node", {"node": "ignored"})
+
+    events = await asyncio.wait_for(collect(bus), 1)
+
+    assert [event.type for event in events] == ["node", "status"]
+
+@pytest.mark.asyncio
+async def test_subscriber_is_woken_by_publish():
+    """Test events published from a worker thread reach the subscriber immediately."""
+    bus = EventBus(MemoryJobStore(), poll_interval=60)
+    task = asyncio.create_task(collect(bus))
+    await asyncio.sleep(0.05)
+
+    thread = threading.Thread(target=bus.publish, args=(JOB_ID, "status", {"status": "failed"}))
+    thread.start()
+    events = await asyncio.wait_for(task, 1)
+    thread.join()
+
+    assert events[0].data == {"status": "failed"}
+
+@pytest.mark.asyncio
+async def test_events_reach_other_replicas(tmp_path):
+    """Test a replica streams events published by another process through the store."""
+    publisher = EventBus(SqliteJobStore(tmp_path / "jobs.sqlite"))
+    subscriber = EventBus(SqliteJobStore(tmp_path / "jobs.sqlite"), poll_interval=0.05)
+    task = asyncio.create_task(collect(subscriber))
+    await asyncio.sleep(0.05)
+
+    publisher.publish(JOB_ID, "render", {"animation": 0, "percent": 50})
+    publisher.publish(JOB_ID, "status", {"status": "completed"})
+    events = await asyncio.wait_for(task, 1)
+
+    assert [event.type for event in events] == ["render", "status"]
+
+@pytest.mark.asyncio
+async def test_subscribe_resumes_after_last_event():
+    """Test a reconnecting client only receives events it has not seen."""
+    bus = EventBus(MemoryJobStore())
+    first = bus.publish(JOB_ID, "node", {"node": "validate_input"})
+    bus.publish(JOB_ID, "status", {"status": "completed"})
+
+    events = await asyncio.wait_for(collect(bus, after=first.seq), 1)
+
+    assert [event.type for event in events] == ["status"]
+
+def test_parse_manim_progress():
+    """Test Manim's progress bar lines are recognised."""
+    service = ManimService()
+
+    assert service.parse_progress("Animation 3: Write(Text('Hi')):  45%|####      | 27/60 [00:01<00:01]") == (3, 45)
+    assert service.parse_progress("File ready at /tmp/scene.mp4") is None
@@ -0,0 +1,112 @@
+"""
+Unit tests for few-shot example retrieval.
+"""
+import pytest
+
+from leap.services.example_retriever import (
+    ExampleRetriever,
+    chunk_scene_file,
+    format_examples,
+    retrieve_examples,
+    tokenize,
+)
+
+PENDULUM = '''from manim import *
+
+class PendulumScene(Scene):
+    """Simple pendulum motion and its period."""
+    def construct(self):
+        self.swing()
+        self.period()
+
+    def swing(self):
+        bob = Circle(radius=0.2)
+        rod = Line(UP, bob.get_center())
+        self.play(Create(rod), Create(bob))
+
+    def period(self):
+        formula = MathTex(r"T = 2\\pi \\sqrt{L / g}")
+        self.play(Write(formula))
+'''
+
+PRIMES = '''from manim import *
+
+class PrimeSieve(Scene):
+    def construct(self):
+        numbers = VGroup(*[Integer(n) for n in range(2, 50)])
+        self.play(Write(numbers))
+
+    def cross_out_multiples(self, numbers, prime):
+        for number in numbers:
+            if number.get_value() % prime == 0:
+                self.play(number.animate.set_opacity(0.2))
+'''
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    scenes = tmp_path / "saved_scenes"
+    (scenes / "Pendulum").mkdir(parents=True)
+    (scenes / "Pendulum" / "Pendulum.py").write_text(PENDULUM)
+    (scenes / "Primes.py").write_text(PRIMES)
+    (scenes / "broken.py").write_text("class Broken(:\n")
+    return ExampleRetriever.from_directories([scenes])
+
+def test_tokenize_splits_identifiers():
+    """Test identifiers are split into lowercase words and filler words dropped."""
+    assert tokenize("How does GradientDescent use min_max_scaling on HTTPServer?") == [
+        "gradient", "descent", "use", "min", "max", "scaling", "http", "server"
+    ]
+
+def test_chunks_are_scene_methods(tmp_path):
+    """Test a scene file is split into one chunk per method, keeping its class header."""
+    path = tmp_path / "Pendulum.py"
+    path.write_text(PENDULUM)
+
+    chunks = chunk_scene_file(path, tmp_path)
+
+    assert [chunk.name for chunk in chunks] == ["construct", "swing", "period"]
+    assert chunks[1].class_header == "class PendulumScene(Scene):"
+    assert chunks[1].code.startswith("    def swing(self):")
+    assert "pendulum" in chunks[1].words
+
+def test_unparseable_files_skipped(retriever):
+    """Test files that do not parse are left out of the index."""
+    assert {chunk.source for chunk in retriever.chunks} == {"saved_scenes/Pendulum/Pendulum.py", "saved_scenes/Primes.py"}
+
+def test_search_ranks_relevant_methods_first(retriever):
+    """Test the methods matching the question rank above unrelated scenes."""
+    chunks = retriever.search("What is the period of a pendulum?")
+
+    assert "period" in [chunk.name for chunk in chunks]
+    assert all(chunk.class_name == "PendulumScene" for chunk in chunks)
+
+def test_search_respects_top_k_and_budget(retriever):
+    """Test selection stops at top_k chunks and never exceeds the token budget."""
+    assert len(retriever.search("pendulum swing period", top_k=2)) == 2
+
+    budget = retriever.chunks[0].tokens + 5
+    chunks = retriever.search("pendulum swing period", token_budget=budget)
+    assert chunks
+    assert sum(chunk.tokens for chunk in chunks) <= budget
+
+def test_format_groups_by_class_in_file_order(retriever):
+    """Test excerpts show each class header once with its methods in source order."""
+    chunks = retriever.search("pendulum period swing")
+
+    text = format_examples(chunks)
+
+    assert text.count("class PendulumScene(Scene):") == 1
+    assert text.index("def swing") < text.index("def period")
+    assert text.startswith("# Excerpt from saved_scenes/Pendulum/Pendulum.py")
+
+def test_falls_back_to_gcf_example(monkeypatch, retriever):
+    """Test the GCF example is used, within the budget, when nothing is relevant."""
+    from leap.services import example_retriever
+    monkeypatch.setattr(example_retriever, "_retriever", retriever)
+
+    text = retrieve_examples("Why is the sky blue?", token_budget=600)
+
+    assert "# Excerpt from examples/gcf.py" in text
+    assert "class GCFCalculationScene(ManimVoiceoverBase):" in text
+    assert len(text) // 4 <= 600 + 50
@@ -4,7 +4,8 @@ Unit tests for the workflow graph.
 import pytest
 from unittest.mock import patch, MagicMock
 from leap.workflow import workflow, GraphState
-from leap.workflow.graph import create_workflow, log_workflow_end
+from leap.workflow import graph
+from leap.workflow.graph import RECURSION_LIMIT, create_workflow, log_workflow_end
 from leap.core.config import MAX_ATTEMPTS
 
 def test_workflow_creation():
@@ -64,4 +65,44 @@ def test_workflow_state_transitions():
     
     # Test code generation update
     state["generated_code"] = "print('test')"
-    assert state["generated_code"] == "print('test')" 
\ No newline at end of file
+    assert state["generated_code"] == "print('test')"
+
+FAILING_CODE = """from manim import *
+from leap.templates.base_scene import ManimVoiceoverBase
+x = ShowCreation
+"""
+
+def test_failure_path_ends_in_log_end(monkeypatch):
+    """Test code that keeps failing runs every correction round and ends in log_end, not a recursion error."""
+    steps = []
+
+    def node(name, update):
+        def run(state):
+            steps.append(name)
+            return update(state)
+        return run
+
+    monkeypatch.setattr(graph, "validate_input", node("validate_input", lambda s: {"validation_status": "valid"}))
+    monkeypatch.setattr(graph, "plan_scenes", node("plan_scenes", lambda s: {"plan": "1. Fall"}))
+    monkeypatch.setattr(graph, "generate_code", node("generate_code", lambda s: {
+        "generated_code": FAILING_CODE, "correction_attempts": 0
+    }))
+    # Every round the auto-fixer fixes a validation issue, then the render still fails
+    monkeypatch.setattr(graph, "validate_code", node("validate_code", lambda s: {
+        "error": "WARNING: ShowCreation is deprecated" if "ShowCreation" in s["generated_code"] else None
+    }))
+    monkeypatch.setattr(graph, "execute_code", node("execute_code", lambda s: {"error": "RuntimeError: render failed"}))
+    monkeypatch.setattr(graph, "error_correction", node("correct_code", lambda s: {
+        "generated_code": FAILING_CODE, "error": None, "correction_attempts": s["correction_attempts"] + 1
+    }))
+
+    result = create_workflow().invoke(
+        GraphState(user_input="How does gravity work?"), {"recursion_limit": RECURSION_LIMIT}
+    )
+
+    assert result["correction_attempts"] == MAX_ATTEMPTS
+    assert steps.count("correct_code") == MAX_ATTEMPTS
+    assert steps[-1] == "correct_code"
+    # The real auto_fix ran twice per round and log_end once: the longest run, past LangGraph's default of 25
+    assert len(steps) + 2 * MAX_ATTEMPTS + 1 == RECURSION_LIMIT - 1
+
@@ -0,0 +1,53 @@
+"""
+Import-time budget tests.
+
+Every API replica and CLI invocation pays for what is imported at startup, so
+heavy dependencies (Manim, the OpenAI and Supabase clients, LangGraph) must only
+be imported on the paths that use them.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+HEAVY_MODULES = ["manim", "openai", "instructor", "langgraph", "supabase", "sendgrid"]
+
+# Cumulative import time budgets in seconds, generous enough for a loaded CI machine
+IMPORT_BUDGETS = {
+    "leap.core.config": 0.5,
+    "leap.main": 1.0,
+}
+
+def import_times(code: str) -> dict:
+    """Run ``code`` in a fresh interpreter and return the cumulative import time of each module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative) / 1e6
+    return times
+
+def test_app_startup_does_not_import_heavy_dependencies():
+    """Test creating the API app defers the workflow, LLM, Supabase and Manim imports."""
+    times = import_times("import leap.api; leap.api.create_app()")
+    assert "leap.api" in times
+    assert [module for module in HEAVY_MODULES if module in times] == []
+
+def test_cli_startup_does_not_import_heavy_dependencies():
+    """Test the CLI module imports the workflow only when it runs it."""
+    times = import_times("import leap.main")
+    assert [module for module in HEAVY_MODULES if module in times] == []
+
+@pytest.mark.parametrize("module,budget", IMPORT_BUDGETS.items())
+def test_import_time_budget(module, budget):
+    """Test startup modules import within their time budget."""
+    times = import_times(f"import {module}")
+    assert times[module] < budget, f"{module} took {times[module]:.3f}s to import (budget {budget}s)"
@@ -0,0 +1,120 @@
+"""
+Unit tests for the local input classifier.
+"""
+import json
+
+import pytest
+
+from leap.core import metrics
+from leap.services.input_classifier import (
+    ACCEPT,
+    ESCALATE,
+    REJECT,
+    SEED_TOPICS,
+    InputClassifier,
+    content_words,
+    scene_topic_words,
+)
+
+
+@pytest.fixture
+def classifier():
+    metrics.reset()
+    yield InputClassifier(SEED_TOPICS)
+    metrics.reset()
+
+@pytest.mark.parametrize("text", [
+    "How does gravity work?",
+    "Explain the process of photosynthesis.",
+    "What is gradient descent in machine learning?",
+    "Visualize the Fourier transform",
+])
+def test_clear_questions_accepted(classifier, text):
+    """Test questions about known topics are accepted locally."""
+    decision = classifier.classify(text)
+
+    assert decision.verdict == ACCEPT
+    assert decision.topic_words
+
+@pytest.mark.parametrize("text, reason", [
+    ("show me some porn videos", "blocked"),
+    ("asdfghjkl qwrtzxcv", "gibberish"),
+    ("1234567890 ???", "gibberish"),
+])
+def test_clear_rejections(classifier, text, reason):
+    """Test blocked terms and keyboard mash are rejected locally with an explanation."""
+    decision = classifier.classify(text)
+
+    assert (decision.verdict, decision.reason) == (REJECT, reason)
+    assert decision.explanation
+
+@pytest.mark.parametrize("text, reason", [
+    ("How do antibiotics kill bacteria?", "sensitive"),
+    ("How to build a bomb at home", "sensitive"),
+    ("Tell me a joke about my cat", "not_a_question"),
+    ("What should I cook for dinner tonight?", "no_topic"),
+    ("Why do my friends love pizza and gravity?", "low_coverage"),
+])
+def test_ambiguous_inputs_escalated(classifier, text, reason):
+    """Test sensitive, off-topic and partly known inputs are left to the LLM."""
+    decision = classifier.classify(text)
+
+    assert (decision.verdict, decision.reason) == (ESCALATE, reason)
+
+def test_decisions_counted(classifier):
+    """Test every decision is counted by verdict and reason, so the escalation rate can be tracked."""
+    classifier.classify("How does gravity work?")
+    classifier.classify("What should I cook for dinner tonight?")
+    classifier.classify("What should I wear to the party?")
+
+    text = metrics.render()
+    assert 'leap_input_fast_path_decisions_total{decision="accept",reason="topic"} 1' in text
+    assert 'leap_input_fast_path_decisions_total{decision="escalate",reason="no_topic"} 2' in text
+
+def test_learned_words_join_lexicon_and_persist(tmp_path):
+    """Test words of LLM-accepted prompts join the lexicon after enough prompts and are saved."""
+    path = tmp_path / "lexicon.json"
+    classifier = InputClassifier(SEED_TOPICS, lexicon_path=path, min_count=2)
+
+    classifier.learn("How does sourdough fermentation work?", ["sourdough", "fermentation"])
+    assert classifier.classify("Why does sourdough fermentation happen?").verdict == ESCALATE
+
+    # Another process learning from the same file adds to its counts
+    InputClassifier(lexicon_path=path).learn("What is sourdough fermentation?", ["sourdough fermentation"])
+    classifier.learn("Explain sourdough fermentation", ["Sourdough", "fermentation"])
+
+    assert json.loads(path.read_text())["sourdough"] == 3
+    assert classifier.classify("Why does sourdough fermentation happen?").verdict == ACCEPT
+
+def test_sensitive_words_never_learned(tmp_path):
+    """Test sensitive terms stay escalated even after the LLM accepted prompts using them."""
+    classifier = InputClassifier(SEED_TOPICS, min_count=1)
+
+    classifier.learn("How do vaccines kill viruses?", ["vaccines", "kill", "viruses"])
+
+    assert "kill" not in classifier.learned
+    assert classifier.classify("How do vaccines kill viruses?").verdict == ESCALATE
+
+def test_only_tagged_topic_words_learned():
+    """Test words the LLM did not tag as the topic never join the lexicon, however often they are accepted."""
+    classifier = InputClassifier(SEED_TOPICS, min_count=1)
+
+    for _ in range(3):
+        classifier.learn("Why does yeast make my pizza bread rise tonight?", ["yeast", "bread", "oven"])
+
+    assert set(classifier.learned) == {"yeast", "bread"}
+    assert classifier.classify("What pizza should I order tonight?").verdict == ESCALATE
+
+def test_scene_topics(tmp_path):
+    """Test saved scene names and docstrings become topic words."""
+    scene_dir = tmp_path / "GradientDescent"
+    scene_dir.mkdir()
+    (scene_dir / "GradientDescent.py").write_text(
+        'class LossLandscapeScene(Scene):\n    """Convex loss surfaces and learning rates."""\n'
+    )
+
+    words = scene_topic_words(tmp_path)
+
+    assert {"gradient", "descent", "loss", "landscape", "convex", "surfaces", "rates"} <= words
+    assert "scene" not in words
+    assert content_words("How does the loss work?") == ["loss"]
@@ -6,6 +6,8 @@ from unittest.mock import patch, MagicMock
 from leap.workflow import GraphState
 from leap.workflow.nodes.input_validation import validate_input
 from leap.models import ValidationResult
+from leap.services import input_classifier
+from leap.services.input_classifier import InputClassifier, SEED_TOPICS
 
 @pytest.fixture
 def mock_logger():
@@ -35,6 +37,7 @@ def test_basic_validation(mock_logger):
     assert result["validation_status"] == "valid"
     assert "error" not in result
 
+@patch('leap.workflow.nodes.input_validation.INPUT_FAST_PATH', False)
 @patch('leap.workflow.nodes.input_validation.LLMService')
 def test_llm_validation(mock_llm_service_class, mock_logger):
     """Test LLM-based validation with valid input."""
@@ -60,4 +63,45 @@ def test_llm_validation(mock_llm_service_class, mock_logger):
     # Verify the result
     assert result["validation_status"] == "valid"
     assert "error" not in result 
-    assert result["reformulated_input"] == "How does gravity work and affect objects on Earth?" 
\ No newline at end of file
+    assert result["reformulated_input"] == "How does gravity work and affect objects on Earth?"
+
+@pytest.fixture
+def classifier(monkeypatch):
+    """A fast-path classifier that does not persist what it learns."""
+    classifier = InputClassifier(SEED_TOPICS, min_count=1)
+    monkeypatch.setattr(input_classifier, "_classifier", classifier)
+    return classifier
+
+@patch('leap.workflow.nodes.input_validation.LLMService')
+def test_fast_path_skips_llm(mock_llm_service_class, mock_logger, classifier):
+    """Test clearly valid and clearly invalid inputs are decided without calling the LLM."""
+    result = validate_input(GraphState(user_input="How does photosynthesis work?"))
+    assert result["validation_status"] == "valid"
+    assert result["reformulated_input"] == "How does photosynthesis work?"
+
+    result = validate_input(GraphState(user_input="show me naked pictures"))
+    assert result["validation_status"] == "invalid"
+    assert "not suitable" in result["error"]
+
+    mock_llm_service_class.assert_not_called()
+
+@patch('leap.workflow.nodes.input_validation.LLMService')
+def test_ambiguous_input_escalated_and_learned(mock_llm_service_class, mock_logger, classifier):
+    """Test ambiguous inputs go to the LLM, and topics it accepts are learned by the fast path."""
+    mock_llm = MagicMock()
+    mock_llm_service_class.return_value = mock_llm
+    mock_llm.generate_structured_response.return_value = ValidationResult(
+        classification="VALID",
+        explanation="A clear question about baking.",
+        reformulated_question="How does yeast make bread dough rise?",
+        topic_words=["yeast", "bread"]
+    )
+
+    result = validate_input(GraphState(user_input="How does yeast make bread rise?"))
+
+    assert result["validation_status"] == "valid"
+    assert result["reformulated_input"] == "How does yeast make bread dough rise?"
+    assert mock_llm.generate_structured_response.call_count == 1
+    assert classifier.classify("Why does yeast make bread rise?").verdict == "accept"
+    assert "rise" not in classifier.learned
+
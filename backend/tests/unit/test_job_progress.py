@@ -0,0 +1,144 @@
+"""
+Unit tests for the job progress model.
+"""
+import uuid
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from leap.services.event_bus import EventBus
+from leap.services.job_progress import (
+    JobProgress,
+    ProgressTracker,
+    record_prompt_tokens,
+    render_progress_reporter,
+    tracking,
+)
+from leap.services.job_store import Job, MemoryJobStore
+from leap.services.manim_service import ManimService
+
+ESTIMATES = {
+    "validate_input": 1,
+    "plan_scenes": 10,
+    "generate_code": 20,
+    "validate_code": 1,
+    "auto_fix": 1,
+    "correct_code": 20,
+    "execute_code": 60,
+}
+
+@pytest.fixture(autouse=True)
+def fixed_estimates():
+    """Keep learned node durations from leaking between tests."""
+    with patch.dict("leap.services.job_progress._estimates", ESTIMATES, clear=True):
+        yield
+
+@pytest.fixture
+def tracker():
+    """Tracker for a fresh job backed by in-memory storage."""
+    store = MemoryJobStore()
+    job = Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status="processing")
+    store.save(job)
+    return ProgressTracker(job, store, EventBus(store))
+
+def test_eta_counts_remaining_nodes():
+    """Test the ETA adds up the nodes still to run."""
+    progress = JobProgress(started_at=100.0, stage="plan_scenes", stage_started_at=100.0)
+
+    # 6s left of planning, then generation, validation and rendering
+    assert progress.eta_seconds(now=104.0) == 6 + 20 + 1 + 60
+
+def test_eta_extrapolates_render_progress():
+    """Test the render ETA follows the observed render speed."""
+    progress = JobProgress(
+        started_at=0.0,
+        stage="execute_code",
+        stage_started_at=100.0,
+        animation=1,
+        animations_total=4,
+        render_percent=0
+    )
+
+    # A quarter of the render took 30s, so three quarters remain
+    assert progress.eta_seconds(now=130.0) == 90.0
+
+def test_eta_after_correction_includes_rerender():
+    """Test a correction round adds validation and another render."""
+    progress = JobProgress(started_at=0.0, stage="correct_code", stage_started_at=0.0, attempt=1)
+
+    assert progress.eta_seconds(now=5.0) == 15 + 1 + 60
+
+def test_tracker_records_timings_and_attempts(tracker):
+    """Test node hooks record timings and the correction attempt with the job."""
+    tracker.node_started("generate_code", {"correction_attempts": 0})
+    tracker.node_finished("generate_code")
+    tracker.node_started("correct_code", {"correction_attempts": 2})
+
+    stored = tracker.store.get(tracker.job.id).progress
+    assert "generate_code" in stored["timings"]
+    assert stored["stage"] == "correct_code"
+    assert stored["attempt"] == 2
+    assert stored["eta_seconds"] > 0
+
+    events = tracker.store.events_since(tracker.job.id)
+    assert [(event.data["node"], event.data["phase"]) for event in events] == [
+        ("generate_code", "start"), ("generate_code", "end"), ("correct_code", "start")
+    ]
+    assert events[-1].data["progress"]["attempt"] == 2
+
+def test_render_progress_goes_to_active_tracker(tracker):
+    """Test render progress is throttled and recorded by the job's tracker."""
+    tracker.node_started("execute_code")
+    report = render_progress_reporter(tracker.job.id, total=3, step=10)
+    with tracking(tracker):
+        for percent in (0, 3, 9, 10, 55, 56, 99, 100, 100):
+            report(0, percent)
+        report(1, 0)
+
+    renders = [event.data for event in tracker.store.events_since(tracker.job.id) if event.type == "render"]
+    assert [(data["animation"], data["percent"]) for data in renders] == [
+        (0, 0), (0, 10), (0, 55), (0, 99), (0, 100), (1, 0)
+    ]
+    progress = tracker.store.get(tracker.job.id).progress
+    assert progress["animation"] == 1
+    assert progress["animations_total"] == 3
+
+def test_count_animations():
+    """Test play and wait calls are counted as animations."""
+    code = """
+class Demo(Scene):
+    def construct(self):
+        self.play(Create(Circle()))
+        self.wait(1)
+        self.play(FadeOut(Circle()))
+"""
+    assert ManimService().count_animations(code) == 3
+
+def test_prompt_tokens_saved_with_node(tracker):
+    """Test a node's prompt size is saved with the job when the node finishes."""
+    with tracking(tracker):
+        tracker.node_started("generate_code")
+        record_prompt_tokens(tracker.job.id, "generate_code", {"plan": 400, "example_code": 1800, "total": 3100})
+        tracker.node_finished("generate_code")
+
+    saved = tracker.store.get(tracker.job.id).progress
+    assert saved["prompt_tokens"] == {"generate_code": {"plan": 400, "example_code": 1800, "total": 3100}}
+    assert JobProgress.from_dict(saved).prompt_tokens == saved["prompt_tokens"]
+
+
+def test_progress_update_keeps_status_set_by_another_process(tmp_path):
+    """Test a progress update does not bring a job cancelled elsewhere back to processing."""
+    from leap.services.job_store import SqliteJobStore
+
+    worker_store, api_store = SqliteJobStore(tmp_path / "jobs.sqlite"), SqliteJobStore(tmp_path / "jobs.sqlite")
+    job = Job(id=uuid.uuid4(), created_at=datetime.utcnow(), status="processing")
+    worker_store.save(job)
+    tracker = ProgressTracker(job, worker_store, EventBus(worker_store))
+
+    cancelled = api_store.get(job.id)
+    cancelled.status = "cancelled"
+    api_store.save(cancelled)
+    tracker.node_started("generate_code")
+
+    saved = api_store.get(job.id)
+    assert saved.status == "cancelled"
+    assert saved.progress["stage"] == "generate_code"
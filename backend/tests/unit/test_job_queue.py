@@ -0,0 +1,131 @@
+"""
+Unit tests for the durable job queue and render worker.
+"""
+import time
+import pytest
+from unittest.mock import MagicMock
+from leap.services.job_queue import JobQueue, QUEUED, LEASED, DONE, DEAD
+from leap.services.scheduling import INTERACTIVE, OFFLINE, SchedulingPolicy
+from leap.worker import process_item
+
+JOB_ID = "00000000-0000-0000-0000-000000000001"
+PAYLOAD = {"prompt": "How does gravity work?", "level": "normal", "email": None}
+
+@pytest.fixture
+def queue(tmp_path):
+    """Job queue in a scratch database with no retry delay."""
+    return JobQueue(tmp_path / "queue.sqlite", visibility_timeout=60, max_attempts=2, retry_backoff=0)
+
+def test_lease_and_ack(queue):
+    """Test a leased job is hidden from other workers until acknowledged."""
+    queue.enqueue(JOB_ID, PAYLOAD)
+
+    item = queue.lease("worker-a")
+    assert item.job_id == JOB_ID
+    assert item.payload == PAYLOAD
+    assert item.attempts == 1
+    assert queue.lease("worker-b") is None
+
+    queue.ack(item)
+    assert queue.get(JOB_ID).status == DONE
+    assert queue.depth() == 0
+
+def test_enqueue_is_idempotent(queue):
+    """Test enqueueing the same job twice keeps a single entry."""
+    queue.enqueue(JOB_ID, PAYLOAD)
+    queue.enqueue(JOB_ID, PAYLOAD)
+
+    assert queue.counts() == {QUEUED: 1}
+
+def test_expired_lease_is_retried(tmp_path):
+    """Test a job held by a dead worker becomes visible again."""
+    queue = JobQueue(tmp_path / "queue.sqlite", visibility_timeout=0.05, max_attempts=3)
+    queue.enqueue(JOB_ID, PAYLOAD)
+    queue.lease("worker-a")
+
+    time.sleep(0.1)
+    item = queue.lease("worker-b")
+
+    assert item.worker == "worker-b"
+    assert item.attempts == 2
+
+def test_nack_retries_then_dead_letters(queue):
+    """Test failed jobs are retried until they run out of attempts."""
+    queue.enqueue(JOB_ID, PAYLOAD)
+
+    assert queue.nack(queue.lease("worker-a"), "render crashed") == QUEUED
+    assert queue.nack(queue.lease("worker-a"), "render crashed") == DEAD
+
+    assert queue.lease("worker-a") is None
+    dead = queue.dead_letters()
+    assert [item.job_id for item in dead] == [JOB_ID]
+    assert dead[0].last_error == "render crashed"
+
+def test_extend_fails_after_lease_is_lost(tmp_path):
+    """Test a worker notices when another worker took over its job."""
+    queue = JobQueue(tmp_path / "queue.sqlite", visibility_timeout=0.05)
+    queue.enqueue(JOB_ID, PAYLOAD)
+    first = queue.lease("worker-a")
+    time.sleep(0.1)
+    second = queue.lease("worker-b")
+
+    assert not queue.extend(first)
+    assert queue.extend(second)
+    assert queue.get(JOB_ID).status == LEASED
+
+def job_id(n):
+    return f"00000000-0000-0000-0000-{n:012d}"
+
+def test_interactive_jobs_go_ahead_of_offline_jobs(queue):
+    """Test an interactive job is leased before offline jobs that arrived earlier."""
+    queue.enqueue(job_id(1), PAYLOAD, priority_class=OFFLINE)
+    queue.enqueue(job_id(2), PAYLOAD, priority_class=OFFLINE)
+    queue.enqueue(job_id(3), PAYLOAD, priority_class=INTERACTIVE)
+
+    assert [queue.lease("worker").job_id for _ in range(3)] == [job_id(3), job_id(1), job_id(2)]
+
+def test_tenants_share_render_slots(queue):
+    """Test a tenant with a job running yields to other tenants."""
+    for n in range(1, 4):
+        queue.enqueue(job_id(n), PAYLOAD, tenant="ip:10.0.0.1")
+    queue.enqueue(job_id(4), PAYLOAD, tenant="ip:10.0.0.2")
+
+    first = queue.lease("worker-a")
+    second = queue.lease("worker-b")
+
+    assert first.job_id == job_id(1)
+    assert second.job_id == job_id(4)
+    assert second.tenant == "ip:10.0.0.2"
+
+def test_waiting_jobs_age_past_new_priority_jobs(tmp_path):
+    """Test an offline job that waited long enough beats a fresh interactive job."""
+    policy = SchedulingPolicy(class_boost={INTERACTIVE: 0.05, OFFLINE: 0}, aging_rate=1)
+    queue = JobQueue(tmp_path / "queue.sqlite", policy=policy)
+    queue.enqueue(job_id(1), PAYLOAD, priority_class=OFFLINE)
+    time.sleep(0.1)
+    queue.enqueue(job_id(2), PAYLOAD, priority_class=INTERACTIVE)
+
+    assert queue.lease("worker").job_id == job_id(1)
+
+def test_worker_acks_processed_job(queue):
+    """Test the worker runs the job and acknowledges it."""
+    service = MagicMock()
+    queue.enqueue(JOB_ID, PAYLOAD)
+
+    process_item(service, queue, queue.lease("worker-a"))
+
+    service.run_job.assert_called_once()
+    assert service.run_job.call_args.kwargs["prompt"] == PAYLOAD["prompt"]
+    assert queue.get(JOB_ID).status == DONE
+
+def test_worker_nacks_failed_job(queue):
+    """Test an unexpected worker error returns the job to the queue."""
+    service = MagicMock()
+    service.run_job.side_effect = RuntimeError("out of memory")
+    queue.enqueue(JOB_ID, PAYLOAD)
+
+    process_item(service, queue, queue.lease("worker-a"))
+
+    entry = queue.get(JOB_ID)
+    assert entry.status == QUEUED
+    assert entry.last_error == "out of memory"
@@ -0,0 +1,68 @@
+"""
+Unit tests for the shared job-state store.
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from leap.services.job_store import Job, MemoryJobStore, SqliteJobStore
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Each job store backend that runs without external services."""
+    if request.param == "memory":
+        return MemoryJobStore()
+    return SqliteJobStore(tmp_path / "jobs.sqlite")
+
+def make_job(status="pending", offset=0):
+    return Job(
+        id=uuid.uuid4(),
+        created_at=datetime(2025, 1, 1) + timedelta(seconds=offset),
+        status=status
+    )
+
+def test_save_and_get(store):
+    """Test a saved job is returned by ID."""
+    job = make_job()
+    store.save(job)
+
+    assert store.get(job.id) == job
+    assert store.get(str(job.id)) == job
+    assert store.get(uuid.uuid4()) is None
+
+def test_update_replaces_job(store):
+    """Test saving an existing job updates every field."""
+    job = make_job()
+    store.save(job)
+
+    job.status = "completed"
+    job.video_url = "http://localhost:8000/videos/demo.mp4"
+    job.completed_at = datetime(2025, 1, 1, 0, 5)
+    store.save(job)
+
+    stored = store.get(job.id)
+    assert stored.status == "completed"
+    assert stored.video_url == job.video_url
+    assert stored.completed_at == job.completed_at
+
+def test_list_by_status(store):
+    """Test jobs are listed by status, newest first."""
+    older = make_job("processing", offset=0)
+    newer = make_job("processing", offset=10)
+    done = make_job("completed")
+    for job in (older, newer, done):
+        store.save(job)
+
+    assert [job.id for job in store.list_by_status("processing")] == [newer.id, older.id]
+    assert [job.id for job in store.list_by_status("completed")] == [done.id]
+
+def test_sqlite_store_is_shared_between_processes(tmp_path):
+    """Test a status written by one replica is seen by another."""
+    worker = SqliteJobStore(tmp_path / "jobs.sqlite")
+    replica = SqliteJobStore(tmp_path / "jobs.sqlite")
+    job = make_job()
+    worker.save(job)
+
+    job.status = "completed"
+    worker.save(job)
+
+    assert replica.get(job.id).status == "completed"
@@ -1,10 +1,13 @@
 """
 Unit tests for the logging module.
 """
+import gc
 import pytest
 import logging
+from logging.handlers import QueueHandler
 from pathlib import Path
-from leap.core.logging import setup_question_logger, _loggers
+from leap.core import logging as question_logging
+from leap.core.logging import setup_question_logger, flush_question_logs, question_log_file, _loggers, _file_handlers
 from leap.core.config import LOGS_DIR
 from pythonjsonlogger.json import JsonFormatter
 
@@ -19,13 +22,17 @@ def cleanup_loggers():
     # Store original loggers
     original_loggers = logging.Logger.manager.loggerDict.copy()
     original_cache = _loggers.copy()
+    original_files = _file_handlers.copy()
     
     yield
     
     # Restore original loggers
+    flush_question_logs()
     logging.Logger.manager.loggerDict = original_loggers
     _loggers.clear()
     _loggers.update(original_cache)
+    _file_handlers.clear()
+    _file_handlers.update(original_files)
 
 def test_setup_question_logger_basic(test_question):
     """Test basic logger setup functionality."""
@@ -35,15 +42,13 @@ def test_setup_question_logger_basic(test_question):
     assert isinstance(logger, logging.Logger)
     assert logger.name.startswith("question_")
     
-    # Check handlers
-    assert len(logger.handlers) == 2  # File and console handlers
-    
-    # Check file handler
-    file_handlers = [h for h in logger.handlers if isinstance(h, logging.FileHandler)]
-    assert len(file_handlers) == 1
+    # Records are handed to the background listener instead of written inline
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], QueueHandler)
+    assert not logger.propagate
     
     # Check log file location
-    log_file_path = Path(file_handlers[0].baseFilename)
+    log_file_path = question_log_file(logger)
     assert log_file_path.parent == LOGS_DIR
     assert "how_does_gravity_work" in log_file_path.name
 
@@ -53,12 +58,56 @@ def test_logger_caching(test_question):
     logger2 = setup_question_logger(test_question)
     
     assert logger1 is logger2
-    assert len(logger1.handlers) == len(logger2.handlers) == 2
+    assert len(logger1.handlers) == len(logger2.handlers) == 1
 
 def test_json_formatting(test_question):
-    """Test that loggers use JSON formatting."""
+    """Test that log files are written as JSON by the listener."""
     logger = setup_question_logger(test_question)
+    logger.info("Starting workflow")
+    assert flush_question_logs()
+    
+    assert isinstance(_file_handlers[logger.name].formatter, JsonFormatter)
+    assert '"message": "Starting workflow"' in question_log_file(logger).read_text()
+
+def test_evicted_loggers_close_their_files(monkeypatch):
+    """Test the logger cache is bounded and evicted questions release their file."""
+    monkeypatch.setattr(question_logging, "QUESTION_LOGGER_CACHE_SIZE", 2)
+    _loggers.clear()
+    first = setup_question_logger("What is a derivative?")
+    first.info("first question")
+    handler = _file_handlers[first.name]
+    name = first.name
+    setup_question_logger("What is an integral?")
+    setup_question_logger("What is a limit?")
+    assert flush_question_logs()
+    
+    assert handler.stream is None  # closed
+    assert "first question" in Path(handler.baseFilename).read_text()
+    assert len(_loggers) == 2
+    
+    del first
+    gc.collect()
+    assert flush_question_logs()
+    assert name not in _file_handlers
+
+def test_evicted_logger_of_running_job_keeps_logging(monkeypatch):
+    """Test a logger evicted while its job still runs keeps writing to its file."""
+    monkeypatch.setattr(question_logging, "QUESTION_LOGGER_CACHE_SIZE", 1)
+    _loggers.clear()
+    running = setup_question_logger("What is a derivative?")
+    running.info("before eviction")
+    log_file = question_log_file(running)
+    setup_question_logger("What is an integral?")
+    assert flush_question_logs()
+    
+    # The job still holds the evicted logger and logs through it
+    running.info("after eviction")
+    # Its next node sets the question up again and gets the same logger
+    assert setup_question_logger("What is a derivative?") is running
+    running.info("next node")
+    assert flush_question_logs()
     
-    # Check that handlers use JsonFormatter
-    for handler in logger.handlers:
-        assert isinstance(handler.formatter, JsonFormatter) 
\ No newline at end of file
+    assert question_log_file(running) == log_file
+    contents = log_file.read_text()
+    for message in ("before eviction", "after eviction", "next node"):
+        assert f'"message": "{message}"' in contents
@@ -0,0 +1,170 @@
+"""
+Unit tests for the Manim API signature index and call checker.
+"""
+import json
+import sys
+import types
+
+import pytest
+
+from leap.services import manim_api_service
+from leap.services.manim_api_service import ManimAPIService, build_signature_index
+from leap.workflow.nodes.validation import ManimAPIRule, collect_code_issues
+
+
+class Mobject:
+    def __init__(self, color=None, name=None):
+        self.color = color
+
+    def __getattr__(self, attr):
+        raise AttributeError(attr)
+
+    def shift(self, *vectors):
+        return self
+
+    def set_color(self, color=None, family=True):
+        return self
+
+    @property
+    def animate(self):
+        return self
+
+
+class VMobject(Mobject):
+    def __init__(self, fill_opacity=0.0, stroke_width=4, **kwargs):
+        super().__init__(**kwargs)
+
+
+class Circle(VMobject):
+    def __init__(self, radius=1.0, **kwargs):
+        super().__init__(**kwargs)
+
+
+class Text(VMobject):
+    def __init__(self, text, font_size=48, **kwargs):
+        super().__init__(fill_opacity=1.0)
+        self.options = kwargs
+
+
+def always_redraw(func):
+    return func
+
+
+def _module():
+    module = types.ModuleType("manim")
+    for obj in (Mobject, VMobject, Circle, Text, always_redraw):
+        setattr(module, obj.__name__, obj)
+    module.UP = (0, 1, 0)
+    return module
+
+
+HEADER = "from manim import *\n\n"
+
+
+@pytest.fixture
+def service():
+    return ManimAPIService(index=build_signature_index(_module(), "test"))
+
+
+def test_index_follows_kwargs_to_super():
+    """Test **kwargs handed to super().__init__ accept what the parent accepts."""
+    index = build_signature_index(_module(), "test")
+
+    circle = index["classes"]["Circle"]["init"]
+    assert not circle["open"]
+    assert {"radius", "fill_opacity", "stroke_width", "color", "name"} <= set(circle["params"])
+    # Text keeps its **kwargs, so any keyword is accepted
+    assert index["classes"]["Text"]["init"]["open"]
+    assert index["classes"]["Circle"]["methods"]["set_color"] == {"params": ["color", "family"], "open": False}
+    assert "always_redraw" in index["functions"]
+    assert "UP" in index["names"]
+
+def test_unexpected_keyword_reported(service):
+    """Test an unknown constructor keyword is reported at its line with a suggestion."""
+    code = HEADER + "c = Circle(radius=2, colour='red')\n"
+
+    issues = service.check_code(code)
+
+    assert len(issues) == 1
+    assert issues[0].message == "Circle() got an unexpected keyword argument 'colour'"
+    assert issues[0].line_number == 3
+    assert "'color'" in issues[0].suggestion
+
+def test_open_signatures_and_call_site_kwargs_not_checked(service):
+    """Test open signatures and **options at the call site are left alone."""
+    code = HEADER + "t = Text('Hi', anything=1)\nc = Circle(**options)\n"
+
+    assert service.check_code(code) == []
+
+def test_unknown_class_reported(service):
+    """Test names Manim does not export are reported when Manim is star-imported."""
+    code = HEADER + "class Dot:\n    pass\n\nc = Cirlce()\nd = Dot()\nn = ValueError()\n"
+
+    issues = service.check_code(code)
+
+    assert [(issue.message, issue.line_number) for issue in issues] == [("Cirlce is not defined in Manim", 6)]
+    assert "'Circle'" in issues[0].suggestion
+
+def test_unknown_method_reported(service):
+    """Test methods are checked on variables holding a Manim object, including .animate."""
+    code = HEADER + """def construct(self):
+    c = Circle()
+    c.shfit(UP)
+    self.play(c.animate.set_color(colr='red'))
+    c.set_radius(2)
+"""
+
+    issues = service.check_code(code)
+
+    assert [(issue.message, issue.line_number) for issue in issues] == [
+        ("'Circle' object has no attribute 'shfit'", 5),
+        ("Circle.set_color() got an unexpected keyword argument 'colr'", 6),
+    ]
+
+def test_reassigned_variables_not_checked(service):
+    """Test a variable is only typed while it still holds the constructed object."""
+    code = HEADER + """def construct(self):
+    c = Circle()
+    c = make_shape()
+    c.shfit(UP)
+    for c in shapes:
+        c.shfit(UP)
+
+def other(self):
+    c.shfit(UP)
+"""
+
+    assert service.check_code(code) == []
+
+def test_index_persisted_per_version(tmp_path, monkeypatch):
+    """Test the index is built once per Manim version and then loaded from disk."""
+    monkeypatch.setattr(manim_api_service, "manim_version", lambda: "0.0.test")
+    monkeypatch.setitem(sys.modules, "manim", _module())
+
+    built = ManimAPIService(index_dir=tmp_path).index
+
+    path = tmp_path / "manim-0.0.test.json"
+    assert path.exists()
+    assert json.loads(path.read_text())["classes"]["Circle"] == built["classes"]["Circle"]
+
+    # A later process loads the file without importing Manim
+    monkeypatch.setitem(sys.modules, "manim", None)
+    loaded = ManimAPIService(index_dir=tmp_path).index
+    assert loaded == json.loads(path.read_text())
+
+def test_no_index_without_manim(tmp_path, monkeypatch):
+    """Test the checks are skipped when Manim is not installed."""
+    monkeypatch.setattr(manim_api_service, "manim_version", lambda: None)
+
+    service = ManimAPIService(index_dir=tmp_path)
+
+    assert service.index is None
+    assert service.check_code(HEADER + "c = Cirlce()\n") == []
+
+def test_validation_rule_uses_index(service, monkeypatch):
+    """Test the validator reports API issues through the Manim API rule."""
+    monkeypatch.setattr(manim_api_service, "_service", service)
+
+    issues = collect_code_issues(HEADER + "c = Circle(colour='red')\n", rules=[ManimAPIRule])
+
+    assert [issue.line_number for issue in issues] == [3]
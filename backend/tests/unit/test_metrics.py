@@ -0,0 +1,93 @@
+"""
+Unit tests for the Prometheus metrics registry.
+"""
+import pytest
+from leap.core import metrics
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_histogram_exposition():
+    """Test histograms are rendered with cumulative buckets, sum and count."""
+    metrics.NODE_DURATION.observe(0.3, node="plan_scenes")
+    metrics.NODE_DURATION.observe(7, node="plan_scenes")
+
+    text = metrics.render()
+
+    assert "# TYPE leap_node_duration_seconds histogram" in text
+    assert 'leap_node_duration_seconds_bucket{node="plan_scenes",le="0.1"} 0' in text
+    assert 'leap_node_duration_seconds_bucket{node="plan_scenes",le="0.5"} 1' in text
+    assert 'leap_node_duration_seconds_bucket{node="plan_scenes",le="+Inf"} 2' in text
+    assert 'leap_node_duration_seconds_sum{node="plan_scenes"} 7.3' in text
+    assert 'leap_node_duration_seconds_count{node="plan_scenes"} 2' in text
+
+def test_llm_calls_are_labelled_with_their_node():
+    """Test LLM latency and tokens are attributed to the workflow node making the call."""
+    class Usage:
+        prompt_tokens = 120
+        completion_tokens = 30
+
+    class Completion:
+        usage = Usage()
+
+    def plan(state):
+        with metrics.observe_llm_call("o3-mini") as usage:
+            metrics.record_usage(usage, Completion())
+        return state
+
+    assert metrics.instrument_node("plan_scenes", plan)({"x": 1}) == {"x": 1}
+    assert metrics.current_node() == ""
+
+    text = metrics.render()
+    assert 'leap_llm_tokens_total{node="plan_scenes",model="o3-mini",kind="prompt"} 120' in text
+    assert 'leap_llm_tokens_total{node="plan_scenes",model="o3-mini",kind="completion"} 30' in text
+    assert 'leap_llm_request_duration_seconds_count{node="plan_scenes",model="o3-mini"} 1' in text
+    assert 'leap_node_duration_seconds_count{node="plan_scenes"} 1' in text
+
+def test_cached_prompt_tokens_recorded():
+    """Test prompt tokens read from the provider's cache are counted and their fraction observed."""
+    class Details:
+        cached_tokens = 1536
+
+    class Usage:
+        prompt_tokens = 2048
+        completion_tokens = 100
+        prompt_tokens_details = Details()
+
+    class Completion:
+        usage = Usage()
+
+    with metrics.observe_llm_call("o3-mini") as usage:
+        metrics.record_usage(usage, Completion())
+
+    text = metrics.render()
+    assert 'leap_llm_tokens_total{node="none",model="o3-mini",kind="cached"} 1536' in text
+    assert 'leap_llm_prompt_cached_ratio_bucket{node="none",model="o3-mini",le="0.5"} 0' in text
+    assert 'leap_llm_prompt_cached_ratio_bucket{node="none",model="o3-mini",le="0.75"} 1' in text
+    assert 'leap_llm_prompt_cached_ratio_sum{node="none",model="o3-mini"} 0.75' in text
+
+def test_collectors_refresh_before_scrape():
+    """Test collectors run on every scrape and a failing collector does not break it."""
+    depth = {"queued": 3}
+    metrics.register_collector("test_queue", lambda: metrics.QUEUE_JOBS.set(depth["queued"], status="queued"))
+    metrics.register_collector("test_broken", lambda: 1 / 0)
+    try:
+        assert 'leap_queue_jobs{status="queued"} 3' in metrics.render()
+        depth["queued"] = 1
+        assert 'leap_queue_jobs{status="queued"} 1' in metrics.render()
+    finally:
+        metrics._collectors.pop("test_queue")
+        metrics._collectors.pop("test_broken")
+
+def test_cache_hits_and_misses():
+    """Test cache lookups are counted by cache and result."""
+    metrics.record_cache("render", hit=True, count=2)
+    metrics.record_cache("render", hit=False)
+    metrics.record_cache("render", hit=False, count=0)
+
+    text = metrics.render()
+    assert 'leap_cache_requests_total{cache="render",result="hit"} 2' in text
+    assert 'leap_cache_requests_total{cache="render",result="miss"} 1' in text
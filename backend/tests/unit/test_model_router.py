@@ -0,0 +1,47 @@
+"""
+Unit tests for per-node model routing.
+"""
+import pytest
+
+from leap.core import metrics
+from leap.services import model_router
+from leap.services.model_router import select_model
+
+TIERS = {"fast": "small-model", "standard": "medium-model", "strong": "large-model"}
+
+
+@pytest.fixture(autouse=True)
+def routing(monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(model_router, "MODEL_TIERS", TIERS)
+    monkeypatch.setattr(model_router, "NODE_MODELS", {
+        "validate_input": "fast",
+        "generate_code": "standard",
+        "correct_code": "standard",
+        "plan_scenes": "custom-model",
+    })
+    monkeypatch.setattr(model_router, "ESCALATE_AFTER_FAILURES", 2)
+    yield
+    metrics.reset()
+
+def test_nodes_use_their_tier():
+    """Test each node gets its tier's model, an explicit model name, or the standard tier."""
+    assert select_model("validate_input") == "small-model"
+    assert select_model("generate_code") == "medium-model"
+    assert select_model("plan_scenes") == "custom-model"
+    assert select_model("unknown_node") == "medium-model"
+
+def test_corrections_escalate_after_repeated_failures():
+    """Test a node moves up one tier once it has failed often enough, and the escalation is counted."""
+    assert select_model("correct_code", failures=1) == "medium-model"
+    assert select_model("correct_code", failures=2) == "large-model"
+    assert select_model("correct_code", failures=4) == "large-model"
+    assert select_model("plan_scenes", failures=5) == "custom-model"
+
+    assert 'leap_model_escalations_total{node="correct_code",model="large-model"} 2' in metrics.render()
+
+def test_escalation_can_be_disabled(monkeypatch):
+    """Test no escalation happens when ESCALATE_AFTER_FAILURES is 0."""
+    monkeypatch.setattr(model_router, "ESCALATE_AFTER_FAILURES", 0)
+
+    assert select_model("correct_code", failures=10) == "medium-model"
@@ -67,6 +67,21 @@ def test_generate_code(base_state, mock_llm):
     assert result["user_input"] == base_state["user_input"]
     assert result["plan"] == base_state["plan"]
 
+def test_llm_outage_escapes_generate_code(base_state, mock_llm):
+    """Test an LLM outage is raised for the worker to retry instead of becoming a code error."""
+    import httpx
+    import openai
+
+    mock_llm.generate_structured_response.side_effect = openai.APIConnectionError(
+        request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    )
+
+    with pytest.raises(openai.APIConnectionError):
+        generate_code(base_state, llm_service=mock_llm)
+
+    mock_llm.generate_structured_response.side_effect = ValueError("unparseable response")
+    assert "Code generation failed" in generate_code(base_state, llm_service=mock_llm)["error"]
+
 def test_validate_code(base_state):
     """Test code validation with valid Manim code."""
     base_state["generated_code"] = """
@@ -0,0 +1,60 @@
+"""
+Unit tests for the post-render outbox.
+"""
+import threading
+import pytest
+from leap.services.outbox import DEAD, DONE, PENDING, Outbox, OutboxDispatcher
+
+@pytest.fixture
+def outbox(tmp_path):
+    """Outbox in a scratch database that retries immediately."""
+    return Outbox(tmp_path / "outbox.sqlite", max_attempts=3, retry_backoff=0)
+
+def test_idempotency_key_deduplicates(outbox):
+    """Test recording the same side effect twice delivers it once."""
+    assert outbox.add("email", "job-1:email:ready", {"email": "a@example.com"})
+    assert not outbox.add("email", "job-1:email:ready", {"email": "a@example.com"})
+
+    delivered = []
+    OutboxDispatcher(outbox, {"email": delivered.append}).dispatch_once()
+
+    assert delivered == [{"email": "a@example.com"}]
+    assert outbox.counts() == {DONE: 1}
+
+def test_failed_messages_are_retried_then_dead_lettered(outbox):
+    """Test a failing handler is retried until its attempts run out."""
+    outbox.add("job_status", "job-1:status:completed", {})
+    calls = []
+
+    def failing(payload):
+        calls.append(payload)
+        raise ConnectionError("database unavailable")
+
+    dispatcher = OutboxDispatcher(outbox, {"job_status": failing})
+    for _ in range(5):
+        dispatcher.dispatch_once()
+
+    assert len(calls) == 3
+    assert outbox.counts() == {DEAD: 1}
+
+def test_claimed_messages_are_hidden_from_other_dispatchers(outbox):
+    """Test two dispatchers never deliver the same message concurrently."""
+    outbox.add("upload", "job-1:upload", {})
+
+    assert len(outbox.claim()) == 1
+    assert outbox.claim() == []
+    assert outbox.counts() == {PENDING: 1}
+
+def test_dispatcher_thread_is_woken_by_notify(outbox):
+    """Test new messages are delivered without waiting for the poll interval."""
+    delivered = threading.Event()
+    dispatcher = OutboxDispatcher(outbox, {"email": lambda payload: delivered.set()}, poll_interval=60)
+    stop_event = threading.Event()
+    dispatcher.start(stop_event)
+
+    outbox.add("email", "job-1:email:ready", {})
+    dispatcher.notify()
+
+    assert delivered.wait(2)
+    stop_event.set()
+    dispatcher.notify()
@@ -0,0 +1,157 @@
+"""
+Unit tests for prompt token budgets.
+"""
+from leap.core import metrics
+from leap.prompts import CODE_GENERATION_PROMPTS, ERROR_CORRECTION_PROMPTS
+from leap.prompts.base import PromptTemplate
+from leap.prompts.budget import (
+    KEEP_HEAD,
+    KEEP_TAIL,
+    OUTLINE,
+    PromptComponent,
+    build_prompt,
+    count_tokens,
+    fit_components,
+    keep_head,
+    keep_tail,
+    outline,
+    static_prefix,
+)
+
+TEMPLATE = PromptTemplate(system="You fix Manim code.", user="Error: {error}\nCode:\n{code}\nNotes:\n{notes}")
+
+def _lines(prefix: str, count: int) -> str:
+    return "\n".join(f"{prefix} line {i} with some words in it" for i in range(count))
+
+def test_count_tokens():
+    """Test token counts grow with the text and are zero for empty text."""
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("from manim import *") < count_tokens(_lines("code", 10))
+
+def test_keep_head_and_tail():
+    """Test trimming keeps whole lines from the chosen end and says what was left out."""
+    text = _lines("x", 50)
+
+    head = keep_head(text, 60)
+    tail = keep_tail(text, 60)
+
+    assert head.startswith("x line 0 ")
+    assert "lines left out to fit the prompt budget" in head.splitlines()[-1]
+    assert tail.endswith("x line 49 with some words in it")
+    assert "lines left out" in tail.splitlines()[0]
+    assert count_tokens(head) < count_tokens(text)
+    assert keep_head("short", 60) == "short"
+
+def test_outline_keeps_steps():
+    """Test a plan is summarized by its headings and numbered steps."""
+    plan = "# Gravity\n1. Introduce gravity\nShow an apple falling slowly.\n2. Show orbits\nDraw the moon circling.\n"
+
+    summary = outline(plan, 100)
+
+    assert "1. Introduce gravity" in summary
+    assert "2. Show orbits" in summary
+    assert "apple" not in summary
+
+def test_fit_trims_lowest_priority_first():
+    """Test low-priority components shrink first and required ones are never touched."""
+    code = _lines("code", 40)
+    components = [
+        PromptComponent("code", code),
+        PromptComponent("error", _lines("trace", 40), trim=KEEP_TAIL, priority=1),
+        PromptComponent("notes", _lines("note", 40), trim=KEEP_HEAD, priority=0),
+    ]
+    sizes = {component.name: count_tokens(component.text) for component in components}
+    budget = sum(sizes.values()) - sizes["notes"] // 2
+
+    texts = fit_components(components, budget)
+
+    assert texts["code"] == code
+    assert texts["error"] == components[1].text
+    assert count_tokens(texts["notes"]) < sizes["notes"]
+    assert sum(count_tokens(text) for text in texts.values()) <= budget
+
+def test_fit_respects_min_tokens():
+    """Test a component is not shrunk below its minimum size."""
+    notes = _lines("note", 40)
+    components = [PromptComponent("notes", notes, trim=KEEP_HEAD, min_tokens=100)]
+
+    texts = fit_components(components, budget=10)
+
+    assert 80 <= count_tokens(texts["notes"]) <= 110
+
+def test_build_prompt_records_tokens_per_component():
+    """Test the prompt is formatted within budget and its size recorded per component."""
+    metrics.reset()
+    components = [
+        PromptComponent("error", _lines("trace", 30), trim=KEEP_TAIL, priority=1),
+        PromptComponent("code", "circle = Circle()"),
+        PromptComponent("notes", _lines("note", 60), trim=OUTLINE, priority=0),
+    ]
+
+    prompt = build_prompt("correct_code", TEMPLATE, components, budget=300)
+
+    assert prompt.trimmed == ["notes"]
+    assert prompt.total_tokens <= 300
+    assert set(prompt.tokens) == {"error", "code", "notes", "template", "prefix", "total"}
+    assert "circle = Circle()" in prompt.user
+    assert prompt.system == "You fix Manim code."
+    exposition = metrics.render()
+    assert 'leap_prompt_tokens_count{node="correct_code",component="notes"} 1' in exposition
+    assert 'leap_prompt_trims_total{node="correct_code",component="notes"} 1' in exposition
+
+def test_build_prompt_without_budget_keeps_everything():
+    """Test nodes without a budget only have their prompt measured."""
+    notes = _lines("note", 60)
+
+    prompt = build_prompt("unbudgeted", TEMPLATE, [
+        PromptComponent("error", "boom"),
+        PromptComponent("code", "pass"),
+        PromptComponent("notes", notes, trim=KEEP_HEAD),
+    ])
+
+    assert prompt.trimmed == []
+    assert notes in prompt.user
+
+def test_static_components_never_trimmed():
+    """Test static components are left whole even when they are marked trimmable."""
+    notes = _lines("note", 60)
+
+    texts = fit_components([PromptComponent("notes", notes, trim=KEEP_HEAD, static=True)], budget=10)
+
+    assert texts["notes"] == notes
+
+def _production_prompt(collection, static, request):
+    template = collection.get()
+    components = [PromptComponent(name, text, static=True) for name, text in static.items()]
+    components += [PromptComponent(name, text) for name, text in request.items()]
+    return template, components
+
+def test_production_prompts_share_a_static_prefix():
+    """Test production prompts start with the same text for different requests, static blocks included."""
+    cases = [
+        (CODE_GENERATION_PROMPTS, {"code_template": "class SCENE_NAME(ManimVoiceoverBase):"}, [
+            {"user_input": "gravity", "plan": "1. Fall", "user_level_instruction": "simple",
+             "duration_instruction": "short", "example_code": "# Excerpt from a.py"},
+            {"user_input": "primes", "plan": "1. Sieve", "user_level_instruction": "advanced",
+             "duration_instruction": "short", "example_code": "# Excerpt from b.py"},
+        ]),
+        (ERROR_CORRECTION_PROMPTS, {"manim_api_context": "ShowCreation was renamed to Create"}, [
+            {"plan": "1. Fall", "generated_code": "a = 1", "error": "NameError"},
+            {"plan": "1. Sieve", "generated_code": "b = 2", "error": "TypeError"},
+        ]),
+    ]
+    for collection, static, requests in cases:
+        prefixes = [static_prefix(*_production_prompt(collection, static, request)) for request in requests]
+
+        assert prefixes[0] == prefixes[1]
+        assert all(text in prefixes[0] for text in static.values())
+        assert not any(text in prefixes[0] for text in requests[0].values())
+
+def test_late_static_component_warns(caplog):
+    """Test a static component after a per-request value is reported as uncacheable."""
+    template = PromptTemplate(system="Fix it.", user="{error}\n{notes}")
+
+    prefix = static_prefix(template, [PromptComponent("error", "boom"), PromptComponent("notes", "API", static=True)])
+
+    assert prefix == "Fix it."
+    assert "notes follow per-request values" in caplog.text
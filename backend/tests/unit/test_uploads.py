@@ -0,0 +1,140 @@
+"""
+Unit tests for chunked, resumable uploads.
+"""
+import pytest
+from leap.services.storage_service import StorageService, content_addressed_path, file_content_hash
+from leap.services.upload_manifest import UploadManifest
+from leap.services.uploads import ChunkedUploader, LocalObjectStore, UploadError, get_upload_stats, reset_upload_stats
+
+DATA = bytes(range(256)) * 40
+
+class FlakyStore(LocalObjectStore):
+    """Local store whose chunk requests fail on chosen calls, after writing part of the chunk."""
+
+    def __init__(self, root, fail_on=(), partial=0):
+        super().__init__(root)
+        self.fail_on = set(fail_on)
+        self.partial = partial
+        self.calls = 0
+        self.chunk_sizes = []
+        self.offsets = []
+
+    def upload_chunk(self, upload_id, offset, data):
+        self.calls += 1
+        self.chunk_sizes.append(len(data))
+        self.offsets.append(offset)
+        if self.calls in self.fail_on:
+            # The connection drops after the store has received some of the bytes
+            super().upload_chunk(upload_id, offset, data[:self.partial])
+            raise ConnectionError("connection reset")
+        return super().upload_chunk(upload_id, offset, data)
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    """Start every test with empty upload metrics."""
+    reset_upload_stats()
+    yield
+    reset_upload_stats()
+
+@pytest.fixture
+def source(tmp_path):
+    """A rendered video to upload."""
+    path = tmp_path / "render.mp4"
+    path.write_bytes(DATA)
+    return path
+
+def test_upload_in_chunks(tmp_path, source):
+    """Test the file is sent in chunks of at most the configured size."""
+    store = FlakyStore(tmp_path / "bucket")
+    uploader = ChunkedUploader(store, chunk_size=4096, sleep=lambda _: None)
+
+    url = uploader.upload(source, "480p15/Demo.mp4", "video/mp4")
+
+    assert url.endswith("/480p15/Demo.mp4")
+    assert (tmp_path / "bucket" / "480p15" / "Demo.mp4").read_bytes() == DATA
+    assert store.chunk_sizes == [4096, 4096, len(DATA) - 8192]
+    stats = get_upload_stats()
+    assert stats["uploads"] == 1
+    assert stats["bytes"] == len(DATA)
+    assert stats["retries"] == 0
+
+def test_upload_resumes_from_store_offset(tmp_path, source):
+    """Test a failed chunk resumes from the bytes the store already has."""
+    store = FlakyStore(tmp_path / "bucket", fail_on={2}, partial=1000)
+    delays = []
+    uploader = ChunkedUploader(store, chunk_size=4096, retry_backoff=0.5, sleep=delays.append)
+
+    uploader.upload(source, "Demo.mp4")
+
+    assert (tmp_path / "bucket" / "Demo.mp4").read_bytes() == DATA
+    # The retry picks up after the 1000 bytes that got through
+    assert store.offsets == [0, 4096, 5096, 9192]
+    assert delays == [0.5]
+    assert get_upload_stats()["retries"] == 1
+
+def test_upload_gives_up_after_max_retries(tmp_path, source):
+    """Test consecutive failures back off exponentially and then abort."""
+    store = FlakyStore(tmp_path / "bucket", fail_on=range(1, 10))
+    delays = []
+    uploader = ChunkedUploader(store, chunk_size=4096, max_retries=3, retry_backoff=1, sleep=delays.append)
+
+    with pytest.raises(UploadError):
+        uploader.upload(source, "Demo.mp4")
+
+    assert delays == [1, 2, 4]
+    assert not (tmp_path / "bucket" / "Demo.mp4").exists()
+    stats = get_upload_stats()
+    assert stats["failures"] == 1
+    assert stats["uploads"] == 0
+
+@pytest.fixture
+def remote_storage(tmp_path):
+    """Storage service uploading to a local object store with a scratch manifest."""
+    storage = StorageService()
+    storage.use_supabase = True
+    storage.uploader = ChunkedUploader(FlakyStore(tmp_path / "bucket"), chunk_size=4096, sleep=lambda _: None)
+    storage.manifest = UploadManifest(tmp_path / "manifest.sqlite")
+    return storage
+
+def test_manifest_answers_existence_checks(tmp_path, remote_storage, monkeypatch):
+    """Test an uploaded file is found through the manifest without touching the store."""
+    render = tmp_path / "render" / "480p15" / "Demo.mp4"
+    render.parent.mkdir(parents=True)
+    render.write_bytes(DATA)
+
+    url = remote_storage.get_file_url(str(render))
+    monkeypatch.setattr(remote_storage.uploader.store, "object_exists", lambda key: pytest.fail("store was queried"))
+
+    assert remote_storage.get_file_url(str(render)) == url
+    assert get_upload_stats()["uploads"] == 1
+
+def test_existing_object_is_found_with_single_lookup(tmp_path, remote_storage):
+    """Test an object uploaded elsewhere is detected and added to the manifest instead of re-uploaded."""
+    render = tmp_path / "render" / "480p15" / "Demo.mp4"
+    render.parent.mkdir(parents=True)
+    render.write_bytes(DATA)
+    key = content_addressed_path(render, file_content_hash(render))
+    (tmp_path / "bucket" / "480p15").mkdir(parents=True)
+    (tmp_path / "bucket" / key).write_bytes(DATA)
+
+    url = remote_storage.get_file_url(str(render))
+
+    assert url.endswith(f"/{key}")
+    assert get_upload_stats()["uploads"] == 0
+    assert remote_storage.manifest.get(file_content_hash(render)).key == key
+
+def test_same_named_scenes_get_their_own_objects(tmp_path, remote_storage):
+    """Test a scene named like another job's scene is uploaded instead of reusing that job's video."""
+    first = tmp_path / "job1" / "480p15" / "MainScene.mp4"
+    second = tmp_path / "job2" / "480p15" / "MainScene.mp4"
+    for path, data in [(first, DATA), (second, DATA[::-1])]:
+        path.parent.mkdir(parents=True)
+        path.write_bytes(data)
+
+    first_url = remote_storage.get_file_url(str(first))
+    second_url = remote_storage.get_file_url(str(second))
+
+    assert first_url != second_url
+    assert get_upload_stats()["uploads"] == 2
+    assert (tmp_path / "bucket" / content_addressed_path(first, file_content_hash(first))).read_bytes() == DATA
+    assert remote_storage.manifest.get(file_content_hash(second)).url == second_url
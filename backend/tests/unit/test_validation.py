@@ -0,0 +1,181 @@
+"""
+Unit tests for the static code validator.
+"""
+import ast
+import re
+import time
+
+from leap.workflow.nodes.validation import (
+    ValidationRule,
+    collect_code_issues,
+    validate_code,
+)
+
+VALID_CODE = """from manim import *
+from leap.templates.base_scene import ManimVoiceoverBase
+
+class Demo(ManimVoiceoverBase):
+    def construct(self):
+        with self.voiceover(text="Hi") as tracker:
+            self.play(Write(MathTex(r"E = mc^2")), run_time=tracker.duration)
+"""
+
+def _scene(body: str) -> str:
+    return VALID_CODE + "".join(f"            {line}\n" for line in body.strip().splitlines())
+
+def _best_of(code: str, runs: int = 3) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        assert collect_code_issues(code) == []
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def test_valid_code_has_no_issues():
+    """Test code following every rule passes, LaTeX escapes included."""
+    assert collect_code_issues(VALID_CODE + '        label = MathTex("\\pi r^2")\n') == []
+
+def test_issues_report_their_line():
+    """Test issues found on a node carry that node's line number."""
+    code = _scene("""
+self.play(ShowCreation(Circle()))
+self.clear()
+""")
+
+    issues = {issue.message: issue for issue in collect_code_issues(code)}
+
+    assert issues["ShowCreation is deprecated. Use Create() instead."].line_number == 8
+    assert issues["ShowCreation is deprecated. Use Create() instead."].severity == "warning"
+    assert issues["self.clear() removes the background. Use self.fade_out_scene() instead."].line_number == 9
+
+def test_missing_structure_reported_without_line():
+    """Test missing imports, construct and voiceover blocks are reported for the whole file."""
+    issues = collect_code_issues("class Demo(Scene):\n    def setup(self):\n        pass\n")
+
+    messages = [issue.message for issue in issues]
+    assert messages == [
+        "Code must import all Manim classes",
+        "Code must import ManimVoiceoverBase",
+        "Scene class must have a construct method",
+        "Code must use voiceover blocks for animations",
+    ]
+    assert all(issue.line_number is None for issue in issues)
+
+def test_strings_and_comments_are_not_code():
+    """Test names mentioned only in strings or comments do not trigger rules."""
+    code = _scene("""
+# ShowCreation was renamed, self.clear() removes the background
+self.play(Write(Text("ShowCreation and Tex( are old")))
+""")
+
+    assert collect_code_issues(code) == []
+
+def test_syntax_error_reported_first():
+    """Test code that does not parse yields a single syntax error with its line."""
+    issues = collect_code_issues(VALID_CODE + "        self.play(\n")
+
+    assert len(issues) == 1
+    assert issues[0].message.startswith("Syntax error")
+    assert issues[0].line_number == 8
+
+def test_tex_only_flagged_without_mathtex():
+    """Test Tex calls are flagged at their lines unless MathTex is used too."""
+    code = VALID_CODE.replace("MathTex", "Tex")
+
+    issues = collect_code_issues(code)
+
+    assert [(issue.message, issue.line_number) for issue in issues] == [
+        ("Using Tex instead of MathTex for mathematical expressions", 7)
+    ]
+
+def test_background_reported_once():
+    """Test background creation is reported once, at its first occurrence."""
+    code = _scene("""
+bg = Rectangle(width=config.frame_width, height=config.frame_height)
+self.camera.background_color = BLUE
+image = ImageMobject("assets/background.png")
+""")
+
+    issues = collect_code_issues(code)
+
+    assert len(issues) == 1
+    assert issues[0].message == "Code creates a background element which will conflict with the base scene background"
+    assert issues[0].line_number == 8
+
+def test_background_image_assignment():
+    """Test an image assigned to a background name is flagged."""
+    code = _scene('self.background = ImageMobject("sky.png")')
+
+    assert [issue.line_number for issue in collect_code_issues(code)] == [8]
+
+def test_custom_rules():
+    """Test the validator runs only the rules it is given."""
+    class NoPrintRule(ValidationRule):
+        name = "no_print"
+        node_types = ()
+
+    class PrintRule(ValidationRule):
+        name = "print"
+        node_types = (ast.Call,)
+
+        def visit(self, node):
+            if getattr(node.func, "id", None) == "print":
+                self.report(node, "Do not print", "Remove the print call")
+
+    issues = collect_code_issues("print('hi')\n", rules=[NoPrintRule, PrintRule])
+
+    assert [(issue.message, issue.line_number) for issue in issues] == [("Do not print", 1)]
+
+def test_validate_code_includes_line_numbers():
+    """Test the node's error message points at the offending line."""
+    state = {
+        "user_input": "How does gravity work?",
+        "plan": "1. Show gravity",
+        "generated_code": _scene("self.clear()"),
+        "correction_attempts": 0,
+    }
+
+    result = validate_code(state)
+
+    assert "(Line 8)" in result["error"]
+
+def test_large_generated_file_validates_in_linear_time():
+    """Microbenchmark: validation time grows linearly with the size of the file."""
+    long_line = 'image = ImageMobject("' + "a" * 2000 + '")'
+
+    def generate(blocks: int) -> str:
+        body = "\n".join(
+            f'with self.voiceover(text="Step {i}") as tracker:\n'
+            f'    circle_{i} = Circle(radius={i % 5 + 1})\n'
+            f'    self.play(Create(circle_{i}), run_time=tracker.duration)\n'
+            f'    {long_line}'
+            for i in range(blocks)
+        )
+        return VALID_CODE + "".join(f"        {line}\n" for line in body.splitlines())
+
+    small = generate(1000)
+    large = generate(4000)
+    assert large.count("\n") > 16000
+
+    small_time = _best_of(small)
+    large_time = _best_of(large)
+    print(f"validator: {small_time:.3f}s for 4k lines, {large_time:.3f}s for 16k lines")
+
+    assert large_time < 5
+    # 4x the code should take about 4x the time; allow for allocator and GC noise
+    assert large_time < small_time * 10
+
+def test_long_line_does_not_backtrack():
+    """Microbenchmark: a long line that made the old background regex backtrack validates quickly."""
+    line = "image = ImageMobject(" + ", ".join(["f(x)"] * 3000) + ")"
+    code = _scene(line)
+
+    old_pattern = re.compile(r'ImageMobject\s*\(\s*.*\s*\)\s*.*\s*background')
+    started = time.perf_counter()
+    assert not old_pattern.search(code)
+    old_time = time.perf_counter() - started
+
+    new_time = _best_of(code)
+    print(f"validator: {new_time:.4f}s, old regex: {old_time:.4f}s")
+
+    assert new_time < old_time
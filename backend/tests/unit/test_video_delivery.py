@@ -0,0 +1,121 @@
+"""
+Unit tests for video delivery.
+"""
+import hashlib
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from leap.api.routes import videos
+
+VIDEO_BYTES = bytes(range(256)) * 64
+DIGEST = hashlib.sha256(VIDEO_BYTES).hexdigest()
+
+@pytest.fixture
+def client(tmp_path):
+    """Client for the video routes serving a scratch videos directory."""
+    (tmp_path / "480p15").mkdir()
+    (tmp_path / "480p15" / "Demo.mp4").write_bytes(VIDEO_BYTES)
+    (tmp_path.parent / "secret.txt").write_text("secret")
+
+    app = FastAPI()
+    app.include_router(videos.router, prefix="/videos")
+    with patch.object(videos, "VIDEOS_DIR", tmp_path):
+        yield TestClient(app)
+
+def test_full_response_has_strong_etag(client):
+    """Test the whole video is served with a content-derived ETag."""
+    response = client.get("/videos/480p15/Demo.mp4")
+
+    assert response.status_code == 200
+    assert response.content == VIDEO_BYTES
+    assert response.headers["etag"] == f'"{DIGEST}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "video/mp4"
+    assert "immutable" not in response.headers["cache-control"]
+
+def test_range_request(client):
+    """Test seeking only transfers the requested bytes."""
+    response = client.get("/videos/480p15/Demo.mp4", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == VIDEO_BYTES[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(VIDEO_BYTES)}"
+
+def test_if_none_match_returns_not_modified(client):
+    """Test a client with the current copy gets a 304 without a body."""
+    response = client.get("/videos/480p15/Demo.mp4", headers={"If-None-Match": f'"{DIGEST}"'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+def test_versioned_url_is_immutable(client):
+    """Test URLs carrying the content version are cacheable forever."""
+    current = client.get(f"/videos/480p15/Demo.mp4?v={DIGEST[:16]}")
+    stale = client.get("/videos/480p15/Demo.mp4?v=0000000000000000")
+
+    assert current.headers["cache-control"] == videos.IMMUTABLE_CACHE_CONTROL
+    assert stale.headers["cache-control"] == videos.REVALIDATE_CACHE_CONTROL
+
+def test_whole_file_is_handed_to_servers_supporting_pathsend(tmp_path):
+    """Test a server advertising pathsend sends the file itself, with the video headers."""
+    import asyncio
+
+    path = tmp_path / "Demo.mp4"
+    path.write_bytes(VIDEO_BYTES)
+    response = videos.VideoFileResponse(path, media_type="video/mp4", headers={"ETag": f'"{DIGEST}"'})
+    scope = {"type": "http", "method": "GET", "headers": [], "extensions": {"http.response.pathsend": {}}}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(response(scope, None, send))
+
+    assert messages[1] == {"type": "http.response.pathsend", "path": str(path)}
+    headers = dict(messages[0]["headers"])
+    assert headers[b"etag"] == f'"{DIGEST}"'.encode()
+    assert headers[b"content-length"] == str(len(VIDEO_BYTES)).encode()
+
+def test_paths_outside_videos_directory_are_rejected(client):
+    """Test path traversal cannot reach files outside the videos directory."""
+    assert client.get("/videos/..%2Fsecret.txt").status_code == 404
+    assert client.get("/videos/480p15/Missing.mp4").status_code == 404
+
+def test_local_storage_urls_are_versioned(tmp_path):
+    """Test local storage URLs carry the content version."""
+    from leap.services.storage_service import StorageService
+
+    source = tmp_path / "render" / "480p15" / "Demo.mp4"
+    source.parent.mkdir(parents=True)
+    source.write_bytes(VIDEO_BYTES)
+    storage = StorageService()
+    storage.use_supabase = False
+    storage.local_storage_path = str(tmp_path / "videos")
+
+    url = storage.get_file_url(str(source))
+
+    assert url.endswith(f"/videos/480p15/Demo.mp4?v={DIGEST[:16]}")
+
+def test_local_storage_keeps_videos_of_same_named_scenes_apart(tmp_path):
+    """Test a scene named like another job's scene does not get that job's video."""
+    from leap.services.storage_service import StorageService
+
+    storage = StorageService()
+    storage.use_supabase = False
+    storage.local_storage_path = str(tmp_path / "videos")
+    first = tmp_path / "job1" / "480p15" / "MainScene.mp4"
+    second = tmp_path / "job2" / "480p15" / "MainScene.mp4"
+    for path, data in [(first, VIDEO_BYTES), (second, VIDEO_BYTES[::-1])]:
+        path.parent.mkdir(parents=True)
+        path.write_bytes(data)
+
+    first_url = storage.get_local_url(str(first))
+    second_url = storage.get_local_url(str(second))
+
+    assert first_url.split("?")[0].endswith("/videos/480p15/MainScene.mp4")
+    assert second_url != first_url
+    assert storage.get_local_url(str(second)) == second_url
+    assert storage.get_local_url(str(first)) == first_url
+    stored = tmp_path / "videos" / second_url.split("/videos/")[1].split("?")[0]
+    assert stored.read_bytes() == VIDEO_BYTES[::-1]
@@ -89,16 +89,46 @@ def test_log_state_transition(caplog):
     
     result = log_state_transition("test_node", input_state, output_state)
     
-    # Verify log contents
+    # Verify log contents: only what changed, long values summarized
     assert "Node: test_node" in caplog.text
-    assert "Input State:" in caplog.text
-    assert "Changes:" in caplog.text
     assert "quality: low -> high" in caplog.text
+    assert "generated_code: def test(): pass -> def test(): return True" in caplog.text
     assert "+ new_field: added" in caplog.text
+    assert "user_input" not in caplog.text
+    assert caplog.records[0].node == "test_node"
+    assert caplog.records[0].changes["quality"] == ("low", "high")
     
     # Verify return value
     assert result == output_state
 
+def test_log_state_transition_summarizes_large_values(caplog):
+    """Test large state values are logged as their length and hash."""
+    caplog.set_level(logging.INFO)
+    stdout = "Rendering frame\n" * 1000
+    
+    log_state_transition(
+        "execute_code",
+        {"execution_result": None},
+        {"execution_result": {"success": True, "output": stdout}, "prompts": {"system": "x" * 5000}}
+    )
+    
+    assert stdout not in caplog.text
+    assert f"<{len(stdout)} chars sha1:" in caplog.text
+    assert caplog.records[0].added["prompts"]["system"].startswith("<5000 chars sha1:")
+    assert len(caplog.text) < 1000
+
+def test_log_state_transition_level_and_sampling(caplog, monkeypatch):
+    """Test transitions below the configured level or outside the sample are not formatted."""
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr("leap.workflow.utils.STATE_LOG_LEVEL", "DEBUG")
+    log_state_transition("plan_scenes", {}, {"plan": "1. Intro"})
+    
+    monkeypatch.setattr("leap.workflow.utils.STATE_LOG_LEVEL", "INFO")
+    monkeypatch.setattr("leap.workflow.utils.STATE_LOG_SAMPLE_RATE", 0.0)
+    log_state_transition("plan_scenes", {}, {"plan": "1. Intro"})
+    
+    assert caplog.records == []
+
 def test_get_manim_api_context():
     """Test getting Manim API context."""
     context = get_manim_api_context()
@@ -28,6 +28,11 @@ export async function generateAnimation(prompt: string, level: string, email?: s
     if (!response.ok) {
         const errorData = await response.json().catch(() => ({}));
         console.error("API error:", errorData);
+        if (response.status === 429) {
+            const retryAfter = Number(response.headers.get('Retry-After'));
+            const minutes = Math.max(1, Math.ceil(retryAfter / 60));
+            throw new Error(`${errorData.detail || 'Too many requests'}. Please try again in about ${minutes} minute${minutes === 1 ? '' : 's'}.`);
+        }
         throw new Error(errorData.detail || 'Failed to generate animation');
     }
 
@@ -53,6 +58,88 @@ export async function getAnimationStatus(jobId: string) {
     return response.json();
 }
 
+/**
+ * Cancel an animation job
+ */
+export async function cancelAnimation(jobId: string) {
+    const response = await fetch(`${API_BASE_URL}/api/animations/${jobId}`, { method: 'DELETE' });
+
+    // 409 means the job had already finished; the body is its final status
+    if (!response.ok && response.status !== 409) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || 'Failed to cancel animation');
+    }
+
+    return response.json();
+}
+
+/**
+ * Subscribe to live progress for an animation job
+ *
+ * Uses server-sent events and falls back to polling the status endpoint when
+ * the event stream is unavailable. Returns a function that ends the subscription.
+ * With `cancelOnDisconnect` the server cancels the job if the page goes away
+ * and does not reconnect.
+ */
+export function subscribeToAnimationEvents(
+    jobId: string,
+    onStatus: (status: any) => void,
+    onEvent?: (type: string, data: any) => void,
+    options: { cancelOnDisconnect?: boolean } = {},
+) {
+    let closed = false;
+    let source: EventSource | null = null;
+    let pollInterval: ReturnType<typeof setInterval> | null = null;
+
+    const startPolling = () => {
+        if (closed || pollInterval) return;
+        console.log("Falling back to status polling for job:", jobId);
+
+        const checkStatus = async () => {
+            try {
+                onStatus(await getAnimationStatus(jobId));
+            } catch (error) {
+                console.error('Error checking status:', error);
+            }
+        };
+
+        // Check immediately and then every 5 seconds
+        checkStatus();
+        pollInterval = setInterval(checkStatus, 5000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+        startPolling();
+    } else {
+        const query = options.cancelOnDisconnect ? '?cancel_on_disconnect=true' : '';
+        source = new EventSource(`${API_BASE_URL}/api/animations/events/${jobId}${query}`);
+
+        source.addEventListener('status', (event) => {
+            onStatus(JSON.parse((event as MessageEvent).data));
+        });
+        for (const type of ['node', 'render']) {
+            source.addEventListener(type, (event) => {
+                onEvent?.(type, JSON.parse((event as MessageEvent).data));
+            });
+        }
+
+        source.onerror = () => {
+            // The browser reconnects on its own unless the stream is unavailable
+            if (source && source.readyState === EventSource.CLOSED) {
+                source.close();
+                source = null;
+                startPolling();
+            }
+        };
+    }
+
+    return () => {
+        closed = true;
+        source?.close();
+        if (pollInterval) clearInterval(pollInterval);
+    };
+}
+
 /**
  * Submit feedback for an animation
  */
@@ -89,10 +176,9 @@ export async function downloadVideo(jobId: string) {
             throw new Error(errorData.detail || 'Failed to download video');
         }
 
-        const data = await response.json();
-
         // If we have a direct download URL (Supabase), open it in a new tab
-        if (data.download_url) {
+        if (response.headers.get('content-type')?.includes('application/json')) {
+            const data = await response.json();
             window.open(data.download_url, '_blank');
             return { success: true };
         }
@@ -4,7 +4,34 @@ import PromptInput from '@/components/PromptInput';
 import LoadingAnimation from '@/components/LoadingAnimation';
 import VideoOutput from '@/components/VideoOutput';
 import { useToast } from "@/hooks/use-toast";
-import { generateAnimation, getAnimationStatus } from '@/api/client';
+import { generateAnimation, subscribeToAnimationEvents } from '@/api/client';
+
+const STAGE_LABELS: Record<string, string> = {
+  validate_input: "Checking your question",
+  plan_scenes: "Planning the scenes",
+  generate_code: "Writing the animation",
+  validate_code: "Checking the animation",
+  auto_fix: "Fixing the animation",
+  correct_code: "Fixing the animation",
+  execute_code: "Rendering the video",
+};
+
+// Turn the job progress reported by the API into a short status line
+const describeProgress = (progress: any): string | undefined => {
+  if (!progress || !progress.stage) return undefined;
+  let message = STAGE_LABELS[progress.stage] || "Working on it";
+  if (progress.stage === 'execute_code' && progress.animation != null) {
+    const total = progress.animations_total ? ` of ${progress.animations_total}` : '';
+    message += ` (animation ${progress.animation + 1}${total}, ${progress.render_percent ?? 0}%)`;
+  }
+  if (progress.attempt > 0) {
+    message += ` - attempt ${progress.attempt + 1} of ${progress.max_attempts}`;
+  }
+  if (progress.eta_seconds != null) {
+    message += ` - about ${Math.max(1, Math.round(progress.eta_seconds / 60))} min left`;
+  }
+  return message + "...";
+};
 
 const Index = () => {
   const [isLoading, setIsLoading] = useState(false);
@@ -14,17 +41,17 @@ const Index = () => {
   const [email, setEmail] = useState('');
   const [jobId, setJobId] = useState<string | null>(null);
   const [jobFailed, setJobFailed] = useState(false);
+  const [progressMessage, setProgressMessage] = useState<string | undefined>(undefined);
   const { toast } = useToast();
 
-  // Poll for job status when we have a jobId
+  // Follow job progress when we have a jobId
   useEffect(() => {
     if (!jobId || videoUrl || jobFailed) return;
 
-    const checkStatus = async () => {
+    const handleStatus = (status: any) => {
       try {
-        console.log("Checking status for job:", jobId);
-        const status = await getAnimationStatus(jobId);
         console.log("Received status:", status);
+        setProgressMessage(describeProgress(status.progress));
 
         if (status.status === 'completed' && status.video_url) {
           setVideoUrl(status.video_url);
@@ -34,6 +61,9 @@ const Index = () => {
             title: "Explanation Video Generated",
             description: email ? `We've also sent a notification to ${email}.` : undefined,
           });
+        } else if (status.status === 'cancelled') {
+          setIsLoading(false);
+          setJobFailed(true);
         } else if (status.status === 'failed') {
           setIsLoading(false);
           setJobFailed(true); // Mark job as failed to stop polling
@@ -69,15 +99,15 @@ const Index = () => {
           });
         }
       } catch (error) {
-        console.error('Error checking status:', error);
+        console.error('Error handling status:', error);
       }
     };
 
-    // Check immediately and then every 5 seconds
-    checkStatus();
-    const interval = setInterval(checkStatus, 5000);
-
-    return () => clearInterval(interval);
+    // Status updates are pushed over server-sent events, with polling as a fallback
+    // Without an email nobody is waiting for the video once the page is gone
+    return subscribeToAnimationEvents(jobId, handleStatus, (_type, data) => {
+      if (data.progress) setProgressMessage(describeProgress(data.progress));
+    }, { cancelOnDisconnect: !email });
   }, [jobId, videoUrl, email, toast, jobFailed]);
 
   const validateEmail = (email: string): boolean => {
@@ -128,6 +158,7 @@ const Index = () => {
       // Call the real API
       const response = await generateAnimation(promptText, difficulty, userEmail);
       console.log("Received response:", response);
+      setProgressMessage(undefined);
       setJobId(response.job_id);
 
       toast({
@@ -153,7 +184,7 @@ const Index = () => {
         <PromptInput onSubmit={generateVideo} isLoading={isLoading} />
 
         {isLoading ? (
-          <LoadingAnimation />
+          <LoadingAnimation message={progressMessage} />
         ) : (
           videoUrl && <VideoOutput videoUrl={videoUrl} prompt={prompt} difficulty={difficultyLevel} jobId={jobId || ''} />
         )}